@@ -0,0 +1 @@
+# Exo Protocol SRE Runtime Benchmarks
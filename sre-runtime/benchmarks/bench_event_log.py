@@ -0,0 +1,70 @@
+"""
+事件日志基准测试
+
+用 fixtures/anchor_logs.json 中的交易构造一天的事件流 (默认 216,000 slot，每 slot 一个事件)，
+测量写入吞吐、全量回放 (解码为 ChainEvent) 与按 slot 区间 (1 小时) 回放的耗时。
+
+Usage:
+    python benchmarks/bench_event_log.py [--events 216000] [--segment-mb 64]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from listener.chain_listener import LogParser
+from listener.event_log import EventLogReader, EventLogWriter
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "anchor_logs.json")
+
+SLOTS_PER_HOUR = 9_000  # 400ms / slot
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the chain event log")
+    parser.add_argument("--events", type=int, default=216_000, help="Events to write (one per slot)")
+    parser.add_argument("--segment-mb", type=int, default=64, help="Segment size in MiB")
+    args = parser.parse_args()
+
+    with open(FIXTURE, encoding="utf-8") as f:
+        transactions = json.load(f)
+    templates = [LogParser.parse(tx["signature"], tx["logs"], tx["slot"]) for tx in transactions]
+    templates = [event for event in templates if event is not None]
+
+    with tempfile.TemporaryDirectory() as directory:
+        writer = EventLogWriter(directory, segment_bytes=args.segment_mb * 1024 * 1024)
+        start = time.perf_counter()
+        for slot in range(args.events):
+            event = templates[slot % len(templates)]
+            event.slot = slot
+            writer.append_event(event)
+        writer.close()
+        write_s = time.perf_counter() - start
+
+        size = sum(os.path.getsize(os.path.join(directory, f)) for f in os.listdir(directory))
+        reader = EventLogReader(directory)
+        segments = len(reader.segments())
+
+        start = time.perf_counter()
+        replayed = sum(1 for _ in reader.events())
+        replay_s = time.perf_counter() - start
+
+        middle = args.events // 2
+        start = time.perf_counter()
+        ranged = sum(1 for _ in reader.events(middle, middle + SLOTS_PER_HOUR - 1))
+        range_s = time.perf_counter() - start
+
+    print(f"events: {args.events:,}  segments: {segments}  size: {size / 1024 / 1024:.1f} MiB")
+    print(f"{'operation':<16} {'seconds':>8} {'events/sec':>12}")
+    print(f"{'write':<16} {write_s:>8.2f} {args.events / write_s:>12,.0f}")
+    print(f"{'replay (all)':<16} {replay_s:>8.2f} {replayed / replay_s:>12,.0f}")
+    print(f"{'replay (1 hour)':<16} {range_s:>8.3f} {ranged / range_s:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+事件内存占用基准测试
+
+用合成交易 (listener.load.synthetic_transactions) 经 LogParser 解析出 N 个事件并全部驻留内存，
+用 tracemalloc 统计每个事件的堆占用 (bytes/event):
+
+    legacy   普通 dataclass (含 __dict__) + 完整 raw_logs (旧实现)
+    keep     slots dataclass + 完整 raw_logs
+    lazy     slots dataclass + 压缩保存的 raw_logs
+    drop     slots dataclass，不保留 raw_logs
+
+并对比 CommitResult / OrderResult / ChallengeResult 在 slots 前后的单实例大小。
+
+Usage:
+    python benchmarks/bench_event_memory.py [--events 20000]
+"""
+
+import argparse
+import dataclasses
+import gc
+import os
+import sys
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from committer.committer import CommitResult
+from listener.chain_listener import RAW_LOGS_POLICIES, EventType, LogParser, retain_logs
+from listener.load import synthetic_transactions
+from orchestrator.orchestrator import OrderResult
+from verifier.challenger import ChallengeResult, ChallengeStatus
+
+
+@dataclasses.dataclass
+class LegacyChainEvent:
+    """旧实现: 普通 dataclass"""
+    event_type: EventType
+    signature: str
+    slot: int
+    timestamp: datetime
+    program_id: str
+    data: Dict[str, Any] = dataclasses.field(default_factory=dict)
+    raw_logs: List[str] = dataclasses.field(default_factory=list)
+    commitment: str = "confirmed"
+
+
+def legacy(event):
+    return LegacyChainEvent(
+        event.event_type, event.signature, event.slot, event.timestamp,
+        # 旧实现不共享 Program ID 字符串
+        "".join(event.program_id), event.data, event.raw_logs, event.commitment,
+    )
+
+
+def measure(convert: Callable[[Any], Any], count: int) -> float:
+    """bytes/event"""
+    transactions = synthetic_transactions(seed=1)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    events = []
+    while len(events) < count:
+        tx = next(transactions)
+        event = LogParser.parse(tx.signature, tx.logs, tx.slot)
+        if event is not None:
+            events.append(convert(event))
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used / len(events)
+
+
+def instance_size(obj: Any) -> int:
+    """实例本身 (不含字段值) 的字节数"""
+    size = sys.getsizeof(obj)
+    if hasattr(obj, "__dict__"):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+
+def unslotted(cls):
+    """同字段的普通 dataclass (对照)"""
+    fields = [(f.name, f.type, f) for f in dataclasses.fields(cls)]
+    return dataclasses.make_dataclass(f"Legacy{cls.__name__}", fields)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure ChainEvent memory footprint")
+    parser.add_argument("--events", type=int, default=20_000)
+    args = parser.parse_args()
+
+    print(f"{'ChainEvent':<10} {'bytes/event':>12}")
+    baseline = measure(legacy, args.events)
+    print(f"{'legacy':<10} {baseline:>12,.0f}")
+    for policy in RAW_LOGS_POLICIES:
+        def convert(event, policy=policy):
+            event.raw_logs = retain_logs(event.raw_logs, policy)
+            return event
+        per_event = measure(convert, args.events)
+        print(f"{policy:<10} {per_event:>12,.0f}  ({per_event / baseline:.0%})")
+
+    samples = {
+        CommitResult: dict(order_id="o", result_uri="da://x", result_hash="h", execution_time_ms=1, status="success"),
+        OrderResult: dict(order_id="o", status="completed", commit_result=None, verification=None, execution_time_ms=1),
+        ChallengeResult: dict(order_pubkey="p", status=ChallengeStatus.PENDING),
+    }
+    print(f"\n{'record':<16} {'dict':>6} {'slots':>6}")
+    for cls, values in samples.items():
+        before = instance_size(unslotted(cls)(**values))
+        after = instance_size(cls(**values))
+        print(f"{cls.__name__:<16} {before:>6} {after:>6}")
+
+
+if __name__ == "__main__":
+    main()
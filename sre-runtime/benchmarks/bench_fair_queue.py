@@ -0,0 +1,75 @@
+"""
+公平队列基准测试
+
+一个重负载 Agent 一次提交大量订单 (同一 Skill)，若干小 Agent 按固定间隔各自下单；
+订单执行以 sleep 模拟。对比 FIFO (信号量) 与 FairQueue 下小 Agent 订单的排队 + 执行延迟
+(p50 / p99)，以及无重负载 Agent 时的基线。
+
+Usage:
+    python benchmarks/bench_fair_queue.py [--heavy 2000] [--small-agents 10] [--small-orders 20]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from concurrency import FairQueue
+from metrics import Histogram
+
+
+async def _scenario(args: argparse.Namespace, mode: str, heavy: int) -> Histogram:
+    latency = Histogram()
+    service = args.service_ms / 1000
+    if mode == "fifo":
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def execute(agent_id: str) -> None:
+            async with semaphore:
+                await asyncio.sleep(service)
+    else:
+        queue = FairQueue(max_concurrent=args.concurrency)
+
+        async def execute(agent_id: str) -> None:
+            await queue.run(lambda: asyncio.sleep(service), agent_id=agent_id, skill_id="skill")
+
+    async def small_agent(index: int) -> None:
+        for _ in range(args.small_orders):
+            start = time.perf_counter()
+            await execute(f"small-{index}")
+            latency.add((time.perf_counter() - start) * 1000)
+            await asyncio.sleep(args.interval_ms / 1000)
+
+    heavy_orders = [asyncio.ensure_future(execute("heavy")) for _ in range(heavy)]
+    await asyncio.gather(*(small_agent(i) for i in range(args.small_agents)))
+    for task in heavy_orders:
+        task.cancel()
+    await asyncio.gather(*heavy_orders, return_exceptions=True)
+    return latency
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark weighted fair queuing of orders")
+    parser.add_argument("--heavy", type=int, default=2000, help="Orders submitted by the heavy agent")
+    parser.add_argument("--small-agents", type=int, default=10, help="Number of small agents")
+    parser.add_argument("--small-orders", type=int, default=20, help="Orders per small agent")
+    parser.add_argument("--interval-ms", type=float, default=5.0, help="Pause between a small agent's orders")
+    parser.add_argument("--service-ms", type=float, default=2.0, help="Simulated execution time")
+    parser.add_argument("--concurrency", type=int, default=8, help="Orders running at the same time")
+    args = parser.parse_args()
+
+    print(f"{'scenario':<20} {'p50 ms':>10} {'p99 ms':>10}")
+    for label, mode, heavy in (
+        ("baseline", "fair", 0),
+        ("fifo + heavy", "fifo", args.heavy),
+        ("fair + heavy", "fair", args.heavy),
+    ):
+        latency = asyncio.run(_scenario(args, mode, heavy))
+        print(f"{label:<20} {latency.quantile(0.5):>10.1f} {latency.quantile(0.99):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
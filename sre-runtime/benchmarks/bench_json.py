@@ -0,0 +1,108 @@
+"""
+JSON 编解码基准测试
+
+按运行时中的实际调用点构造负载，分别在 stdlib 与原生后端 (orjson, 已安装时) 下
+测量 codec 门面的单次耗时 (us/op) 与加速比:
+
+    ws_decode        WebSocket logsNotification 解析 (chain_listener._handle_message)
+    ws_encode        logsSubscribe 订阅请求
+    event_compact    ChainEvent.to_compact_json (事件日志记录)
+    event_decode     事件日志 payload 解析 (event_log.decode_event)
+    spill            订阅者溢出记录编码 + 解码 (dispatch)
+    checkpoint       回填检查点编码 + 解码 (backfill)
+    ai_prompt        AI Provider 用户输入编码 (providers.deepseek)
+
+规范化路径 (结果哈希 / 输入哈希 / DA 存储) 始终使用 stdlib 以保证字节一致，
+仅作为参照列出，不随后端变化。
+
+Usage:
+    python benchmarks/bench_json.py [--iterations 20000]
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Callable, Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import codec
+from committer.committer import compute_result_hash
+from executor.sandbox import serialize_input
+from listener.chain_listener import LogParser
+from listener.load import synthetic_transactions
+
+
+def build_cases() -> Dict[str, Callable[[], object]]:
+    """调用点名称 → 单次操作"""
+    tx = next(tx for tx in synthetic_transactions(seed=1) if LogParser.parse(tx.signature, tx.logs, tx.slot))
+    event = LogParser.parse(tx.signature, tx.logs, tx.slot)
+    notification = codec.exact_dumps({
+        "jsonrpc": "2.0",
+        "method": "logsNotification",
+        "params": {
+            "subscription": 42,
+            "result": {
+                "context": {"slot": tx.slot},
+                "value": {"signature": tx.signature, "err": None, "logs": list(tx.logs)},
+            },
+        },
+    }).decode("utf-8")
+    subscribe = {
+        "jsonrpc": "2.0", "id": 1, "method": "logsSubscribe",
+        "params": [{"mentions": [event.program_id]}, {"commitment": "confirmed"}],
+    }
+    payload = event.to_compact_json(include_logs=True).encode("utf-8")
+    spill = {"enqueued_at": time.perf_counter(), "event": event.to_dict(), "raw_logs": list(event.raw_logs)}
+    checkpoint = {"slot": tx.slot, "signatures": [f"sig-{i:064d}" for i in range(256)]}
+    user_input = {"text": "总结以下内容 " * 40, "options": {"language": "zh", "max_points": 5}}
+    result = {"summary": "结果" * 50, "points": list(range(20)), "score": 0.97}
+
+    return {
+        "ws_decode": lambda: codec.loads(notification),
+        "ws_encode": lambda: codec.dumps(subscribe),
+        "event_compact": lambda: event.to_compact_json(include_logs=True),
+        "event_decode": lambda: codec.loads(payload),
+        "spill": lambda: codec.loads(codec.dumps(spill)),
+        "checkpoint": lambda: codec.loads(codec.dumpb(checkpoint)),
+        "ai_prompt": lambda: codec.dumps(user_input),
+        "result_hash*": lambda: compute_result_hash(result),
+        "input_hash*": lambda: serialize_input(user_input),
+    }
+
+
+def measure(op: Callable[[], object], iterations: int) -> float:
+    """us/op"""
+    op()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        op()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark JSON codec call sites")
+    parser.add_argument("--iterations", type=int, default=20_000)
+    args = parser.parse_args()
+
+    backends = codec.available_backends()[::-1]
+    cases = build_cases()
+    results = {}
+    for backend in backends:
+        codec.set_backend(backend)
+        results[backend] = {name: measure(op, args.iterations) for name, op in cases.items()}
+    codec.reset_backend()
+
+    header = f"{'call site':<16}" + "".join(f"{b + ' us/op':>16}" for b in backends)
+    print(header + (f"{'speedup':>10}" if len(backends) > 1 else ""))
+    for name in cases:
+        row = f"{name:<16}" + "".join(f"{results[b][name]:>16.2f}" for b in backends)
+        if len(backends) > 1:
+            row += f"{results[backends[0]][name] / results[backends[-1]][name]:>9.1f}x"
+        print(row)
+    print("\n* 规范化路径，始终使用 stdlib")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+LogParser 基准测试
+
+在 fixtures/anchor_logs.json 上对比逐关键字扫描 (旧实现) 与预编译匹配器的吞吐量 (lines/sec)。
+夹具按 exo-core / exo-hooks 程序的 msg! 输出格式构造，混有 ComputeBudget、Token-2022、
+第三方程序等无关日志行。
+
+Usage:
+    python benchmarks/bench_log_parser.py [--repeat 2000]
+"""
+
+import argparse
+import base64
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from listener.chain_listener import EventType, LogParser
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "anchor_logs.json")
+
+
+def legacy_parse(logs: List[str]) -> Dict[str, Any]:
+    """旧实现: 每行遍历全部 EVENT_KEYWORDS 并做多次子串扫描"""
+    event_type = EventType.UNKNOWN
+    program_id = ""
+    data: Dict[str, Any] = {}
+    for log in logs:
+        if "Program " in log and " invoke" in log:
+            parts = log.split()
+            if len(parts) >= 2:
+                program_id = parts[1]
+        for keyword, etype in LogParser.EVENT_KEYWORDS.items():
+            if keyword in log:
+                event_type = etype
+                break
+        if "Program data:" in log:
+            try:
+                data["raw_data"] = base64.b64decode(log.split("Program data:")[1].strip()).hex()
+            except Exception:
+                pass
+        if "fee_bps" in log:
+            try:
+                data["fee_bps"] = int(log.split(":")[-1].strip())
+            except ValueError:
+                pass
+        if "amount" in log.lower():
+            try:
+                data["amount"] = int(log.split(":")[-1].strip())
+            except ValueError:
+                pass
+    return {"event_type": event_type, "program_id": program_id, "data": data}
+
+
+def run(fn, transactions, repeat: int) -> float:
+    """返回 lines/sec"""
+    lines = sum(len(tx["logs"]) for tx in transactions) * repeat
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for tx in transactions:
+            fn(tx)
+    return lines / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark LogParser")
+    parser.add_argument("--repeat", type=int, default=2000, help="Passes over the fixture")
+    args = parser.parse_args()
+
+    with open(FIXTURE, encoding="utf-8") as f:
+        transactions = json.load(f)
+
+    legacy = run(lambda tx: legacy_parse(tx["logs"]), transactions, args.repeat)
+    compiled = run(lambda tx: LogParser.parse(tx["signature"], tx["logs"], tx["slot"]), transactions, args.repeat)
+
+    print(f"{'parser':<10} {'lines/sec':>12}")
+    print(f"{'legacy':<10} {legacy:>12,.0f}")
+    print(f"{'compiled':<10} {compiled:>12,.0f}")
+    print(f"speedup: {compiled / legacy:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
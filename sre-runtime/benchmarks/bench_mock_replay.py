@@ -0,0 +1,68 @@
+"""
+MockChainListener 回放压测
+
+按目标速率回放合成或录制的交易日志 (经真实 LogParser 解析)，下游挂一个模拟处理耗时的异步订阅者，
+输出发送 / 端到端吞吐、发送延迟与订阅者分发延迟。
+
+Usage:
+    python benchmarks/bench_mock_replay.py [--rate 5000] [--process poisson] [--duration 5]
+        [--burst-rate 1 --burst-size 1000] [--source fixtures/anchor_logs.json] [--work-us 50]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from listener.chain_listener import MockChainListener
+from listener.load import ARRIVAL_PROCESSES, ArrivalProfile, cycle, load_transactions, synthetic_transactions
+
+
+async def run(args: argparse.Namespace) -> None:
+    listener = MockChainListener()
+
+    async def subscriber(event) -> None:
+        # 模拟下游处理耗时 (忙等，不让出事件循环)
+        deadline = time.perf_counter() + args.work_us / 1e6
+        while time.perf_counter() < deadline:
+            pass
+
+    listener.on_event(subscriber, name="subscriber", max_queue=args.queue)
+
+    if args.source:
+        transactions = cycle(load_transactions(args.source))
+    else:
+        transactions = synthetic_transactions(seed=args.seed)
+    profile = ArrivalProfile(
+        rate=args.rate,
+        process=args.process,
+        burst_rate=args.burst_rate,
+        burst_size=args.burst_size,
+        seed=args.seed,
+    )
+    report = await listener.replay(transactions, profile, duration=args.duration)
+    await listener.stop()
+
+    for key, value in report.summary().items():
+        print(f"{key:<40} {value:>12,.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay load through MockChainListener")
+    parser.add_argument("--rate", type=float, default=5000, help="Target transactions/sec")
+    parser.add_argument("--process", choices=ARRIVAL_PROCESSES, default="poisson")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds to send")
+    parser.add_argument("--burst-rate", type=float, default=0.0, help="Bursts per second")
+    parser.add_argument("--burst-size", type=int, default=0, help="Extra transactions per burst")
+    parser.add_argument("--source", help="Recorded transactions (JSON file or event log directory)")
+    parser.add_argument("--work-us", type=float, default=50.0, help="Subscriber work per event (µs)")
+    parser.add_argument("--queue", type=int, default=1000, help="Subscriber queue size")
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
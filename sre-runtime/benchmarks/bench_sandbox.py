@@ -0,0 +1,84 @@
+"""
+Sandbox 后端基准测试
+
+在 examples/skills 的示例 Skill 上对比 Docker 与 process 后端的单次执行延迟。
+Docker 守护进程不可用或镜像缺失时跳过 Docker 后端。
+
+Usage:
+    python benchmarks/bench_sandbox.py [--runs 20] [--warmup 1] [--backends docker,process,forkserver]
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from executor.sandbox import SandboxConfig, execute_in_sandbox
+
+EXAMPLES_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "examples", "skills",
+)
+
+_INPUT_BLOCK = re.compile(r"\*\*输入\*\*.*?```json\s*(.*?)```", re.S)
+_RUNTIME_FIELD = re.compile(r"^\s+(docker_image|entrypoint|timeout_seconds):\s*(\S+)", re.M)
+
+
+def load_example_skills():
+    """读取示例 Skill 的 runtime 配置与 SKILL.md 中的输入示例"""
+    skills = []
+    for name in sorted(os.listdir(EXAMPLES_DIR)):
+        skill_dir = os.path.join(EXAMPLES_DIR, name)
+        with open(os.path.join(skill_dir, "SKILL.md"), encoding="utf-8") as f:
+            text = f.read()
+        runtime = dict(_RUNTIME_FIELD.findall(text))
+        runtime["timeout_seconds"] = int(runtime.get("timeout_seconds", 30))
+        match = _INPUT_BLOCK.search(text)
+        input_data = json.loads(match.group(1)) if match else {}
+        skills.append(({"name": name, "path": skill_dir, "runtime": runtime}, input_data))
+    return skills
+
+
+def bench(skill_package, input_data, backend, runs, warmup):
+    """返回每次执行耗时 (ms) 列表 (不含预热运行)"""
+    config = SandboxConfig(backend=backend)
+    for _ in range(warmup):
+        execute_in_sandbox(skill_package, input_data, config)
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        execute_in_sandbox(skill_package, input_data, config)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sandbox backends on example skills")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs per backend (zygote start etc.)")
+    parser.add_argument("--backends", default="docker,process,forkserver")
+    args = parser.parse_args()
+
+    print(f"{'skill':<16}{'backend':<10}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for skill_package, input_data in load_example_skills():
+        for backend in args.backends.split(","):
+            try:
+                timings = bench(skill_package, input_data, backend, args.runs, args.warmup)
+            except Exception as e:
+                print(f"{skill_package['name']:<16}{backend:<10}  skipped: {str(e).splitlines()[0][:60]}")
+                continue
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            print(
+                f"{skill_package['name']:<16}{backend:<10}"
+                f"{statistics.mean(timings):>10.1f}{statistics.median(timings):>10.1f}{p95:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
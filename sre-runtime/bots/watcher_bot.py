@@ -15,7 +15,7 @@ from typing import List
 # 添加 sre-runtime 到路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from verifier.challenger import challenge_if_invalid, get_challenge_stats
+from verifier.challenger import get_challenge_stats, watch_and_challenge
 
 logging.basicConfig(
     level=logging.INFO,
@@ -49,16 +49,14 @@ async def run_watcher():
             if orders:
                 logger.info(f"📋 Found {len(orders)} orders to verify")
                 
-                for order_pubkey in orders:
-                    logger.info(f"🔎 Verifying order: {order_pubkey}")
-                    
-                    # 验证并挑战
-                    result = await challenge_if_invalid(order_pubkey)
-                    
+                # 验证并挑战 (按挑战窗口截止时间调度)
+                for result in await watch_and_challenge(orders):
                     if result.status.value == "submitted":
                         logger.warning(f"⚔️ CHALLENGE SUBMITTED: {result.tx_signature}")
+                    elif result.status.value == "failed":
+                        logger.error(f"❌ Challenge failed for {result.order_pubkey}: {result.error_reason}")
                     else:
-                        logger.info(f"✅ Order valid: {order_pubkey}")
+                        logger.info(f"✅ Order valid: {result.order_pubkey}")
             
             # 显示统计
             stats = get_challenge_stats()
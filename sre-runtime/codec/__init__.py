@@ -0,0 +1,36 @@
+# Exo Protocol - Codec Module
+# JSON facade shared by all SRE components (native backend when installed)
+
+from .json_codec import (
+    BACKEND_ORJSON,
+    BACKEND_STDLIB,
+    JSONDecodeError,
+    available_backends,
+    canonical_dumps,
+    dumpb,
+    dumps,
+    exact_dumps,
+    exact_loads,
+    get_backend,
+    loads,
+    reset_backend,
+    set_backend,
+    sort_keys,
+)
+
+__all__ = [
+    "BACKEND_ORJSON",
+    "BACKEND_STDLIB",
+    "JSONDecodeError",
+    "available_backends",
+    "canonical_dumps",
+    "dumpb",
+    "dumps",
+    "exact_dumps",
+    "exact_loads",
+    "get_backend",
+    "loads",
+    "reset_backend",
+    "set_backend",
+    "sort_keys",
+]
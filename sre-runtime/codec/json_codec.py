@@ -0,0 +1,153 @@
+# Exo Protocol - JSON Codec
+# Single JSON entry point for the runtime: native encoder/decoder when installed, stdlib otherwise
+
+import json
+from typing import Any, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+BACKEND_ORJSON = "orjson"
+BACKEND_STDLIB = "stdlib"
+
+JsonInput = Union[str, bytes, bytearray, memoryview]
+
+# orjson.JSONDecodeError 是其子类，两种后端都抛出该类型
+JSONDecodeError = json.JSONDecodeError
+
+_backend: Optional[str] = None
+
+
+def available_backends() -> tuple:
+    """当前环境可用的后端 (最快的在前)"""
+    return (BACKEND_ORJSON, BACKEND_STDLIB) if orjson is not None else (BACKEND_STDLIB,)
+
+
+def get_backend() -> str:
+    """
+    获取快速路径使用的后端
+
+    Returns:
+        已安装 orjson 时为 "orjson"，否则为 "stdlib"
+    """
+    global _backend
+    if _backend is None:
+        _backend = available_backends()[0]
+    return _backend
+
+
+def set_backend(name: str) -> None:
+    """
+    强制指定后端 (基准测试，或调试时排除原生编码器)
+
+    Args:
+        name: "orjson" | "stdlib"
+    """
+    global _backend
+    if name not in available_backends():
+        raise ValueError(f"JSON backend not available: {name}")
+    _backend = name
+
+
+def reset_backend() -> None:
+    """重置后端以触发重新检测"""
+    global _backend
+    _backend = None
+
+
+# ============================================================================
+# 快速路径: 链上消息、日志、溢出文件、AI Provider 请求体
+# ============================================================================
+#
+# 两种后端输出均为紧凑的 UTF-8 (不转义非 ASCII) 合法 JSON，但字节不完全一致:
+# orjson 将浮点数写作 1e16 (stdlib: 1e+16)、NaN 写作 null，
+# 并把超过 64 位的整数解析为 float。
+# 需要计算或复算哈希的数据必须使用下方的 canonical / exact 函数。
+
+def loads(data: JsonInput) -> Any:
+    """从 str / bytes / memoryview 解析 JSON"""
+    if get_backend() == BACKEND_ORJSON:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # NaN / Infinity 字面量，或确实非法的输入 (stdlib 抛出相同的异常类型)
+            pass
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def dumpb(obj: Any, *, indent: bool = False, sort_keys: bool = False) -> bytes:
+    """序列化为 UTF-8 JSON 字节串"""
+    if get_backend() == BACKEND_ORJSON:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(obj, option=option)
+        except orjson.JSONEncodeError:
+            # 超过 64 位的整数、不支持的类型 (由 stdlib 抛出常规 TypeError)
+            pass
+    return _stdlib_dumps(obj, indent, sort_keys).encode("utf-8")
+
+
+def dumps(obj: Any, *, indent: bool = False, sort_keys: bool = False) -> str:
+    """序列化为 JSON 字符串"""
+    if get_backend() == BACKEND_ORJSON:
+        return dumpb(obj, indent=indent, sort_keys=sort_keys).decode("utf-8")
+    return _stdlib_dumps(obj, indent, sort_keys)
+
+
+def _stdlib_dumps(obj: Any, indent: bool, sort_keys: bool) -> str:
+    if indent:
+        return json.dumps(obj, indent=2, sort_keys=sort_keys, ensure_ascii=False)
+    return json.dumps(obj, separators=(",", ":"), sort_keys=sort_keys, ensure_ascii=False)
+
+
+# ============================================================================
+# 精确路径: 哈希与 DA 存储 (始终使用 stdlib，逐字节稳定)
+# ============================================================================
+
+def canonical_dumps(obj: Any, *, compact: bool = True, ensure_ascii: bool = True) -> str:
+    """
+    用于哈希的确定性序列化 (键排序，stdlib 格式)
+
+    字节布局属于协议的一部分 (执行者与挑战者之间比对结果 / 输入哈希)，
+    因此从不使用原生后端。
+
+    Args:
+        compact: 使用 "," / ":" 分隔符 (否则为 stdlib 默认的 ", " / ": ")
+        ensure_ascii: 转义非 ASCII 字符
+    """
+    separators = (",", ":") if compact else None
+    return json.dumps(obj, sort_keys=True, separators=separators, ensure_ascii=ensure_ascii)
+
+
+def exact_dumps(obj: Any, *, indent: bool = False) -> bytes:
+    """存储结果的 stdlib 序列化 (经 stdlib 往返后值保持不变)"""
+    return _stdlib_dumps(obj, indent, False).encode("utf-8")
+
+
+def exact_loads(data: JsonInput) -> Any:
+    """被哈希数据的 stdlib 解析 (任意精度整数、NaN / Infinity)"""
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def sort_keys(obj: Any) -> Any:
+    """
+    递归排序已解析 JSON 值中的字典键
+
+    对 JSON 解析器产生的值，等价于 json.loads(json.dumps(obj, sort_keys=True))，
+    但无需序列化。
+    """
+    if isinstance(obj, dict):
+        return {key: sort_keys(obj[key]) for key in sorted(obj)}
+    if isinstance(obj, list):
+        return [sort_keys(value) for value in obj]
+    return obj
@@ -3,12 +3,28 @@
 
 from .committer import (
     CommitResult,
+    ExecutionOutput,
     commit_result,
     compute_result_hash,
+    execute_skill,
+)
+from .journal import (
+    JournalEntry,
+    OrderJournal,
+    get_journal,
+    reset_journal,
+    set_journal,
 )
 
 __all__ = [
     "CommitResult",
+    "ExecutionOutput",
     "commit_result",
     "compute_result_hash",
+    "execute_skill",
+    "JournalEntry",
+    "OrderJournal",
+    "get_journal",
+    "reset_journal",
+    "set_journal",
 ]
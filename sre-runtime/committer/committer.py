@@ -1,21 +1,37 @@
 # Exo Protocol - Result Committer
 # Integrates sandbox execution with DA storage for on-chain submission
 
+import asyncio
 import hashlib
-import json
 import time
-from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Dict, Optional
 
 import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from executor.sandbox import execute_in_sandbox, SandboxConfig
+from codec import canonical_dumps
+from concurrency import SingleFlight, execution_key
+from executor.autotune import get_autotuner
+from executor.sandbox import (
+    CancelToken,
+    execute_in_sandbox,
+    ResourceUsage,
+    SandboxCancelledError,
+    SandboxConfig,
+    SandboxReport,
+)
 from da.storage import store_result
+from metrics import SPAN_DA_UPLOAD, SPAN_HASHING, SPAN_SKILL_RUNTIME, StageTimings
+from committer.journal import STAGE_EXECUTED, STAGE_STORED, get_journal
 
 
-@dataclass
+# 进行中的 sandbox 执行 (按 Skill 摘要 + 输入哈希合并重复执行)
+_executions = SingleFlight("execution")
+
+
+@dataclass(slots=True)
 class CommitResult:
     """提交结果数据结构"""
     order_id: str
@@ -27,6 +43,19 @@ class CommitResult:
     execution_mode: str = "sandbox"  # "sandbox" | "ai"
     model_used: Optional[str] = None
     tokens_used: int = 0
+    resource_usage: Optional[ResourceUsage] = None  # 仅 sandbox 模式
+    timings: StageTimings = field(default_factory=StageTimings)  # 各阶段耗时 (执行 / 哈希 / DA 上传)
+
+
+@dataclass
+class ExecutionOutput:
+    """Skill 执行输出 (尚未写入 DA)"""
+    result: Dict[str, Any]
+    execution_mode: str = "sandbox"
+    model_used: Optional[str] = None
+    tokens_used: int = 0
+    resource_usage: Optional[ResourceUsage] = None
+    timings: Optional[StageTimings] = None  # 执行各阶段耗时 (共享 / 推测执行的等待方据此合并)
 
 
 def compute_result_hash(result: Dict[str, Any]) -> str:
@@ -40,16 +69,163 @@ def compute_result_hash(result: Dict[str, Any]) -> str:
         SHA256 哈希值 (hex string)
     """
     # 使用 sort_keys=True 保证确定性
-    serialized = json.dumps(result, sort_keys=True, ensure_ascii=False)
+    serialized = canonical_dumps(result, compact=False, ensure_ascii=False)
     return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
 
 
+def _run_sandbox(
+    skill_package: dict,
+    input_data: dict,
+    sandbox_config: Optional[SandboxConfig],
+    report: SandboxReport,
+    order_id: str,
+    cancel_token: CancelToken,
+) -> Dict[str, Any]:
+    """
+    执行 sandbox 模式 Skill (在工作线程中运行)
+
+    未指定 sandbox_config 时由全局 Autotuner 选择配置并记录本次资源消耗；
+    调优配置因 OOM / 超时失败时，使用基准配置重试一次。
+    """
+    def run(config: Optional[SandboxConfig]) -> Dict[str, Any]:
+        return execute_in_sandbox(
+            skill_package, input_data, config,
+            report=report, order_id=order_id, cancel_token=cancel_token,
+        )
+
+    if sandbox_config is not None:
+        return run(sandbox_config)
+
+    tuner = get_autotuner()
+    config = tuner.config_for(skill_package)
+    try:
+        result = run(config)
+    except Exception:
+        if cancel_token.cancelled:
+            raise
+        tuner.record(skill_package, report, config)
+        exhausted = report.timed_out or (report.usage is not None and report.usage.oom_killed)
+        if config == tuner.base or not exhausted:
+            raise
+        # 回退: 基准配置重试
+        report.usage, report.timed_out = None, False
+        config = tuner.base
+        try:
+            result = run(config)
+        except Exception:
+            if not cancel_token.cancelled:
+                tuner.record(skill_package, report, config)
+            raise
+
+    tuner.record(skill_package, report, config)
+    return result
+
+
+async def execute_skill(
+    order_id: str,
+    skill_package: dict,
+    input_data: dict,
+    execution_mode: str = "sandbox",  # "sandbox" | "ai"
+    sandbox_config: Optional[SandboxConfig] = None,
+    cancel_token: Optional[CancelToken] = None,
+    report: Optional[SandboxReport] = None,
+) -> ExecutionOutput:
+    """
+    执行 Skill (不写入 DA)
+    
+    可单独调用以提前开始执行 (如在交易确认前推测执行)，之后交给 commit_result 提交。
+    
+    Args:
+        report: 沙盒资源报告 (可选，执行失败时调用方仍可读取资源消耗)
+        其余参数同 commit_result
+        
+    Raises:
+        执行失败时抛出异常
+    """
+    report = report if report is not None else SandboxReport()
+    cancel_token = cancel_token or CancelToken()
+    
+    if execution_mode == "ai":
+        from executor.ai_executor import AIExecutor
+        executor = AIExecutor()
+        with report.timings.span(SPAN_SKILL_RUNTIME):
+            ai_result = await executor.execute_skill(skill_package, input_data)
+        await executor.close()
+        
+        if not ai_result.success:
+            raise RuntimeError(ai_result.error_message or "AI execution failed")
+        
+        return ExecutionOutput(
+            result=ai_result.output,
+            execution_mode=execution_mode,
+            model_used=ai_result.model_used,
+            tokens_used=ai_result.tokens_used,
+            timings=report.timings,
+        )
+    
+    # 默认使用 sandbox 模式
+    # 沙盒在工作线程中执行，不阻塞事件循环；取消时终止容器
+    try:
+        result = await asyncio.to_thread(
+            _run_sandbox, skill_package, input_data, sandbox_config,
+            report, order_id, cancel_token,
+        )
+    except asyncio.CancelledError:
+        cancel_token.cancel()
+        raise
+    return ExecutionOutput(
+        result=result, execution_mode=execution_mode,
+        resource_usage=report.usage, timings=report.timings,
+    )
+
+
+class SharedExecutionError(RuntimeError):
+    """合并执行失败 (携带该次执行的沙盒报告，各等待方据此读取资源消耗与阶段耗时)"""
+
+    def __init__(self, message: str, report: SandboxReport):
+        super().__init__(message)
+        self.report = report
+
+
+async def _execute_shared(
+    order_id: str,
+    skill_package: dict,
+    input_data: dict,
+    sandbox_config: Optional[SandboxConfig],
+) -> ExecutionOutput:
+    """
+    合并执行的实际运行 (sandbox 模式)
+
+    使用独立的取消令牌与报告: 最后一个等待方离开 (被取消或其取消令牌触发) 时任务被取消，
+    令牌随之触发并终止容器；报告通过 ExecutionOutput / SharedExecutionError 交给每个等待方。
+    """
+    report = SandboxReport()
+    try:
+        return await execute_skill(
+            order_id, skill_package, input_data, "sandbox",
+            sandbox_config, CancelToken(), report,
+        )
+    except Exception as e:
+        raise SharedExecutionError(str(e), report) from e
+
+
+def _abandon(execution: Optional[Awaitable[ExecutionOutput]]) -> None:
+    """放弃不再需要的已开始执行 (结果已在订单日志中)"""
+    if isinstance(execution, asyncio.Future):
+        execution.cancel()
+    elif asyncio.iscoroutine(execution):
+        execution.close()
+
+
 async def commit_result(
     order_id: str,
     skill_package: dict,
     input_data: dict,
     execution_mode: str = "sandbox",  # "sandbox" | "ai"
-    sandbox_config: Optional[SandboxConfig] = None
+    sandbox_config: Optional[SandboxConfig] = None,
+    cancel_token: Optional[CancelToken] = None,
+    execution: Optional[Awaitable[ExecutionOutput]] = None,
+    timings: Optional[StageTimings] = None,
 ) -> CommitResult:
     """
     执行 Skill 并提交结果
@@ -65,38 +241,87 @@ async def commit_result(
         skill_package: Skill 包配置
         input_data: 输入数据
         execution_mode: 执行模式 "sandbox" 或 "ai"
-        sandbox_config: 沙盒配置 (仅 sandbox 模式)
+        sandbox_config: 沙盒配置 (仅 sandbox 模式，未指定时由 Autotuner 选择)
+        cancel_token: 取消令牌 (可选)。任务被取消 (如 asyncio.wait_for 超时) 时
+            会自动触发，立即终止沙盒容器 / 进程
+        execution: 已开始的执行 (execute_skill 任务，可选)。提供时等待其结果，
+            不再重复执行
+        timings: 阶段耗时记录 (可选，如订单跨重试共用一个；默认新建)。执行 (校验 / 容器 /
+            运行 / 输出解析)、哈希与 DA 上传各阶段写入其中，并作为 CommitResult.timings 返回
+        
+    sandbox 模式下，相同 Skill、输入与沙盒配置的并发执行合并为一次 (见 concurrency.SingleFlight)；
+    合并后的执行使用独立的取消令牌，各订单的 cancel_token 被触发 (或任务被取消) 时该订单退出等待，
+    最后一个等待方退出时才终止容器。资源消耗与阶段耗时按各订单分别返回。
+    
+    配置了订单日志 (committer.journal) 时记录 executed / stored 阶段，并从日志恢复:
+    结果已写入 DA 则直接返回日志中的 URI；已执行未写入则复用日志中的结果，不再执行。
         
     Returns:
         CommitResult: 提交结果数据结构
     """
     start_time = time.perf_counter()
+    timings = timings if timings is not None else StageTimings()
     model_used = None
     tokens_used = 0
+    output: Optional[ExecutionOutput] = None
+    report = SandboxReport()
+    cancel_token = cancel_token or CancelToken()
+    journal = get_journal()
+    entry = journal.get(order_id) if journal is not None else None
+    
+    if entry is not None and entry.result_uri:
+        # 已写入 DA (上次运行在提交前中断)
+        _abandon(execution)
+        return CommitResult(
+            order_id=order_id,
+            result_uri=entry.result_uri,
+            result_hash=entry.result_hash,
+            execution_time_ms=int((time.perf_counter() - start_time) * 1000),
+            status="success",
+            execution_mode=execution_mode,
+            timings=timings,
+        )
     
     try:
-        # 1. 根据模式选择执行方式
-        if execution_mode == "ai":
-            from executor.ai_executor import AIExecutor
-            executor = AIExecutor()
-            ai_result = await executor.execute_skill(skill_package, input_data)
-            await executor.close()
-            
-            if not ai_result.success:
-                raise RuntimeError(ai_result.error_message or "AI execution failed")
-            
-            result = ai_result.output
-            model_used = ai_result.model_used
-            tokens_used = ai_result.tokens_used
+        # 1. 根据模式选择执行方式 (或等待已开始的执行 / 复用日志中的结果)
+        if entry is not None and entry.result is not None:
+            _abandon(execution)
+            output = ExecutionOutput(result=entry.result, execution_mode=execution_mode)
         else:
-            # 默认使用 sandbox 模式
-            result = execute_in_sandbox(skill_package, input_data, sandbox_config)
+            if execution is None and execution_mode == "sandbox":
+                execution = _executions.do(
+                    execution_key(skill_package, input_data, sandbox_config),
+                    lambda: _execute_shared(order_id, skill_package, input_data, sandbox_config),
+                    cancel_token=cancel_token,
+                )
+            elif execution is None:
+                execution = execute_skill(
+                    order_id, skill_package, input_data, execution_mode,
+                    sandbox_config, cancel_token, report,
+                )
+            try:
+                output = await execution
+            except asyncio.CancelledError:
+                # 本订单的取消令牌被触发 (如超时)，而非任务本身被取消: 按取消失败处理
+                if cancel_token.cancelled and not asyncio.current_task().cancelling():
+                    raise SandboxCancelledError("Sandbox execution cancelled") from None
+                raise
+            timings.extend(output.timings)
+        result = output.result
+        model_used = output.model_used
+        tokens_used = output.tokens_used
         
         # 2. 计算结果哈希
-        result_hash = compute_result_hash(result)
+        with timings.span(SPAN_HASHING):
+            result_hash = compute_result_hash(result)
+        if journal is not None and (entry is None or entry.result is None):
+            journal.record(order_id, STAGE_EXECUTED, result=result, result_hash=result_hash)
         
         # 3. 调用 DA 存储结果 (异步调用)
-        result_uri = await store_result(result, order_id)
+        with timings.span(SPAN_DA_UPLOAD):
+            result_uri = await store_result(result, order_id)
+        if journal is not None:
+            journal.record(order_id, STAGE_STORED, result_uri=result_uri)
         
         # 4. 计算执行耗时
         execution_time_ms = int((time.perf_counter() - start_time) * 1000)
@@ -111,11 +336,17 @@ async def commit_result(
             execution_mode=execution_mode,
             model_used=model_used,
             tokens_used=tokens_used,
+            resource_usage=output.resource_usage,
+            timings=timings,
         )
         
     except Exception as e:
-        # 执行失败时返回 status="failed"
+        # 执行失败时返回 status="failed" (执行阶段失败时保留已记录的执行阶段耗时)
         execution_time_ms = int((time.perf_counter() - start_time) * 1000)
+        if isinstance(e, SharedExecutionError):
+            report = e.report
+        if output is None:
+            timings.extend(report.timings)
         
         return CommitResult(
             order_id=order_id,
@@ -127,4 +358,6 @@ async def commit_result(
             execution_mode=execution_mode,
             model_used=model_used,
             tokens_used=tokens_used,
+            resource_usage=report.usage,
+            timings=timings,
         )
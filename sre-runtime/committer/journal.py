@@ -0,0 +1,306 @@
+# Exo Protocol - Order Journal
+# 订单阶段预写日志 (SQLite WAL)，进程重启后从最后完成的阶段恢复，避免重复执行容器
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from codec import dumps, exact_dumps, exact_loads, loads
+from metrics import get_sink
+
+# 订单阶段 (按推进顺序)
+STAGE_STARTED = "started"      # 已接单，记录订单请求
+STAGE_EXECUTED = "executed"    # Skill 执行完成，记录结果 (尚未写入 DA)
+STAGE_STORED = "stored"        # 结果已写入 DA，记录 result_uri / result_hash
+STAGE_COMPLETED = "completed"  # 订单完成
+STAGE_FAILED = "failed"        # 重试耗尽 / 超时
+
+TERMINAL_STAGES = (STAGE_COMPLETED, STAGE_FAILED)
+
+DEFAULT_FLUSH_INTERVAL = 0.05  # 秒；批量提交窗口
+DEFAULT_MAX_BATCH = 256        # 待写记录达到该数量时立即提交
+
+JOURNAL_ENV = "EXO_ORDER_JOURNAL"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    order_id    TEXT PRIMARY KEY,
+    stage       TEXT NOT NULL,
+    request     TEXT,
+    result      BLOB,
+    result_hash TEXT,
+    result_uri  TEXT,
+    error       TEXT,
+    updated_at  REAL NOT NULL
+)
+"""
+
+# 未提供的字段保留原值 (error 除外: 阶段推进时清空)
+_UPSERT = """
+INSERT INTO orders (order_id, stage, request, result, result_hash, result_uri, error, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(order_id) DO UPDATE SET
+    stage = excluded.stage,
+    request = COALESCE(excluded.request, orders.request),
+    result = COALESCE(excluded.result, orders.result),
+    result_hash = COALESCE(excluded.result_hash, orders.result_hash),
+    result_uri = COALESCE(excluded.result_uri, orders.result_uri),
+    error = excluded.error,
+    updated_at = excluded.updated_at
+"""
+
+_COLUMNS = "order_id, stage, request, result, result_hash, result_uri, error, updated_at"
+
+
+@dataclass
+class JournalEntry:
+    """
+    订单在日志中的最新状态
+
+    Attributes:
+        order_id: 订单 ID
+        stage: 最后完成的阶段
+        request: 订单请求 (skill_package / input_data 等，用于重启后重新提交)
+        result: 执行结果 (executed 之后)
+        result_hash: 结果哈希 (executed 之后)
+        result_uri: DA 存储 URI (stored 之后)
+        error: 失败原因 (failed)
+        updated_at: 最后更新时间 (Unix 时间戳)
+    """
+    order_id: str
+    stage: str
+    request: Optional[Dict[str, Any]] = None
+    result: Optional[Dict[str, Any]] = None
+    result_hash: Optional[str] = None
+    result_uri: Optional[str] = None
+    error: Optional[str] = None
+    updated_at: float = 0.0
+
+    @property
+    def finished(self) -> bool:
+        return self.stage in TERMINAL_STAGES
+
+    def merge(self, update: "JournalEntry") -> "JournalEntry":
+        """叠加一次阶段推进 (与 _UPSERT 语义一致)"""
+        return JournalEntry(
+            order_id=self.order_id,
+            stage=update.stage,
+            request=update.request if update.request is not None else self.request,
+            result=update.result if update.result is not None else self.result,
+            result_hash=update.result_hash if update.result_hash is not None else self.result_hash,
+            result_uri=update.result_uri if update.result_uri is not None else self.result_uri,
+            error=update.error,
+            updated_at=update.updated_at,
+        )
+
+
+class OrderJournal:
+    """
+    订单阶段日志
+
+    - record() 只写入内存缓冲，不阻塞调用方；缓冲在 flush_interval 后 (或达到 max_batch 时)
+      以单个事务批量提交，订单不承担逐条 fsync 延迟
+    - WAL + synchronous=NORMAL: 提交只追加 WAL 文件，进程崩溃不丢已提交记录
+      (掉电可能丢失最后一批，恢复时从更早的阶段重做，各阶段均幂等)
+    - 结果使用 stdlib 精确序列化存储，恢复后重新计算的哈希与原哈希一致
+    """
+
+    def __init__(
+        self,
+        path: str,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        max_batch: int = DEFAULT_MAX_BATCH,
+    ):
+        """
+        Args:
+            path: SQLite 数据库文件路径 (":memory:" 用于测试)
+            flush_interval: 批量提交窗口 (秒)；0 表示每次 record 立即提交
+            max_batch: 缓冲记录数上限
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        self._pending: Dict[str, JournalEntry] = {}
+        self._lock = threading.Lock()
+        self._flush_handle: Optional[Any] = None
+        self._closed = False
+
+    def record(self, order_id: str, stage: str, **fields: Any) -> None:
+        """
+        记录阶段推进
+
+        Args:
+            order_id: 订单 ID
+            stage: 新阶段 (STAGE_*)
+            fields: JournalEntry 字段 (request / result / result_hash / result_uri / error)
+        """
+        update = JournalEntry(order_id=order_id, stage=stage, updated_at=time.time(), **fields)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Order journal is closed")
+            previous = self._pending.get(order_id)
+            self._pending[order_id] = previous.merge(update) if previous is not None else update
+            pending = len(self._pending)
+        if pending >= self.max_batch or self.flush_interval <= 0:
+            self.flush()
+        else:
+            self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        """在事件循环中延迟提交 (无运行中的事件循环时，等待 max_batch 或显式 flush)"""
+        if self._flush_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._flush_handle = loop.call_later(self.flush_interval, self.flush)
+
+    def flush(self) -> int:
+        """
+        提交缓冲的记录 (单个事务)
+
+        Returns:
+            int: 提交的记录数
+        """
+        with self._lock:
+            if self._flush_handle is not None:
+                self._flush_handle.cancel()
+                self._flush_handle = None
+            if not self._pending or self._closed:
+                return 0
+            batch = list(self._pending.values())
+            self._pending.clear()
+            start = time.perf_counter()
+            rows = [
+                (
+                    e.order_id, e.stage,
+                    dumps(e.request) if e.request is not None else None,
+                    exact_dumps(e.result) if e.result is not None else None,
+                    e.result_hash, e.result_uri, e.error, e.updated_at,
+                )
+                for e in batch
+            ]
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(_UPSERT, rows)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                # 保留未写入的记录，下次提交重试 (已有更新的记录优先)
+                for entry in batch:
+                    newer = self._pending.get(entry.order_id)
+                    self._pending[entry.order_id] = entry.merge(newer) if newer is not None else entry
+                raise
+        sink = get_sink()
+        sink.observe("journal.flush_ms", (time.perf_counter() - start) * 1000)
+        sink.observe("journal.batch_size", len(batch))
+        return len(batch)
+
+    def get(self, order_id: str) -> Optional[JournalEntry]:
+        """读取订单最新状态 (含未提交的缓冲记录)"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM orders WHERE order_id = ?", (order_id,)
+            ).fetchone()
+            pending = self._pending.get(order_id)
+        entry = _from_row(row) if row is not None else None
+        if pending is None:
+            return entry
+        return entry.merge(pending) if entry is not None else pending
+
+    def unfinished(self) -> List[JournalEntry]:
+        """未完成的订单 (进程重启后需恢复)，按更新时间排序"""
+        self.flush()
+        placeholders = ", ".join("?" for _ in TERMINAL_STAGES)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM orders WHERE stage NOT IN ({placeholders}) ORDER BY updated_at",
+                TERMINAL_STAGES,
+            ).fetchall()
+        return [_from_row(row) for row in rows]
+
+    def prune(self, older_than: float) -> int:
+        """
+        删除已完成且早于指定时间的记录
+
+        Args:
+            older_than: Unix 时间戳
+
+        Returns:
+            int: 删除的记录数
+        """
+        self.flush()
+        placeholders = ", ".join("?" for _ in TERMINAL_STAGES)
+        with self._lock:
+            cursor = self._conn.execute(
+                f"DELETE FROM orders WHERE stage IN ({placeholders}) AND updated_at < ?",
+                (*TERMINAL_STAGES, older_than),
+            )
+        return cursor.rowcount
+
+    def close(self) -> None:
+        """提交缓冲记录并关闭数据库"""
+        if self._closed:
+            return
+        self.flush()
+        with self._lock:
+            self._closed = True
+            self._conn.close()
+
+
+def _from_row(row: tuple) -> JournalEntry:
+    order_id, stage, request, result, result_hash, result_uri, error, updated_at = row
+    return JournalEntry(
+        order_id=order_id,
+        stage=stage,
+        request=loads(request) if request is not None else None,
+        result=exact_loads(result) if result is not None else None,
+        result_hash=result_hash,
+        result_uri=result_uri,
+        error=error,
+        updated_at=updated_at,
+    )
+
+
+# 全局日志实例 (未配置时为 None，不记录)
+_journal: Optional[OrderJournal] = None
+
+
+def get_journal() -> Optional[OrderJournal]:
+    """
+    获取当前订单日志
+
+    未设置时，若环境变量 EXO_ORDER_JOURNAL 指定了数据库路径则按其创建，否则返回 None
+    """
+    global _journal
+    if _journal is None and os.environ.get(JOURNAL_ENV):
+        _journal = OrderJournal(os.environ[JOURNAL_ENV])
+    return _journal
+
+
+def set_journal(journal: Optional[OrderJournal]) -> None:
+    """设置订单日志 (None 关闭记录)"""
+    global _journal
+    _journal = journal
+
+
+def reset_journal() -> None:
+    """关闭并重置订单日志"""
+    global _journal
+    if _journal is not None:
+        _journal.close()
+    _journal = None
@@ -0,0 +1,44 @@
+# Exo Protocol - Concurrency Module
+# Asyncio coordination primitives shared by the orchestrator, committer and verifier
+
+from .deadline import (
+    KIND_CHALLENGE,
+    KIND_ORDER,
+    DeadlineMissedError,
+    DeadlineScheduler,
+    SlotClock,
+    get_scheduler,
+    reset_scheduler,
+    set_scheduler,
+)
+from .fair_queue import (
+    TIER_WEIGHTS,
+    FairQueue,
+    TenantPolicy,
+    get_fair_queue,
+    reset_fair_queue,
+    set_fair_queue,
+)
+from .singleflight import (
+    SingleFlight,
+    execution_key,
+)
+
+__all__ = [
+    "KIND_CHALLENGE",
+    "KIND_ORDER",
+    "DeadlineMissedError",
+    "DeadlineScheduler",
+    "SlotClock",
+    "get_scheduler",
+    "reset_scheduler",
+    "set_scheduler",
+    "TIER_WEIGHTS",
+    "FairQueue",
+    "TenantPolicy",
+    "get_fair_queue",
+    "reset_fair_queue",
+    "set_fair_queue",
+    "SingleFlight",
+    "execution_key",
+]
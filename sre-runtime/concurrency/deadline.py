@@ -0,0 +1,315 @@
+# Exo Protocol - Deadline Scheduler
+# Earliest-deadline-first scheduling of orders and challenges by slot deadline
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import get_sink
+
+DEFAULT_SLOT_SECONDS = 0.4   # Solana 目标 slot 时长
+DEFAULT_MAX_CONCURRENT = 4
+DEFAULT_ESTIMATE_ALPHA = 0.2  # 最近一次执行耗时的 EWMA 权重
+
+NO_DEADLINE = math.inf
+
+KIND_ORDER = "order"
+KIND_CHALLENGE = "challenge"
+
+
+class DeadlineMissedError(RuntimeError):
+    """任务已无法在截止 slot 前完成，被丢弃 (或抢占)"""
+
+    def __init__(self, name: str, deadline: float, now: float, stage: str):
+        super().__init__(
+            f"{name or 'job'} missed deadline slot {deadline:.0f} "
+            f"(now {now:.0f}, {stage})"
+        )
+        self.deadline = deadline
+        self.now = now
+        self.stage = stage
+
+
+class SlotClock:
+    """
+    根据最近观察到的 slot 与经过的时间估算当前 slot
+
+    通过 observe 输入链上看到的 slot (启动时应以 getSlot 的当前 slot 锚定)；
+    两次观察之间按每 slot_seconds 秒前进一个 slot。观察值不会使时钟回退。
+    """
+
+    def __init__(
+        self,
+        slot_seconds: float = DEFAULT_SLOT_SECONDS,
+        slot: float = 0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.slot_seconds = slot_seconds
+        self._clock = clock
+        self._anchor_slot = float(slot)
+        self._anchor_time = clock()
+        self._on_anchor: List[Callable[[], None]] = []
+
+    def now(self) -> float:
+        """当前 slot 估计值 (含小数)"""
+        return self._anchor_slot + (self._clock() - self._anchor_time) / self.slot_seconds
+
+    def observe(self, slot: float) -> None:
+        """以链上看到的 slot 重新锚定 (落后于估计值时忽略)"""
+        if slot > self.now():
+            self._anchor_slot = float(slot)
+            self._anchor_time = self._clock()
+            for callback in list(self._on_anchor):
+                callback()
+
+    def on_anchor(self, callback: Callable[[], None]) -> None:
+        """注册重新锚定回调 (例如按新的估计重设定时器)"""
+        self._on_anchor.append(callback)
+
+    def slot_at(self, unix_time: float) -> float:
+        """Unix 时间戳对应的 slot 估计值 (例如 escrow expires_at)"""
+        return self.now() + (unix_time - time.time()) / self.slot_seconds
+
+    def seconds_until(self, slot: float) -> float:
+        return (slot - self.now()) * self.slot_seconds
+
+
+@dataclass(eq=False)
+class _Job:
+    fn: Callable[[], Awaitable[Any]]
+    future: asyncio.Future
+    deadline: float
+    value: int
+    priority: int
+    kind: str
+    name: str
+    submitted_at: float = field(default_factory=time.perf_counter)
+    started_at: float = 0.0
+    task: Optional[asyncio.Task] = None
+    timer: Optional[asyncio.TimerHandle] = None
+    preempted: bool = False
+
+
+class DeadlineScheduler:
+    """
+    限制并发的最早截止优先 (EDF) 调度器
+
+    - 排队任务按截止 slot 排序，其次按 escrow 金额 (高者优先)，再按 Agent 优先级
+      (高者优先)；无截止时间的任务最后执行。
+    - 启动前用预计耗时 (同类任务近期耗时的 EWMA) 对照截止时间: 已无法按时完成的任务
+      以 DeadlineMissedError 丢弃，不占用 worker。
+    - 执行中的任务在截止时间到达时被抢占 (取消)。
+
+    指标 (标签: scheduler, kind):
+        scheduler.jobs{outcome=completed|failed|shed|preempted}
+        scheduler.deadline_miss{stage=queued|running}
+        scheduler.slack_slots      启动时距截止的剩余 slot 数
+        scheduler.queue_wait_ms
+        scheduler.queue_depth / scheduler.running (gauge)
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = DEFAULT_MAX_CONCURRENT,
+        clock: Optional[SlotClock] = None,
+        name: str = "default",
+        estimate_alpha: float = DEFAULT_ESTIMATE_ALPHA,
+    ):
+        """
+        Args:
+            max_concurrent: 同时执行的任务数
+            clock: Slot 时钟 (默认新建 SlotClock)
+            name: 调度器名称 (指标标签)
+            estimate_alpha: 耗时估计的 EWMA 权重
+        """
+        self.max_concurrent = max_concurrent
+        self.clock = clock or SlotClock()
+        self.name = name
+        self.estimate_alpha = estimate_alpha
+        self._queue: List[tuple] = []
+        self._running: Set[_Job] = set()
+        self._estimates: Dict[str, float] = {}
+        self._seq = itertools.count()
+        self.clock.on_anchor(self._rearm)
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    @property
+    def running(self) -> int:
+        return len(self._running)
+
+    def estimate(self, kind: str) -> float:
+        """某类任务的预计耗时 (slot 数)"""
+        return self._estimates.get(kind, 0.0)
+
+    def submit(
+        self,
+        fn: Callable[[], Awaitable[Any]],
+        *,
+        deadline: Optional[float] = None,
+        value: int = 0,
+        priority: int = 0,
+        kind: str = KIND_ORDER,
+        name: str = "",
+    ) -> asyncio.Future:
+        """
+        提交任务
+
+        Args:
+            fn: 无参协程函数
+            deadline: 任务必须完成的 slot (None: 无截止时间)
+            value: Escrow 金额 (lamports)，截止时间相同时的排序依据
+            priority: Agent 优先级，其余情况的排序依据
+            kind: 任务类型 (耗时估计与指标按类型区分)
+            name: 日志与错误中的标识 (例如订单 ID)
+
+        Returns:
+            fn 结果的 Future；被丢弃或抢占时为 DeadlineMissedError。
+            取消该 Future 会取消任务。
+        """
+        future = asyncio.get_running_loop().create_future()
+        job = _Job(
+            fn=fn, future=future, deadline=NO_DEADLINE if deadline is None else deadline,
+            value=value, priority=priority, kind=kind, name=name,
+        )
+        future.add_done_callback(lambda f, job=job: self._on_future_done(job))
+        heapq.heappush(self._queue, (self._sort_key(job), next(self._seq), job))
+        self._dispatch()
+        return future
+
+    async def run(self, fn: Callable[[], Awaitable[Any]], **kwargs: Any) -> Any:
+        """submit() 并等待结果"""
+        return await self.submit(fn, **kwargs)
+
+    @staticmethod
+    def _sort_key(job: _Job) -> tuple:
+        # 截止时间按整 slot 比较，同一 slot 到期的任务由金额 / 优先级决定先后
+        deadline = job.deadline if job.deadline == NO_DEADLINE else math.floor(job.deadline)
+        return (deadline, -job.value, -job.priority)
+
+    def _tags(self, job: _Job) -> Dict[str, str]:
+        return {"scheduler": self.name, "kind": job.kind}
+
+    def _dispatch(self) -> None:
+        sink = get_sink()
+        while self._queue and len(self._running) < self.max_concurrent:
+            _, _, job = heapq.heappop(self._queue)
+            if job.future.done():
+                continue  # 排队期间被调用方取消
+            now = self.clock.now()
+            if now + self.estimate(job.kind) > job.deadline:
+                sink.increment("scheduler.deadline_miss", 1, {**self._tags(job), "stage": "queued"})
+                sink.increment("scheduler.jobs", 1, {**self._tags(job), "outcome": "shed"})
+                job.future.set_exception(DeadlineMissedError(job.name, job.deadline, now, "shed before start"))
+                continue
+            self._start(job, now)
+        sink.gauge("scheduler.queue_depth", len(self._queue), {"scheduler": self.name})
+        sink.gauge("scheduler.running", len(self._running), {"scheduler": self.name})
+
+    def _start(self, job: _Job, now: float) -> None:
+        sink = get_sink()
+        job.started_at = time.perf_counter()
+        sink.observe("scheduler.queue_wait_ms", (job.started_at - job.submitted_at) * 1000, self._tags(job))
+        if job.deadline != NO_DEADLINE:
+            sink.observe("scheduler.slack_slots", job.deadline - now, self._tags(job))
+        job.task = asyncio.ensure_future(job.fn())
+        self._running.add(job)
+        self._arm(job)
+        job.task.add_done_callback(lambda task, job=job: self._finish(job))
+
+    def _arm(self, job: _Job) -> None:
+        """按当前 slot 估计设置截止时的抢占定时器"""
+        if job.timer is not None:
+            job.timer.cancel()
+        if job.deadline != NO_DEADLINE:
+            job.timer = job.task.get_loop().call_later(
+                max(0.0, self.clock.seconds_until(job.deadline)), self._preempt, job
+            )
+
+    def _rearm(self) -> None:
+        # 时钟重新锚定后，执行中任务的截止时间对应的墙钟时间随之改变
+        for job in self._running:
+            self._arm(job)
+
+    def _preempt(self, job: _Job) -> None:
+        if job.task is None or job.task.done():
+            return
+        job.preempted = True
+        job.task.cancel()
+
+    def _finish(self, job: _Job) -> None:
+        sink = get_sink()
+        tags = self._tags(job)
+        self._running.discard(job)
+        if job.timer is not None:
+            job.timer.cancel()
+
+        task = job.task
+        if job.preempted:
+            sink.increment("scheduler.deadline_miss", 1, {**tags, "stage": "running"})
+            sink.increment("scheduler.jobs", 1, {**tags, "outcome": "preempted"})
+            if not job.future.done():
+                job.future.set_exception(
+                    DeadlineMissedError(job.name, job.deadline, self.clock.now(), "preempted while running")
+                )
+        elif task.cancelled():
+            if not job.future.done():
+                job.future.cancel()
+        else:
+            duration = (time.perf_counter() - job.started_at) / self.clock.slot_seconds
+            previous = self._estimates.get(job.kind)
+            self._estimates[job.kind] = duration if previous is None else (
+                self.estimate_alpha * duration + (1 - self.estimate_alpha) * previous
+            )
+            error = task.exception()
+            sink.increment("scheduler.jobs", 1, {**tags, "outcome": "failed" if error else "completed"})
+            if not job.future.done():
+                if error is not None:
+                    job.future.set_exception(error)
+                else:
+                    job.future.set_result(task.result())
+        self._dispatch()
+
+    def _on_future_done(self, job: _Job) -> None:
+        # 调用方取消了 Future: 停止任务
+        if job.future.cancelled() and job.task is not None and not job.task.done():
+            job.task.cancel()
+
+
+# 编排器与挑战者共享的全局调度器 (延迟初始化)
+_scheduler: Optional[DeadlineScheduler] = None
+
+
+def get_scheduler() -> DeadlineScheduler:
+    """
+    获取共享的截止时间调度器
+
+    Returns:
+        当前 DeadlineScheduler 实例 (未调用 set_scheduler 时使用默认设置)
+    """
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = DeadlineScheduler()
+    return _scheduler
+
+
+def set_scheduler(scheduler: DeadlineScheduler) -> None:
+    """设置自定义调度器 (并发数、slot 时钟)"""
+    global _scheduler
+    _scheduler = scheduler
+
+
+def reset_scheduler() -> None:
+    """重置调度器以触发重新初始化"""
+    global _scheduler
+    _scheduler = None
@@ -0,0 +1,308 @@
+# Exo Protocol - Fair Queue
+# Weighted fair queuing of orders across agents (tenants) and their skills
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import get_sink
+
+DEFAULT_MAX_CONCURRENT = 8
+DEFAULT_TENANT = "anonymous"   # 未携带 agent_id 的订单
+DEFAULT_SKILL = "default"
+
+# 各 Agent 等级的调度权重 (exo-core Agent.tier: 0 → 1 → 2)
+TIER_WEIGHTS: Dict[int, float] = {0: 1.0, 1: 2.0, 2: 4.0}
+
+LAMPORTS_PER_SOL = 1_000_000_000
+
+
+@dataclass
+class TenantPolicy:
+    """
+    单个 Agent 的调度策略
+
+    Attributes:
+        weight: 相对其他有积压 Agent 的调度份额
+        max_concurrent: 该 Agent 同时执行的订单数 (None: 不限额)
+    """
+    weight: float = 1.0
+    max_concurrent: Optional[int] = None
+
+    def __post_init__(self):
+        if self.weight <= 0:
+            raise ValueError(f"weight must be positive, got {self.weight}")
+
+    @classmethod
+    def for_tier(cls, tier: int, max_concurrent: Optional[int] = None) -> "TenantPolicy":
+        """按 Agent 等级加权的策略 (TIER_WEIGHTS)"""
+        return cls(weight=TIER_WEIGHTS.get(tier, 1.0), max_concurrent=max_concurrent)
+
+    @classmethod
+    def for_stake(cls, staked_lamports: int, max_concurrent: Optional[int] = None) -> "TenantPolicy":
+        """按质押加权的策略: 1 + 质押 SOL 数"""
+        return cls(weight=1.0 + staked_lamports / LAMPORTS_PER_SOL, max_concurrent=max_concurrent)
+
+
+@dataclass(eq=False)
+class _Job:
+    fn: Callable[[], Awaitable[Any]]
+    future: asyncio.Future
+    agent_id: str
+    skill_id: str
+    submitted_at: float = field(default_factory=time.perf_counter)
+    task: Optional[asyncio.Task] = None
+
+
+@dataclass(eq=False)
+class _SkillFlow:
+    skill_id: str
+    weight: float
+    jobs: Deque[_Job] = field(default_factory=deque)
+    pass_: float = 0.0
+
+
+@dataclass(eq=False)
+class _Tenant:
+    agent_id: str
+    policy: TenantPolicy
+    skills: Dict[str, _SkillFlow] = field(default_factory=dict)
+    pass_: float = 0.0
+    vtime: float = 0.0   # 该 Agent 各 Skill 之间的虚拟时间
+    queued: int = 0
+    running: int = 0
+
+    def eligible(self) -> bool:
+        quota = self.policy.max_concurrent
+        return self.queued > 0 and (quota is None or self.running < quota)
+
+
+class FairQueue:
+    """
+    带 Agent 并发配额的加权公平队列
+
+    两级 stride 调度: 在有排队订单 (且配额未满) 的 Agent 中，已获加权服务最少的先执行；
+    同一 Agent 的各 Skill 之间按同样方式调度。空闲后重新加入的 Agent 从当前虚拟时间开始，
+    既不积攒额度，也不因过去的突发而受罚。因此单个 Agent 向某个 Skill 大量下单，
+    对其他 Agent 的延迟只与其份额有关，而与其积压长度无关。
+
+    每次调度计一个服务单位 (按订单计，而非 CPU 时间)。
+
+    指标 (标签: queue):
+        fairqueue.queue_wait_ms{agent}
+        fairqueue.dispatched{agent}
+        fairqueue.queue_depth / fairqueue.running (gauge)
+        fairqueue.tenant_queue_depth{agent} / fairqueue.tenant_running{agent} (gauge)
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = DEFAULT_MAX_CONCURRENT,
+        policies: Optional[Dict[str, TenantPolicy]] = None,
+        default_policy: Optional[TenantPolicy] = None,
+        skill_weights: Optional[Dict[str, float]] = None,
+        name: str = "default",
+    ):
+        """
+        Args:
+            max_concurrent: 同时执行的订单数 (所有 Agent 合计)
+            policies: agent_id → TenantPolicy
+            default_policy: policies 中没有条目的 Agent 使用的策略
+            skill_weights: skill_id → 同一 Agent 各 Skill 之间的权重 (默认 1.0)
+            name: 队列名称 (指标标签)
+        """
+        self.max_concurrent = max_concurrent
+        self.policies: Dict[str, TenantPolicy] = dict(policies or {})
+        self.default_policy = default_policy or TenantPolicy()
+        self.skill_weights: Dict[str, float] = dict(skill_weights or {})
+        self.name = name
+        self._tenants: Dict[str, _Tenant] = {}
+        self._vtime = 0.0
+        self._queued = 0
+        self._running = 0
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    def set_policy(self, agent_id: str, policy: TenantPolicy) -> None:
+        """设置 Agent 的策略 (同样作用于其已排队的订单)"""
+        self.policies[agent_id] = policy
+        tenant = self._tenants.get(agent_id)
+        if tenant is not None:
+            tenant.policy = policy
+        self._dispatch()
+
+    def policy(self, agent_id: str) -> TenantPolicy:
+        return self.policies.get(agent_id, self.default_policy)
+
+    def tenant_depth(self, agent_id: str) -> int:
+        """Agent 在队列中等待的订单数"""
+        tenant = self._tenants.get(agent_id)
+        return tenant.queued if tenant is not None else 0
+
+    def submit(
+        self,
+        fn: Callable[[], Awaitable[Any]],
+        *,
+        agent_id: Optional[str] = None,
+        skill_id: Optional[str] = None,
+    ) -> asyncio.Future:
+        """
+        为 Agent / Skill 提交任务
+
+        Args:
+            fn: 无参协程函数
+            agent_id: 租户 (默认 DEFAULT_TENANT)
+            skill_id: 租户内的 Skill (默认 DEFAULT_SKILL)
+
+        Returns:
+            fn 结果的 Future。取消该 Future 会取消任务 (或将其移出队列)。
+        """
+        agent_id = agent_id or DEFAULT_TENANT
+        skill_id = skill_id or DEFAULT_SKILL
+        future = asyncio.get_running_loop().create_future()
+        job = _Job(fn=fn, future=future, agent_id=agent_id, skill_id=skill_id)
+        future.add_done_callback(lambda f, job=job: self._on_future_done(job))
+
+        tenant = self._tenants.get(agent_id)
+        if tenant is None:
+            tenant = self._tenants[agent_id] = _Tenant(agent_id, self.policy(agent_id))
+        if tenant.queued == 0 and tenant.running == 0:
+            tenant.pass_ = max(tenant.pass_, self._vtime)
+        flow = tenant.skills.get(skill_id)
+        if flow is None:
+            flow = tenant.skills[skill_id] = _SkillFlow(skill_id, self.skill_weights.get(skill_id, 1.0))
+        if not flow.jobs:
+            flow.pass_ = max(flow.pass_, tenant.vtime)
+        flow.jobs.append(job)
+        tenant.queued += 1
+        self._queued += 1
+
+        self._dispatch()
+        self._report(tenant)
+        return future
+
+    async def run(self, fn: Callable[[], Awaitable[Any]], **kwargs: Any) -> Any:
+        """submit() 并等待结果"""
+        return await self.submit(fn, **kwargs)
+
+    def _dispatch(self) -> None:
+        while self._running < self.max_concurrent:
+            tenant = min(
+                (t for t in self._tenants.values() if t.eligible()),
+                key=lambda t: t.pass_,
+                default=None,
+            )
+            if tenant is None:
+                break
+            flow = min((f for f in tenant.skills.values() if f.jobs), key=lambda f: f.pass_)
+
+            self._vtime = max(self._vtime, tenant.pass_)
+            tenant.pass_ += 1.0 / tenant.policy.weight
+            tenant.vtime = flow.pass_
+            flow.pass_ += 1.0 / flow.weight
+
+            job = flow.jobs.popleft()
+            tenant.queued -= 1
+            self._queued -= 1
+            self._start(tenant, job)
+        get_sink().gauge("fairqueue.queue_depth", self._queued, {"queue": self.name})
+        get_sink().gauge("fairqueue.running", self._running, {"queue": self.name})
+
+    def _start(self, tenant: _Tenant, job: _Job) -> None:
+        sink = get_sink()
+        tags = {"queue": self.name, "agent": job.agent_id}
+        sink.observe("fairqueue.queue_wait_ms", (time.perf_counter() - job.submitted_at) * 1000, tags)
+        sink.increment("fairqueue.dispatched", 1, tags)
+        tenant.running += 1
+        self._running += 1
+        job.task = asyncio.ensure_future(job.fn())
+        job.task.add_done_callback(lambda task, tenant=tenant, job=job: self._finish(tenant, job))
+        self._report(tenant)
+
+    def _finish(self, tenant: _Tenant, job: _Job) -> None:
+        tenant.running -= 1
+        self._running -= 1
+        task = job.task
+        if not job.future.done():
+            if task.cancelled():
+                job.future.cancel()
+            elif task.exception() is not None:
+                job.future.set_exception(task.exception())
+            else:
+                job.future.set_result(task.result())
+        self._release(tenant)
+        self._dispatch()
+        self._report(tenant)
+
+    def _on_future_done(self, job: _Job) -> None:
+        if not job.future.cancelled():
+            return
+        if job.task is not None:
+            if not job.task.done():
+                job.task.cancel()
+            return
+        # 排队期间被取消: 从所属 flow 中移除
+        tenant = self._tenants.get(job.agent_id)
+        if tenant is None:
+            return
+        flow = tenant.skills.get(job.skill_id)
+        if flow is not None and job in flow.jobs:
+            flow.jobs.remove(job)
+            tenant.queued -= 1
+            self._queued -= 1
+            self._release(tenant)
+            self._report(tenant)
+
+    def _release(self, tenant: _Tenant) -> None:
+        # 移除空闲的 Agent / Skill (重新加入时从当前虚拟时间开始)
+        for skill_id in [s for s, f in tenant.skills.items() if not f.jobs]:
+            del tenant.skills[skill_id]
+        if tenant.queued == 0 and tenant.running == 0:
+            self._tenants.pop(tenant.agent_id, None)
+
+    def _report(self, tenant: _Tenant) -> None:
+        sink = get_sink()
+        tags = {"queue": self.name, "agent": tenant.agent_id}
+        sink.gauge("fairqueue.tenant_queue_depth", tenant.queued, tags)
+        sink.gauge("fairqueue.tenant_running", tenant.running, tags)
+
+
+# 编排器前的全局公平队列 (延迟初始化)
+_fair_queue: Optional[FairQueue] = None
+
+
+def get_fair_queue() -> FairQueue:
+    """
+    获取共享的公平队列
+
+    Returns:
+        当前 FairQueue 实例 (未调用 set_fair_queue 时使用默认设置)
+    """
+    global _fair_queue
+    if _fair_queue is None:
+        _fair_queue = FairQueue()
+    return _fair_queue
+
+
+def set_fair_queue(queue: FairQueue) -> None:
+    """设置自定义公平队列 (并发数、租户策略)"""
+    global _fair_queue
+    _fair_queue = queue
+
+
+def reset_fair_queue() -> None:
+    """重置公平队列以触发重新初始化"""
+    global _fair_queue
+    _fair_queue = None
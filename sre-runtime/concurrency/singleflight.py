@@ -0,0 +1,123 @@
+# Exo Protocol - Single-Flight
+# Coalesces concurrent calls for the same key into one in-flight task
+
+import asyncio
+import dataclasses
+import hashlib
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from codec import canonical_dumps
+from metrics import get_sink
+
+T = TypeVar("T")
+
+OUTCOME_LEADER = "leader"  # 发起执行
+OUTCOME_SHARED = "shared"  # 加入进行中的调用
+
+
+def execution_key(skill_package: dict, input_data: dict, sandbox_config: Any = None) -> Tuple[str, str, str]:
+    """
+    Skill 执行的内容键: (Skill 摘要, 输入哈希, 配置摘要)
+
+    Skill 摘要覆盖整个 Skill 包 (镜像、镜像哈希、入口、限制)；输入哈希与沙盒输入使用
+    相同的规范化序列化；配置摘要覆盖沙盒配置 (内存 / 超时 / 后端)，由 autotune 决定时为 "auto"。
+    键相同的两个订单在相同限制下执行逐字节一致的工作负载。
+    """
+    skill_digest = hashlib.sha256(canonical_dumps(skill_package).encode("utf-8")).hexdigest()
+    input_hash = hashlib.sha256(canonical_dumps(input_data, compact=False).encode("utf-8")).hexdigest()
+    if sandbox_config is None:
+        config_digest = "auto"
+    else:
+        config = dataclasses.asdict(sandbox_config) if dataclasses.is_dataclass(sandbox_config) else sandbox_config
+        config_digest = hashlib.sha256(canonical_dumps(config).encode("utf-8")).hexdigest()
+    return skill_digest, input_hash, config_digest
+
+
+@dataclass
+class _Call(Generic[T]):
+    task: "asyncio.Task[T]"
+    waiters: int = 0
+
+
+class SingleFlight:
+    """
+    按任意可哈希键对进行中的调用去重
+
+    - 某个键的首个调用方以 task 启动 fn()；同键的并发调用方等待同一 task，
+      得到相同的结果 (或异常)。
+    - task 结束后立即释放该键: 之后的调用方重新执行 (不缓存已完成的结果)。
+    - 被取消的调用方只停止等待；最后一个等待方离开时才取消共享 task。
+
+    结果按引用共享，调用方须视为只读。
+    """
+
+    def __init__(self, name: str):
+        """
+        Args:
+            name: 名称 (指标标签)
+        """
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]], cancel_token: Optional[Any] = None) -> T:
+        """
+        若该键没有进行中的调用则执行 fn()，然后等待其结果
+
+        Args:
+            key: 去重键
+            fn: 无参协程函数 (仅由首个调用方调用)
+            cancel_token: 调用方的取消令牌 (任何提供 on_cancel(callback) -> unregister 的对象，
+                例如 executor.sandbox.CancelToken)。触发后该调用方退出等待 (await 抛出
+                CancelledError)；与取消 await 相同，最后一个调用方退出时取消共享 task。
+        """
+        sink = get_sink()
+        tags = {"flight": self.name}
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda task, key=key, call=call: self._forget(key, call))
+            sink.increment("singleflight.calls", 1, {**tags, "outcome": OUTCOME_LEADER})
+        else:
+            sink.increment("singleflight.calls", 1, {**tags, "outcome": OUTCOME_SHARED})
+        sink.gauge("singleflight.inflight", len(self._calls), tags)
+
+        call.waiters += 1
+        waiter = asyncio.shield(call.task)
+        unregister = None
+        if cancel_token is not None:
+            loop = asyncio.get_running_loop()
+            # cancel() 可能在任意线程调用 (例如超时处理)
+            unregister = cancel_token.on_cancel(lambda: loop.call_soon_threadsafe(waiter.cancel))
+        try:
+            return await waiter
+        finally:
+            if unregister is not None:
+                unregister()
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # 立即移除该调用，之后加入的调用方重新执行，而不是挂到已取消的执行上
+                self._release(key, call)
+                call.task.cancel()
+
+    def _release(self, key: Hashable, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        get_sink().gauge("singleflight.inflight", len(self._calls), {"flight": self.name})
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        self._release(key, call)
+        # 标记结果已读取 (所有等待方可能在结束前已离开)
+        if not call.task.cancelled():
+            call.task.exception()
@@ -1,12 +1,16 @@
 # Exo Protocol - Storage Abstraction Layer
 # Provides unified interface for result data availability
 
-import json
 import os
 from abc import ABC, abstractmethod
 from datetime import datetime
 from typing import Any, Dict, Optional, Protocol, runtime_checkable
 
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from codec import JSONDecodeError, exact_dumps, exact_loads
+
 
 @runtime_checkable
 class StorageProvider(Protocol):
@@ -148,7 +152,7 @@ async def store_result(result: Dict[str, Any], order_id: str) -> str:
         "result": result,
     }
     
-    data = json.dumps(result_with_meta, indent=2, ensure_ascii=False).encode("utf-8")
+    data = exact_dumps(result_with_meta, indent=True)
     
     metadata = {
         "order_id": order_id,
@@ -184,13 +188,13 @@ async def fetch_result(uri: str) -> Dict[str, Any]:
             raise NotFoundError(f"Result not found at URI: {uri}")
         
         data = await provider.download(uri)
-        result_with_meta = json.loads(data.decode("utf-8"))
+        result_with_meta = exact_loads(data)
         
         # Return the inner result for convenience
         return result_with_meta.get("result", result_with_meta)
     except NotFoundError:
         raise
-    except json.JSONDecodeError as e:
+    except JSONDecodeError as e:
         raise DownloadError(f"Invalid JSON at URI {uri}: {e}") from e
     except Exception as e:
         raise DownloadError(f"Failed to fetch result from {uri}: {e}") from e
@@ -1,13 +1,14 @@
 # Exo Protocol - AI Executor
 # Real AI-driven skill execution using LLM providers
 
-import json
 import logging
 import os
 import time
 from dataclasses import dataclass
 from typing import Dict, Any, Optional
 
+from codec import dumps
+
 from .providers import AIProvider, SimulatedProvider
 from .providers.deepseek import DeepSeekProvider, OpenAICompatibleProvider
 
@@ -134,14 +135,14 @@ class AIExecutor:
         examples = skill_package.get("examples", [])
         examples_str = ""
         if examples:
-            examples_str = "\n\nExamples:\n" + json.dumps(examples, indent=2, ensure_ascii=False)
+            examples_str = "\n\nExamples:\n" + dumps(examples, indent=True)
         
         return f"""You are an AI Agent executing the skill: {name}
 
 Description: {description}
 
 You must return a valid JSON response matching this schema:
-{json.dumps(output_schema, indent=2, ensure_ascii=False) if output_schema else "Return a JSON object with appropriate fields."}
+{dumps(output_schema, indent=True) if output_schema else "Return a JSON object with appropriate fields."}
 {examples_str}
 
 IMPORTANT RULES:
@@ -201,7 +202,7 @@ async def test_ai_executor():
     print(f"Model: {result.model_used}")
     print(f"Tokens: {result.tokens_used}")
     print(f"Time: {result.execution_time_ms}ms")
-    print(f"Output: {json.dumps(result.output, indent=2, ensure_ascii=False)}")
+    print(f"Output: {dumps(result.output, indent=True)}")
     print(f"{'='*50}\n")
     
     await executor.close()
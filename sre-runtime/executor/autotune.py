@@ -0,0 +1,233 @@
+"""
+Exo Protocol - Sandbox Autotuner
+
+根据历史执行记录 (SandboxReport.usage) 为每个 Skill 学习资源包络，
+提出或应用比默认 SandboxConfig 更紧的 mem_limit / cpu_quota / timeout_seconds。
+
+- 包络 = 最近 window 次成功执行的 p99 × headroom，并限制在 [下限, 基准配置] 之间
+  (只收紧，不放宽基准配置)
+- 样本按 (Skill, 后端) 分别记录: 同一 Skill 在不同后端下的资源消耗与限制方式不同
+- 内存建议来自峰值 RSS，只用于 Docker 的 mem_limit (cgroup 按 RSS 计)；
+  process / forkserver 后端以 RLIMIT_AS 限制虚拟地址空间 (远大于 RSS)，保持基准 mem_limit
+- 样本数不足 min_samples 时不调整
+- 调优后的配置发生 OOM 或超时: 丢弃该 Skill 的样本并回退到基准配置，重新学习
+- runtime.timeout_seconds 由 Skill 显式声明时优先，不调整超时
+"""
+
+import logging
+import math
+import threading
+from collections import deque
+from dataclasses import dataclass, replace
+from typing import Deque, Dict, Optional, Tuple
+
+from metrics import get_sink
+
+from .limits import parse_mem_limit
+from .sandbox import (
+    BACKEND_DOCKER,
+    ResourceUsage,
+    SandboxConfig,
+    SandboxReport,
+    backend_name_for,
+    skill_key,
+)
+
+logger = logging.getLogger(__name__)
+
+MIB = 1024 * 1024
+
+# 按 RSS 限制内存的后端 (其余后端的 mem_limit 为 RLIMIT_AS，不按 RSS 调优)
+RSS_LIMITED_BACKENDS = frozenset({BACKEND_DOCKER})
+
+# 样本键: (skill_key, 后端名称)
+SampleKey = Tuple[str, str]
+
+
+@dataclass
+class SkillEnvelope:
+    """单个 Skill 在某个后端下的资源包络 (p99 × headroom)"""
+    mem_bytes: int
+    cpu_quota: int
+    timeout_seconds: float
+    samples: int
+
+
+def _quantile(values: list, q: float) -> float:
+    """最近秩法分位数 (values 非空)"""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))
+    return ordered[index]
+
+
+class SandboxAutotuner:
+    """
+    按 Skill 与后端自适应调整 SandboxConfig
+
+    apply=False (默认) 时仅提出建议 (propose / proposals)，config_for 返回基准配置；
+    apply=True 时 config_for 直接返回调优后的配置。
+    """
+
+    def __init__(
+        self,
+        base: Optional[SandboxConfig] = None,
+        apply: bool = False,
+        min_samples: int = 20,
+        window: int = 200,
+        quantile: float = 0.99,
+        memory_headroom: float = 1.5,
+        cpu_headroom: float = 1.5,
+        timeout_headroom: float = 3.0,
+        min_mem_bytes: int = 64 * MIB,
+        min_cpu_quota: int = 10000,
+        min_timeout_seconds: float = 2.0,
+    ):
+        """
+        Args:
+            base: 基准配置 (默认 SandboxConfig())，同时是调优上限与回退目标
+            apply: 是否应用调优结果
+            min_samples: 开始调优所需的最少成功样本数
+            window: 每个 (Skill, 后端) 保留的最近样本数
+            quantile: 包络分位数
+            memory_headroom / cpu_headroom / timeout_headroom: 分位数上的余量倍数
+            min_mem_bytes / min_cpu_quota / min_timeout_seconds: 调优下限
+        """
+        self.base = base or SandboxConfig()
+        self.apply = apply
+        self.min_samples = min_samples
+        self.window = window
+        self.quantile = quantile
+        self.memory_headroom = memory_headroom
+        self.cpu_headroom = cpu_headroom
+        self.timeout_headroom = timeout_headroom
+        self.min_mem_bytes = min_mem_bytes
+        self.min_cpu_quota = min_cpu_quota
+        self.min_timeout_seconds = min_timeout_seconds
+        self._samples: Dict[SampleKey, Deque[ResourceUsage]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, skill_package: dict, report: SandboxReport, config: Optional[SandboxConfig] = None) -> None:
+        """
+        记录一次执行结果
+
+        Args:
+            skill_package: Skill 包配置
+            report: execute_in_sandbox 填充的报告
+            config: 本次执行使用的配置 (用于判断是否为调优配置导致的失败)
+        """
+        backend = report.backend or backend_name_for(skill_package, config or self.base)
+        key = (skill_key(skill_package), backend)
+        usage = report.usage
+        failed = report.timed_out or (usage is not None and usage.oom_killed)
+
+        if failed:
+            tuned = config is not None and config != self.base
+            with self._lock:
+                self._samples.pop(key, None)
+            if tuned:
+                reason = "timeout" if report.timed_out else "oom"
+                logger.warning(
+                    f"Autotuned limits failed for {key[0]} on {backend} ({reason}), falling back to base config"
+                )
+                get_sink().increment(
+                    "autotune.fallback", 1, {"skill": key[0], "backend": backend, "reason": reason}
+                )
+            return
+
+        if usage is None:
+            return
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.window)
+            samples.append(usage)
+
+    def propose(self, skill_package: dict, backend: Optional[str] = None) -> Optional[SkillEnvelope]:
+        """
+        根据历史样本计算资源包络，样本不足时返回 None
+
+        Args:
+            skill_package: Skill 包配置
+            backend: 后端名称 (默认为该 Skill 在基准配置下使用的后端)
+        """
+        backend = backend or backend_name_for(skill_package, self.base)
+        return self._envelope((skill_key(skill_package), backend))
+
+    def _envelope(self, key: SampleKey) -> Optional[SkillEnvelope]:
+        with self._lock:
+            samples = list(self._samples.get(key, ()))
+        if len(samples) < self.min_samples:
+            return None
+
+        base_mem = parse_mem_limit(self.base.mem_limit)
+        if key[1] in RSS_LIMITED_BACKENDS:
+            peak = _quantile([u.peak_memory_bytes for u in samples], self.quantile)
+            mem_bytes = math.ceil(peak * self.memory_headroom / MIB) * MIB
+            mem_bytes = min(base_mem, max(self.min_mem_bytes, mem_bytes))
+        else:
+            # 峰值 RSS 不能约束 RLIMIT_AS (解释器、共享库与线程栈的映射都计入地址空间)
+            mem_bytes = base_mem
+
+        # CPU 利用率 = CPU 时间 / 墙钟时间 (单位: 核)
+        utilization = _quantile(
+            [u.cpu_time_ms / max(u.wall_time_ms, 1) for u in samples], self.quantile
+        )
+        cpu_quota = math.ceil(round(utilization * self.cpu_headroom * self.base.cpu_period, 6))
+        cpu_quota = min(self.base.cpu_quota, max(self.min_cpu_quota, cpu_quota))
+
+        wall = _quantile([u.wall_time_ms for u in samples], self.quantile) / 1000
+        timeout = math.ceil(wall * self.timeout_headroom)
+        timeout = min(self.base.timeout_seconds, max(self.min_timeout_seconds, timeout))
+
+        return SkillEnvelope(
+            mem_bytes=mem_bytes,
+            cpu_quota=cpu_quota,
+            timeout_seconds=timeout,
+            samples=len(samples),
+        )
+
+    def tuned_config(self, skill_package: dict) -> SandboxConfig:
+        """调优后的配置 (样本不足时为基准配置)"""
+        envelope = self.propose(skill_package)
+        if envelope is None:
+            return self.base
+
+        tuned = replace(self.base, cpu_quota=envelope.cpu_quota)
+        if backend_name_for(skill_package, self.base) in RSS_LIMITED_BACKENDS:
+            tuned.mem_limit = f"{envelope.mem_bytes // MIB}m"
+        if "timeout_seconds" not in skill_package.get("runtime", {}):
+            tuned.timeout_seconds = envelope.timeout_seconds
+        return tuned
+
+    def config_for(self, skill_package: dict) -> SandboxConfig:
+        """本次执行应使用的配置"""
+        return self.tuned_config(skill_package) if self.apply else self.base
+
+    def proposals(self) -> Dict[SampleKey, SkillEnvelope]:
+        """所有样本充足的 Skill 的建议包络 (key 为 (skill_key, 后端名称))"""
+        with self._lock:
+            keys = list(self._samples)
+        result = {}
+        for key in keys:
+            envelope = self._envelope(key)
+            if envelope is not None:
+                result[key] = envelope
+        return result
+
+
+# 全局 Autotuner 实例 (延迟初始化)
+_autotuner: Optional[SandboxAutotuner] = None
+
+
+def get_autotuner() -> SandboxAutotuner:
+    """获取全局 Autotuner (默认仅提出建议，不应用)"""
+    global _autotuner
+    if _autotuner is None:
+        _autotuner = SandboxAutotuner()
+    return _autotuner
+
+
+def set_autotuner(autotuner: Optional[SandboxAutotuner]) -> None:
+    """设置全局 Autotuner (None 表示重置)"""
+    global _autotuner
+    _autotuner = autotuner
@@ -0,0 +1,267 @@
+"""
+Exo Protocol - Forkserver Sandbox Backend
+
+预 fork 的 Skill worker: 每个 Skill 入口维护若干常驻 zygote 进程 (见 zygote.py)，
+zygote 已导入 Skill 模块，每个请求只需 fork + 调用 main()，
+省去解释器启动与模块导入开销。
+
+隔离手段与 process 后端相同 (rlimits / network namespace / 可选 seccomp)，
+network namespace 在 zygote 启动时进入一次，由所有子进程继承。
+仅适用于受信任的纯 Python Skill。
+"""
+
+import atexit
+import logging
+import math
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from metrics import SPAN_CONTAINER_CREATE, SPAN_SKILL_RUNTIME
+
+from .limits import SANDBOX_ENV, parse_mem_limit
+from .process_sandbox import resolve_entrypoint
+from .sandbox import CancelToken, ResourceUsage, SandboxBackend, SandboxConfig, SandboxReport
+from .zygote import ZYGOTE_SCRIPT, read_frame, write_frame
+
+logger = logging.getLogger(__name__)
+
+ZYGOTE_START_TIMEOUT = 10.0  # seconds
+# zygote 自身在 timeout 时杀死子进程，父进程额外等待的宽限时间
+RESPONSE_GRACE_SECONDS = 5.0
+# 池已满时等待空闲 zygote 的默认时间
+ACQUIRE_TIMEOUT = 30.0
+
+
+class ForkServer:
+    """单个 zygote 进程的句柄 (一次处理一个请求)"""
+
+    def __init__(self, script: str, network_disabled: bool, python: str):
+        self.script = script
+        self.network_disabled = network_disabled
+        self.python = python
+        self._proc: Optional[subprocess.Popen] = None
+
+    def start(self) -> None:
+        """启动 zygote 并等待 Skill 模块导入完成"""
+        args = [self.python, "-I", ZYGOTE_SCRIPT, self.script]
+        if self.network_disabled:
+            args.append("--no-network")
+
+        self._proc = subprocess.Popen(
+            args,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=os.path.dirname(self.script),
+            env=SANDBOX_ENV,
+            close_fds=True,
+            start_new_session=True,
+        )
+        try:
+            header, _ = read_frame(
+                self._proc.stdout.fileno(), time.monotonic() + ZYGOTE_START_TIMEOUT
+            )
+        except (TimeoutError, EOFError) as e:
+            self.close()
+            raise RuntimeError(f"Zygote failed to start for {self.script}: {e}") from e
+
+        if not header.get("ready"):
+            self.close()
+            raise RuntimeError(f"Zygote failed to load {self.script}: {header.get('error')}")
+
+    @property
+    def alive(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def run(self, payload: bytes, mem_bytes: int, timeout: float) -> Tuple[int, bytes, bytes, bool, Dict[str, Any]]:
+        """
+        执行一次请求
+
+        Returns:
+            (exit_code, stdout, stderr, timed_out, usage)
+        """
+        request = {
+            "mem_bytes": mem_bytes,
+            "cpu_seconds": max(1, math.ceil(timeout)),
+            "timeout": timeout,
+        }
+        try:
+            write_frame(self._proc.stdin.fileno(), request, payload)
+            header, body = read_frame(
+                self._proc.stdout.fileno(), time.monotonic() + timeout + RESPONSE_GRACE_SECONDS
+            )
+        except (OSError, EOFError, TimeoutError) as e:
+            self.close()
+            raise RuntimeError(f"Zygote for {self.script} failed: {e}") from e
+
+        split = header.get("stdout", 0)
+        return (
+            header["exit_code"],
+            body[:split],
+            body[split:],
+            bool(header.get("timed_out")),
+            header.get("usage", {}),
+        )
+
+    def kill(self) -> None:
+        """杀死 zygote 进程组 (含正在执行的子进程)，用于取消"""
+        if self._proc is not None:
+            try:
+                os.killpg(self._proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+    def close(self) -> None:
+        """终止 zygote"""
+        if self._proc is not None and self._proc.poll() is None:
+            self._proc.kill()
+            self._proc.wait()
+
+
+class ForkServerSandboxBackend(SandboxBackend):
+    """
+    Forkserver 后端
+
+    通过 runtime.sandbox_backend = "forkserver" 或 SandboxConfig(backend="forkserver") 选择。
+    同一 Skill 最多并发 max_workers_per_skill 个 zygote，空闲 zygote 复用；
+    退出的 zygote 释放名额，由下一个请求补齐。
+    """
+
+    def __init__(
+        self,
+        python: Optional[str] = None,
+        max_workers_per_skill: int = 4,
+        acquire_timeout: float = ACQUIRE_TIMEOUT,
+    ):
+        """
+        Args:
+            python: zygote 使用的解释器 (默认当前解释器)
+            max_workers_per_skill: 每个 Skill 的 zygote 上限
+            acquire_timeout: 等待空闲 zygote 的最长时间 (秒)，超时后冷启动临时 zygote
+        """
+        self.python = python or sys.executable
+        self.max_workers_per_skill = max_workers_per_skill
+        self.acquire_timeout = acquire_timeout
+        self._idle: Dict[Tuple[str, bool], List[ForkServer]] = {}
+        self._counts: Dict[Tuple[str, bool], int] = {}
+        self._all: List[ForkServer] = []
+        self._lock = threading.Lock()
+        # zygote 归还 / 退出 / 池关闭时唤醒等待者
+        self._available = threading.Condition(self._lock)
+        atexit.register(self.close)
+
+    def _acquire(self, key: Tuple[str, bool]) -> ForkServer:
+        deadline = time.monotonic() + self.acquire_timeout
+        with self._available:
+            while True:
+                idle = self._idle.setdefault(key, [])
+                while idle:
+                    server = idle.pop()
+                    if server.alive:
+                        return server
+                    # 空闲期间退出的 zygote: 释放名额，下面按需补齐
+                    self._discard(key, server)
+                if self._counts.get(key, 0) < self.max_workers_per_skill:
+                    self._counts[key] = self._counts.get(key, 0) + 1
+                    pooled = True
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    # 池已满且长时间无归还: 冷启动一个不入池的临时 zygote，避免死等
+                    logger.warning(f"No idle zygote for {key[0]} after {self.acquire_timeout}s, cold start")
+                    pooled = False
+                    break
+                self._available.wait(remaining)
+
+        server = ForkServer(key[0], key[1], self.python)
+        try:
+            server.start()
+        except Exception:
+            if pooled:
+                with self._available:
+                    self._counts[key] = self._counts.get(key, 1) - 1
+                    self._available.notify_all()
+            raise
+        if pooled:
+            with self._lock:
+                self._all.append(server)
+            logger.info(f"Zygote started for {key[0]}")
+        return server
+
+    def _discard(self, key: Tuple[str, bool], server: ForkServer) -> None:
+        # 调用方持有 self._lock
+        self._all.remove(server)
+        self._counts[key] -= 1
+        self._available.notify_all()
+
+    def _release(self, key: Tuple[str, bool], server: ForkServer) -> None:
+        with self._available:
+            pooled = server in self._all
+            if pooled and server.alive:
+                self._idle.setdefault(key, []).append(server)
+                self._available.notify()
+            elif pooled:
+                # zygote 已退出: 释放名额并唤醒等待者，由其启动替代 zygote
+                self._discard(key, server)
+        if not pooled:
+            # 临时 zygote，或池已 close()
+            server.close()
+
+    def prewarm(self, skill_package: dict, config: Optional[SandboxConfig] = None) -> None:
+        """提前启动 Skill 的 zygote (例如在 Skill 注册时)"""
+        config = config or SandboxConfig()
+        key = (resolve_entrypoint(skill_package), config.network_disabled)
+        self._release(key, self._acquire(key))
+
+    def run(
+        self,
+        skill_package: dict,
+        payload: bytes,
+        config: SandboxConfig,
+        timeout: float,
+        report: SandboxReport,
+        cancel_token: Optional[CancelToken] = None,
+        order_id: Optional[str] = None,
+    ) -> bytes:
+        key = (resolve_entrypoint(skill_package), config.network_disabled)
+        with report.timings.span(SPAN_CONTAINER_CREATE):
+            server = self._acquire(key)
+        unregister = cancel_token.on_cancel(server.kill) if cancel_token else None
+        try:
+            with report.timings.span(SPAN_SKILL_RUNTIME):
+                exit_code, stdout, stderr, timed_out, usage = server.run(
+                    payload, parse_mem_limit(config.mem_limit), timeout
+                )
+        finally:
+            if unregister is not None:
+                unregister()
+            self._release(key, server)
+
+        if usage:
+            report.usage = ResourceUsage(**usage)
+
+        if timed_out:
+            report.timed_out = True
+            raise RuntimeError(f"Process timed out after {timeout}s")
+        if exit_code != 0:
+            logs = stderr.decode("utf-8", errors="replace")
+            if report.usage is not None and "MemoryError" in logs:
+                # RLIMIT_AS 触发的 MemoryError 等同于容器 OOM
+                report.usage.oom_killed = True
+            raise RuntimeError(f"Process exited with code {exit_code}: {logs}")
+        return stdout
+
+    def close(self) -> None:
+        """终止所有 zygote"""
+        with self._lock:
+            servers, self._all = self._all, []
+            self._idle.clear()
+            self._counts.clear()
+            self._available.notify_all()
+        for server in servers:
+            server.close()
@@ -0,0 +1,339 @@
+"""
+Exo Protocol - Docker Image Manager
+
+Skill 镜像预拉取与按 digest 固定的本地镜像缓存。
+
+- 启动时或收到 SKILL_REGISTERED 事件时后台预拉取镜像
+- 校验 SKILL.md 中的 runtime.docker_image_hash
+- 订单执行时只解析为本地 image id，绝不在关键路径上拉取镜像
+- Docker 镜像实际磁盘占用 (docker system df) 超出预算时按最近最少使用 (LRU) 淘汰未在使用中的镜像
+
+运行时由 EventPipeline 在 start() 时安装全局管理器，并在 attach() 时订阅
+SKILL_REGISTERED / SKILL_UPDATED 事件；不使用 EventPipeline 时需自行调用
+set_image_manager() 并将 on_event 注册到监听器。
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import docker
+
+logger = logging.getLogger(__name__)
+
+# 触发后台预拉取的事件类型 (EventType 值)
+PREFETCH_EVENTS = ("skill_registered", "skill_updated")
+
+
+class ImageNotReadyError(RuntimeError):
+    """镜像尚未预拉取到本地 (已调度后台拉取)"""
+    pass
+
+
+class ImageVerificationError(RuntimeError):
+    """镜像 digest 与 docker_image_hash 不一致"""
+    pass
+
+
+@dataclass
+class ImageRecord:
+    """本地镜像缓存记录"""
+    reference: str            # SKILL.md 中的 docker_image
+    image_id: str             # 本地内容寻址 ID (sha256:...)
+    repo_digests: List[str]
+    size_bytes: int
+    last_used: float
+    use_count: int = 0
+    in_use: int = 0
+
+
+def _hash_matches(expected: str, image_id: str, repo_digests: Iterable[str]) -> bool:
+    """docker_image_hash 可为 image id、repo digest 或其不短于 12 位的前缀"""
+    expected = expected.strip()
+    if not expected.startswith("sha256:"):
+        expected = f"sha256:{expected}"
+    if len(expected) < len("sha256:") + 12:
+        return False
+    candidates = [image_id] + [d.split("@", 1)[-1] for d in repo_digests]
+    return any(c.startswith(expected) for c in candidates)
+
+
+def _digest_reference(reference: str, expected: Optional[str]) -> Optional[str]:
+    """
+    docker_image_hash 为完整 sha256 时构造 "repo@sha256:..." 引用
+
+    image id 与 repo digest 形式相同，无法区分；调用方按 digest 拉取失败后
+    回退为按 tag 拉取 + 拉取后校验。
+    """
+    if not expected:
+        return None
+    digest = expected.strip()
+    if not digest.startswith("sha256:"):
+        digest = f"sha256:{digest}"
+    if len(digest) != len("sha256:") + 64:
+        return None
+    repository = reference.split("@", 1)[0]
+    name_start = repository.rfind("/") + 1
+    if ":" in repository[name_start:]:
+        # 去掉 tag (registry 端口中的 ':' 位于最后一个 '/' 之前)
+        repository = repository[:repository.rindex(":")]
+    return f"{repository}@{digest}"
+
+
+class ImageManager:
+    """
+    Skill 镜像管理器
+
+    所有拉取都在后台线程池中完成；resolve() 只返回已就绪镜像的 image id，
+    容器以 image id 创建，因此执行时不会触发隐式拉取。
+    """
+
+    def __init__(
+        self,
+        client: Any = None,
+        max_disk_bytes: Optional[int] = None,
+        package_resolver: Optional[Callable[[Any], Optional[dict]]] = None,
+        max_workers: int = 2,
+    ):
+        """
+        Args:
+            client: Docker client (默认 docker.from_env())
+            max_disk_bytes: Docker 镜像磁盘占用上限 (docker system df 的 LayersSize)，超出时 LRU 淘汰
+            package_resolver: 将 SKILL_REGISTERED 事件解析为 skill_package 的函数
+            max_workers: 后台拉取线程数
+        """
+        self._client = client
+        self.max_disk_bytes = max_disk_bytes
+        self.package_resolver = package_resolver
+        self._records: Dict[str, ImageRecord] = {}
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="exo-image")
+
+    @property
+    def client(self) -> Any:
+        if self._client is None:
+            self._client = docker.from_env()
+        return self._client
+
+    # ------------------------------------------------------------------
+    # 预拉取
+    # ------------------------------------------------------------------
+
+    def prepare(self, skill_package: dict) -> ImageRecord:
+        """
+        同步准备镜像：本地缺失则拉取，校验 hash，并登记为已就绪
+
+        Raises:
+            ImageVerificationError: digest 校验失败
+        """
+        runtime = skill_package.get("runtime", {})
+        reference = runtime["docker_image"]
+        expected = runtime.get("docker_image_hash")
+
+        image = self._fetch_by_digest(_digest_reference(reference, expected))
+        if image is None:
+            try:
+                image = self.client.images.get(reference)
+            except docker.errors.ImageNotFound:
+                logger.info(f"Pulling image {reference}...")
+                image = self.client.images.pull(reference)
+
+        repo_digests = list(image.attrs.get("RepoDigests") or [])
+        if expected and not _hash_matches(expected, image.id, repo_digests):
+            raise ImageVerificationError(
+                f"Image {reference} digest mismatch: expected {expected}, got {image.id}"
+            )
+
+        with self._lock:
+            record = self._records.get(reference)
+            if record is None or record.image_id != image.id:
+                record = ImageRecord(
+                    reference=reference,
+                    image_id=image.id,
+                    repo_digests=repo_digests,
+                    size_bytes=int(image.attrs.get("Size", 0)),
+                    last_used=time.monotonic(),
+                )
+                self._records[reference] = record
+        logger.info(f"Image ready: {reference} -> {image.id[:19]}")
+
+        self.evict(keep=reference)
+        return record
+
+    def _fetch_by_digest(self, digest_reference: Optional[str]) -> Any:
+        """
+        按 repo digest 获取镜像 (本地已有则不拉取)
+
+        拉取内容即由 digest 固定，tag 被重新指向也不受影响。digest 实为 image id
+        (registry 中不存在该 manifest) 时返回 None，由调用方按 tag 拉取后校验。
+        """
+        if digest_reference is None:
+            return None
+        try:
+            return self.client.images.get(digest_reference)
+        except docker.errors.ImageNotFound:
+            pass
+        try:
+            logger.info(f"Pulling image {digest_reference}...")
+            return self.client.images.pull(digest_reference)
+        except docker.errors.APIError as e:
+            logger.info(f"Pull by digest failed for {digest_reference}, falling back to tag: {e}")
+            return None
+
+    def schedule(self, skill_package: dict) -> Future:
+        """在后台线程池中准备镜像 (同一镜像的并发请求合并)"""
+        reference = skill_package.get("runtime", {})["docker_image"]
+        with self._lock:
+            future = self._pending.get(reference)
+            if future is not None and not future.done():
+                return future
+            future = self._pool.submit(self.prepare, skill_package)
+            self._pending[reference] = future
+
+        def _done(f: Future) -> None:
+            with self._lock:
+                if self._pending.get(reference) is f:
+                    del self._pending[reference]
+            if f.exception() is not None:
+                logger.error(f"Image prepare failed for {reference}: {f.exception()}")
+
+        future.add_done_callback(_done)
+        return future
+
+    async def prefetch(self, skill_packages: Iterable[dict]) -> List[Optional[ImageRecord]]:
+        """
+        启动时批量预拉取镜像
+
+        Returns:
+            每个 skill 对应的 ImageRecord，失败为 None
+        """
+        futures = [asyncio.wrap_future(self.schedule(p)) for p in skill_packages]
+        results = await asyncio.gather(*futures, return_exceptions=True)
+        return [r if isinstance(r, ImageRecord) else None for r in results]
+
+    def on_event(self, event: Any) -> None:
+        """ChainListener 回调：SKILL_REGISTERED / SKILL_UPDATED 时后台预拉取"""
+        if event.event_type.value not in PREFETCH_EVENTS:
+            return
+        if self.package_resolver is None:
+            return
+        skill_package = self.package_resolver(event)
+        if skill_package and skill_package.get("runtime", {}).get("docker_image"):
+            self.schedule(skill_package)
+
+    # ------------------------------------------------------------------
+    # 订单关键路径
+    # ------------------------------------------------------------------
+
+    def resolve(self, skill_package: dict) -> str:
+        """
+        解析为已就绪镜像的 image id 并标记为使用中
+
+        Raises:
+            ImageNotReadyError: 镜像未就绪 (已调度后台拉取，订单不等待)
+        """
+        reference = skill_package.get("runtime", {})["docker_image"]
+        with self._lock:
+            record = self._records.get(reference)
+            if record is not None:
+                record.in_use += 1
+                record.use_count += 1
+                record.last_used = time.monotonic()
+                return record.image_id
+
+        self.schedule(skill_package)
+        raise ImageNotReadyError(f"Image {reference} is not prefetched yet; pull scheduled")
+
+    def ready(self, skill_package: dict) -> bool:
+        """镜像是否已就绪 (resolve() 不会失败)"""
+        reference = skill_package.get("runtime", {})["docker_image"]
+        with self._lock:
+            return reference in self._records
+
+    def release(self, skill_package: dict) -> None:
+        """执行结束后释放使用计数"""
+        reference = skill_package.get("runtime", {})["docker_image"]
+        with self._lock:
+            record = self._records.get(reference)
+            if record is not None and record.in_use > 0:
+                record.in_use -= 1
+
+    # ------------------------------------------------------------------
+    # 淘汰
+    # ------------------------------------------------------------------
+
+    def disk_usage(self) -> int:
+        """
+        Docker 镜像实际磁盘占用 (字节)
+
+        取 docker system df 的 LayersSize (共享层只计一次，含非托管镜像)；
+        查询失败时退化为托管镜像大小之和。
+        """
+        try:
+            return int(self.client.df()["LayersSize"])
+        except Exception as e:
+            logger.warning(f"docker system df failed, using tracked image sizes: {e}")
+            with self._lock:
+                return sum(r.size_bytes for r in self._records.values())
+
+    def evict(self, keep: Optional[str] = None) -> List[str]:
+        """
+        磁盘占用超出 max_disk_bytes 时按 LRU 淘汰未在使用中的托管镜像
+
+        每删除一个镜像后重新测量占用 (与其他镜像共享的层不会释放)，降到预算内即停止。
+
+        Args:
+            keep: 不参与淘汰的镜像 reference (如刚完成预拉取的镜像)
+
+        Returns:
+            被淘汰的镜像 reference 列表
+        """
+        if self.max_disk_bytes is None:
+            return []
+
+        evicted: List[str] = []
+        while self.disk_usage() > self.max_disk_bytes:
+            with self._lock:
+                candidates = [r for r in self._records.values() if r.in_use == 0 and r.reference != keep]
+                if not candidates:
+                    logger.warning("Image disk usage over budget, no idle images to evict")
+                    break
+                record = min(candidates, key=lambda r: (r.last_used, r.use_count))
+                del self._records[record.reference]
+
+            try:
+                self.client.images.remove(record.image_id)
+                logger.info(f"Evicted image: {record.reference}")
+            except Exception as e:
+                logger.warning(f"Failed to remove image {record.reference}: {e}")
+            evicted.append(record.reference)
+        return evicted
+
+    def records(self) -> List[ImageRecord]:
+        """当前已就绪镜像"""
+        with self._lock:
+            return list(self._records.values())
+
+    def close(self) -> None:
+        """关闭后台线程池"""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Global manager instance (optional)
+_manager: Optional[ImageManager] = None
+
+
+def get_image_manager() -> Optional[ImageManager]:
+    """获取全局镜像管理器 (未配置时返回 None，沿用镜像名直接执行)"""
+    return _manager
+
+
+def set_image_manager(manager: Optional[ImageManager]) -> None:
+    """设置全局镜像管理器"""
+    global _manager
+    _manager = manager
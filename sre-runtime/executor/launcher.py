@@ -0,0 +1,43 @@
+"""
+Exo Protocol - Skill Launcher
+
+process 后端的子进程入口。
+
+父进程直接 spawn 本脚本 (不使用 preexec_fn，多线程下安全)，由子进程自身
+应用资源限制与隔离，然后在同一解释器中以 __main__ 运行 Skill 入口脚本。
+与 "python -I <script>" 相比只多导入 limits 模块，不多启动一次解释器。
+
+本模块只依赖标准库；作为脚本运行时从同目录导入 limits。
+
+Usage (由 ProcessSandboxBackend 启动):
+    python -I executor/launcher.py <script> <mem_bytes> <cpu_seconds> [--no-network]
+"""
+
+import os
+import runpy
+import sys
+
+LAUNCHER_SCRIPT = os.path.abspath(__file__)
+
+
+def main() -> None:
+    """应用限制后运行 Skill 脚本"""
+    sys.path.insert(0, os.path.dirname(LAUNCHER_SCRIPT))
+    from limits import apply_rlimits, install_seccomp, unshare_network
+
+    # 恢复 "python -I <script>" 的 sys.path / sys.modules，避免遮蔽 Skill 自己的模块
+    sys.path.pop(0)
+    del sys.modules["limits"]
+
+    script, mem_bytes, cpu_seconds = sys.argv[1], int(sys.argv[2]), int(sys.argv[3])
+    apply_rlimits(mem_bytes, cpu_seconds)
+    if "--no-network" in sys.argv[4:]:
+        unshare_network()
+    install_seccomp()
+
+    sys.argv = [script]
+    runpy.run_path(script, run_name="__main__")
+
+
+if __name__ == "__main__":
+    main()
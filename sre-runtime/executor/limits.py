@@ -0,0 +1,84 @@
+"""
+Exo Protocol - Sandbox Resource Limits
+
+子进程沙盒 (process / forkserver 后端) 共用的隔离原语。
+
+本模块只依赖标准库，可被 zygote 进程以脚本方式直接导入。
+"""
+
+import ctypes
+import errno
+import os
+import resource
+
+# unshare(2) flags
+CLONE_NEWUSER = 0x10000000
+CLONE_NEWNET = 0x40000000
+
+MAX_OPEN_FILES = 64
+MAX_FILE_SIZE = 16 * 1024 * 1024  # 16MB
+
+# 子进程环境变量 (不继承宿主环境，避免泄露密钥)
+SANDBOX_ENV = {
+    "PATH": "/usr/bin:/bin",
+    "LANG": "C.UTF-8",
+    "PYTHONIOENCODING": "utf-8",
+    "PYTHONDONTWRITEBYTECODE": "1",
+}
+
+# seccomp 拦截的系统调用
+_SECCOMP_DENIED_SYSCALLS = (
+    "ptrace", "mount", "umount2", "pivot_root", "chroot", "reboot",
+    "kexec_load", "init_module", "finit_module", "delete_module",
+    "setns", "unshare", "bpf", "perf_event_open",
+)
+
+
+def parse_mem_limit(mem_limit: str) -> int:
+    """
+    解析 Docker 风格的内存限制 ("512m", "1g", "65536k", "1048576")
+
+    Returns:
+        int: 字节数
+    """
+    units = {"b": 1, "k": 1024, "m": 1024 ** 2, "g": 1024 ** 3}
+    value = str(mem_limit).strip().lower()
+    if value and value[-1] in units:
+        return int(float(value[:-1]) * units[value[-1]])
+    return int(value)
+
+
+def apply_rlimits(mem_bytes: int, cpu_seconds: int) -> None:
+    """设置地址空间、CPU 时间、文件描述符、文件大小与 core dump 限制"""
+    resource.setrlimit(resource.RLIMIT_AS, (mem_bytes, mem_bytes))
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+    resource.setrlimit(resource.RLIMIT_NOFILE, (MAX_OPEN_FILES, MAX_OPEN_FILES))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (MAX_FILE_SIZE, MAX_FILE_SIZE))
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+
+
+def unshare_network() -> None:
+    """进入新的 network namespace；非 root 时借助 user namespace"""
+    libc = ctypes.CDLL(None, use_errno=True)
+    if libc.unshare(CLONE_NEWNET) == 0:
+        return
+    if libc.unshare(CLONE_NEWUSER | CLONE_NEWNET) == 0:
+        return
+    err = ctypes.get_errno()
+    raise OSError(err, f"Network isolation unavailable: {os.strerror(err)}")
+
+
+def install_seccomp() -> None:
+    """安装 seccomp 过滤器 (可选依赖，未安装时跳过)"""
+    try:
+        import seccomp
+    except ImportError:
+        return
+
+    f = seccomp.SyscallFilter(defaction=seccomp.ALLOW)
+    for name in _SECCOMP_DENIED_SYSCALLS:
+        f.add_rule(seccomp.ERRNO(errno.EPERM), name)
+    # 禁止创建 IPv4/IPv6 socket (AF_UNIX 等不受影响)
+    for family in (2, 10):  # AF_INET, AF_INET6
+        f.add_rule(seccomp.ERRNO(errno.EACCES), "socket", seccomp.Arg(0, seccomp.EQ, family))
+    f.load()
@@ -0,0 +1,199 @@
+"""
+Exo Protocol - Process Sandbox Backend
+
+轻量级子进程沙盒后端，用于受信任的纯 Python Skill。
+
+相比 Docker 后端省去了容器创建/启动开销，隔离手段为:
+- rlimits: 地址空间 (mem_limit)、CPU 时间 (timeout)、文件描述符、core dump
+- Linux network namespace: network_disabled 时 unshare(CLONE_NEWNET)，子进程只有 lo
+- seccomp: 安装了 libseccomp Python 绑定 (seccomp 模块) 时拦截危险系统调用和 IP socket
+- 隔离模式解释器 (python -I)、最小环境变量、独立进程组
+
+限制由子进程经 launcher.py 自行应用 (不使用 preexec_fn)；资源消耗通过
+自有的 os.wait4 回收获得。
+
+NOTE: rlimits 无法表达 CPU 配额比例 (cpu_quota / cpu_period)，该字段仅由 Docker 后端执行。
+"""
+
+import math
+import os
+import select
+import selectors
+import signal
+import subprocess
+import sys
+import time
+from typing import List, Optional, Tuple
+
+from metrics import SPAN_CONTAINER_CREATE, SPAN_SKILL_RUNTIME
+
+from .launcher import LAUNCHER_SCRIPT
+from .limits import SANDBOX_ENV, parse_mem_limit
+from .sandbox import CancelToken, ResourceUsage, SandboxBackend, SandboxConfig, SandboxReport
+
+
+def resolve_entrypoint(skill_package: dict) -> str:
+    """
+    解析 Skill 入口脚本的宿主路径
+
+    process 后端在宿主上直接执行 Skill 代码，需要 skill_package["path"]
+    (或 runtime.workdir) 指向 Skill 目录。
+
+    Raises:
+        ValueError: 未提供 Skill 目录或入口脚本越界
+    """
+    runtime = skill_package.get("runtime", {})
+    skill_dir = skill_package.get("path") or runtime.get("workdir")
+    if not skill_dir:
+        raise ValueError("Process sandbox requires skill_package['path'] (local skill directory)")
+
+    skill_dir = os.path.realpath(skill_dir)
+    script = os.path.realpath(os.path.join(skill_dir, runtime["entrypoint"]))
+    if os.path.commonpath([skill_dir, script]) != skill_dir:
+        raise ValueError(f"Entrypoint escapes skill directory: {runtime['entrypoint']}")
+    return script
+
+
+def launch_args(python: str, script: str, config: SandboxConfig, timeout: float) -> List[str]:
+    """
+    启动 Skill 的命令行 (launcher 应用限制后运行入口脚本)
+
+    Args:
+        python: 解释器
+        script: 入口脚本
+        config: 沙盒配置 (mem_limit / network_disabled)
+        timeout: 超时时间，同时作为 CPU 时间上限
+    """
+    args = [
+        python, "-I", LAUNCHER_SCRIPT, script,
+        str(parse_mem_limit(config.mem_limit)), str(max(1, math.ceil(timeout))),
+    ]
+    if config.network_disabled:
+        args.append("--no-network")
+    return args
+
+
+def _kill_group(proc: subprocess.Popen) -> None:
+    """杀死 Skill 进程组 (含其子进程)"""
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def _communicate(proc: subprocess.Popen, payload: bytes, timeout: float) -> Tuple[bytes, bytes, bool]:
+    """
+    写入 stdin 并读取 stdout / stderr 直到 EOF 或超时 (不回收子进程)
+
+    Returns:
+        (stdout, stderr, timed_out)
+    """
+    deadline = time.monotonic() + timeout
+    output = {proc.stdout: [], proc.stderr: []}
+    view = memoryview(payload)
+    with selectors.DefaultSelector() as selector:
+        if view:
+            selector.register(proc.stdin, selectors.EVENT_WRITE)
+        else:
+            proc.stdin.close()
+        for pipe in output:
+            selector.register(pipe, selectors.EVENT_READ)
+
+        while selector.get_map():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            for key, _ in selector.select(remaining):
+                pipe = key.fileobj
+                if pipe is proc.stdin:
+                    try:
+                        view = view[os.write(pipe.fileno(), view[:select.PIPE_BUF]):]
+                    except BrokenPipeError:
+                        view = view[:0]
+                    if not view:
+                        selector.unregister(pipe)
+                        pipe.close()
+                    continue
+                chunk = os.read(pipe.fileno(), 1 << 16)
+                if chunk:
+                    output[pipe].append(chunk)
+                else:
+                    selector.unregister(pipe)
+        timed_out = bool(selector.get_map())
+
+    for pipe in (proc.stdin, proc.stdout, proc.stderr):
+        pipe.close()
+    return b"".join(output[proc.stdout]), b"".join(output[proc.stderr]), timed_out
+
+
+class ProcessSandboxBackend(SandboxBackend):
+    """
+    受限子进程后端
+
+    通过 runtime.sandbox_backend = "process" 或 SandboxConfig(backend="process") 选择。
+    """
+
+    def __init__(self, python: Optional[str] = None):
+        """
+        Args:
+            python: 执行 Skill 的解释器 (默认当前解释器)
+        """
+        self.python = python or sys.executable
+
+    def run(
+        self,
+        skill_package: dict,
+        payload: bytes,
+        config: SandboxConfig,
+        timeout: float,
+        report: SandboxReport,
+        cancel_token: Optional[CancelToken] = None,
+        order_id: Optional[str] = None,
+    ) -> bytes:
+        script = resolve_entrypoint(skill_package)
+
+        started = time.perf_counter()
+        proc = subprocess.Popen(
+            launch_args(self.python, script, config, timeout),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=os.path.dirname(script),
+            env=SANDBOX_ENV,
+            close_fds=True,
+            start_new_session=True,
+        )
+        spawned = time.perf_counter()
+        report.timings.add(SPAN_CONTAINER_CREATE, started, (spawned - started) * 1000)
+        unregister = cancel_token.on_cancel(lambda: _kill_group(proc)) if cancel_token else None
+
+        try:
+            stdout, stderr, timed_out = _communicate(proc, payload, timeout)
+            if timed_out:
+                _kill_group(proc)
+            # 自行回收以获得 rusage (CPU 时间 / 峰值 RSS / 块 I/O)；置 returncode 后 Popen 不再回收
+            _, status, rusage = os.wait4(proc.pid, 0)
+            proc.returncode = os.waitstatus_to_exitcode(status)
+        except BaseException:
+            _kill_group(proc)
+            proc.wait()
+            raise
+        finally:
+            report.timings.add(SPAN_SKILL_RUNTIME, spawned, (time.perf_counter() - spawned) * 1000)
+            if unregister is not None:
+                unregister()
+
+        wall_time_ms = int((time.perf_counter() - started) * 1000)
+        report.usage = ResourceUsage.from_rusage(rusage, wall_time_ms)
+        if timed_out:
+            report.timed_out = True
+            raise RuntimeError(f"Process timed out after {timeout}s")
+
+        if proc.returncode != 0:
+            logs = stderr.decode("utf-8", errors="replace")
+            if report.usage is not None and "MemoryError" in logs:
+                # RLIMIT_AS 触发的 MemoryError 等同于容器 OOM
+                report.usage.oom_killed = True
+            raise RuntimeError(f"Process exited with code {proc.returncode}: {logs}")
+
+        return stdout
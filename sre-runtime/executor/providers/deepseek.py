@@ -1,12 +1,13 @@
 # Exo Protocol - DeepSeek AI Provider
 # OpenAI-compatible API implementation for DeepSeek
 
-import json
 import logging
 from typing import Dict, Any
 
 import httpx
 
+from codec import JSONDecodeError, dumps, loads
+
 from . import AIProvider
 
 logger = logging.getLogger(__name__)
@@ -58,7 +59,7 @@ class DeepSeekProvider(AIProvider):
                         "model": self.model,
                         "messages": [
                             {"role": "system", "content": system_prompt},
-                            {"role": "user", "content": json.dumps(user_input, ensure_ascii=False)}
+                            {"role": "user", "content": dumps(user_input)}
                         ],
                         "max_tokens": 4096,
                         "temperature": 0.7
@@ -76,8 +77,8 @@ class DeepSeekProvider(AIProvider):
                 try:
                     # 清理 markdown 代码块 (如果存在)
                     cleaned_content = result_content.replace("```json", "").replace("```", "").strip()
-                    parsed_result = json.loads(cleaned_content)
-                except json.JSONDecodeError:
+                    parsed_result = loads(cleaned_content)
+                except JSONDecodeError:
                     logger.warning("Failed to parse JSON from AI response, returning raw content")
                     parsed_result = {"raw_response": result_content}
                 
@@ -155,7 +156,7 @@ class OpenAICompatibleProvider(AIProvider):
                     "model": self.model,
                     "messages": [
                         {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": json.dumps(user_input, ensure_ascii=False)}
+                        {"role": "user", "content": dumps(user_input)}
                     ],
                     "max_tokens": 4096,
                     "temperature": 0.7
@@ -170,8 +171,8 @@ class OpenAICompatibleProvider(AIProvider):
             logger.info(f"OpenAI-compatible execution completed. Model: {self.model}, Tokens: {tokens_used}")
             
             try:
-                parsed_result = json.loads(result_content)
-            except json.JSONDecodeError:
+                parsed_result = loads(result_content)
+            except JSONDecodeError:
                 parsed_result = {"raw_response": result_content}
             
             return {
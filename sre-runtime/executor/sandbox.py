@@ -5,9 +5,70 @@ Exo Protocol - Docker Sandbox Executor
 """
 
 import docker
-import json
-from dataclasses import dataclass
-from typing import Any, Optional
+import requests
+import logging
+import os
+import shlex
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from codec import canonical_dumps, exact_loads, sort_keys
+from metrics import (
+    SPAN_CONTAINER_CREATE,
+    SPAN_CONTAINER_REMOVE,
+    SPAN_OUTPUT_PARSING,
+    SPAN_SKILL_RUNTIME,
+    SPAN_VALIDATION,
+    StageTimings,
+    get_sink,
+)
+
+from .images import get_image_manager
+
+logger = logging.getLogger(__name__)
+
+
+# 沙盒后端
+BACKEND_DOCKER = "docker"    # Docker 容器 (默认)
+BACKEND_PROCESS = "process"  # 受限子进程 (仅限受信任的纯 Python Skill)
+BACKEND_FORKSERVER = "forkserver"  # 预导入 Skill 的 zygote fork 子进程 (同上)
+
+# 输入传递方式
+INPUT_TRANSPORT_STDIN = "stdin"  # 通过容器 stdin 流式写入 (默认)
+INPUT_TRANSPORT_FILE = "file"    # 宿主临时文件只读挂载
+INPUT_TRANSPORT_SHM = "shm"      # /dev/shm 共享内存段只读挂载
+INPUT_TRANSPORT_ENV = "env"      # 旧版 INPUT_JSON 环境变量 (兼容)
+
+INPUT_TRANSPORTS = (
+    INPUT_TRANSPORT_STDIN,
+    INPUT_TRANSPORT_FILE,
+    INPUT_TRANSPORT_SHM,
+    INPUT_TRANSPORT_ENV,
+)
+
+# 容器内输入文件挂载路径 (file / shm 模式)
+CONTAINER_INPUT_PATH = "/run/exo/input.json"
+
+# 共享内存目录 (tmpfs)
+SHM_DIR = "/dev/shm"
+
+# 容器标签 (用于取消与孤儿容器回收)
+LABEL_MANAGED = "exo.managed"
+LABEL_ORDER_ID = "exo.order_id"
+LABEL_INSTANCE = "exo.instance"
+# 当前运行时实例标识: 标签不同的受管容器属于已退出的进程
+INSTANCE_ID = uuid.uuid4().hex
+
+MAX_INPUT_BYTES = 100_000  # 100KB 默认限制
+MAX_INPUT_FIELDS = 20
+# 环境变量受 ARG_MAX 等限制，env 模式始终使用默认上限
+MAX_ENV_INPUT_BYTES = 100_000
 
 
 @dataclass
@@ -18,83 +79,580 @@ class SandboxConfig:
     cpu_quota: int = 50000  # 50% CPU
     timeout_seconds: int = 30
     network_disabled: bool = True
+    input_transport: str = INPUT_TRANSPORT_STDIN  # "stdin" | "file" | "shm" | "env"
+    max_input_bytes: int = MAX_INPUT_BYTES
+    input_dir: Optional[str] = None  # file 模式的宿主目录 (默认系统临时目录)
+    backend: str = BACKEND_DOCKER  # "docker" | "process" | "forkserver"，可由 runtime.sandbox_backend 覆盖
+
+
+class SandboxCancelledError(RuntimeError):
+    """沙盒执行被取消 (容器 / 进程已被终止)"""
+
+
+class CancelToken:
+    """
+    协作式取消令牌
+
+    后端通过 on_cancel 注册终止回调 (kill 容器 / 进程组)，
+    cancel() 在调用线程中立即执行这些回调；取消后注册的回调会被立即执行。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._callbacks: List[Callable[[], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def cancel(self) -> None:
+        """取消并执行所有已注册的回调 (幂等)"""
+        with self._lock:
+            if self._cancelled:
+                return
+            self._cancelled = True
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            _run_cancel_callback(callback)
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        注册取消回调
+
+        Returns:
+            注销函数 (执行结束后调用)
+        """
+        with self._lock:
+            if not self._cancelled:
+                self._callbacks.append(callback)
+                return lambda: self._unregister(callback)
+        _run_cancel_callback(callback)
+        return lambda: None
+
+    def _unregister(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def raise_if_cancelled(self) -> None:
+        if self._cancelled:
+            raise SandboxCancelledError("Sandbox execution cancelled")
+
+
+def _run_cancel_callback(callback: Callable[[], None]) -> None:
+    try:
+        callback()
+    except Exception as e:
+        logger.warning(f"Cancel callback failed: {e}")
+
+
+@dataclass
+class ResourceUsage:
+    """单次沙盒执行的资源消耗"""
+    cpu_time_ms: int = 0
+    peak_memory_bytes: int = 0
+    io_read_bytes: int = 0
+    io_write_bytes: int = 0
+    wall_time_ms: int = 0
+    oom_killed: bool = False
+
+    @classmethod
+    def from_rusage(cls, rusage: Any, wall_time_ms: int = 0) -> "ResourceUsage":
+        """由 os.wait4 / getrusage 结果构造 (Linux: ru_maxrss 单位 KB，块大小 512B)"""
+        return cls(
+            cpu_time_ms=int((rusage.ru_utime + rusage.ru_stime) * 1000),
+            peak_memory_bytes=int(rusage.ru_maxrss) * 1024,
+            io_read_bytes=int(rusage.ru_inblock) * 512,
+            io_write_bytes=int(rusage.ru_oublock) * 512,
+            wall_time_ms=wall_time_ms,
+        )
+
+
+@dataclass
+class SandboxReport:
+    """
+    沙盒执行报告 (由 execute_in_sandbox 填充的输出参数)
+
+    Attributes:
+        backend: 实际使用的后端
+        usage: 资源消耗 (后端无法采集时为 None)
+        timed_out: 是否因超时被终止
+        timings: 各阶段耗时 (校验 / 容器创建 / Skill 运行 / 输出解析等，后端应记录创建与运行阶段)
+    """
+    backend: str = ""
+    usage: Optional[ResourceUsage] = None
+    timed_out: bool = False
+    timings: StageTimings = field(default_factory=StageTimings)
+
+
+def skill_key(skill_package: dict) -> str:
+    """Skill 标识 (name@version)，用于按 Skill 聚合指标"""
+    name = skill_package.get("name") or skill_package.get("runtime", {}).get("docker_image", "unknown")
+    version = skill_package.get("version")
+    return f"{name}@{version}" if version else name
+
+
+def backend_name_for(skill_package: dict, config: SandboxConfig) -> str:
+    """Skill 实际使用的后端名称 (runtime.sandbox_backend 优先于 config.backend)"""
+    return skill_package.get("runtime", {}).get("sandbox_backend", config.backend)
+
+
+def record_usage(skill_package: dict, backend: str, usage: ResourceUsage) -> None:
+    """将资源消耗写入 metrics sink"""
+    sink = get_sink()
+    tags = {"skill": skill_key(skill_package), "backend": backend}
+    sink.observe("sandbox.cpu_time_ms", usage.cpu_time_ms, tags)
+    sink.observe("sandbox.peak_memory_bytes", usage.peak_memory_bytes, tags)
+    sink.observe("sandbox.io_read_bytes", usage.io_read_bytes, tags)
+    sink.observe("sandbox.io_write_bytes", usage.io_write_bytes, tags)
+    sink.observe("sandbox.wall_time_ms", usage.wall_time_ms, tags)
+    if usage.oom_killed:
+        sink.increment("sandbox.oom_killed", 1, tags)
 
 
-def validate_input(input_data: dict) -> None:
+def serialize_input(input_data: dict) -> bytes:
+    """
+    规范化序列化输入数据
+
+    Args:
+        input_data: 输入数据字典
+
+    Returns:
+        bytes: UTF-8 编码的 JSON
+    """
+    # NOTE: sorted keys ensure deterministic hashing for Challenger verification
+    return canonical_dumps(input_data, compact=False).encode("utf-8")
+
+
+def _check_input(input_data: dict, payload: bytes, max_bytes: int) -> None:
+    """校验已序列化的输入 (避免重复序列化)"""
+    if len(payload) > max_bytes:
+        raise ValueError(f"Input too large (max {max_bytes // 1000}KB)")
+    if len(input_data.keys()) > MAX_INPUT_FIELDS:  # 最大属性数限制
+        raise ValueError(f"Too many input fields (max {MAX_INPUT_FIELDS})")
+
+
+def validate_input(input_data: dict, max_bytes: int = MAX_INPUT_BYTES) -> None:
     """
     验证输入数据安全性
-    
+
     Args:
         input_data: 输入数据字典
-        
+        max_bytes: 序列化后的最大字节数
+
     Raises:
         ValueError: 如果输入不符合安全限制
     """
-    input_json = json.dumps(input_data)
-    if len(input_json) > 100_000:  # 100KB 限制
-        raise ValueError("Input too large (max 100KB)")
-    if len(input_data.keys()) > 20:  # 最大属性数限制
-        raise ValueError("Too many input fields (max 20)")
+    _check_input(input_data, serialize_input(input_data), max_bytes)
+
+
+def _write_input_file(payload: bytes, directory: str) -> str:
+    """将输入写入宿主临时文件，返回路径"""
+    fd, path = tempfile.mkstemp(prefix="exo-input-", suffix=".json", dir=directory)
+    try:
+        os.write(fd, payload)
+    finally:
+        os.close(fd)
+    os.chmod(path, 0o444)
+    return path
+
+
+class SandboxBackend(ABC):
+    """沙盒后端抽象基类"""
+
+    def max_input_bytes(self, skill_package: dict, config: SandboxConfig) -> int:
+        """该后端允许的最大输入字节数"""
+        return config.max_input_bytes
+
+    @abstractmethod
+    def run(
+        self,
+        skill_package: dict,
+        payload: bytes,
+        config: SandboxConfig,
+        timeout: float,
+        report: SandboxReport,
+        cancel_token: Optional[CancelToken] = None,
+        order_id: Optional[str] = None,
+    ) -> bytes:
+        """
+        执行 Skill
+
+        Args:
+            skill_package: Skill 包配置
+            payload: 已规范化序列化的输入 (JSON bytes)
+            config: 沙盒配置
+            timeout: 超时时间 (秒)
+            report: 执行报告，后端应尽量填充 report.usage (失败时也应填充)
+            cancel_token: 取消令牌，后端应注册回调以立即终止执行
+            order_id: 订单 ID (用于标记容器等资源)
+
+        Returns:
+            Skill 的 stdout 原始字节
+
+        Raises:
+            RuntimeError: 执行失败
+        """
+        pass
+
+
+class _ContainerStatsSampler(threading.Thread):
+    """
+    后台读取 Docker stats 流，记录容器的 CPU 时间、峰值内存与块设备 I/O
+
+    cgroup v1 提供 memory_stats.max_usage；cgroup v2 只有 usage，取采样最大值。
+    """
+
+    def __init__(self, container: Any):
+        super().__init__(daemon=True, name="exo-stats")
+        self._container = container
+        self.cpu_ns = 0
+        self.peak_memory = 0
+        self.io_read = 0
+        self.io_write = 0
+
+    def run(self) -> None:
+        try:
+            for stats in self._container.stats(stream=True, decode=True):
+                self._update(stats)
+        except Exception as e:
+            logger.debug(f"Stats stream ended: {e}")
+
+    def _update(self, stats: dict) -> None:
+        cpu = stats.get("cpu_stats", {}).get("cpu_usage", {}).get("total_usage")
+        if cpu:
+            self.cpu_ns = max(self.cpu_ns, int(cpu))
+
+        memory = stats.get("memory_stats", {})
+        peak = memory.get("max_usage") or memory.get("usage") or 0
+        self.peak_memory = max(self.peak_memory, int(peak))
+
+        entries = (stats.get("blkio_stats") or {}).get("io_service_bytes_recursive") or []
+        read = sum(e.get("value", 0) for e in entries if str(e.get("op", "")).lower() == "read")
+        write = sum(e.get("value", 0) for e in entries if str(e.get("op", "")).lower() == "write")
+        self.io_read = max(self.io_read, read)
+        self.io_write = max(self.io_write, write)
+
+    def usage(self, wall_time_ms: int, oom_killed: bool) -> ResourceUsage:
+        return ResourceUsage(
+            cpu_time_ms=self.cpu_ns // 1_000_000,
+            peak_memory_bytes=self.peak_memory,
+            io_read_bytes=self.io_read,
+            io_write_bytes=self.io_write,
+            wall_time_ms=wall_time_ms,
+            oom_killed=oom_killed,
+        )
+
+
+class DockerSandboxBackend(SandboxBackend):
+    """
+    Docker 容器后端
+
+    输入传递方式由 runtime.input_transport 或 config.input_transport 决定:
+    - stdin: 创建容器后 attach stdin 流式写入，Skill 直接 json.load(sys.stdin)
+    - file / shm: 写入宿主临时文件 (shm 位于 tmpfs) 并只读挂载，重定向为 stdin
+    - env: 旧版 INPUT_JSON 环境变量，受环境大小限制
+
+    容器带有 exo.managed / exo.order_id / exo.instance 标签，首次执行前回收
+    此前进程遗留的受管容器 (见 reap_orphaned_containers)。
+    """
+
+    def __init__(self):
+        self._reaped = False
+
+    @staticmethod
+    def _transport(skill_package: dict, config: SandboxConfig) -> str:
+        transport = skill_package.get("runtime", {}).get("input_transport", config.input_transport)
+        if transport not in INPUT_TRANSPORTS:
+            raise ValueError(f"Unknown input transport: {transport}")
+        return transport
+
+    def max_input_bytes(self, skill_package: dict, config: SandboxConfig) -> int:
+        if self._transport(skill_package, config) == INPUT_TRANSPORT_ENV:
+            return min(config.max_input_bytes, MAX_ENV_INPUT_BYTES)
+        return config.max_input_bytes
+
+    def run(
+        self,
+        skill_package: dict,
+        payload: bytes,
+        config: SandboxConfig,
+        timeout: float,
+        report: SandboxReport,
+        cancel_token: Optional[CancelToken] = None,
+        order_id: Optional[str] = None,
+    ) -> bytes:
+        runtime = skill_package.get("runtime", {})
+        image = runtime["docker_image"]
+        entrypoint = runtime["entrypoint"]
+        transport = self._transport(skill_package, config)
+        manager = get_image_manager()
+
+        # 1. 按传输方式准备容器参数
+        command: Any = f"python {entrypoint}"
+        environment = {}
+        volumes = {}
+        input_path: Optional[str] = None
+
+        if transport == INPUT_TRANSPORT_ENV:
+            environment["INPUT_JSON"] = payload.decode("utf-8")
+        elif transport in (INPUT_TRANSPORT_FILE, INPUT_TRANSPORT_SHM):
+            directory = SHM_DIR if transport == INPUT_TRANSPORT_SHM else config.input_dir
+            input_path = _write_input_file(payload, directory)
+            volumes[input_path] = {"bind": CONTAINER_INPUT_PATH, "mode": "ro"}
+            environment["EXO_INPUT_PATH"] = CONTAINER_INPUT_PATH
+            command = [
+                "sh", "-c",
+                f"exec python {shlex.quote(entrypoint)} < {CONTAINER_INPUT_PATH}",
+            ]
+
+        container = None
+        unregister: Optional[Callable[[], None]] = None
+        sampler: Optional[_ContainerStatsSampler] = None
+        started = 0.0
+        resolved = False
+        create_start = time.perf_counter()
+        try:
+            # 2. 创建并启动容器 (配置镜像管理器时使用预拉取的 image id，不触发拉取)
+            if manager is not None:
+                image = manager.resolve(skill_package)
+                resolved = True
+            client = docker.from_env()
+            if not self._reaped:
+                self._reaped = True
+                reap_orphaned_containers(client)
+            container = client.containers.create(
+                image=image,
+                command=command,
+                environment=environment,
+                volumes=volumes,
+                stdin_open=transport == INPUT_TRANSPORT_STDIN,
+                stdin_once=transport == INPUT_TRANSPORT_STDIN,
+                mem_limit=config.mem_limit,
+                cpu_period=config.cpu_period,
+                cpu_quota=config.cpu_quota,
+                network_disabled=config.network_disabled,
+                labels={
+                    LABEL_MANAGED: "true",
+                    LABEL_ORDER_ID: order_id or "",
+                    LABEL_INSTANCE: INSTANCE_ID,
+                },
+            )
+
+            sampler = _ContainerStatsSampler(container)
+            if transport == INPUT_TRANSPORT_STDIN:
+                # 先 attach 再 start，确保输入不会丢失
+                sock = container.attach_socket(params={"stdin": 1, "stream": 1})
+                container.start()
+                started = time.perf_counter()
+                sampler.start()
+                unregister = _kill_on_cancel(cancel_token, container)
+                raw = getattr(sock, "_sock", sock)
+                try:
+                    raw.sendall(payload)
+                    # 半关闭写端: Skill 的 json.load(sys.stdin) 读到 EOF
+                    raw.shutdown(socket.SHUT_WR)
+                finally:
+                    sock.close()
+            else:
+                container.start()
+                started = time.perf_counter()
+                sampler.start()
+                unregister = _kill_on_cancel(cancel_token, container)
+
+            # 3. 等待执行完成
+            try:
+                result = container.wait(timeout=timeout)
+            except (requests.exceptions.ReadTimeout, requests.exceptions.ConnectionError):
+                report.timed_out = True
+                raise
+            exit_code = result.get("StatusCode", -1)
+
+            if exit_code != 0:
+                logs = container.logs().decode("utf-8")
+                raise RuntimeError(f"Container exited with code {exit_code}: {logs}")
+
+            # 4. 获取输出
+            return container.logs(stdout=True, stderr=False)
+        finally:
+            finished = time.perf_counter()
+            if unregister is not None:
+                unregister()
+            if started:
+                report.timings.add(SPAN_CONTAINER_CREATE, create_start, (started - create_start) * 1000)
+                report.timings.add(SPAN_SKILL_RUNTIME, started, (finished - started) * 1000)
+            else:
+                report.timings.add(SPAN_CONTAINER_CREATE, create_start, (finished - create_start) * 1000)
+            if sampler is not None and started:
+                wall_time_ms = int((finished - started) * 1000)
+                sampler.join(timeout=1.0)
+                report.usage = sampler.usage(wall_time_ms, _oom_killed(container))
+            if container is not None:
+                with report.timings.span(SPAN_CONTAINER_REMOVE):
+                    container.remove(force=True)
+            if resolved:
+                manager.release(skill_package)
+            if input_path is not None:
+                try:
+                    os.unlink(input_path)
+                except OSError:
+                    pass
+
+
+def _kill_on_cancel(cancel_token: Optional[CancelToken], container: Any) -> Optional[Callable[[], None]]:
+    """取消时立即 kill 容器 (容器随后在 finally 中删除)"""
+    if cancel_token is None:
+        return None
+    return cancel_token.on_cancel(container.kill)
+
+
+def reap_orphaned_containers(client: Any = None, order_ids: Optional[List[str]] = None) -> int:
+    """
+    删除遗留的受管容器
+
+    默认删除不属于当前运行时实例的全部受管容器 (进程崩溃 / 被杀死后遗留)；
+    指定 order_ids 时只删除对应订单的容器 (不论所属实例)。
+
+    NOTE: 假设每个 Docker 主机只运行一个 SRE 运行时。
+
+    Returns:
+        删除的容器数量
+    """
+    try:
+        client = client or docker.from_env()
+        containers = client.containers.list(all=True, filters={"label": f"{LABEL_MANAGED}=true"})
+    except Exception as e:
+        logger.warning(f"Failed to list sandbox containers: {e}")
+        return 0
+
+    removed = 0
+    for container in containers:
+        labels = container.labels or {}
+        if order_ids is not None:
+            if labels.get(LABEL_ORDER_ID) not in order_ids:
+                continue
+        elif labels.get(LABEL_INSTANCE) == INSTANCE_ID:
+            continue
+        try:
+            container.remove(force=True)
+            removed += 1
+            logger.info(f"Removed orphaned sandbox container {container.id} (order {labels.get(LABEL_ORDER_ID)})")
+        except Exception as e:
+            logger.warning(f"Failed to remove container {container.id}: {e}")
+    return removed
+
+
+def _oom_killed(container: Any) -> bool:
+    """容器是否因超出 mem_limit 被 OOM killer 终止"""
+    try:
+        container.reload()
+        return container.attrs.get("State", {}).get("OOMKilled") is True
+    except Exception:
+        return False
+
+
+# 已注册的沙盒后端
+_backends: Dict[str, SandboxBackend] = {}
+
+
+def register_backend(name: str, backend: SandboxBackend) -> None:
+    """
+    注册沙盒后端
+
+    Args:
+        name: 后端名称 (runtime.sandbox_backend / SandboxConfig.backend 取值)
+        backend: SandboxBackend 实例
+    """
+    _backends[name] = backend
+
+
+def get_backend(name: str) -> SandboxBackend:
+    """
+    获取沙盒后端
+
+    Raises:
+        ValueError: 未注册的后端
+    """
+    try:
+        return _backends[name]
+    except KeyError:
+        raise ValueError(f"Unknown sandbox backend: {name}") from None
 
 
 def execute_in_sandbox(
-    skill_package: dict, 
+    skill_package: dict,
     input_data: dict,
-    config: Optional[SandboxConfig] = None
+    config: Optional[SandboxConfig] = None,
+    report: Optional[SandboxReport] = None,
+    order_id: Optional[str] = None,
+    cancel_token: Optional[CancelToken] = None,
 ) -> dict:
     """
-    在隔离 Docker 容器中执行 Skill
-    
+    在隔离沙盒中执行 Skill
+
+    后端由 runtime.sandbox_backend 或 config.backend 选择 (默认 Docker)。
+    资源消耗写入 report.usage 并记录到 metrics sink。
+
     Args:
         skill_package: Skill 包配置，包含 runtime 信息
         input_data: 输入数据
         config: 沙盒配置，使用默认值如果未提供
-        
+        report: 执行报告 (输出参数，可选)
+        order_id: 订单 ID (标记容器，便于回收)
+        cancel_token: 取消令牌，cancel() 时立即终止容器 / 进程
+
     Returns:
         dict: 执行结果
-        
+
     Raises:
         ValueError: 输入验证失败
         RuntimeError: 容器执行失败
+        SandboxCancelledError: 执行被取消
     """
     config = config or SandboxConfig()
-    
-    # 0. 输入验证
-    validate_input(input_data)
-    
+
     # 1. 获取运行时配置
     runtime = skill_package.get("runtime", {})
-    image = runtime["docker_image"]
-    entrypoint = runtime["entrypoint"]
+    backend_name = backend_name_for(skill_package, config)
+    backend = get_backend(backend_name)
     timeout = runtime.get("timeout_seconds", config.timeout_seconds)
-    
-    # 2. 启动容器并执行
-    client = docker.from_env()
-    container = client.containers.run(
-        image=image,
-        command=f"python {entrypoint}",
-        # NOTE: sort_keys=True ensures deterministic hashing for Challenger verification
-        environment={"INPUT_JSON": json.dumps(input_data, sort_keys=True)},
-        mem_limit=config.mem_limit,
-        cpu_period=config.cpu_period,
-        cpu_quota=config.cpu_quota,
-        network_disabled=config.network_disabled,
-        detach=True,
-    )
-    
+    report = report if report is not None else SandboxReport()
+    report.backend = backend_name
+
+    # 2. 输入验证 (只序列化一次)
+    with report.timings.span(SPAN_VALIDATION):
+        payload = serialize_input(input_data)
+        _check_input(input_data, payload, backend.max_input_bytes(skill_package, config))
+
+    # 3. 执行 (失败时同样记录资源消耗)
+    if cancel_token is not None:
+        cancel_token.raise_if_cancelled()
     try:
-        # 3. 等待执行完成
-        result = container.wait(timeout=timeout)
-        exit_code = result.get("StatusCode", -1)
-        
-        if exit_code != 0:
-            logs = container.logs().decode("utf-8")
-            raise RuntimeError(f"Container exited with code {exit_code}: {logs}")
-        
-        # 4. 获取输出并规范化 (确保哈希一致性)
-        output = container.logs().decode("utf-8")
-        result = json.loads(output)
-        # NOTE: sort_keys=True ensures deterministic hashing for Challenger verification
-        return json.loads(json.dumps(result, sort_keys=True))
+        stdout = backend.run(
+            skill_package, payload, config, timeout, report,
+            cancel_token=cancel_token, order_id=order_id,
+        )
+    except Exception as e:
+        if cancel_token is not None and cancel_token.cancelled:
+            raise SandboxCancelledError("Sandbox execution cancelled") from e
+        raise
     finally:
-        container.remove(force=True)
+        if report.usage is not None:
+            record_usage(skill_package, backend_name, report.usage)
+
+    # 4. 规范化输出 (确保哈希一致性)
+    # NOTE: sorted keys ensure deterministic hashing for Challenger verification
+    with report.timings.span(SPAN_OUTPUT_PARSING):
+        return sort_keys(exact_loads(stdout.decode("utf-8")))
+
+
+register_backend(BACKEND_DOCKER, DockerSandboxBackend())
+
+from .process_sandbox import ProcessSandboxBackend  # noqa: E402
+
+register_backend(BACKEND_PROCESS, ProcessSandboxBackend())
+
+from .forkserver import ForkServerSandboxBackend  # noqa: E402
+
+register_backend(BACKEND_FORKSERVER, ForkServerSandboxBackend())
@@ -0,0 +1,192 @@
+"""
+Exo Protocol - Skill Zygote
+
+forkserver 后端的 zygote 进程入口。
+
+zygote 启动时导入一次 Skill 模块 (不执行 __main__ 分支)，之后每个请求
+fork 一个子进程: 子进程设置资源限制、把输入替换为 sys.stdin、捕获 stdout/stderr
+并调用 Skill 的 main()。解释器启动与模块导入 (json / re / typing 等) 只发生一次。
+
+帧格式 (父进程 <-> zygote <-> 子进程):
+    >II (header 长度, body 长度) + JSON header + body
+
+本模块的帧读写函数只依赖标准库；作为脚本运行时从同目录导入 limits。
+
+Usage (由 ForkServer 启动):
+    python -I executor/zygote.py <script> [--no-network]
+"""
+
+import json
+import os
+import select
+import struct
+import sys
+import time
+from typing import Any, Dict, Optional, Tuple
+
+ZYGOTE_SCRIPT = os.path.abspath(__file__)
+
+_FRAME_HEADER = struct.Struct(">II")
+
+
+def _read_exact(fd: int, size: int, deadline: Optional[float]) -> bytes:
+    """从 fd 读取恰好 size 字节，超过 deadline 抛出 TimeoutError"""
+    chunks = []
+    remaining = size
+    while remaining > 0:
+        if deadline is not None:
+            wait = deadline - time.monotonic()
+            if wait <= 0 or not select.select([fd], [], [], wait)[0]:
+                raise TimeoutError("Timed out waiting for frame")
+        chunk = os.read(fd, min(remaining, 1 << 20))
+        if not chunk:
+            raise EOFError("Channel closed")
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+def read_frame(fd: int, deadline: Optional[float] = None) -> Tuple[Dict[str, Any], bytes]:
+    """读取一帧，返回 (header, body)"""
+    header_len, body_len = _FRAME_HEADER.unpack(_read_exact(fd, _FRAME_HEADER.size, deadline))
+    header = json.loads(_read_exact(fd, header_len, deadline))
+    body = _read_exact(fd, body_len, deadline) if body_len else b""
+    return header, body
+
+
+def write_frame(fd: int, header: Dict[str, Any], body: bytes = b"") -> None:
+    """写入一帧"""
+    encoded = json.dumps(header).encode("utf-8")
+    view = memoryview(_FRAME_HEADER.pack(len(encoded), len(body)) + encoded + body)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+def _load_skill(script: str) -> Any:
+    """以普通模块方式导入 Skill 入口 (__name__ != "__main__")"""
+    import importlib.util
+
+    sys.path.insert(0, os.path.dirname(script))
+    spec = importlib.util.spec_from_file_location("exo_skill", script)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    if not callable(getattr(module, "main", None)):
+        raise RuntimeError(f"Skill entrypoint has no main(): {script}")
+    return module
+
+
+def _run_child(module: Any, header: Dict[str, Any], payload: bytes, result_fd: int) -> None:
+    """子进程: 应用限制后调用 main()，把退出码和输出写回 result_fd"""
+    import io
+    import traceback
+
+    from limits import apply_rlimits, install_seccomp
+
+    apply_rlimits(header["mem_bytes"], header["cpu_seconds"])
+    install_seccomp()
+
+    out, err = io.StringIO(), io.StringIO()
+    sys.stdin = io.TextIOWrapper(io.BytesIO(payload), encoding="utf-8")
+    sys.stdout, sys.stderr = out, err
+
+    try:
+        module.main()
+        exit_code = 0
+    except SystemExit as e:
+        if e.code is None:
+            exit_code = 0
+        elif isinstance(e.code, int):
+            exit_code = e.code
+        else:
+            err.write(str(e.code))
+            exit_code = 1
+    except BaseException:
+        traceback.print_exc(file=err)
+        exit_code = 1
+
+    stdout = out.getvalue().encode("utf-8")
+    stderr = err.getvalue().encode("utf-8")
+    write_frame(result_fd, {"exit_code": exit_code, "stdout": len(stdout)}, stdout + stderr)
+
+
+def _handle(module: Any, header: Dict[str, Any], payload: bytes, proto_fds: Tuple[int, int]) -> Tuple[Dict[str, Any], bytes]:
+    """zygote: fork 子进程执行单个请求并等待结果"""
+    result_r, result_w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.close(result_r)
+            for fd in proto_fds:
+                os.close(fd)
+            _run_child(module, header, payload, result_w)
+        finally:
+            os._exit(0)
+
+    os.close(result_w)
+    started = time.monotonic()
+    deadline = started + header["timeout"]
+    try:
+        response, body = read_frame(result_r, deadline)
+    except TimeoutError:
+        os.kill(pid, 9)
+        response, body = {"exit_code": -9, "timed_out": True, "stdout": 0}, b""
+    except EOFError:
+        # 子进程被信号终止 (如 RLIMIT_CPU 触发 SIGXCPU)
+        response, body = None, b""
+    finally:
+        os.close(result_r)
+
+    _, status, rusage = os.wait4(pid, 0)
+    if response is None:
+        code = -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+        response = {"exit_code": code or 1, "stdout": 0}
+    response["usage"] = _usage(rusage, time.monotonic() - started)
+    return response, body
+
+
+def _usage(rusage: Any, wall_seconds: float) -> Dict[str, int]:
+    """子进程 rusage 转为响应头字段 (字段同 sandbox.ResourceUsage)"""
+    return {
+        "cpu_time_ms": int((rusage.ru_utime + rusage.ru_stime) * 1000),
+        "peak_memory_bytes": int(rusage.ru_maxrss) * 1024,
+        "io_read_bytes": int(rusage.ru_inblock) * 512,
+        "io_write_bytes": int(rusage.ru_oublock) * 512,
+        "wall_time_ms": int(wall_seconds * 1000),
+    }
+
+
+def main() -> None:
+    """zygote 主循环"""
+    sys.path.insert(0, os.path.dirname(ZYGOTE_SCRIPT))
+    from limits import unshare_network
+
+    script = sys.argv[1]
+    if "--no-network" in sys.argv[2:]:
+        # 所有子进程继承同一个空 network namespace
+        unshare_network()
+
+    # 协议通道使用 dup 后的 fd，0/1 重定向到 /dev/null 防止 Skill 输出污染协议
+    proto_in, proto_out = os.dup(0), os.dup(1)
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+
+    try:
+        module = _load_skill(script)
+    except BaseException as e:
+        write_frame(proto_out, {"ready": False, "error": repr(e)})
+        return
+    write_frame(proto_out, {"ready": True})
+
+    while True:
+        try:
+            header, payload = read_frame(proto_in)
+        except EOFError:
+            break
+        response, body = _handle(module, header, payload, (proto_in, proto_out))
+        write_frame(proto_out, response, body)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@ Exo Protocol - Chain Event Listener Module
 
 from .chain_listener import (
     ChainListener,
+    EventPublisher,
     MockChainListener,
     ChainEvent,
     EventType,
@@ -13,13 +14,48 @@ from .chain_listener import (
     EXO_CORE_PROGRAM_ID,
     EXO_HOOKS_PROGRAM_ID,
 )
+from .multi_endpoint import (
+    Endpoint,
+    MultiEndpointListener,
+)
+from .event_log import (
+    EventLogReader,
+    EventLogWriter,
+)
+from .load import (
+    ArrivalProfile,
+    LoadReport,
+    RecordedTransaction,
+    cycle,
+    load_transactions,
+    synthetic_transactions,
+)
+from .anchor_events import (
+    DecodedEvent,
+    EventSchema,
+    decode_event,
+)
 
 __all__ = [
     "ChainListener",
+    "EventPublisher",
     "MockChainListener",
     "ChainEvent",
     "EventType",
     "LogParser",
     "EXO_CORE_PROGRAM_ID",
     "EXO_HOOKS_PROGRAM_ID",
+    "Endpoint",
+    "MultiEndpointListener",
+    "EventLogReader",
+    "EventLogWriter",
+    "ArrivalProfile",
+    "LoadReport",
+    "RecordedTransaction",
+    "cycle",
+    "load_transactions",
+    "synthetic_transactions",
+    "DecodedEvent",
+    "EventSchema",
+    "decode_event",
 ]
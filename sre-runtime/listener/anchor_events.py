@@ -0,0 +1,229 @@
+"""
+Exo Protocol - Anchor Event Decoder
+
+解码 Anchor `emit!` 事件 (日志行 "Program data: <base64>")
+
+事件数据布局:
+    [0:8]   discriminator = sha256("event:<EventName>")[:8]
+    [8:]    Borsh 序列化的事件字段 (小端序)
+
+- 判别符表在模块加载时预先计算，按前 8 字节直接查表
+- 每个事件的字段均为定长类型，预编译为一个 struct.Struct，
+  对 base64 解码后的缓冲区直接 unpack_from (不做切片拷贝)
+- 事件定义与 exo-core / exo-hooks 账户状态字段保持一致；
+  程序目前只输出 msg! 文本日志，发出对应 #[event] 后即可被识别
+"""
+
+import hashlib
+import struct
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+BASE58_ALPHABET = b"123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+
+def b58encode(data: bytes) -> str:
+    """Base58 编码 (Solana 公钥格式)"""
+    number = int.from_bytes(data, "big")
+    encoded = bytearray()
+    while number:
+        number, remainder = divmod(number, 58)
+        encoded.append(BASE58_ALPHABET[remainder])
+    # 前导零字节编码为 "1"
+    pad = len(data) - len(data.lstrip(b"\0"))
+    encoded.extend(BASE58_ALPHABET[0:1] * pad)
+    return bytes(reversed(encoded)).decode("ascii")
+
+
+def _hex(value: bytes) -> str:
+    return value.hex()
+
+
+# Borsh 定长类型 → (struct 格式, 值转换)
+FIELD_TYPES: Dict[str, Tuple[str, Optional[Callable[[Any], Any]]]] = {
+    "u8": ("B", None),
+    "u16": ("H", None),
+    "u32": ("I", None),
+    "u64": ("Q", None),
+    "i16": ("h", None),
+    "i64": ("q", None),
+    "bool": ("?", None),
+    "pubkey": ("32s", b58encode),
+    "hash": ("32s", _hex),  # [u8; 32]
+}
+
+DISCRIMINATOR_SIZE = 8
+
+
+def event_discriminator(name: str) -> bytes:
+    """Anchor 事件判别符: sha256("event:<Name>") 前 8 字节"""
+    return hashlib.sha256(f"event:{name}".encode()).digest()[:DISCRIMINATOR_SIZE]
+
+
+@dataclass
+class EventSchema:
+    """
+    Anchor 事件结构
+
+    Attributes:
+        name: Rust 事件结构体名 (决定判别符)
+        event_type: 对应的 EventType 值
+        fields: (字段名, Borsh 类型) 列表，顺序与结构体声明一致
+    """
+    name: str
+    event_type: str
+    fields: Sequence[Tuple[str, str]]
+    discriminator: bytes = field(init=False)
+    _struct: struct.Struct = field(init=False, repr=False)
+    _converters: Tuple[Tuple[str, Optional[Callable[[Any], Any]]], ...] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.discriminator = event_discriminator(self.name)
+        self._struct = struct.Struct("<" + "".join(FIELD_TYPES[ftype][0] for _, ftype in self.fields))
+        self._converters = tuple((fname, FIELD_TYPES[ftype][1]) for fname, ftype in self.fields)
+
+    @property
+    def size(self) -> int:
+        """事件数据长度 (含判别符)"""
+        return DISCRIMINATOR_SIZE + self._struct.size
+
+    def decode(self, buffer: bytes) -> Dict[str, Any]:
+        """
+        解码事件字段 (buffer 包含判别符)
+
+        Raises:
+            struct.error: 数据长度不足
+        """
+        values = self._struct.unpack_from(buffer, DISCRIMINATOR_SIZE)
+        return {
+            name: (convert(value) if convert else value)
+            for (name, convert), value in zip(self._converters, values)
+        }
+
+
+# exo-core 事件
+EXO_CORE_EVENTS = (
+    EventSchema("SkillRegistered", "skill_registered", [
+        ("skill", "pubkey"),
+        ("authority", "pubkey"),
+        ("content_hash", "hash"),
+        ("price_lamports", "u64"),
+        ("version", "u8"),
+    ]),
+    EventSchema("SkillUpdated", "skill_updated", [
+        ("skill", "pubkey"),
+        ("content_hash", "hash"),
+        ("price_lamports", "u64"),
+        ("version", "u8"),
+    ]),
+    EventSchema("SkillDeprecated", "skill_deprecated", [
+        ("skill", "pubkey"),
+        ("authority", "pubkey"),
+    ]),
+    EventSchema("AgentCreated", "agent_created", [
+        ("agent", "pubkey"),
+        ("owner", "pubkey"),
+        ("tier", "u8"),
+        ("reputation_score", "u16"),
+    ]),
+    EventSchema("EscrowCreated", "escrow_created", [
+        ("escrow", "pubkey"),
+        ("buyer", "pubkey"),
+        ("skill", "pubkey"),
+        ("amount", "u64"),
+        ("nonce", "u64"),
+        ("expires_at", "i64"),
+    ]),
+    EventSchema("EscrowCompleted", "escrow_released", [
+        ("escrow", "pubkey"),
+        ("executor", "pubkey"),
+        ("protocol_fee", "u64"),
+        ("skill_royalty", "u64"),
+        ("executor_payout", "u64"),
+    ]),
+    EventSchema("EscrowCancelled", "escrow_cancelled", [
+        ("escrow", "pubkey"),
+        ("buyer", "pubkey"),
+        ("amount", "u64"),
+    ]),
+    EventSchema("EscrowChallenged", "escrow_disputed", [
+        ("escrow", "pubkey"),
+        ("challenger", "pubkey"),
+        ("challenge_slot", "u64"),
+    ]),
+)
+
+# exo-hooks 事件
+EXO_HOOKS_EVENTS = (
+    EventSchema("HookInitialized", "hook_initialized", [
+        ("mint", "pubkey"),
+        ("protocol_fee_bps", "u16"),
+        ("creator_royalty_bps", "u16"),
+    ]),
+    EventSchema("HookConfigUpdated", "hook_config_updated", [
+        ("mint", "pubkey"),
+        ("protocol_fee_bps", "u16"),
+        ("creator_royalty_bps", "u16"),
+    ]),
+    EventSchema("TransferHooked", "transfer_hooked", [
+        ("mint", "pubkey"),
+        ("amount", "u64"),
+        ("protocol_fee", "u64"),
+        ("creator_royalty", "u64"),
+        ("executor_amount", "u64"),
+    ]),
+)
+
+# 判别符 → 事件结构 (预计算)
+EVENT_SCHEMAS: Dict[bytes, EventSchema] = {
+    schema.discriminator: schema for schema in EXO_CORE_EVENTS + EXO_HOOKS_EVENTS
+}
+
+
+@dataclass
+class DecodedEvent:
+    """解码后的 Anchor 事件"""
+    name: str
+    event_type: str
+    fields: Dict[str, Any]
+
+
+def decode_event(data: bytes) -> Optional[DecodedEvent]:
+    """
+    按判别符解码 Anchor 事件
+
+    Args:
+        data: base64 解码后的 Program data
+
+    Returns:
+        DecodedEvent，或 None (未知判别符 / 数据长度不足)
+    """
+    schema = EVENT_SCHEMAS.get(bytes(data[:DISCRIMINATOR_SIZE]))
+    if schema is None:
+        return None
+    try:
+        fields = schema.decode(data)
+    except struct.error:
+        return None
+    return DecodedEvent(name=schema.name, event_type=schema.event_type, fields=fields)
+
+
+def encode_event(name: str, **values: Any) -> bytes:
+    """
+    按事件结构编码 (测试与 Mock 事件使用)
+
+    pubkey 字段接受 32 字节 bytes，hash 字段接受 32 字节 bytes 或 hex 字符串
+    """
+    for schema in EVENT_SCHEMAS.values():
+        if schema.name == name:
+            break
+    else:
+        raise KeyError(f"Unknown event: {name}")
+
+    packed = []
+    for fname, ftype in schema.fields:
+        value = values[fname]
+        if ftype == "hash" and isinstance(value, str):
+            value = bytes.fromhex(value)
+        packed.append(value)
+    return schema.discriminator + schema._struct.pack(*packed)
@@ -0,0 +1,295 @@
+"""
+Exo Protocol - Listener Backfill
+
+WebSocket 断线期间的日志不会重发。重连后先按检查点补齐遗漏的交易，再恢复实时事件:
+
+1. 检查点 (Checkpoint): 最后处理的 slot 及该 slot 内已处理的签名，持久化为 JSON 文件
+2. getSignaturesForAddress 逐页向前翻 (before 游标)，直到早于检查点 slot (不截断，补齐整个缺口)
+3. getTransaction 以 JSON-RPC 批量请求拉取日志；失败或尚未索引 (result 为 null) 的交易重试，
+   仍失败时在第一笔缺失的交易处停止，只返回其之前的交易
+4. 多个 Program 的结果按签名去重、按 slot 升序排列后返回
+"""
+
+import asyncio
+import logging
+import os
+import tempfile
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+from codec import dumpb, loads
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_LIMIT = 1000  # getSignaturesForAddress 单页上限
+DEFAULT_BATCH_SIZE = 20
+DEFAULT_MAX_SIGNATURES = 10_000  # 超过时告警 (长时间断线)
+DEFAULT_FETCH_RETRIES = 3  # getTransaction 失败后的重试轮数
+DEFAULT_RETRY_DELAY = 0.5  # 秒，第 n 轮重试前等待 n 倍
+
+
+class RpcError(RuntimeError):
+    """JSON-RPC 错误响应"""
+
+
+@dataclass
+class Checkpoint:
+    """
+    监听进度
+
+    Attributes:
+        slot: 最后处理的 slot
+        signatures: 该 slot 内已处理的交易签名 (同一 slot 可能有多笔交易)
+    """
+    slot: int = 0
+    signatures: List[str] = field(default_factory=list)
+
+    def advance(self, slot: int, signature: str) -> None:
+        """记录已处理的交易 (slot 不回退)"""
+        if slot > self.slot:
+            self.slot = slot
+            self.signatures = [signature]
+        elif slot == self.slot and signature not in self.signatures:
+            self.signatures.append(signature)
+
+    def covers(self, slot: int, signature: str) -> bool:
+        """交易是否已在检查点之前处理"""
+        return slot < self.slot or (slot == self.slot and signature in self.signatures)
+
+
+class CheckpointStore:
+    """检查点持久化 (JSON 文件，原子替换写入；path 为 None 时仅保存在内存)"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._checkpoint: Optional[Checkpoint] = None
+        self._dirty = False
+
+    def load(self) -> Optional[Checkpoint]:
+        """读取检查点 (不存在或损坏时返回 None)"""
+        if self._checkpoint is None and self.path and os.path.exists(self.path):
+            try:
+                with open(self.path, "rb") as f:
+                    data = loads(f.read())
+                self._checkpoint = Checkpoint(slot=data["slot"], signatures=list(data["signatures"]))
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Ignoring unreadable checkpoint {self.path}: {e}")
+        return self._checkpoint
+
+    def advance(self, slot: int, signature: str) -> None:
+        """记录已处理的交易 (调用 save 后落盘)"""
+        if self._checkpoint is None:
+            self._checkpoint = self.load() or Checkpoint()
+        self._checkpoint.advance(slot, signature)
+        self._dirty = True
+
+    def save(self) -> None:
+        """写入检查点文件"""
+        if not self._dirty or self._checkpoint is None or not self.path:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".checkpoint-", dir=directory)
+        with os.fdopen(fd, "wb") as f:
+            f.write(dumpb({"slot": self._checkpoint.slot, "signatures": self._checkpoint.signatures}))
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+
+@dataclass
+class MissedTransaction:
+    """补齐的交易日志"""
+    signature: str
+    slot: int
+    logs: List[str]
+    program_id: str = ""  # 查到该签名的 Program (选择解析器)
+
+
+@dataclass
+class BackfillResult:
+    """
+    一次补齐的结果
+
+    Attributes:
+        transactions: 按 slot 升序的遗漏交易
+        unresolved: 重试后仍未取到的第一笔交易 (slot, signature)；
+            其后的交易未返回，检查点需停在它之前，下次补齐重新获取
+    """
+    transactions: List[MissedTransaction] = field(default_factory=list)
+    unresolved: Optional[Tuple[int, str]] = None
+
+
+class Backfiller:
+    """
+    基于 getSignaturesForAddress + getTransaction 的遗漏交易补齐
+    """
+
+    def __init__(
+        self,
+        rpc_url: str,
+        program_ids: Sequence[str],
+        commitment: str = "confirmed",
+        page_limit: int = DEFAULT_PAGE_LIMIT,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_signatures: int = DEFAULT_MAX_SIGNATURES,
+        fetch_retries: int = DEFAULT_FETCH_RETRIES,
+        retry_delay: float = DEFAULT_RETRY_DELAY,
+        client: Optional[httpx.AsyncClient] = None,
+    ):
+        """
+        Args:
+            rpc_url: Solana JSON-RPC 端点
+            program_ids: 要补齐的 Program ID 列表
+            commitment: 查询使用的确认级别
+            page_limit: getSignaturesForAddress 每页数量
+            batch_size: 每个批量请求中的 getTransaction 数量
+            max_signatures: 单个 Program 单次补齐的签名数超过该值时记录警告 (仍翻页直到补齐)
+            fetch_retries: getTransaction 失败或返回 null 时的重试轮数
+            retry_delay: 重试间隔基数 (秒)
+            client: 自定义 HTTP 客户端 (测试时可注入 MockTransport)
+        """
+        self.rpc_url = rpc_url
+        self.program_ids = list(program_ids)
+        self.commitment = commitment
+        self.page_limit = page_limit
+        self.batch_size = batch_size
+        self.max_signatures = max_signatures
+        self.fetch_retries = fetch_retries
+        self.retry_delay = retry_delay
+        self._client = client or httpx.AsyncClient(timeout=30.0)
+        self._request_id = 0
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+    def _request(self, method: str, params: List[Any]) -> Dict[str, Any]:
+        self._request_id += 1
+        return {"jsonrpc": "2.0", "id": self._request_id, "method": method, "params": params}
+
+    async def _call(self, payload: Any) -> Any:
+        response = await self._client.post(self.rpc_url, json=payload)
+        response.raise_for_status()
+        return response.json()
+
+    @staticmethod
+    def _result(reply: Dict[str, Any]) -> Any:
+        if "error" in reply:
+            raise RpcError(f"{reply['error'].get('code')}: {reply['error'].get('message')}")
+        return reply.get("result")
+
+    async def fetch_signatures(self, program_id: str, checkpoint: Checkpoint) -> List[Dict[str, Any]]:
+        """
+        向前翻页获取检查点之后的签名 (返回按时间升序)
+
+        已失败的交易 (err 非空) 不产生事件，直接跳过。
+        一直翻页到检查点为止: 截断会丢掉最早的签名，而检查点随后越过它们，无法再补齐。
+        """
+        collected: List[Dict[str, Any]] = []
+        before: Optional[str] = None
+        warned = False
+        while True:
+            options: Dict[str, Any] = {"limit": self.page_limit, "commitment": self.commitment}
+            if before:
+                options["before"] = before
+            page = self._result(await self._call(
+                self._request("getSignaturesForAddress", [program_id, options])
+            )) or []
+
+            reached_checkpoint = False
+            for info in page:
+                if info["slot"] < checkpoint.slot:
+                    reached_checkpoint = True
+                    break
+                if info.get("err") is None and not checkpoint.covers(info["slot"], info["signature"]):
+                    collected.append(info)
+
+            if reached_checkpoint or len(page) < self.page_limit:
+                break
+            if not warned and len(collected) >= self.max_signatures:
+                logger.warning(
+                    f"Backfill for {program_id[:8]}... exceeds {self.max_signatures} signatures, still paging"
+                )
+                warned = True
+            before = page[-1]["signature"]
+
+        # RPC 返回新 → 旧
+        collected.reverse()
+        return collected
+
+    async def fetch_transactions(self, signatures: Sequence[str]) -> Dict[str, MissedTransaction]:
+        """
+        批量获取交易日志
+
+        失败或返回 null (该确认级别下尚未索引) 的交易最多重试 fetch_retries 轮；
+        仍未取到的交易不出现在结果中。
+        """
+        transactions: Dict[str, MissedTransaction] = {}
+        pending = list(signatures)
+        for attempt in range(self.fetch_retries + 1):
+            if attempt:
+                logger.info(f"Retrying getTransaction for {len(pending)} signatures (attempt {attempt})")
+                await asyncio.sleep(self.retry_delay * attempt)
+            transactions.update(await self._fetch_batches(pending))
+            pending = [signature for signature in pending if signature not in transactions]
+            if not pending:
+                break
+        return transactions
+
+    async def _fetch_batches(self, signatures: Sequence[str]) -> Dict[str, MissedTransaction]:
+        transactions: Dict[str, MissedTransaction] = {}
+        options = {
+            "encoding": "json",
+            "commitment": self.commitment,
+            "maxSupportedTransactionVersion": 0,
+        }
+        for start in range(0, len(signatures), self.batch_size):
+            chunk = signatures[start:start + self.batch_size]
+            batch = [self._request("getTransaction", [signature, options]) for signature in chunk]
+            replies = await self._call(batch)
+            by_id = {reply.get("id"): reply for reply in replies}
+
+            for request, signature in zip(batch, chunk):
+                reply = by_id.get(request["id"])
+                if reply is None or "error" in reply:
+                    logger.warning(f"getTransaction failed for {signature[:16]}...: {reply and reply.get('error')}")
+                    continue
+                result = reply.get("result")
+                if not result:
+                    logger.warning(f"getTransaction returned no result for {signature[:16]}...")
+                    continue
+                logs = (result.get("meta") or {}).get("logMessages") or []
+                transactions[signature] = MissedTransaction(signature, result.get("slot", 0), logs)
+        return transactions
+
+    async def fetch_missed(self, checkpoint: Checkpoint) -> BackfillResult:
+        """
+        获取检查点之后的所有交易 (跨 Program 去重，按 slot 升序)
+
+        重试后仍缺失的交易处停止: 只返回其之前的交易，并在 unresolved 中记录该交易。
+        """
+        ordered: List[Dict[str, Any]] = []
+        programs: Dict[str, str] = {}
+        for program_id in self.program_ids:
+            for info in await self.fetch_signatures(program_id, checkpoint):
+                if info["signature"] not in programs:
+                    programs[info["signature"]] = program_id
+                    ordered.append(info)
+
+        # 稳定排序: 同一 slot 内保持各 Program 的原始顺序
+        ordered.sort(key=lambda info: info["slot"])
+        transactions = await self.fetch_transactions([info["signature"] for info in ordered])
+        result = BackfillResult()
+        for info in ordered:
+            tx = transactions.get(info["signature"])
+            if tx is None:
+                logger.warning(
+                    f"Backfill stopped at {info['signature'][:16]}... (slot {info['slot']}), "
+                    f"{len(ordered) - len(result.transactions)} transactions left for the next backfill"
+                )
+                result.unresolved = (info["slot"], info["signature"])
+                break
+            tx.program_id = programs[tx.signature]
+            result.transactions.append(tx)
+        return result
@@ -15,16 +15,37 @@ Events:
 """
 
 import asyncio
-import json
+import heapq
+import itertools
 import logging
 import os
+import re
 import sys
+import time
+import zlib
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 import base64
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from codec import JSONDecodeError, dumps, loads
+from listener.anchor_events import DecodedEvent, decode_event
+from listener.backfill import Backfiller, CheckpointStore
+from listener.dispatch import (
+    DEFAULT_SUBSCRIBER_QUEUE,
+    OVERFLOW_BLOCK,
+    EventCallback,
+    EventDispatcher,
+)
+from listener.event_log import EventLogWriter
+from listener.load import ArrivalProfile, LoadReport, RecordedTransaction
+from listener.subscriptions import SubscriptionManager
+from listener.ordering import DEFAULT_DEDUP_TTL, DEFAULT_REORDER_WINDOW, DedupCache, ReorderBuffer
+from metrics import Histogram, get_sink
+
 # ============================================================================
 # Configuration
 # ============================================================================
@@ -42,10 +63,31 @@ EXO_HOOKS_PROGRAM_ID = "F5CzTZpDch5gUc5FgTPPRJ8mRKgrMVzJmcPfTzTugCeK"
 # Helius endpoints
 HELIUS_WS_MAINNET = "wss://atlas-mainnet.helius-rpc.com"
 HELIUS_WS_DEVNET = "wss://devnet.helius-rpc.com"
+HELIUS_RPC_MAINNET = "https://mainnet.helius-rpc.com"
+HELIUS_RPC_DEVNET = "https://devnet.helius-rpc.com"
+
+# 确认级别: processed 用于推测执行，confirmed 为正式事件
+COMMITMENT_PROCESSED = "processed"
+COMMITMENT_CONFIRMED = "confirmed"
 
 # Reconnect settings
-RECONNECT_DELAY = 3  # seconds
-MAX_RECONNECT_ATTEMPTS = 5
+RECONNECT_DELAY = 3  # seconds (连续失败时指数退避的基数)
+MAX_RECONNECT_DELAY = 60  # seconds
+
+# Backfill / 去重
+SEEN_SIGNATURES_SIZE = 10_000  # 去重窗口 (最近处理的签名数量)
+CHECKPOINT_EVERY = 100  # 每处理 N 笔交易写一次检查点
+
+# 事件原始日志保留策略 (见 retain_logs)
+RAW_LOGS_KEEP = "keep"
+RAW_LOGS_LAZY = "lazy"
+RAW_LOGS_DROP = "drop"
+
+RAW_LOGS_POLICIES = (RAW_LOGS_KEEP, RAW_LOGS_LAZY, RAW_LOGS_DROP)
+
+# Mock 回放调度
+REPLAY_MIN_SLEEP = 0.001  # 距计划时间不足 1ms 时不休眠 (sleep 精度有限)
+REPLAY_YIELD_EVERY = 64  # 连续不休眠时每 N 笔让出一次事件循环
 
 
 # ============================================================================
@@ -80,16 +122,79 @@ class EventType(Enum):
     UNKNOWN = "unknown"
 
 
-@dataclass
+class CompressedLogs(Sequence[str]):
+    """
+    压缩保存的原始日志 (只读序列)
+
+    日志行以换行拼接后 zlib 压缩，访问时才解压；
+    未被读取的日志 (绝大多数事件) 只占用压缩后的字节串。
+    """
+    
+    __slots__ = ("_blob",)
+    
+    def __init__(self, logs: Iterable[str]):
+        self._blob = zlib.compress("\n".join(logs).encode("utf-8"), 1)
+    
+    def _lines(self) -> List[str]:
+        text = zlib.decompress(self._blob).decode("utf-8")
+        return text.split("\n") if text else []
+    
+    def __getitem__(self, index):
+        return self._lines()[index]
+    
+    def __len__(self) -> int:
+        return len(self._lines())
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._lines())
+    
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (CompressedLogs, list, tuple)):
+            return self._lines() == list(other)
+        return NotImplemented
+    
+    def __repr__(self) -> str:
+        return f"CompressedLogs({self._lines()!r})"
+
+
+def retain_logs(logs: Sequence[str], policy: str = RAW_LOGS_KEEP) -> Sequence[str]:
+    """
+    按策略保留事件的原始日志
+    
+    Args:
+        logs: 原始日志
+        policy: keep (原样保留) / lazy (压缩保存，访问时解压) / drop (丢弃)
+    """
+    if policy == RAW_LOGS_KEEP:
+        return logs
+    if policy == RAW_LOGS_LAZY:
+        return CompressedLogs(logs) if logs else []
+    if policy == RAW_LOGS_DROP:
+        return []
+    raise ValueError(f"Unknown raw logs policy: {policy}")
+
+
+@dataclass(slots=True)
 class ChainEvent:
-    """链上事件数据结构"""
+    """
+    链上事件数据结构
+    
+    使用 __slots__ (事件在去重 / 重排缓冲与订阅者队列中大量驻留)；
+    raw_logs 可按 retain_logs 策略压缩或丢弃。
+    """
     event_type: EventType
     signature: str
     slot: int
     timestamp: datetime
     program_id: str
     data: Dict[str, Any] = field(default_factory=dict)
-    raw_logs: List[str] = field(default_factory=list)
+    raw_logs: Union[List[str], Sequence[str]] = field(default_factory=list)
+    commitment: str = COMMITMENT_CONFIRMED
+    
+    @property
+    def speculative(self) -> bool:
+        """是否为未确认 (processed) 事件，可能因分叉或丢弃而不会被确认"""
+        return self.commitment != COMMITMENT_CONFIRMED
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
@@ -100,17 +205,53 @@ class ChainEvent:
             "timestamp": self.timestamp.isoformat(),
             "program_id": self.program_id,
             "data": self.data,
+            "commitment": self.commitment,
         }
     
     def to_json(self) -> str:
         """转换为 JSON 字符串"""
-        return json.dumps(self.to_dict(), indent=2)
+        return dumps(self.to_dict(), indent=True)
+    
+    def to_compact_json(self, include_logs: bool = False) -> str:
+        """紧凑 JSON (无缩进；用于事件日志等批量存储)"""
+        record = self.to_dict()
+        if include_logs:
+            record["raw_logs"] = list(self.raw_logs)
+        return dumps(record)
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], raw_logs: Optional[List[str]] = None) -> "ChainEvent":
+        """由 to_dict() 的结果还原事件"""
+        return cls(
+            event_type=EventType(data["event_type"]),
+            signature=data["signature"],
+            slot=data["slot"],
+            timestamp=datetime.fromisoformat(data["timestamp"]),
+            program_id=data["program_id"],
+            data=data.get("data", {}),
+            raw_logs=raw_logs or [],
+            commitment=data.get("commitment", COMMITMENT_CONFIRMED),
+        )
 
 
 # ============================================================================
 # Log Parser
 # ============================================================================
 
+# "Amount: 1000 lamports" / "Transfer amount: 500 lamports" (不匹配 slash_amount 等字段名)
+_AMOUNT_PATTERN = re.compile(r"(?i)\bamount:\s*(\d+)")
+
+
+def _extract_int(log: str, key: str, data: Dict[str, Any]) -> None:
+    """提取 "key: 123" 形式的整数 (取最后一个冒号之后的内容)"""
+    parts = log.split(":")
+    if len(parts) >= 2:
+        try:
+            data[key] = int(parts[-1].strip())
+        except ValueError:
+            pass
+
+
 class LogParser:
     """
     解析 Solana Program 日志，提取 Exo Protocol 事件
@@ -159,11 +300,63 @@ class LogParser:
         "fee_bps": EventType.TRANSFER_HOOKED,  # Hook 日志包含费率
     }
     
+    # 预编译的关键字匹配器 (按类构建一次，见 _compile)
+    _keyword_pattern: Optional["re.Pattern"] = None
+    _keyword_priority: Dict[str, int] = {}
+    
+    @staticmethod
+    def _trie_regex(keywords: List[str]) -> str:
+        """
+        将关键字集合构建为前缀树形式的正则 (如 "Escrow (?:created|funded|...)")
+        
+        共享前缀只比较一次，单次扫描即可匹配全部关键字，效果近似 Aho-Corasick。
+        """
+        trie: Dict[str, Any] = {}
+        for keyword in keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[""] = {}
+        
+        def build(node: Dict[str, Any]) -> str:
+            branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ""
+            body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+            # 关键字在此结束: 允许更长的关键字继续匹配 (贪婪，优先最长)
+            return "(?:" + body + ")?" if "" in node else body
+        
+        return build(trie)
+    
+    @classmethod
+    def _compile(cls) -> "re.Pattern":
+        """构建 EVENT_KEYWORDS 的前缀树正则 (子类覆盖 EVENT_KEYWORDS 时单独构建)"""
+        if cls.__dict__.get("_keyword_pattern") is None:
+            cls._keyword_pattern = re.compile(cls._trie_regex(list(cls.EVENT_KEYWORDS)))
+            cls._keyword_priority = {k: i for i, k in enumerate(cls.EVENT_KEYWORDS)}
+        return cls._keyword_pattern
+    
+    @classmethod
+    def _classify(cls, log: str, first: str) -> EventType:
+        """一行包含多个关键字时，按 EVENT_KEYWORDS 顺序取第一个 (与逐个 in 检查一致)"""
+        priority = cls._keyword_priority
+        limit = priority[first]
+        for keyword in cls.EVENT_KEYWORDS:
+            if priority[keyword] >= limit:
+                break
+            if keyword in log:
+                return cls.EVENT_KEYWORDS[keyword]
+        return cls.EVENT_KEYWORDS[first]
+    
     @classmethod
     def parse(cls, signature: str, logs: List[str], slot: int = 0) -> Optional[ChainEvent]:
         """
         解析日志，提取事件
         
+        每行只用预编译匹配器扫描一次关键字，其余特征用前缀检查判断。
+        "Program data:" 中的 Anchor 事件按判别符解码为结构化字段 (见 anchor_events)，
+        解码成功时事件类型以解码结果为准，关键字只作为回退。
+        
         Args:
             signature: 交易签名
             logs: 日志行列表
@@ -172,51 +365,54 @@ class LogParser:
         Returns:
             解析后的 ChainEvent 或 None
         """
+        search = cls._compile().search
         event_type = EventType.UNKNOWN
         program_id = ""
         data: Dict[str, Any] = {}
+        decoded_events: List[DecodedEvent] = []
         
         for log in logs:
-            # 提取 Program ID
-            if "Program " in log and " invoke" in log:
-                parts = log.split()
-                if len(parts) >= 2:
-                    program_id = parts[1]
-            
-            # 检测事件类型
-            for keyword, etype in cls.EVENT_KEYWORDS.items():
-                if keyword in log:
-                    event_type = etype
-                    break
-            
-            # 提取数据 (简化版本)
-            if "Program data:" in log:
-                try:
-                    b64_data = log.split("Program data:")[1].strip()
-                    decoded = base64.b64decode(b64_data)
+            if log.startswith("Program "):
+                # 提取 Program ID ("Program <id> invoke [N]")
+                if " invoke [" in log:
+                    parts = log.split(" ", 3)
+                    if parts[2] == "invoke":
+                        program_id = parts[1]
+                        continue
+                
+                # 提取数据: Anchor 事件 (判别符 + Borsh)
+                if log.startswith("Program data:"):
+                    try:
+                        decoded = base64.b64decode(log[13:].strip())
+                    except Exception:
+                        continue
                     data["raw_data"] = decoded.hex()
-                except Exception:
-                    pass
+                    anchor_event = decode_event(decoded)
+                    if anchor_event is not None:
+                        decoded_events.append(anchor_event)
+                    continue
             
-            # 提取费率信息 (Transfer Hook)
-            if "fee_bps" in log:
-                try:
-                    # 日志格式: "fee_bps: 500"
-                    parts = log.split(":")
-                    if len(parts) >= 2:
-                        data["fee_bps"] = int(parts[-1].strip())
-                except ValueError:
-                    pass
+            # 检测事件类型
+            match = search(log)
+            if match is not None:
+                event_type = cls._classify(log, match.group())
+                # 提取费率信息 (Transfer Hook)，日志格式: "fee_bps: 500"
+                if "fee_bps" in log:
+                    _extract_int(log, "fee_bps", data)
             
-            # 提取金额信息
+            # 提取金额信息，日志格式: "Amount: 1000000 lamports"
             if "amount" in log.lower():
-                try:
-                    # 日志格式: "Amount: 1000000"
-                    parts = log.split(":")
-                    if len(parts) >= 2:
-                        data["amount"] = int(parts[-1].strip())
-                except ValueError:
-                    pass
+                amount = _AMOUNT_PATTERN.search(log)
+                if amount is not None:
+                    data["amount"] = int(amount.group(1))
+        
+        if decoded_events:
+            # 首个事件为交易主事件，其字段覆盖文本日志中提取的值
+            primary = decoded_events[0]
+            event_type = EventType(primary.event_type)
+            data.update(primary.fields)
+            data["event_name"] = primary.name
+            data["events"] = [{"name": e.name, **e.fields} for e in decoded_events]
         
         # 只返回有效事件
         if event_type == EventType.UNKNOWN and program_id not in [EXO_CORE_PROGRAM_ID, EXO_HOOKS_PROGRAM_ID]:
@@ -227,17 +423,85 @@ class LogParser:
             signature=signature,
             slot=slot,
             timestamp=datetime.utcnow(),
-            program_id=program_id,
+            # 同一 Program ID 在所有事件间共享
+            program_id=sys.intern(program_id),
             data=data,
             raw_logs=logs,
         )
 
 
+# ============================================================================
+# Event Publishing (shared by ChainListener / MockChainListener)
+# ============================================================================
+
+class EventPublisher:
+    """
+    事件分发基类
+
+    管理订阅者注册、事件分发与可选的事件日志，ChainListener 与 MockChainListener 共用。
+    """
+    
+    def __init__(self, event_log: Optional[EventLogWriter] = None):
+        """
+        Args:
+            event_log: 事件日志 (可选)，已确认事件在分发前追加写入
+        """
+        self._dispatcher = EventDispatcher()
+        self.event_log = event_log
+    
+    def on_event(
+        self,
+        callback: EventCallback,
+        *,
+        name: Optional[str] = None,
+        max_queue: int = DEFAULT_SUBSCRIBER_QUEUE,
+        overflow: str = OVERFLOW_BLOCK,
+        spill_dir: Optional[str] = None,
+    ) -> None:
+        """
+        注册事件回调
+        
+        同步回调在读循环中直接执行 (应保持轻量)；异步回调 (async def) 进入
+        独立的有界队列，由后台任务执行，不阻塞读循环。
+        
+        Args:
+            callback: 回调函数，接收 ChainEvent 参数
+            name: 订阅者名称 (指标标签，默认为函数名)
+            max_queue: 异步回调的队列容量
+            overflow: 队列满时的策略 ("block" | "drop_oldest" | "spill")
+            spill_dir: spill 策略的溢出文件目录 (默认系统临时目录)
+        """
+        self._dispatcher.subscribe(
+            callback, name=name, max_queue=max_queue, overflow=overflow, spill_dir=spill_dir
+        )
+    
+    def _emit(self, event: ChainEvent) -> None:
+        """触发事件回调 (非阻塞)"""
+        self._dispatcher.emit(event)
+    
+    async def _publish(self, event: ChainEvent) -> None:
+        """触发事件回调 (block 策略的异步订阅者积压时等待)"""
+        if self.event_log is not None and not event.speculative:
+            try:
+                self.event_log.append_event(event)
+            except OSError as e:
+                logger.error(f"Failed to append to event log: {e}")
+        await self._dispatcher.publish(event)
+    
+    def subscriber_lag(self) -> Dict[str, int]:
+        """各异步订阅者的积压事件数"""
+        return self._dispatcher.lag()
+    
+    async def flush(self, timeout: Optional[float] = None) -> None:
+        """等待异步订阅者处理完积压事件"""
+        await self._dispatcher.flush(timeout)
+
+
 # ============================================================================
 # WebSocket Listener
 # ============================================================================
 
-class ChainListener:
+class ChainListener(EventPublisher):
     """
     链上事件监听器
     
@@ -249,6 +513,16 @@ class ChainListener:
         api_key: str,
         network: str = "devnet",
         program_ids: Optional[List[str]] = None,
+        checkpoint_path: Optional[str] = None,
+        backfill: bool = True,
+        rpc_url: Optional[str] = None,
+        max_reconnect_attempts: Optional[int] = None,
+        dedup_ttl: Optional[float] = DEFAULT_DEDUP_TTL,
+        reorder_window: float = DEFAULT_REORDER_WINDOW,
+        parsers: Optional[Dict[str, Any]] = None,
+        speculative: bool = False,
+        event_log_dir: Optional[str] = None,
+        raw_logs_policy: str = RAW_LOGS_KEEP,
     ):
         """
         初始化监听器
@@ -257,19 +531,57 @@ class ChainListener:
             api_key: Helius API Key
             network: 网络类型 ("mainnet" 或 "devnet")
             program_ids: 要监听的 Program ID 列表
+            checkpoint_path: 检查点文件 (None 时仅在进程内保留，重连补齐仍然生效)
+            backfill: 重连后是否补齐断线期间的交易
+            rpc_url: 补齐使用的 JSON-RPC 端点 (默认 Helius RPC)
+            max_reconnect_attempts: 连续连接失败达到该次数后停止监听 (显式启用)；
+                默认 None 为按指数退避无限重试，恢复后由补齐找回断线期间的事件
+            dedup_ttl: 签名去重保留时间 (秒)
+            reorder_window: 按 slot 重排的缓冲时间 (秒)，0 表示按到达顺序直接分发
+            parsers: Program ID → 日志解析器 (默认 LogParser)
+            speculative: 同时订阅 processed 级别日志，提前分发未确认事件
+                (event.speculative 为 True；同一交易确认后再以 confirmed 分发一次)
+            event_log_dir: 事件日志目录 (可选)，已确认事件按分发顺序追加写入，
+                可用 EventLogReader 按 slot 区间回放
+            raw_logs_policy: 事件原始日志保留策略 (keep / lazy / drop，见 retain_logs)
         """
+        if raw_logs_policy not in RAW_LOGS_POLICIES:
+            raise ValueError(f"Unknown raw logs policy: {raw_logs_policy}")
+        super().__init__(EventLogWriter(event_log_dir) if event_log_dir else None)
         self.api_key = api_key
         self.network = network
-        self.program_ids = program_ids or [EXO_CORE_PROGRAM_ID, EXO_HOOKS_PROGRAM_ID]
+        self.program_ids = list(program_ids or [EXO_CORE_PROGRAM_ID, EXO_HOOKS_PROGRAM_ID])
+        self._parsers: Dict[str, Any] = dict(parsers or {})
+        self.commitments = (
+            (COMMITMENT_PROCESSED, COMMITMENT_CONFIRMED) if speculative else (COMMITMENT_CONFIRMED,)
+        )
+        self.backfill_enabled = backfill
+        self.raw_logs_policy = raw_logs_policy
+        self.max_reconnect_attempts = max_reconnect_attempts
+        
+        # 检查点与签名去重 (多 Program 订阅、补齐与实时事件可能重复推送同一交易)
+        self.checkpoint = CheckpointStore(checkpoint_path)
+        self._dedup = DedupCache(SEEN_SIGNATURES_SIZE, dedup_ttl)
+        
+        # 按 slot 重排 (见 _publish_ordered)
+        self._reorder: ReorderBuffer[ChainEvent] = ReorderBuffer(reorder_window)
+        self._reorder_lock = asyncio.Lock()
+        self._reorder_wakeup = asyncio.Event()
+        self._reorder_task: Optional[asyncio.Task] = None
+        self._since_checkpoint = 0
+        # 已处理但尚不能计入检查点的无事件交易 (slot, signature)，等待更早的缓冲事件发布
+        self._held: List[Tuple[int, str]] = []
+        # 补齐未完成时检查点可推进到的最大 slot (None 为不限)，保证下次补齐重新获取缺失交易
+        self._checkpoint_limit: Optional[int] = None
+        self._backfiller: Optional[Backfiller] = None
+        rpc_base = HELIUS_RPC_DEVNET if network == "devnet" else HELIUS_RPC_MAINNET
+        self.rpc_url = rpc_url or f"{rpc_base}/?api-key={api_key}"
         
         # WebSocket 状态
         self._ws = None
         self._running = False
         self._reconnect_attempts = 0
-        self._subscription_id: Optional[int] = None
-        
-        # 事件回调
-        self._callbacks: List[Callable[[ChainEvent], None]] = []
+        self._subscriptions = SubscriptionManager()
         
         # 选择端点
         self._ws_url = HELIUS_WS_DEVNET if network == "devnet" else HELIUS_WS_MAINNET
@@ -279,23 +591,6 @@ class ChainListener:
         """WebSocket URL (带 API Key)"""
         return f"{self._ws_url}?api-key={self.api_key}"
     
-    def on_event(self, callback: Callable[[ChainEvent], None]) -> None:
-        """
-        注册事件回调
-        
-        Args:
-            callback: 回调函数，接收 ChainEvent 参数
-        """
-        self._callbacks.append(callback)
-    
-    def _emit(self, event: ChainEvent) -> None:
-        """触发事件回调"""
-        for callback in self._callbacks:
-            try:
-                callback(event)
-            except Exception as e:
-                logger.error(f"Event callback error: {e}")
-    
     async def connect(self) -> bool:
         """
         建立 WebSocket 连接
@@ -324,58 +619,275 @@ class ChainListener:
             logger.error(f"Connection failed: {e}")
             return False
     
-    async def _subscribe(self) -> None:
-        """订阅程序日志"""
-        if not self._ws:
+    def _parser_for(self, program_id: str) -> Any:
+        return self._parsers.get(program_id, LogParser)
+    
+    def _connections(self) -> List[Tuple[Any, SubscriptionManager]]:
+        """(WebSocket 连接或 None, 订阅表) 列表"""
+        return [(self._ws, self._subscriptions)]
+    
+    def _connection_for(self, source: Any) -> Tuple[Any, Optional[SubscriptionManager]]:
+        """消息来源对应的 (连接, 订阅表)"""
+        return self._ws, self._subscriptions
+    
+    async def _subscribe(self, ws: Any = None, subscriptions: Optional[SubscriptionManager] = None) -> None:
+        """在新建立的连接上订阅所有 Program 日志 (默认使用当前连接)"""
+        ws = ws or self._ws
+        if not ws:
             return
+        subscriptions = subscriptions or self._subscriptions
         
-        # 构建订阅消息
-        # 支持多 Program ID 订阅
-        for i, program_id in enumerate(self.program_ids):
-            subscribe_msg = {
-                "jsonrpc": "2.0",
-                "id": i + 1,
-                "method": "logsSubscribe",
-                "params": [
-                    {"mentions": [program_id]},
-                    {"commitment": "confirmed"}
-                ]
-            }
-            
-            await self._ws.send(json.dumps(subscribe_msg))
-            logger.info(f"Subscribed to program: {program_id[:8]}...")
+        # 重连后服务端订阅已失效: 重新订阅已登记的 Program，再补上新增的 Program
+        requests = subscriptions.reset()
+        for program_id in self.program_ids:
+            for commitment in self.commitments:
+                if subscriptions.get(program_id, commitment) is None:
+                    requests.append(subscriptions.subscribe(program_id, self._parser_for(program_id), commitment))
+        
+        for request in requests:
+            await ws.send(dumps(request))
+            logger.info(
+                f"Subscribing to program: {request['params'][0]['mentions'][0][:8]}... "
+                f"({request['params'][1]['commitment']})"
+            )
+    
+    async def add_program(self, program_id: str, parser: Any = None) -> None:
+        """
+        运行时新增 Program 订阅 (已连接时立即发送 logsSubscribe，无需重连)
+        
+        Args:
+            program_id: Program ID
+            parser: 该 Program 的日志解析器 (默认 LogParser)
+        """
+        if parser is not None:
+            self._parsers[program_id] = parser
+        if program_id not in self.program_ids:
+            self.program_ids.append(program_id)
+        
+        for ws, subscriptions in self._connections():
+            for commitment in self.commitments:
+                request = subscriptions.subscribe(program_id, self._parser_for(program_id), commitment)
+                if request is not None and ws is not None:
+                    await ws.send(dumps(request))
+    
+    async def remove_program(self, program_id: str) -> None:
+        """运行时移除 Program 订阅 (已连接时发送 logsUnsubscribe)"""
+        if program_id in self.program_ids:
+            self.program_ids.remove(program_id)
+        self._parsers.pop(program_id, None)
+        
+        for ws, subscriptions in self._connections():
+            for commitment in self.commitments:
+                request = subscriptions.unsubscribe(program_id, commitment)
+                if request is not None and ws is not None:
+                    await ws.send(dumps(request))
     
-    async def _handle_message(self, message: str) -> None:
-        """处理 WebSocket 消息"""
+    async def _handle_message(self, message: str, source: Any = None) -> None:
+        """
+        处理 WebSocket 消息
+        
+        Args:
+            message: 原始消息
+            source: 消息来源连接 (多端点监听时用于健康统计)
+        """
         try:
-            data = json.loads(message)
+            data = loads(message)
+            
+            ws, subscriptions = self._connection_for(source)
             
-            # 订阅确认
-            if "result" in data and "method" not in data:
-                self._subscription_id = data.get("result")
-                logger.info(f"Subscription confirmed, ID: {self._subscription_id}")
+            # 请求响应 (订阅 / 注销确认)，按请求 ID 匹配
+            if "id" in data and "method" not in data:
+                if subscriptions is not None:
+                    follow_up = subscriptions.handle_response(data)
+                    if follow_up is not None and ws is not None:
+                        await ws.send(dumps(follow_up))
                 return
             
             # 日志通知
             if data.get("method") == "logsNotification":
-                result = data.get("params", {}).get("result", {})
+                params = data.get("params", {})
+                result = params.get("result", {})
                 value = result.get("value", {})
                 
                 signature = value.get("signature", "unknown")
                 logs = value.get("logs", [])
                 slot = result.get("context", {}).get("slot", 0)
                 
-                # 解析事件
-                event = LogParser.parse(signature, logs, slot)
-                if event:
-                    logger.info(f"Event detected: {event.event_type.value} | sig: {signature[:16]}...")
-                    self._emit(event)
+                # 按订阅 ID 路由到对应 Program 的解析器
+                parser = LogParser
+                commitment = COMMITMENT_CONFIRMED
+                subscription_id = params.get("subscription")
+                if subscription_id is not None and subscriptions is not None:
+                    subscription = subscriptions.route(subscription_id)
+                    if subscription is not None:
+                        parser = subscription.parser
+                        commitment = subscription.commitment
+                    elif subscriptions.is_known(subscription_id):
+                        # 正在注销的订阅
+                        return
+                
+                if commitment != COMMITMENT_CONFIRMED:
+                    # 执行失败的交易不会产生有效事件，无需推测执行
+                    if value.get("err") is None:
+                        await self._process_speculative(signature, logs, slot, parser, commitment)
+                    return
+                
+                await self._process(signature, logs, slot, source, parser)
                     
-        except json.JSONDecodeError as e:
+        except JSONDecodeError as e:
             logger.error(f"Failed to parse message: {e}")
         except Exception as e:
             logger.error(f"Message handling error: {e}")
     
+    def _on_delivery(self, source: Any, signature: str, first: bool) -> None:
+        """交易送达回调 (first: 是否首次送达)，供多端点监听统计各连接的健康度"""
+    
+    async def _process(
+        self,
+        signature: str,
+        logs: List[str],
+        slot: int,
+        source: Any = None,
+        parser: Any = LogParser,
+    ) -> None:
+        """
+        解析并发布一笔交易 (按签名去重，推进检查点)
+
+        检查点只推进到已发布的位置: 事件交易在离开重排缓冲、发布后才计入，
+        无事件交易在不早于其 slot 的缓冲事件全部发布后才计入。
+        """
+        first = self._dedup.add(signature)
+        self._on_delivery(source, signature, first)
+        if not first:
+            get_sink().increment("listener.duplicates")
+            return
+        
+        # 解析事件
+        event = parser.parse(signature, logs, slot)
+        if event:
+            logger.info(f"Event detected: {event.event_type.value} | sig: {signature[:16]}...")
+            event.raw_logs = retain_logs(event.raw_logs, self.raw_logs_policy)
+            await self._publish_ordered(event)
+        else:
+            heapq.heappush(self._held, (slot, signature))
+            self._advance_checkpoint()
+        
+        self._since_checkpoint += 1
+        if self._since_checkpoint >= CHECKPOINT_EVERY:
+            self._save_checkpoint()
+    
+    def _advance_checkpoint(self) -> None:
+        """将 slot 不晚于缓冲中最早事件的无事件交易计入检查点"""
+        floor = self._reorder.min_slot()
+        while self._held and (floor is None or self._held[0][0] <= floor):
+            slot, signature = heapq.heappop(self._held)
+            self._checkpoint_to(slot, signature)
+    
+    def _checkpoint_to(self, slot: int, signature: str) -> None:
+        """将交易计入检查点 (补齐未完成时不越过缺失交易的 slot)"""
+        if self._checkpoint_limit is not None and slot > self._checkpoint_limit:
+            return
+        self.checkpoint.advance(slot, signature)
+    
+    async def _publish_confirmed(self, event: ChainEvent) -> None:
+        """发布已确认事件并计入检查点"""
+        await self._publish(event)
+        self._checkpoint_to(event.slot, event.signature)
+    
+    def _save_checkpoint(self) -> None:
+        try:
+            # 事件日志先于检查点刷新: 检查点覆盖的事件都已写入日志
+            if self.event_log is not None:
+                self.event_log.flush()
+            self.checkpoint.save()
+        except OSError as e:
+            logger.error(f"Failed to save checkpoint: {e}")
+        self._since_checkpoint = 0
+    
+    async def _process_speculative(
+        self,
+        signature: str,
+        logs: List[str],
+        slot: int,
+        parser: Any,
+        commitment: str,
+    ) -> None:
+        """
+        分发未确认事件 (不经重排缓冲、不推进检查点、不计入端点健康度)
+        """
+        if not self._dedup.add(f"{signature}:{commitment}"):
+            return
+        event = parser.parse(signature, logs, slot)
+        if event:
+            event.commitment = commitment
+            event.raw_logs = retain_logs(event.raw_logs, self.raw_logs_policy)
+            await self._publish(event)
+    
+    async def _publish_ordered(self, event: ChainEvent) -> None:
+        """经重排缓冲发布事件 (窗口到期的事件按 slot 顺序分发)"""
+        if self._reorder.window <= 0:
+            await self._publish_confirmed(event)
+            return
+        self._reorder.push(event)
+        get_sink().gauge("listener.reorder_depth", len(self._reorder))
+        await self._release(self._reorder.pop_ready)
+        
+        if self._reorder_task is None or self._reorder_task.done():
+            self._reorder_task = asyncio.create_task(self._reorder_loop(), name="listener-reorder")
+        self._reorder_wakeup.set()
+    
+    async def _release(self, pop: Callable[[], List[ChainEvent]]) -> None:
+        # 取出与分发在同一把锁内完成，避免两批事件交错
+        async with self._reorder_lock:
+            for event in pop():
+                await self._publish_confirmed(event)
+            self._advance_checkpoint()
+    
+    async def _reorder_loop(self) -> None:
+        """窗口到期时释放缓冲事件 (没有新事件到达时也能及时分发)"""
+        while True:
+            deadline = self._reorder.next_deadline()
+            if deadline is None:
+                self._reorder_wakeup.clear()
+                await self._reorder_wakeup.wait()
+                continue
+            await asyncio.sleep(max(0.0, deadline - time.monotonic()))
+            await self._release(self._reorder.pop_ready)
+    
+    async def backfill(self) -> int:
+        """
+        补齐检查点之后遗漏的交易 (按 slot 顺序发布)
+        
+        订阅建立后、读取实时消息前调用；期间到达的实时通知由 WebSocket 缓冲，
+        与补齐结果重叠的部分按签名去重。
+        
+        未能完整补齐时 (某笔交易重试后仍取不到，或请求失败)，检查点停在缺失交易之前，
+        此后的补齐与实时事件照常发布但不推进检查点，由下次补齐重新获取。
+        
+        Returns:
+            补齐的交易数量 (无检查点时为 0)
+        """
+        checkpoint = self.checkpoint.load()
+        if not self.backfill_enabled or checkpoint is None:
+            return 0
+        
+        if self._backfiller is None:
+            self._backfiller = Backfiller(self.rpc_url, self.program_ids)
+        try:
+            result = await self._backfiller.fetch_missed(checkpoint)
+        except Exception:
+            self._checkpoint_limit = checkpoint.slot
+            raise
+        self._checkpoint_limit = result.unresolved[0] if result.unresolved else None
+        missed = result.transactions
+        for tx in missed:
+            await self._process(tx.signature, tx.logs, tx.slot, parser=self._parser_for(tx.program_id))
+        self._save_checkpoint()
+        
+        if missed:
+            logger.info(f"Backfilled {len(missed)} transactions since slot {checkpoint.slot}")
+        return len(missed)
+    
     async def run(self) -> None:
         """运行监听循环"""
         self._running = True
@@ -384,14 +896,24 @@ class ChainListener:
             # 连接
             if not await self.connect():
                 self._reconnect_attempts += 1
-                if self._reconnect_attempts >= MAX_RECONNECT_ATTEMPTS:
+                if (
+                    self.max_reconnect_attempts is not None
+                    and self._reconnect_attempts >= self.max_reconnect_attempts
+                ):
                     logger.error("Max reconnection attempts reached. Stopping.")
                     break
                 
-                logger.info(f"Reconnecting in {RECONNECT_DELAY}s (attempt {self._reconnect_attempts})...")
-                await asyncio.sleep(RECONNECT_DELAY)
+                delay = min(MAX_RECONNECT_DELAY, RECONNECT_DELAY * 2 ** (self._reconnect_attempts - 1))
+                logger.info(f"Reconnecting in {delay}s (attempt {self._reconnect_attempts})...")
+                await asyncio.sleep(delay)
                 continue
             
+            # 补齐断线期间的交易 (失败时仅记录，继续实时监听)
+            try:
+                await self.backfill()
+            except Exception as e:
+                logger.error(f"Backfill failed: {e}")
+            
             # 监听消息
             try:
                 async for message in self._ws:
@@ -399,6 +921,8 @@ class ChainListener:
             except Exception as e:
                 logger.error(f"WebSocket error: {e}")
             
+            self._save_checkpoint()
+            
             # 连接断开，准备重连
             if self._running:
                 logger.warning("Connection lost. Reconnecting...")
@@ -410,6 +934,19 @@ class ChainListener:
         if self._ws:
             await self._ws.close()
             self._ws = None
+        if self._reorder_task is not None:
+            self._reorder_task.cancel()
+            await asyncio.gather(self._reorder_task, return_exceptions=True)
+            self._reorder_task = None
+        await self._release(self._reorder.drain)
+        self._save_checkpoint()
+        await self._dispatcher.close()
+        self._save_checkpoint()
+        if self.event_log is not None:
+            self.event_log.close()
+        if self._backfiller is not None:
+            await self._backfiller.close()
+            self._backfiller = None
         logger.info("Listener stopped.")
 
 
@@ -417,27 +954,19 @@ class ChainListener:
 # Mock Listener (for testing)
 # ============================================================================
 
-class MockChainListener:
+class MockChainListener(EventPublisher):
     """
     Mock 监听器，用于测试事件处理逻辑
     """
     
-    def __init__(self):
-        self._callbacks: List[Callable[[ChainEvent], None]] = []
+    def __init__(self, event_log_dir: Optional[str] = None):
+        """
+        Args:
+            event_log_dir: 事件日志目录 (可选，同 ChainListener)
+        """
+        super().__init__(EventLogWriter(event_log_dir) if event_log_dir else None)
         self._running = False
     
-    def on_event(self, callback: Callable[[ChainEvent], None]) -> None:
-        """注册事件回调"""
-        self._callbacks.append(callback)
-    
-    def _emit(self, event: ChainEvent) -> None:
-        """触发事件回调"""
-        for callback in self._callbacks:
-            try:
-                callback(event)
-            except Exception as e:
-                logger.error(f"Event callback error: {e}")
-    
     async def run(self, interval: float = 3.0) -> None:
         """运行 Mock 事件生成循环"""
         import random
@@ -476,13 +1005,83 @@ class MockChainListener:
             )
             
             logger.info(f"[MOCK] Event: {event.event_type.value} | sig: {event.signature[:20]}...")
-            self._emit(event)
+            await self._publish(event)
             
             await asyncio.sleep(interval)
     
+    async def replay(
+        self,
+        transactions: Iterable[RecordedTransaction],
+        profile: Optional[ArrivalProfile] = None,
+        count: Optional[int] = None,
+        duration: Optional[float] = None,
+        parser: Any = LogParser,
+    ) -> LoadReport:
+        """
+        压测模式: 按到达过程回放交易日志，经解析器解析后分发
+
+        发送按绝对时间表调度，落后于计划时不休眠直接追赶；
+        block 策略的异步订阅者积压时 publish 等待 (背压计入发送延迟)。
+        
+        Args:
+            transactions: 交易来源 (synthetic_transactions() / load_transactions() / cycle())
+            profile: 到达过程 (默认 1000 笔/秒泊松到达)
+            count: 最多发送的交易数
+            duration: 最长发送时间 (秒)
+            parser: 日志解析器
+            
+        Returns:
+            LoadReport (所有订阅者处理完积压后返回)
+        """
+        profile = profile or ArrivalProfile()
+        if count is None and duration is None and not isinstance(transactions, (list, tuple)):
+            raise ValueError("count or duration is required for unbounded transaction sources")
+        
+        report = LoadReport()
+        subscribers = [s for s in self._dispatcher.subscribers if s.is_async]
+        for subscriber in subscribers:
+            subscriber.dispatch_lag_ms = Histogram()
+        
+        self._running = True
+        sources = zip(profile.arrivals(), transactions)
+        if count is not None:
+            sources = itertools.islice(sources, count)
+        start = time.perf_counter()
+        
+        for offset, tx in sources:
+            if not self._running or (duration is not None and offset >= duration):
+                break
+            delay = start + offset - time.perf_counter()
+            if delay > REPLAY_MIN_SLEEP:
+                await asyncio.sleep(delay)
+            elif report.sent % REPLAY_YIELD_EVERY == 0:
+                # 落后于计划时定期让出事件循环，订阅者任务才能消费
+                await asyncio.sleep(0)
+            report.schedule_lag_ms.add(max(0.0, time.perf_counter() - start - offset) * 1000)
+            
+            report.sent += 1
+            event = parser.parse(tx.signature, tx.logs, tx.slot)
+            if event:
+                report.parsed += 1
+                await self._publish(event)
+            backlog = sum(s.lag for s in subscribers)
+            if backlog > report.max_backlog:
+                report.max_backlog = backlog
+        
+        sent_at = time.perf_counter()
+        report.duration_s = sent_at - start
+        await self.flush()
+        report.drain_s = time.perf_counter() - sent_at
+        report.dispatch_lag_ms = {s.name: s.dispatch_lag_ms for s in subscribers}
+        logger.info(f"[MOCK] Replay finished: {report.summary()}")
+        return report
+    
     async def stop(self) -> None:
         """停止 Mock 监听"""
         self._running = False
+        await self._dispatcher.close()
+        if self.event_log is not None:
+            self.event_log.close()
         logger.info("Mock listener stopped.")
 
 
@@ -498,7 +1097,7 @@ def default_event_handler(event: ChainEvent) -> None:
     print(f"   Slot: {event.slot}")
     print(f"   Program: {event.program_id[:16]}...")
     if event.data:
-        print(f"   Data: {json.dumps(event.data)}")
+        print(f"   Data: {dumps(event.data)}")
     print(f"{'='*60}\n")
 
 
@@ -0,0 +1,268 @@
+"""
+Exo Protocol - Event Dispatcher
+
+ChainListener / MockChainListener 共用的事件分发器。
+
+- 同步回调: 在分发调用中直接执行 (保持原有语义，应保持轻量)
+- 异步回调: 每个订阅者一个有界队列 + 一个消费任务，读循环只负责入队
+- 队列满时的溢出策略:
+    block       异步发布 (publish) 等待队列有空位，背压传递到 WebSocket 读循环；
+                同步 emit 无法等待，暂时超出容量
+    drop_oldest 丢弃最旧的事件
+    spill       溢出事件追加写入磁盘 JSONL 文件，队列排空后按顺序读回
+- 指标: listener.subscriber_lag (积压事件数)、listener.dispatch_lag_ms (入队 → 回调开始)、
+  listener.events_dropped / listener.events_spilled，均带 subscriber 标签
+"""
+
+import asyncio
+import inspect
+import logging
+import os
+import tempfile
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, IO, List, Optional, Tuple, Union
+
+from codec import dumps, loads
+from metrics import Histogram, get_sink
+
+logger = logging.getLogger(__name__)
+
+# 溢出策略
+OVERFLOW_BLOCK = "block"
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_SPILL = "spill"
+
+OVERFLOW_POLICIES = (OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST, OVERFLOW_SPILL)
+
+DEFAULT_SUBSCRIBER_QUEUE = 1000
+
+# 事件回调: 同步函数或协程函数
+EventCallback = Callable[[Any], Union[None, Awaitable[None]]]
+
+
+def _is_async(callback: Callable) -> bool:
+    return inspect.iscoroutinefunction(callback) or inspect.iscoroutinefunction(
+        getattr(callback, "__call__", None)
+    )
+
+
+class Subscriber:
+    """单个事件订阅者 (异步订阅者拥有独立队列与消费任务)"""
+
+    def __init__(
+        self,
+        callback: EventCallback,
+        name: Optional[str] = None,
+        max_queue: int = DEFAULT_SUBSCRIBER_QUEUE,
+        overflow: str = OVERFLOW_BLOCK,
+        spill_dir: Optional[str] = None,
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self.callback = callback
+        self.name = name or getattr(callback, "__qualname__", repr(callback))
+        self.max_queue = max_queue
+        self.overflow = overflow
+        self.spill_dir = spill_dir
+        self.is_async = _is_async(callback)
+
+        self.delivered = 0
+        self.dropped = 0
+        self.dispatch_lag_ms = Histogram()  # 入队 → 回调开始 (本进程内统计，供回放报告使用)
+        self._tags = {"subscriber": self.name}
+        self._buffer: Deque[Tuple[float, Any]] = deque()
+        self._wakeup = asyncio.Event()
+        self._space = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task: Optional[asyncio.Task] = None
+
+        # spill 状态
+        self._spill_file: Optional[IO[str]] = None
+        self._spill_path: Optional[str] = None
+        self._spill_read_pos = 0
+        self._spilled = 0
+        self._event_type: Any = None
+
+    @property
+    def lag(self) -> int:
+        """积压事件数 (内存队列 + 磁盘)"""
+        return len(self._buffer) + self._spilled
+
+    def offer(self, event: Any) -> None:
+        """非阻塞入队 (按溢出策略处理满队列)"""
+        self._ensure_task()
+        sink = get_sink()
+        full = len(self._buffer) >= self.max_queue
+
+        if self.overflow == OVERFLOW_SPILL and (full or self._spilled):
+            # 一旦开始溢出，新事件都写入磁盘以保持顺序
+            self._spill(event)
+            sink.increment("listener.events_spilled", 1, self._tags)
+        else:
+            if full and self.overflow == OVERFLOW_DROP_OLDEST:
+                self._buffer.popleft()
+                self.dropped += 1
+                sink.increment("listener.events_dropped", 1, self._tags)
+            self._buffer.append((time.perf_counter(), event))
+
+        self._idle.clear()
+        self._wakeup.set()
+        sink.gauge("listener.subscriber_lag", self.lag, self._tags)
+
+    async def put(self, event: Any) -> None:
+        """入队；block 策略下等待队列有空位"""
+        if self.overflow == OVERFLOW_BLOCK:
+            while len(self._buffer) >= self.max_queue:
+                self._space.clear()
+                await self._space.wait()
+        self.offer(event)
+
+    async def flush(self) -> None:
+        """等待积压事件全部处理完成"""
+        if self._task is not None:
+            await self._idle.wait()
+
+    async def close(self) -> None:
+        """停止消费任务并清理溢出文件"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self._close_spill()
+
+    def _ensure_task(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(
+                self._consume(), name=f"dispatch-{self.name}"
+            )
+
+    async def _consume(self) -> None:
+        sink = get_sink()
+        while True:
+            if not self._buffer and self._spilled:
+                self._unspill()
+            if not self._buffer:
+                self._idle.set()
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            enqueued_at, event = self._buffer.popleft()
+            self._space.set()
+            lag_ms = (time.perf_counter() - enqueued_at) * 1000
+            self.dispatch_lag_ms.add(lag_ms)
+            sink.observe("listener.dispatch_lag_ms", lag_ms, self._tags)
+            try:
+                await self.callback(event)
+            except Exception as e:
+                logger.error(f"Event callback error ({self.name}): {e}")
+            self.delivered += 1
+            sink.gauge("listener.subscriber_lag", self.lag, self._tags)
+
+    def _spill(self, event: Any) -> None:
+        if self._spill_file is None:
+            fd, self._spill_path = tempfile.mkstemp(prefix="exo-spill-", suffix=".jsonl", dir=self.spill_dir)
+            self._spill_file = os.fdopen(fd, "w+", encoding="utf-8")
+            self._spill_read_pos = 0
+            logger.warning(f"Subscriber {self.name} lagging, spilling events to {self._spill_path}")
+        self._event_type = type(event)
+        record = {"enqueued_at": time.perf_counter(), "event": event.to_dict(), "raw_logs": list(event.raw_logs)}
+        self._spill_file.seek(0, os.SEEK_END)
+        self._spill_file.write(dumps(record) + "\n")
+        self._spill_file.flush()
+        self._spilled += 1
+
+    def _unspill(self) -> None:
+        """从磁盘读回最多 max_queue 个事件 (事件类型需提供 to_dict / from_dict)"""
+        self._spill_file.seek(self._spill_read_pos)
+        count = min(self._spilled, self.max_queue)
+        for _ in range(count):
+            record = loads(self._spill_file.readline())
+            event = self._event_type.from_dict(record["event"], raw_logs=record["raw_logs"])
+            self._buffer.append((record["enqueued_at"], event))
+        self._spill_read_pos = self._spill_file.tell()
+        self._spilled -= count
+        if not self._spilled:
+            self._close_spill()
+
+    def _close_spill(self) -> None:
+        if self._spill_file is not None:
+            self._spill_file.close()
+            os.unlink(self._spill_path)
+            self._spill_file = None
+            self._spill_path = None
+            self._spilled = 0
+
+
+class EventDispatcher:
+    """事件分发器"""
+
+    def __init__(self):
+        self._subscribers: List[Subscriber] = []
+
+    @property
+    def subscribers(self) -> List[Subscriber]:
+        return list(self._subscribers)
+
+    def subscribe(self, callback: EventCallback, **options: Any) -> Subscriber:
+        """
+        注册回调
+
+        Args:
+            callback: 同步函数或协程函数
+            **options: Subscriber 参数 (name / max_queue / overflow / spill_dir)，仅对异步回调生效
+        """
+        subscriber = Subscriber(callback, **options)
+        self._subscribers.append(subscriber)
+        return subscriber
+
+    def emit(self, event: Any) -> None:
+        """同步分发: 同步回调直接执行，异步订阅者非阻塞入队"""
+        for subscriber in self._subscribers:
+            if subscriber.is_async:
+                subscriber.offer(event)
+                continue
+            try:
+                subscriber.callback(event)
+            except Exception as e:
+                logger.error(f"Event callback error: {e}")
+
+    async def publish(self, event: Any) -> None:
+        """异步分发: 与 emit 相同，但 block 策略的订阅者队列满时等待"""
+        for subscriber in self._subscribers:
+            if subscriber.is_async:
+                await subscriber.put(event)
+                continue
+            try:
+                subscriber.callback(event)
+            except Exception as e:
+                logger.error(f"Event callback error: {e}")
+
+    def lag(self) -> Dict[str, int]:
+        """各异步订阅者的积压事件数"""
+        return {s.name: s.lag for s in self._subscribers if s.is_async}
+
+    async def flush(self, timeout: Optional[float] = None) -> None:
+        """等待所有异步订阅者处理完积压事件"""
+        await asyncio.wait_for(
+            asyncio.gather(*(s.flush() for s in self._subscribers if s.is_async)),
+            timeout=timeout,
+        )
+
+    async def close(self, drain: bool = True, timeout: Optional[float] = 5.0) -> None:
+        """
+        关闭所有订阅者
+
+        Args:
+            drain: 是否先处理完积压事件
+            timeout: 排空等待上限 (秒)
+        """
+        if drain:
+            try:
+                await self.flush(timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Dispatcher drain timed out, lag: {self.lag()}")
+        for subscriber in self._subscribers:
+            await subscriber.close()
@@ -0,0 +1,272 @@
+"""
+Exo Protocol - Chain Event Log
+
+追加写入的分段事件日志，用于按 slot 区间回放 (调试、补齐、重建派生状态):
+
+    <dir>/<首个 slot:020d>.log   记录: [长度 u32][CRC32 u32][slot u64][payload]
+    <dir>/<首个 slot:020d>.idx   稀疏索引: [此前记录的最大 slot u64][偏移 u64]
+
+- payload 为紧凑 JSON (ChainEvent.to_dict() + raw_logs)
+- 段文件超过 segment_bytes 后轮转；每写入 index_interval 字节追加一条索引
+- 迟到事件 (slot 回退) 另起新段，段内 slot 单调不减，区间读取越过 end_slot 即停止
+- 索引记录"该偏移之前的最大 slot"
+- 轮转时写入尾索引 (段内最大 slot, 段大小)，读取时整段跳过不相关的段
+- 读取使用 mmap，只解码区间内的记录；进程崩溃留下的残缺尾记录在重新打开时截断
+"""
+
+import logging
+import mmap
+import os
+import struct
+import zlib
+from bisect import bisect_left
+from typing import Any, Iterator, List, Optional, Tuple
+
+from codec import loads
+
+logger = logging.getLogger(__name__)
+
+RECORD_HEADER = struct.Struct("<IIQ")  # payload 长度, CRC32, slot
+INDEX_ENTRY = struct.Struct("<QQ")  # 此前记录的最大 slot, 记录偏移
+
+SEGMENT_SUFFIX = ".log"
+INDEX_SUFFIX = ".idx"
+
+DEFAULT_SEGMENT_BYTES = 64 * 1024 * 1024
+DEFAULT_INDEX_INTERVAL = 64 * 1024
+
+
+def encode_event(event: Any) -> bytes:
+    """ChainEvent → 紧凑 JSON payload"""
+    return event.to_compact_json(include_logs=True).encode("utf-8")
+
+
+def decode_event(payload: bytes) -> Any:
+    """紧凑 JSON payload → ChainEvent"""
+    from listener.chain_listener import ChainEvent
+    record = loads(payload)
+    return ChainEvent.from_dict(record, raw_logs=record.pop("raw_logs", None))
+
+
+def _segment_name(base_slot: int) -> str:
+    return f"{base_slot:020d}"
+
+
+def _list_segments(directory: str) -> List[str]:
+    """按首个 slot 排序的段名 (不含扩展名)"""
+    if not os.path.isdir(directory):
+        return []
+    names = [f[: -len(SEGMENT_SUFFIX)] for f in os.listdir(directory) if f.endswith(SEGMENT_SUFFIX)]
+    return sorted(names)
+
+
+def _load_index(path: str) -> List[Tuple[int, int]]:
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return []
+    usable = len(data) - len(data) % INDEX_ENTRY.size
+    return [INDEX_ENTRY.unpack_from(data, offset) for offset in range(0, usable, INDEX_ENTRY.size)]
+
+
+def _scan(buffer: Any, offset: int, size: int, verify: bool = True) -> Iterator[Tuple[int, int, int]]:
+    """
+    遍历记录
+
+    Yields:
+        (记录偏移, slot, payload 结束偏移)；遇到残缺或校验失败的记录时停止
+    """
+    header_size = RECORD_HEADER.size
+    while offset + header_size <= size:
+        length, crc, slot = RECORD_HEADER.unpack_from(buffer, offset)
+        end = offset + header_size + length
+        if end > size:
+            return
+        if verify and zlib.crc32(buffer[offset + header_size:end]) != crc:
+            logger.warning(f"Corrupt event log record at offset {offset}")
+            return
+        yield offset, slot, end
+        offset = end
+
+
+class EventLogWriter:
+    """
+    事件日志写入器 (单写者)
+
+    写入经缓冲，flush() 后对读取者可见；fsync=True 时 flush 同时落盘。
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+        index_interval: int = DEFAULT_INDEX_INTERVAL,
+        fsync: bool = False,
+    ):
+        """
+        Args:
+            directory: 日志目录
+            segment_bytes: 段文件轮转大小
+            index_interval: 稀疏索引间隔 (字节)
+            fsync: flush 时是否 fsync
+        """
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.index_interval = index_interval
+        self.fsync = fsync
+        self._log = None
+        self._index = None
+        self._size = 0
+        self._max_slot = 0
+        self._last_indexed = 0
+        os.makedirs(directory, exist_ok=True)
+        self._recover()
+
+    def _path(self, name: str, suffix: str) -> str:
+        return os.path.join(self.directory, name + suffix)
+
+    def _recover(self) -> None:
+        """重新打开最后一个段: 截断残缺尾记录并重建其索引"""
+        segments = _list_segments(self.directory)
+        if not segments:
+            return
+        name = segments[-1]
+        path = self._path(name, SEGMENT_SUFFIX)
+        with open(path, "rb") as f:
+            data = f.read()
+
+        entries = []
+        valid = 0
+        last_indexed = -self.index_interval
+        max_slot = 0
+        for offset, slot, end in _scan(data, 0, len(data)):
+            if offset - last_indexed >= self.index_interval:
+                entries.append(INDEX_ENTRY.pack(max_slot, offset))
+                last_indexed = offset
+            max_slot = max(max_slot, slot)
+            valid = end
+        if valid < len(data):
+            logger.warning(f"Truncating {len(data) - valid} bytes of incomplete records from {path}")
+
+        self._log = open(path, "r+b")
+        self._log.truncate(valid)
+        self._log.seek(valid)
+        with open(self._path(name, INDEX_SUFFIX), "wb") as index:
+            index.write(b"".join(entries))
+        self._index = open(self._path(name, INDEX_SUFFIX), "ab")
+        self._size = valid
+        self._max_slot = max_slot
+        self._last_indexed = max(last_indexed, 0)
+
+    def _open_segment(self, base_slot: int) -> None:
+        name = _segment_name(base_slot)
+        if os.path.exists(self._path(name, SEGMENT_SUFFIX)):
+            # 同一 slot 的记录超过一个段
+            name = f"{name}-{len(_list_segments(self.directory)):06d}"
+        self._log = open(self._path(name, SEGMENT_SUFFIX), "ab")
+        self._index = open(self._path(name, INDEX_SUFFIX), "ab")
+        self._size = 0
+        self._max_slot = 0
+        self._last_indexed = 0
+
+    def _seal(self) -> None:
+        """关闭当前段并写入尾索引 (段内最大 slot, 段大小)"""
+        self._index.write(INDEX_ENTRY.pack(self._max_slot, self._size))
+        self.flush()
+        self._log.close()
+        self._index.close()
+        self._log = self._index = None
+
+    def append(self, slot: int, payload: bytes) -> None:
+        """追加一条记录"""
+        if self._log is not None and (
+            self._size >= self.segment_bytes or (self._size > 0 and slot < self._max_slot)
+        ):
+            # 超出大小或 slot 回退: 轮转，保持段内 slot 单调不减
+            self._seal()
+        if self._log is None:
+            # 段名不小于上一段，保证段按写入顺序排列 (迟到事件的 slot 可能回退)
+            self._open_segment(max(slot, self._max_slot))
+
+        if self._size == 0 or self._size - self._last_indexed >= self.index_interval:
+            self._index.write(INDEX_ENTRY.pack(self._max_slot, self._size))
+            self._last_indexed = self._size
+
+        self._log.write(RECORD_HEADER.pack(len(payload), zlib.crc32(payload), slot))
+        self._log.write(payload)
+        self._size += RECORD_HEADER.size + len(payload)
+        self._max_slot = max(self._max_slot, slot)
+
+    def append_event(self, event: Any) -> None:
+        """追加 ChainEvent"""
+        self.append(event.slot, encode_event(event))
+
+    def flush(self) -> None:
+        """刷新缓冲 (fsync=True 时落盘)"""
+        if self._log is None:
+            return
+        self._log.flush()
+        self._index.flush()
+        if self.fsync:
+            os.fsync(self._log.fileno())
+            os.fsync(self._index.fileno())
+
+    def close(self) -> None:
+        if self._log is None:
+            return
+        self.flush()
+        self._log.close()
+        self._index.close()
+        self._log = self._index = None
+
+
+class EventLogReader:
+    """按 slot 区间读取事件日志 (mmap)"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def segments(self) -> List[str]:
+        return _list_segments(self.directory)
+
+    def records(self, start_slot: int = 0, end_slot: Optional[int] = None) -> Iterator[Tuple[int, bytes]]:
+        """
+        读取 slot 在 [start_slot, end_slot] 内的记录 (按写入顺序)
+
+        Yields:
+            (slot, payload)
+        """
+        for name in self.segments():
+            path = os.path.join(self.directory, name + SEGMENT_SUFFIX)
+            size = os.path.getsize(path)
+            if size == 0:
+                continue
+            index = _load_index(os.path.join(self.directory, name + INDEX_SUFFIX))
+            if index and index[-1][1] == size and index[-1][0] < start_slot:
+                # 已封存的段，段内最大 slot 小于区间起点
+                continue
+
+            # 最后一条 "此前最大 slot < start_slot" 的索引之前的记录都不在区间内
+            position = bisect_left([entry[0] for entry in index], start_slot)
+            offset = index[position - 1][1] if position > 0 else 0
+
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                header_size = RECORD_HEADER.size
+                for record_offset, slot, end in _scan(mm, min(offset, size), size, verify=False):
+                    if end_slot is not None and slot > end_slot:
+                        # 段内 slot 单调不减，其后的记录都在区间之外
+                        break
+                    if slot < start_slot:
+                        continue
+                    payload = mm[record_offset + header_size:end]
+                    _, crc, _ = RECORD_HEADER.unpack_from(mm, record_offset)
+                    if zlib.crc32(payload) != crc:
+                        logger.warning(f"Corrupt event log record in {path} at offset {record_offset}")
+                        break
+                    yield slot, payload
+
+    def events(self, start_slot: int = 0, end_slot: Optional[int] = None) -> Iterator[Any]:
+        """读取 slot 区间内的 ChainEvent"""
+        for _, payload in self.records(start_slot, end_slot):
+            yield decode_event(payload)
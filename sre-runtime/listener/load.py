@@ -0,0 +1,340 @@
+"""
+Exo Protocol - Load Replay
+
+MockChainListener.replay() 的交易来源、到达过程与统计报告:
+
+- 交易来源: synthetic_transactions() 按 exo-core / exo-hooks 的 msg! 与 Anchor emit! 格式合成日志，
+  load_transactions() 读取录制的交易 (JSON 夹具，或事件日志目录中的 raw_logs)，
+  cycle() 循环回放录制的交易 (签名与 slot 每轮递增，避免被下游去重)
+- 到达过程: uniform (等间隔) / poisson (指数分布间隔)，可叠加突发 (每秒 burst_rate 次，每次 burst_size 笔)
+- LoadReport: 发送吞吐、相对计划时间表的发送延迟、各异步订阅者的分发延迟与最大积压
+"""
+
+import base64
+import heapq
+import itertools
+import os
+import random
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from codec import loads
+from listener.anchor_events import b58encode, encode_event
+from listener.event_log import EventLogReader
+from metrics import Histogram
+
+ARRIVAL_UNIFORM = "uniform"
+ARRIVAL_POISSON = "poisson"
+
+ARRIVAL_PROCESSES = (ARRIVAL_UNIFORM, ARRIVAL_POISSON)
+
+# 与链上程序一致的 Program ID (避免依赖 chain_listener)
+_CORE = "CdamAXn5fCros3MktPxmbQKXtxd34XHATTLmh9jkn7DT"
+_HOOKS = "F5CzTZpDch5gUc5FgTPPRJ8mRKgrMVzJmcPfTzTugCeK"
+_TOKEN_2022 = "TokenzQdBNbLqP5VEhdkAS6EPFLC1PHnBqCXEpPxuEb"
+_COMPUTE_BUDGET = "ComputeBudget111111111111111111111111111111"
+_SYSTEM = "11111111111111111111111111111111"
+_JUPITER = "JUP6LkbZbjS1jKKwapdHNy74zcZ3tLUZoi5QNyVTaV4"
+
+
+@dataclass
+class RecordedTransaction:
+    """待回放的交易日志"""
+    signature: str
+    slot: int
+    logs: List[str]
+
+
+@dataclass
+class ArrivalProfile:
+    """
+    到达过程
+
+    Attributes:
+        rate: 基础到达速率 (笔/秒)
+        process: uniform / poisson
+        burst_rate: 突发频率 (次/秒，泊松)，0 表示无突发
+        burst_size: 每次突发额外到达的交易数
+        seed: 随机种子
+    """
+    rate: float = 1000.0
+    process: str = ARRIVAL_POISSON
+    burst_rate: float = 0.0
+    burst_size: int = 0
+    seed: Optional[int] = None
+
+    def __post_init__(self):
+        if self.process not in ARRIVAL_PROCESSES:
+            raise ValueError(f"Unknown arrival process: {self.process}")
+        if self.rate <= 0:
+            raise ValueError("rate must be positive")
+
+    def arrivals(self) -> Iterator[float]:
+        """到达时间 (相对开始的秒数，单调不减，无限序列)"""
+        rng = random.Random(self.seed)
+        streams = [self._base(rng)]
+        if self.burst_rate > 0 and self.burst_size > 0:
+            streams.append(self._bursts(rng))
+        return heapq.merge(*streams)
+
+    def _base(self, rng: random.Random) -> Iterator[float]:
+        t = 0.0
+        while True:
+            yield t
+            t += rng.expovariate(self.rate) if self.process == ARRIVAL_POISSON else 1.0 / self.rate
+
+    def _bursts(self, rng: random.Random) -> Iterator[float]:
+        t = 0.0
+        while True:
+            t += rng.expovariate(self.burst_rate)
+            for _ in range(self.burst_size):
+                yield t
+
+
+@dataclass
+class LoadReport:
+    """
+    回放统计
+
+    Attributes:
+        sent: 发送的交易数
+        parsed: 解析出事件并分发的数量
+        duration_s: 发送阶段耗时
+        drain_s: 发送结束到订阅者处理完积压的耗时
+        schedule_lag_ms: 实际发送时间相对计划时间的延迟 (发送端跟不上目标速率时增大)
+        dispatch_lag_ms: 各异步订阅者的分发延迟 (入队 → 回调开始)
+        max_backlog: 回放期间所有异步订阅者积压之和的最大值
+    """
+    sent: int = 0
+    parsed: int = 0
+    duration_s: float = 0.0
+    drain_s: float = 0.0
+    schedule_lag_ms: Histogram = field(default_factory=Histogram)
+    dispatch_lag_ms: Dict[str, Histogram] = field(default_factory=dict)
+    max_backlog: int = 0
+
+    @property
+    def throughput(self) -> float:
+        """发送吞吐 (笔/秒)"""
+        return self.sent / self.duration_s if self.duration_s else 0.0
+
+    @property
+    def delivered_throughput(self) -> float:
+        """端到端吞吐: 分发事件数 / (发送 + 排空) 耗时"""
+        total = self.duration_s + self.drain_s
+        return self.parsed / total if total else 0.0
+
+    def summary(self) -> Dict[str, float]:
+        """扁平化的统计值 (日志与基准输出)"""
+        result = {
+            "sent": self.sent,
+            "parsed": self.parsed,
+            "throughput": round(self.throughput, 1),
+            "delivered_throughput": round(self.delivered_throughput, 1),
+            "schedule_lag_p50_ms": self.schedule_lag_ms.quantile(0.5),
+            "schedule_lag_p99_ms": self.schedule_lag_ms.quantile(0.99),
+            "max_backlog": self.max_backlog,
+        }
+        for name, histogram in self.dispatch_lag_ms.items():
+            result[f"{name}.dispatch_lag_p50_ms"] = histogram.quantile(0.5)
+            result[f"{name}.dispatch_lag_p99_ms"] = histogram.quantile(0.99)
+        return result
+
+
+# ============================================================================
+# 交易来源
+# ============================================================================
+
+def _invoke(program: str, depth: int = 1) -> str:
+    return f"Program {program} invoke [{depth}]"
+
+
+def _exit(program: str, consumed: int = 25_000) -> List[str]:
+    return [
+        f"Program {program} consumed {consumed} of 200000 compute units",
+        f"Program {program} success",
+    ]
+
+
+def _data(name: str, **values) -> str:
+    return "Program data: " + base64.b64encode(encode_event(name, **values)).decode()
+
+
+def _create_escrow(rng: random.Random) -> List[str]:
+    escrow, buyer, skill = (rng.randbytes(32) for _ in range(3))
+    amount = rng.randrange(10_000_000, 2_000_000_000)
+    expires_at = 1_767_225_600 + rng.randrange(86_400)
+    return [
+        _invoke(_COMPUTE_BUDGET), f"Program {_COMPUTE_BUDGET} success",
+        _invoke(_CORE),
+        "Program log: Instruction: CreateEscrow",
+        _invoke(_SYSTEM, 2), f"Program {_SYSTEM} success",
+        "Program log: Escrow created",
+        f"Program log: Buyer: {b58encode(buyer)}",
+        f"Program log: Skill: {b58encode(skill)}",
+        f"Program log: Amount: {amount} lamports",
+        f"Program log: Expires at: {expires_at}",
+        _data("EscrowCreated", escrow=escrow, buyer=buyer, skill=skill, amount=amount,
+              nonce=rng.getrandbits(32), expires_at=expires_at),
+        *_exit(_CORE),
+    ]
+
+
+def _commit_result(rng: random.Random) -> List[str]:
+    return [
+        _invoke(_CORE),
+        "Program log: Instruction: CommitResult",
+        f"Program log: Result committed by executor: {b58encode(rng.randbytes(32))}",
+        f"Program log: Result hash: {list(rng.randbytes(4))}",
+        f"Program log: Challenge window started at slot: {rng.randrange(300_000_000, 310_000_000)}",
+        *_exit(_CORE),
+    ]
+
+
+def _release_escrow(rng: random.Random) -> List[str]:
+    amount = rng.randrange(10_000_000, 2_000_000_000)
+    fee, royalty = amount * 5 // 100, amount * 10 // 100
+    payout = amount - fee - royalty
+    return [
+        _invoke(_CORE),
+        "Program log: Instruction: ReleaseEscrow",
+        "Program log: Escrow completed - Distribution:",
+        f"Program log:   Protocol fee: {fee} lamports -> treasury",
+        f"Program log:   Skill royalty: {royalty} lamports -> skill authority",
+        f"Program log:   Executor payout: {payout} lamports -> executor",
+        _data("EscrowCompleted", escrow=rng.randbytes(32), executor=rng.randbytes(32),
+              protocol_fee=fee, skill_royalty=royalty, executor_payout=payout),
+        *_exit(_CORE),
+    ]
+
+
+def _register_skill(rng: random.Random) -> List[str]:
+    price = rng.randrange(1_000_000, 500_000_000)
+    return [
+        _invoke(_CORE),
+        "Program log: Instruction: RegisterSkill",
+        f"Program log: Skill registered: skill-{rng.randrange(10_000)}",
+        f"Program log: price: {price}",
+        _data("SkillRegistered", skill=rng.randbytes(32), authority=rng.randbytes(32),
+              content_hash=rng.randbytes(32), price_lamports=price, version=1),
+        *_exit(_CORE),
+    ]
+
+
+def _transfer_hooked(rng: random.Random) -> List[str]:
+    amount = rng.randrange(1_000, 10_000_000)
+    fee, royalty = amount * 5 // 100, amount * 2 // 100
+    return [
+        _invoke(_TOKEN_2022),
+        "Program log: Instruction: TransferChecked",
+        _invoke(_HOOKS, 2),
+        "Program log: Instruction: Execute",
+        "Program log: === Exo Transfer Hook Executed ===",
+        f"Program log: Transfer amount: {amount} lamports",
+        f"Program log: Protocol fee (5%): {fee} lamports",
+        f"Program log: Creator royalty (2%): {royalty} lamports",
+        f"Program log: Executor receives (93%): {amount - fee - royalty} lamports",
+        _data("TransferHooked", mint=rng.randbytes(32), amount=amount, protocol_fee=fee,
+              creator_royalty=royalty, executor_amount=amount - fee - royalty),
+        *_exit(_HOOKS, 9_000),
+        *_exit(_TOKEN_2022, 30_000),
+    ]
+
+
+def _unrelated(rng: random.Random) -> List[str]:
+    # 同时提及 Exo 程序账户的第三方交易 (解析结果为 None)
+    return [
+        _invoke(_COMPUTE_BUDGET), f"Program {_COMPUTE_BUDGET} success",
+        _invoke(_JUPITER),
+        "Program log: Instruction: Route",
+        _invoke(_TOKEN_2022, 2),
+        "Program log: Instruction: Transfer",
+        f"Program {_TOKEN_2022} success",
+        *_exit(_JUPITER),
+    ]
+
+
+# 交易模板及默认权重 (大致按主网交易构成)
+TEMPLATES: Dict[str, Callable[[random.Random], List[str]]] = {
+    "create_escrow": _create_escrow,
+    "commit_result": _commit_result,
+    "release_escrow": _release_escrow,
+    "register_skill": _register_skill,
+    "transfer_hooked": _transfer_hooked,
+    "unrelated": _unrelated,
+}
+
+DEFAULT_MIX = {
+    "create_escrow": 30,
+    "commit_result": 25,
+    "release_escrow": 20,
+    "register_skill": 5,
+    "transfer_hooked": 15,
+    "unrelated": 5,
+}
+
+
+def synthetic_transactions(
+    seed: Optional[int] = None,
+    start_slot: int = 300_000_000,
+    mix: Optional[Dict[str, float]] = None,
+    per_slot: int = 4,
+) -> Iterator[RecordedTransaction]:
+    """
+    合成交易流 (无限序列)
+
+    Args:
+        seed: 随机种子
+        start_slot: 起始 slot
+        mix: 模板名 → 权重 (默认 DEFAULT_MIX)
+        per_slot: 每个 slot 的交易数
+    """
+    rng = random.Random(seed)
+    mix = mix or DEFAULT_MIX
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    for n in itertools.count():
+        name = rng.choices(names, weights)[0]
+        yield RecordedTransaction(
+            signature=b58encode(rng.randbytes(64)),
+            slot=start_slot + n // per_slot,
+            logs=TEMPLATES[name](rng),
+        )
+
+
+def load_transactions(path: str) -> List[RecordedTransaction]:
+    """
+    读取录制的交易
+
+    Args:
+        path: JSON 文件 ([{signature, slot, logs}, ...]) 或事件日志目录 (使用事件的 raw_logs)
+    """
+    if os.path.isdir(path):
+        return [
+            RecordedTransaction(event.signature, event.slot, event.raw_logs)
+            for event in EventLogReader(path).events()
+            if event.raw_logs
+        ]
+    with open(path, "rb") as f:
+        records = loads(f.read())
+    return [RecordedTransaction(r["signature"], r["slot"], r["logs"]) for r in records]
+
+
+def cycle(transactions: Iterable[RecordedTransaction]) -> Iterator[RecordedTransaction]:
+    """
+    循环回放 (无限序列): 每轮签名追加轮次后缀，slot 顺延上一轮的跨度
+    """
+    transactions = list(transactions)
+    if not transactions:
+        return
+    first = min(tx.slot for tx in transactions)
+    span = max(tx.slot for tx in transactions) - first + 1
+    for round_ in itertools.count():
+        for tx in transactions:
+            if round_ == 0:
+                yield tx
+            else:
+                yield RecordedTransaction(f"{tx.signature}-{round_}", tx.slot + round_ * span, tx.logs)
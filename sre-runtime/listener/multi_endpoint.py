@@ -0,0 +1,303 @@
+"""
+Exo Protocol - Multi-Endpoint Chain Listener
+
+同时在多个 RPC 端点上保持 logsSubscribe 订阅，合并去重后分发:
+
+- 每个端点一个连接任务，断线后按带抖动的指数退避重连 (不设重连次数上限)；
+  收到首条消息或连接保持 stable_after 秒后才重置退避，避免连上即断的端点被频繁重连
+- 任一端点在线即不丢事件；同一交易由 ChainListener 的签名去重合并
+- 健康度: 首次送达率 (EWMA) 与相对最快端点的送达延迟 (EWMA)；
+  其他端点仍在送达而本端点长时间无消息时判定为僵死连接并主动重连
+- 所有端点都断开后，第一个恢复的连接触发补齐 (使用健康度最高且配置了 rpc_url 的端点)
+"""
+
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from listener.chain_listener import (
+    HELIUS_RPC_DEVNET,
+    HELIUS_RPC_MAINNET,
+    HELIUS_WS_DEVNET,
+    HELIUS_WS_MAINNET,
+    ChainListener,
+)
+from listener.subscriptions import SubscriptionManager
+from metrics import get_sink
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKOFF_BASE = 0.5  # 秒
+DEFAULT_BACKOFF_MAX = 30.0
+DEFAULT_STALE_AFTER = 60.0  # 秒无消息 (且其他端点活跃) 视为僵死
+DEFAULT_STABLE_AFTER = 30.0  # 连接保持该时长 (秒) 视为稳定，重置退避
+HEALTH_ALPHA = 0.1  # EWMA 平滑系数
+
+Connector = Callable[[str], Awaitable[Any]]
+
+
+@dataclass
+class EndpointHealth:
+    """端点健康统计"""
+    connected: bool = False
+    consecutive_failures: int = 0
+    connects: int = 0
+    messages: int = 0
+    first_rate: float = 1.0  # 首次送达率 EWMA
+    lag_ms: float = 0.0  # 相对最快端点的延迟 EWMA
+    last_message_at: Optional[float] = None
+    connected_at: Optional[float] = None
+
+    @property
+    def score(self) -> float:
+        """健康分 (0 ~ 1)，未连接为 0"""
+        if not self.connected:
+            return 0.0
+        return self.first_rate / (1.0 + self.lag_ms / 1000.0)
+
+    def record_delivery(self, first: bool, lag_ms: float, now: float) -> None:
+        self.messages += 1
+        self.last_message_at = now
+        self.first_rate += HEALTH_ALPHA * ((1.0 if first else 0.0) - self.first_rate)
+        self.lag_ms += HEALTH_ALPHA * (lag_ms - self.lag_ms)
+
+
+@dataclass
+class Endpoint:
+    """
+    RPC 端点
+
+    Attributes:
+        name: 名称 (日志与指标标签)
+        ws_url: WebSocket URL
+        rpc_url: JSON-RPC URL (用于补齐，可选)
+    """
+    name: str
+    ws_url: str
+    rpc_url: Optional[str] = None
+    health: EndpointHealth = field(default_factory=EndpointHealth)
+    subscriptions: SubscriptionManager = field(default_factory=SubscriptionManager, repr=False)
+    ws: Any = field(default=None, repr=False)
+
+    @classmethod
+    def helius(cls, api_key: str, network: str = "devnet") -> "Endpoint":
+        ws_base = HELIUS_WS_DEVNET if network == "devnet" else HELIUS_WS_MAINNET
+        rpc_base = HELIUS_RPC_DEVNET if network == "devnet" else HELIUS_RPC_MAINNET
+        return cls(
+            name=f"helius-{network}",
+            ws_url=f"{ws_base}?api-key={api_key}",
+            rpc_url=f"{rpc_base}/?api-key={api_key}",
+        )
+
+
+async def _websocket_connect(url: str) -> Any:
+    import websockets
+    return await websockets.connect(url)
+
+
+class MultiEndpointListener(ChainListener):
+    """
+    多端点链上事件监听器
+
+    与 ChainListener 共享解析、去重、重排、检查点与分发逻辑，仅替换连接管理。
+    """
+
+    def __init__(
+        self,
+        endpoints: List[Endpoint],
+        program_ids: Optional[List[str]] = None,
+        backoff_base: float = DEFAULT_BACKOFF_BASE,
+        backoff_max: float = DEFAULT_BACKOFF_MAX,
+        stale_after: Optional[float] = DEFAULT_STALE_AFTER,
+        stable_after: float = DEFAULT_STABLE_AFTER,
+        connector: Connector = _websocket_connect,
+        **options: Any,
+    ):
+        """
+        Args:
+            endpoints: 端点列表
+            program_ids: 要监听的 Program ID 列表
+            backoff_base: 重连退避基数 (秒)
+            backoff_max: 重连退避上限 (秒)
+            stale_after: 僵死判定时间 (秒)，None 表示不检测
+            stable_after: 未收到消息时，连接保持多久 (秒) 后重置退避
+            connector: WebSocket 连接函数 (测试可注入)
+            **options: ChainListener 其他参数 (checkpoint_path / backfill / dedup_ttl / reorder_window)
+        """
+        if not endpoints:
+            raise ValueError("At least one endpoint is required")
+        rpc_url = next((e.rpc_url for e in endpoints if e.rpc_url), None)
+        super().__init__(api_key="", program_ids=program_ids, rpc_url=rpc_url, max_reconnect_attempts=None, **options)
+        self.endpoints = list(endpoints)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.stale_after = stale_after
+        self.stable_after = stable_after
+        self._connector = connector
+        self._tasks: List[asyncio.Task] = []
+        self._live = 0
+
+    def health(self) -> Dict[str, EndpointHealth]:
+        """各端点健康统计"""
+        return {e.name: e.health for e in self.endpoints}
+
+    def best_endpoint(self, require_rpc: bool = False) -> Optional[Endpoint]:
+        """健康分最高的端点"""
+        candidates = [e for e in self.endpoints if e.rpc_url or not require_rpc]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda e: e.health.score)
+
+    def _connections(self) -> List[Tuple[Any, SubscriptionManager]]:
+        return [(e.ws, e.subscriptions) for e in self.endpoints]
+
+    def _connection_for(self, source: Any) -> Tuple[Any, Optional[SubscriptionManager]]:
+        if isinstance(source, Endpoint):
+            return source.ws, source.subscriptions
+        return None, None
+
+    def _backoff(self, endpoint: Endpoint) -> float:
+        """带抖动的指数退避: [cap/2, cap)，cap = base * 2^failures"""
+        failures = endpoint.health.consecutive_failures
+        cap = min(self.backoff_max, self.backoff_base * (2 ** failures))
+        return cap / 2 + random.uniform(0, cap / 2)
+
+    def _on_delivery(self, source: Any, signature: str, first: bool) -> None:
+        if not isinstance(source, Endpoint):
+            return
+        now = time.monotonic()
+        first_seen = self._dedup.added_at(signature)
+        lag_ms = 0.0 if first or first_seen is None else (now - first_seen) * 1000
+        source.health.record_delivery(first, lag_ms, now)
+        tags = {"endpoint": source.name}
+        sink = get_sink()
+        sink.increment("listener.endpoint_messages", 1, {**tags, "first": str(first).lower()})
+        if not first:
+            sink.observe("listener.endpoint_lag_ms", lag_ms, tags)
+
+    async def backfill(self) -> int:
+        """使用健康分最高的端点补齐"""
+        best = self.best_endpoint(require_rpc=True)
+        if best is not None:
+            self.rpc_url = best.rpc_url
+            if self._backfiller is not None:
+                self._backfiller.rpc_url = best.rpc_url
+        return await super().backfill()
+
+    async def run(self) -> None:
+        """运行监听循环 (各端点独立连接，直到 stop)"""
+        self._running = True
+        self._tasks = [
+            asyncio.create_task(self._endpoint_loop(endpoint), name=f"listener-{endpoint.name}")
+            for endpoint in self.endpoints
+        ]
+        if self.stale_after:
+            self._tasks.append(asyncio.create_task(self._watchdog(), name="listener-watchdog"))
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _endpoint_loop(self, endpoint: Endpoint) -> None:
+        health = endpoint.health
+        while self._running:
+            # 连接并订阅
+            ws = None
+            subscribed = False
+            try:
+                ws = await self._connector(endpoint.ws_url)
+                await self._subscribe(ws, endpoint.subscriptions)
+                subscribed = True
+            except Exception as e:
+                health.consecutive_failures += 1
+                delay = self._backoff(endpoint)
+                logger.error(f"[{endpoint.name}] Connection failed: {e}, retrying in {delay:.1f}s")
+                get_sink().increment("listener.endpoint_failures", 1, {"endpoint": endpoint.name})
+            finally:
+                # 订阅失败 (含取消) 时关闭已建立的连接
+                if ws is not None and not subscribed:
+                    await self._close_quietly(ws)
+            if not subscribed:
+                await asyncio.sleep(delay)
+                continue
+
+            endpoint.ws = ws
+            health.connected = True
+            health.connects += 1
+            health.connected_at = time.monotonic()
+            received = False
+            self._live += 1
+            logger.info(f"[{endpoint.name}] Connected ({self._live}/{len(self.endpoints)} live)")
+
+            # 所有端点都曾断开: 补齐空档
+            if self._live == 1:
+                try:
+                    await self.backfill()
+                except Exception as e:
+                    logger.error(f"Backfill failed: {e}")
+
+            try:
+                async for message in ws:
+                    if not received:
+                        # 首条消息: 连接确实可用，重置退避
+                        received = True
+                        health.consecutive_failures = 0
+                    await self._handle_message(message, source=endpoint)
+            except Exception as e:
+                logger.error(f"[{endpoint.name}] WebSocket error: {e}")
+            finally:
+                self._live -= 1
+                endpoint.ws = None
+                health.connected = False
+                self._save_checkpoint()
+
+            if time.monotonic() - health.connected_at >= self.stable_after:
+                health.consecutive_failures = 0
+            elif not received:
+                # 连上即断且无消息: 按失败计，继续增大退避
+                health.consecutive_failures += 1
+
+            if self._running:
+                delay = self._backoff(endpoint)
+                logger.warning(f"[{endpoint.name}] Connection lost, reconnecting in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    @staticmethod
+    async def _close_quietly(ws: Any) -> None:
+        try:
+            await ws.close()
+        except Exception as e:
+            logger.debug(f"Error closing websocket: {e}")
+
+    async def _watchdog(self) -> None:
+        """关闭僵死连接: 其他端点仍有消息，而本端点超过 stale_after 无消息"""
+        while self._running:
+            await asyncio.sleep(self.stale_after / 2)
+            now = time.monotonic()
+            latest = max((e.health.last_message_at or 0.0 for e in self.endpoints), default=0.0)
+            for endpoint in self.endpoints:
+                health = endpoint.health
+                if endpoint.ws is None:
+                    continue
+                # 重连后从连接时间起算
+                last = max(health.last_message_at or 0.0, health.connected_at or now)
+                if now - last > self.stale_after and latest > last:
+                    logger.warning(f"[{endpoint.name}] No messages for {now - last:.0f}s, reconnecting")
+                    get_sink().increment("listener.endpoint_stale", 1, {"endpoint": endpoint.name})
+                    await endpoint.ws.close()
+
+    async def stop(self) -> None:
+        """停止所有端点连接"""
+        self._running = False
+        for endpoint in self.endpoints:
+            if endpoint.ws is not None:
+                await endpoint.ws.close()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        await super().stop()
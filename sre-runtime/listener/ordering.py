@@ -0,0 +1,157 @@
+"""
+Exo Protocol - Event Ordering
+
+ChainListener 分发前的两道处理:
+
+- DedupCache: 按签名去重。同一交易同时涉及 exo-core 与 exo-hooks 时，两个 logsSubscribe
+  订阅各推送一次；补齐与实时通知也可能重叠。按数量与存活时间淘汰。
+- ReorderBuffer: 短暂缓冲事件，按 (slot, 到达顺序) 发出。事件在窗口到期后释放；
+  晚于已释放 slot 到达的事件不丢弃，立即发出并计数。
+"""
+
+import heapq
+import itertools
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, List, Optional, Tuple, TypeVar
+
+from metrics import get_sink
+
+T = TypeVar("T")
+
+DEFAULT_DEDUP_SIZE = 10_000
+DEFAULT_DEDUP_TTL = 600.0  # 秒
+DEFAULT_REORDER_WINDOW = 0.5  # 秒 (约一个 slot)
+
+Clock = Callable[[], float]
+
+
+class DedupCache:
+    """按数量与存活时间淘汰的签名集合"""
+
+    def __init__(
+        self,
+        max_size: int = DEFAULT_DEDUP_SIZE,
+        ttl: Optional[float] = DEFAULT_DEDUP_TTL,
+        clock: Clock = time.monotonic,
+    ):
+        """
+        Args:
+            max_size: 最多保留的签名数量
+            ttl: 签名保留时间 (秒)，None 表示只按数量淘汰
+            clock: 时钟 (测试可注入)
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        self._evict(self._clock())
+        return key in self._entries
+
+    def added_at(self, key: str) -> Optional[float]:
+        """首次记录时间 (clock 时间)，未记录时为 None"""
+        return self._entries.get(key)
+
+    def add(self, key: str) -> bool:
+        """
+        记录签名
+
+        Returns:
+            首次出现返回 True，重复返回 False
+        """
+        now = self._clock()
+        self._evict(now)
+        if key in self._entries:
+            return False
+        self._entries[key] = now
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return True
+
+    def _evict(self, now: float) -> None:
+        if self.ttl is None:
+            return
+        entries = self._entries
+        while entries:
+            key, added_at = next(iter(entries.items()))
+            if now - added_at < self.ttl:
+                break
+            entries.popitem(last=False)
+
+
+class ReorderBuffer(Generic[T]):
+    """
+    按 slot 排序的短时缓冲
+
+    堆顶 (最小 slot) 的事件缓冲满 window 秒后释放，同 slot 的事件随之释放；
+    更大 slot 的事件等待堆顶释放，保证发出顺序单调。
+    """
+
+    def __init__(
+        self,
+        window: float = DEFAULT_REORDER_WINDOW,
+        slot_of: Callable[[T], int] = lambda event: event.slot,
+        clock: Clock = time.monotonic,
+    ):
+        """
+        Args:
+            window: 缓冲时间 (秒)，0 表示不缓冲
+            slot_of: 取事件 slot 的函数
+            clock: 时钟 (测试可注入)
+        """
+        self.window = window
+        self._slot_of = slot_of
+        self._clock = clock
+        self._heap: List[Tuple[int, int, float, T]] = []
+        self._seq = itertools.count()
+        self._released_slot = -1
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, event: T) -> None:
+        slot = self._slot_of(event)
+        deadline = self._clock() + self.window
+        if slot < self._released_slot:
+            # 更大的 slot 已经发出，继续等待无法恢复顺序
+            get_sink().increment("listener.events_late")
+            deadline = self._clock()
+        heapq.heappush(self._heap, (slot, next(self._seq), deadline, event))
+
+    def pop_ready(self) -> List[T]:
+        """释放到期的事件 (按 slot 升序)"""
+        now = self._clock()
+        ready: List[T] = []
+        heap = self._heap
+        while heap and heap[0][2] <= now:
+            ready.append(self._pop())
+        # 已到期事件的 slot 之前的事件一并释放
+        if ready:
+            while heap and heap[0][0] <= self._released_slot:
+                ready.append(self._pop())
+        return ready
+
+    def drain(self) -> List[T]:
+        """释放全部事件"""
+        ready: List[T] = []
+        while self._heap:
+            ready.append(self._pop())
+        return ready
+
+    def min_slot(self) -> Optional[int]:
+        """缓冲中最小的 slot，缓冲为空时为 None"""
+        return self._heap[0][0] if self._heap else None
+
+    def next_deadline(self) -> Optional[float]:
+        """最早到期时间 (clock 时间)，缓冲为空时为 None"""
+        return self._heap[0][2] if self._heap else None
+
+    def _pop(self) -> T:
+        slot, _, _, event = heapq.heappop(self._heap)
+        self._released_slot = max(self._released_slot, slot)
+        return event
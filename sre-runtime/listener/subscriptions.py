@@ -0,0 +1,184 @@
+"""
+Exo Protocol - Subscription Manager
+
+单个 WebSocket 连接上的 logsSubscribe 订阅表:
+
+    请求 ID → 订阅 (等待确认)
+    订阅 ID → 订阅 (已确认，用于路由 logsNotification)
+    (Program ID, 确认级别) → 订阅
+
+- 请求 ID 在连接内单调递增，确认消息按请求 ID 匹配，不依赖到达顺序
+- 运行时增删 Program 只发送对应的 logsSubscribe / logsUnsubscribe，无需重连
+- 重连后 reset() 清空服务端状态，按原 Program 列表重新订阅
+"""
+
+import itertools
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 订阅状态
+STATE_PENDING = "pending"
+STATE_ACTIVE = "active"
+STATE_CLOSING = "closing"
+
+
+@dataclass
+class Subscription:
+    """
+    Program 日志订阅
+
+    Attributes:
+        program_id: 订阅的 Program ID
+        parser: 该 Program 的日志解析器 (提供 parse(signature, logs, slot))
+        commitment: 确认级别
+        request_id: 最近一次 logsSubscribe 请求 ID
+        subscription_id: 服务端分配的订阅 ID (确认后)
+        state: pending / active / closing
+    """
+    program_id: str
+    parser: Any
+    commitment: str = "confirmed"
+    request_id: Optional[int] = None
+    subscription_id: Optional[int] = None
+    state: str = STATE_PENDING
+
+
+class SubscriptionManager:
+    """logsSubscribe 请求 / 确认 / 路由"""
+
+    def __init__(self):
+        self._ids = itertools.count(1)
+        self._by_program: Dict[Tuple[str, str], Subscription] = {}
+        self._by_request: Dict[int, Subscription] = {}
+        self._by_subscription: Dict[int, Subscription] = {}
+
+    @property
+    def programs(self) -> List[str]:
+        """已登记的 Program ID"""
+        return list(dict.fromkeys(program_id for program_id, _ in self._by_program))
+
+    def get(self, program_id: str, commitment: str = "confirmed") -> Optional[Subscription]:
+        return self._by_program.get((program_id, commitment))
+
+    def subscribe(self, program_id: str, parser: Any, commitment: str = "confirmed") -> Optional[Dict[str, Any]]:
+        """
+        登记订阅并生成 logsSubscribe 请求
+
+        Returns:
+            JSON-RPC 请求 (由调用方发送)；Program 已订阅时只更新解析器，返回 None
+        """
+        key = (program_id, commitment)
+        subscription = self._by_program.get(key)
+        if subscription is not None:
+            subscription.parser = parser
+            return None
+        subscription = Subscription(program_id, parser, commitment)
+        self._by_program[key] = subscription
+        return self._request_subscribe(subscription)
+
+    def unsubscribe(self, program_id: str, commitment: str = "confirmed") -> Optional[Dict[str, Any]]:
+        """
+        注销订阅
+
+        Returns:
+            logsUnsubscribe 请求；订阅尚未确认时返回 None (确认到达后自动注销)
+        """
+        subscription = self._by_program.pop((program_id, commitment), None)
+        if subscription is None:
+            return None
+        subscription.state = STATE_CLOSING
+        if subscription.subscription_id is None:
+            return None
+        return self._request_unsubscribe(subscription)
+
+    def reset(self) -> List[Dict[str, Any]]:
+        """
+        连接重建后清空服务端状态，为所有已登记的 Program 生成新的订阅请求
+        """
+        self._ids = itertools.count(1)
+        self._by_request.clear()
+        self._by_subscription.clear()
+        requests = []
+        for subscription in self._by_program.values():
+            subscription.subscription_id = None
+            subscription.state = STATE_PENDING
+            requests.append(self._request_subscribe(subscription))
+        return requests
+
+    def handle_response(self, message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        处理请求响应 (订阅确认 / 注销确认 / 错误)
+
+        Returns:
+            需要补发的请求 (确认到达前已被注销的订阅)，否则 None
+        """
+        subscription = self._by_request.pop(message.get("id"), None)
+        if subscription is None:
+            logger.debug(f"Response for unknown request id: {message.get('id')}")
+            return None
+
+        if "error" in message:
+            logger.error(f"Subscription request for {subscription.program_id[:8]}... failed: {message['error']}")
+            if subscription.state == STATE_PENDING:
+                self._by_program.pop((subscription.program_id, subscription.commitment), None)
+            return None
+
+        if subscription.state == STATE_CLOSING and subscription.subscription_id is not None:
+            # logsUnsubscribe 确认
+            self._by_subscription.pop(subscription.subscription_id, None)
+            logger.info(f"Unsubscribed from program: {subscription.program_id[:8]}...")
+            return None
+
+        subscription.subscription_id = message.get("result")
+        self._by_subscription[subscription.subscription_id] = subscription
+        if subscription.state == STATE_CLOSING:
+            # 确认到达前已被注销
+            return self._request_unsubscribe(subscription)
+        subscription.state = STATE_ACTIVE
+        logger.info(
+            f"Subscription confirmed for {subscription.program_id[:8]}..., ID: {subscription.subscription_id}"
+        )
+        return None
+
+    def route(self, subscription_id: Any) -> Optional[Subscription]:
+        """
+        按订阅 ID 查找订阅
+
+        Returns:
+            活跃订阅；未知或正在注销的订阅返回 None
+        """
+        subscription = self._by_subscription.get(subscription_id)
+        if subscription is None or subscription.state != STATE_ACTIVE:
+            return None
+        return subscription
+
+    def is_known(self, subscription_id: Any) -> bool:
+        """订阅 ID 是否由本连接分配 (包括正在注销的订阅)"""
+        return subscription_id in self._by_subscription
+
+    def _request_subscribe(self, subscription: Subscription) -> Dict[str, Any]:
+        request_id = next(self._ids)
+        subscription.request_id = request_id
+        self._by_request[request_id] = subscription
+        return {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "method": "logsSubscribe",
+            "params": [
+                {"mentions": [subscription.program_id]},
+                {"commitment": subscription.commitment},
+            ],
+        }
+
+    def _request_unsubscribe(self, subscription: Subscription) -> Dict[str, Any]:
+        request_id = next(self._ids)
+        self._by_request[request_id] = subscription
+        return {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "method": "logsUnsubscribe",
+            "params": [subscription.subscription_id],
+        }
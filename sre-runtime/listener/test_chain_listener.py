@@ -104,6 +104,57 @@ class TestLogParser:
         # 应该返回 None (未知事件且非 Exo 程序)
         assert event is None
 
+    def test_keyword_priority_follows_declaration_order(self):
+        """测试一行包含多个关键字时按 EVENT_KEYWORDS 顺序取第一个"""
+        logs = [
+            f"Program {EXO_CORE_PROGRAM_ID} invoke [1]",
+            "Program log: CreateEscrow after Skill updated",
+            f"Program {EXO_CORE_PROGRAM_ID} success",
+        ]
+
+        event = LogParser.parse("sigprio", logs, slot=1)
+
+        # "Skill updated" 在 EVENT_KEYWORDS 中先于 "CreateEscrow"
+        assert event.event_type == EventType.SKILL_UPDATED
+
+    def test_longest_keyword_wins(self):
+        """测试前缀相同的关键字优先匹配较长者"""
+        logs = [
+            f"Program {EXO_HOOKS_PROGRAM_ID} invoke [1]",
+            "Program log: Hook config updated",
+            f"Program {EXO_HOOKS_PROGRAM_ID} success",
+        ]
+
+        event = LogParser.parse("sighook", logs, slot=1)
+
+        assert event.event_type == EventType.HOOK_CONFIG_UPDATED
+
+    def test_invoke_line_extracts_program_id_only(self):
+        """测试仅 "Program <id> invoke [N]" 行被识别为调用"""
+        logs = [
+            f"Program {EXO_CORE_PROGRAM_ID} invoke [1]",
+            "Program log: CPI invoke [2] forwarded",
+            "Program log: Escrow funded",
+            f"Program {EXO_CORE_PROGRAM_ID} success",
+        ]
+
+        event = LogParser.parse("siginvoke", logs, slot=1)
+
+        assert event.program_id == EXO_CORE_PROGRAM_ID
+        assert event.event_type == EventType.ESCROW_FUNDED
+
+    def test_program_data_is_decoded(self):
+        """测试 Program data 行解码为 raw_data"""
+        logs = [
+            f"Program {EXO_CORE_PROGRAM_ID} invoke [1]",
+            "Program data: AQID",
+            f"Program {EXO_CORE_PROGRAM_ID} success",
+        ]
+
+        event = LogParser.parse("sigdata", logs, slot=1)
+
+        assert event.data["raw_data"] == "010203"
+
 
 # ============================================================================
 # ChainEvent Tests
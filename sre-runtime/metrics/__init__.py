@@ -0,0 +1,46 @@
+# Exo Protocol - Metrics Module
+# Runtime metrics sink (counters / gauges / histograms) shared by all SRE components
+
+from .sink import (
+    MetricsSink,
+    InMemoryMetricsSink,
+    Histogram,
+    get_sink,
+    set_sink,
+    reset_sink,
+)
+from .timing import (
+    SPAN_CONTAINER_CREATE,
+    SPAN_CONTAINER_REMOVE,
+    SPAN_DA_UPLOAD,
+    SPAN_FETCH,
+    SPAN_HASHING,
+    SPAN_OUTPUT_PARSING,
+    SPAN_REPLAY,
+    SPAN_RETRY_BACKOFF,
+    SPAN_SKILL_RUNTIME,
+    SPAN_VALIDATION,
+    Span,
+    StageTimings,
+)
+
+__all__ = [
+    "MetricsSink",
+    "InMemoryMetricsSink",
+    "Histogram",
+    "get_sink",
+    "set_sink",
+    "reset_sink",
+    "SPAN_CONTAINER_CREATE",
+    "SPAN_CONTAINER_REMOVE",
+    "SPAN_DA_UPLOAD",
+    "SPAN_FETCH",
+    "SPAN_HASHING",
+    "SPAN_OUTPUT_PARSING",
+    "SPAN_REPLAY",
+    "SPAN_RETRY_BACKOFF",
+    "SPAN_SKILL_RUNTIME",
+    "SPAN_VALIDATION",
+    "Span",
+    "StageTimings",
+]
@@ -0,0 +1,147 @@
+# Exo Protocol - Metrics Sink
+# Pluggable sink for runtime metrics; defaults to an in-process aggregator
+
+import bisect
+import threading
+from typing import Dict, Iterable, Optional, Protocol, Tuple, runtime_checkable
+
+Tags = Optional[Dict[str, str]]
+MetricKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+# 直方图默认桶上界 (同时覆盖毫秒延迟与字节大小)
+DEFAULT_BUCKETS = (
+    1, 2, 5, 10, 25, 50, 100, 250, 500, 1_000, 2_500, 5_000, 10_000, 30_000,
+    60_000, 1 << 20, 16 << 20, 128 << 20, 512 << 20, 1 << 30,
+)
+
+
+@runtime_checkable
+class MetricsSink(Protocol):
+    """
+    指标 Sink 接口
+    使用 Protocol 实现结构化子类型 (鸭子类型)
+    """
+
+    def increment(self, name: str, value: float = 1, tags: Tags = None) -> None:
+        """累加单调递增计数器"""
+        ...
+
+    def gauge(self, name: str, value: float, tags: Tags = None) -> None:
+        """设置瞬时值"""
+        ...
+
+    def observe(self, name: str, value: float, tags: Tags = None) -> None:
+        """向直方图记录一个样本"""
+        ...
+
+
+def _key(name: str, tags: Tags) -> MetricKey:
+    return name, tuple(sorted((tags or {}).items()))
+
+
+class Histogram:
+    """固定桶直方图，记录 count / sum / min / max"""
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.bounds = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.bounds) + 1)  # 最后一个桶为 +Inf
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def add(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """近似分位数 (所在桶的上界)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                bound = self.bounds[i] if i < len(self.bounds) else self.max
+                return min(bound, self.max)
+        return self.max
+
+
+class InMemoryMetricsSink:
+    """
+    进程内指标聚合器
+    线程安全；作为默认 Sink，也用于测试
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[MetricKey, float] = {}
+        self.gauges: Dict[MetricKey, float] = {}
+        self.histograms: Dict[MetricKey, Histogram] = {}
+
+    def increment(self, name: str, value: float = 1, tags: Tags = None) -> None:
+        key = _key(name, tags)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def gauge(self, name: str, value: float, tags: Tags = None) -> None:
+        with self._lock:
+            self.gauges[_key(name, tags)] = value
+
+    def observe(self, name: str, value: float, tags: Tags = None) -> None:
+        key = _key(name, tags)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.add(value)
+
+    def counter(self, name: str, tags: Tags = None) -> float:
+        """计数器当前值 (从未累加时为 0)"""
+        return self.counters.get(_key(name, tags), 0)
+
+    def histogram(self, name: str, tags: Tags = None) -> Optional[Histogram]:
+        """name/tags 对应的直方图 (无样本时为 None)"""
+        return self.histograms.get(_key(name, tags))
+
+
+# 全局 Sink 实例 (延迟初始化)
+_sink: Optional[MetricsSink] = None
+
+
+def get_sink() -> MetricsSink:
+    """
+    获取当前指标 Sink
+
+    Returns:
+        当前 MetricsSink 实例 (默认 InMemoryMetricsSink)
+    """
+    global _sink
+    if _sink is None:
+        _sink = InMemoryMetricsSink()
+    return _sink
+
+
+def set_sink(sink: MetricsSink) -> None:
+    """
+    设置自定义指标 Sink (例如 StatsD/Prometheus 适配器，或用于测试)
+
+    Args:
+        sink: 要使用的 MetricsSink 实例
+    """
+    global _sink
+    _sink = sink
+
+
+def reset_sink() -> None:
+    """重置 Sink 以触发重新初始化"""
+    global _sink
+    _sink = None
@@ -0,0 +1,104 @@
+# Exo Protocol - Stage Timings
+# Per-stage latency spans recorded for each order / verifier replay
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+from .sink import Tags, get_sink
+
+# 阶段名称 (同一阶段可出现多次，例如每次重试各一次)
+SPAN_VALIDATION = "validation"              # 输入序列化 + 限制检查
+SPAN_CONTAINER_CREATE = "container_create"  # 容器创建 / 启动 (进程启动、获取 zygote)
+SPAN_SKILL_RUNTIME = "skill_runtime"        # Skill 运行至退出 (AI: 模型调用)
+SPAN_CONTAINER_REMOVE = "container_remove"  # 容器销毁
+SPAN_OUTPUT_PARSING = "output_parsing"      # stdout 解码 + 规范 JSON 解析
+SPAN_HASHING = "hashing"                    # 结果哈希
+SPAN_DA_UPLOAD = "da_upload"                # store_result 上传
+SPAN_RETRY_BACKOFF = "retry_backoff"        # 重试间隔等待
+SPAN_FETCH = "fetch"                        # verifier: 查询订单 / Skill / 输入
+SPAN_REPLAY = "replay"                      # verifier: 沙盒回放
+
+
+@dataclass(slots=True)
+class Span:
+    """单个计时阶段，start 为 time.perf_counter() 读数"""
+    stage: str
+    start: float
+    duration_ms: float
+
+
+@dataclass
+class StageTimings:
+    """
+    一次工作 (订单 / 回放) 的有序阶段耗时列表
+
+    可从 worker 线程添加 (沙盒后端在其中运行)；在别处记录的阶段
+    (共享执行或推测执行) 通过 extend() 合并。
+
+    锁不是 dataclass 字段，拷贝 / pickle 时丢弃并重建，
+    嵌入的结果类型 (CommitResult / OrderResult) 仍可 asdict / deepcopy / pickle。
+    """
+    spans: List[Span] = field(default_factory=list)
+    origin: float = field(default_factory=time.perf_counter)
+
+    def __post_init__(self) -> None:
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        with self._lock:
+            state = dict(self.__dict__, spans=list(self.spans))
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        """将代码块计时为 stage (出错时同样记录)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, start, (time.perf_counter() - start) * 1000)
+
+    def add(self, stage: str, start: float, duration_ms: float) -> None:
+        with self._lock:
+            self.spans.append(Span(stage, start, duration_ms))
+
+    def extend(self, other: Optional["StageTimings"]) -> None:
+        """合并另一个 StageTimings 记录的阶段 (None / 自身时不处理)"""
+        if other is None or other is self:
+            return
+        with other._lock:
+            spans = list(other.spans)
+        with self._lock:
+            self.spans.extend(spans)
+            self.spans.sort(key=lambda s: s.start)
+
+    def totals(self) -> Dict[str, float]:
+        """各阶段毫秒数 (重复阶段累加)，按首次出现顺序"""
+        totals: Dict[str, float] = {}
+        with self._lock:
+            for span in self.spans:
+                totals[span.stage] = totals.get(span.stage, 0.0) + span.duration_ms
+        return totals
+
+    def offsets(self) -> List[Dict[str, float]]:
+        """相对 origin 的阶段时间线 (ms)，例如用于日志"""
+        with self._lock:
+            return [
+                {"stage": s.stage, "start_ms": (s.start - self.origin) * 1000, "duration_ms": s.duration_ms}
+                for s in self.spans
+            ]
+
+    def export(self, name: str, tags: Tags = None) -> None:
+        """将各阶段合计写入直方图 name{stage} (每阶段一个样本)"""
+        sink = get_sink()
+        for stage, duration_ms in self.totals().items():
+            sink.observe(name, duration_ms, {**(tags or {}), "stage": stage})
+
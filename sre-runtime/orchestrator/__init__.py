@@ -5,10 +5,18 @@ from .orchestrator import (
     OrderConfig,
     OrderResult,
     execute_skill_order,
+    queue_order,
+    resume_orders,
+    schedule_order,
+    unfinished_orders,
 )
 
 __all__ = [
     "OrderConfig",
     "OrderResult",
     "execute_skill_order",
+    "queue_order",
+    "resume_orders",
+    "schedule_order",
+    "unfinished_orders",
 ]
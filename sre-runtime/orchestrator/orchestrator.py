@@ -4,15 +4,32 @@
 import asyncio
 import logging
 import time
-from dataclasses import dataclass, field
-from typing import Any, Callable, Dict, Optional
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional
 
 import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from committer.committer import commit_result, CommitResult
-from executor.sandbox import SandboxConfig
+from committer.committer import commit_result, CommitResult, ExecutionOutput
+from committer.journal import (
+    STAGE_COMPLETED,
+    STAGE_FAILED,
+    STAGE_STARTED,
+    JournalEntry,
+    get_journal,
+)
+from concurrency import (
+    KIND_ORDER,
+    DeadlineMissedError,
+    DeadlineScheduler,
+    FairQueue,
+    SingleFlight,
+    get_fair_queue,
+    get_scheduler,
+)
+from executor.sandbox import CancelToken, SandboxConfig
+from metrics import SPAN_RETRY_BACKOFF, StageTimings
 from verifier.verifier import verify_result_with_mock, VerificationResult, compute_result_hash
 
 logging.basicConfig(level=logging.INFO)
@@ -32,6 +49,12 @@ class OrderConfig:
         max_retries: 最大重试次数 (默认 0)
         callback_url: 执行完成回调 URL (可选)
         sandbox_config: 沙盒配置 (可选)
+        speculative_execution: 确认前已开始的执行 (可选，仅首次尝试使用其结果)
+        deadline_slot: 结果须在该 slot 前提交 (托管过期时间，可选；用于 schedule_order)
+        escrow_value: 托管金额 (lamports，截止时间相同时优先)
+        priority: Agent 优先级 (截止时间与金额相同时优先)
+        agent_id: 下单 Agent (公平队列租户，可选；用于 queue_order)
+        skill_id: Skill 标识 (同一 Agent 内按 Skill 公平调度，可选)
     """
     order_id: str
     skill_package: dict
@@ -40,9 +63,15 @@ class OrderConfig:
     max_retries: int = 0
     callback_url: Optional[str] = None
     sandbox_config: Optional[SandboxConfig] = None
+    speculative_execution: Optional[Awaitable[ExecutionOutput]] = None
+    deadline_slot: Optional[float] = None
+    escrow_value: int = 0
+    priority: int = 0
+    agent_id: Optional[str] = None
+    skill_id: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class OrderResult:
     """
     订单执行结果
@@ -54,6 +83,7 @@ class OrderResult:
         verification: 验证结果 (来自 verifier)
         execution_time_ms: 总执行耗时 (毫秒)
         error_message: 错误信息 (可选)
+        timings: 各阶段耗时 (全部尝试的校验 / 容器创建 / Skill 运行 / 输出解析 / 哈希 / DA 上传 / 重试等待)
     """
     order_id: str
     status: str  # "completed" | "failed" | "timeout"
@@ -61,6 +91,7 @@ class OrderResult:
     verification: Optional[VerificationResult]
     execution_time_ms: int
     error_message: Optional[str] = None
+    timings: StageTimings = field(default_factory=StageTimings)
 
 
 # 回调函数类型
@@ -69,6 +100,9 @@ CallbackFn = Callable[[OrderResult], None]
 # 全局回调注册
 _failure_callbacks: list[CallbackFn] = []
 
+# 进行中的订单 (同一 order_id 的并发请求共享一次执行)
+_orders = SingleFlight("order")
+
 
 def register_failure_callback(callback: CallbackFn) -> None:
     """
@@ -96,7 +130,8 @@ def _trigger_failure_callbacks(result: OrderResult) -> None:
 
 async def _execute_with_timeout(
     config: OrderConfig,
-    attempt: int = 0
+    attempt: int = 0,
+    timings: Optional[StageTimings] = None,
 ) -> OrderResult:
     """
     带超时的执行流程
@@ -104,30 +139,38 @@ async def _execute_with_timeout(
     Args:
         config: 订单配置
         attempt: 当前重试次数
+        timings: 阶段耗时记录 (订单各次尝试共用，默认新建)
         
     Returns:
         OrderResult: 执行结果
     """
     start_time = time.perf_counter()
+    timings = timings if timings is not None else StageTimings()
     
     try:
         # 1. 调用 committer 执行 sandbox + DA 存储
         logger.info(f"[{config.order_id}] Starting commit (attempt {attempt + 1})")
         
+        cancel_token = CancelToken()
         commit_task = commit_result(
             order_id=config.order_id,
             skill_package=config.skill_package,
             input_data=config.input_data,
-            sandbox_config=config.sandbox_config
+            sandbox_config=config.sandbox_config,
+            cancel_token=cancel_token,
+            # 推测执行失败时，重试重新执行
+            execution=config.speculative_execution if attempt == 0 else None,
+            timings=timings,
         )
         
-        # 应用超时
+        # 应用超时 (超时取消 commit 任务，并立即终止沙盒容器)
         try:
             commit_res = await asyncio.wait_for(
                 commit_task,
                 timeout=config.timeout_seconds
             )
         except asyncio.TimeoutError:
+            cancel_token.cancel()
             execution_time_ms = int((time.perf_counter() - start_time) * 1000)
             logger.error(f"[{config.order_id}] Execution timeout after {config.timeout_seconds}s")
             return OrderResult(
@@ -136,7 +179,8 @@ async def _execute_with_timeout(
                 commit_result=None,
                 verification=None,
                 execution_time_ms=execution_time_ms,
-                error_message=f"Execution timeout after {config.timeout_seconds}s"
+                error_message=f"Execution timeout after {config.timeout_seconds}s",
+                timings=timings,
             )
         
         # 2. 检查 commit 结果
@@ -149,7 +193,8 @@ async def _execute_with_timeout(
                 commit_result=commit_res,
                 verification=None,
                 execution_time_ms=execution_time_ms,
-                error_message=commit_res.error_message
+                error_message=commit_res.error_message,
+                timings=timings,
             )
         
         # 3. 执行验证 (使用 mock 验证器)
@@ -177,7 +222,8 @@ async def _execute_with_timeout(
             commit_result=commit_res,
             verification=verification,
             execution_time_ms=execution_time_ms,
-            error_message=None
+            error_message=None,
+            timings=timings,
         )
         
     except Exception as e:
@@ -190,10 +236,33 @@ async def _execute_with_timeout(
             commit_result=None,
             verification=None,
             execution_time_ms=execution_time_ms,
-            error_message=str(e)
+            error_message=str(e),
+            timings=timings,
         )
 
 
+def _completed_result(entry: JournalEntry) -> OrderResult:
+    """由订单日志中已完成的记录重建结果"""
+    return OrderResult(
+        order_id=entry.order_id,
+        status="completed",
+        commit_result=CommitResult(
+            order_id=entry.order_id,
+            result_uri=entry.result_uri,
+            result_hash=entry.result_hash,
+            execution_time_ms=0,
+            status="success",
+        ),
+        verification=VerificationResult(
+            is_valid=True,
+            error=None,
+            expected_hash=entry.result_hash,
+            actual_hash=entry.result_hash,
+        ),
+        execution_time_ms=0,
+    )
+
+
 async def execute_skill_order(config: OrderConfig) -> OrderResult:
     """
     执行 Skill 订单的完整流程
@@ -204,23 +273,46 @@ async def execute_skill_order(config: OrderConfig) -> OrderResult:
     3. 组装 OrderResult
     4. 触发回调 (失败时)
     
+    配置了订单日志 (committer.journal) 时记录各阶段；日志中已完成的订单直接返回记录的结果，
+    未完成的订单从最后完成的阶段继续 (见 commit_result)。
+    
+    同一 order_id 的并发调用 (监听器重复事件、重试、恢复与链上事件同时到达) 共享一次执行
+    及其结果，失败回调只触发一次。
+    
     Args:
         config: OrderConfig 订单配置
         
     Returns:
         OrderResult: 包含完整执行状态的结果
     """
+    return await _orders.do(config.order_id, lambda: _execute_order(config))
+
+
+async def _execute_order(config: OrderConfig) -> OrderResult:
+    """execute_skill_order 的实际执行 (每个进行中的 order_id 只运行一次)"""
     logger.info(f"[{config.order_id}] Starting skill order execution")
     
+    journal = get_journal()
+    if journal is not None:
+        entry = journal.get(config.order_id)
+        if entry is not None and entry.stage == STAGE_COMPLETED:
+            logger.info(f"[{config.order_id}] Already completed (journal), skipping")
+            return _completed_result(entry)
+        if entry is None:
+            journal.record(config.order_id, STAGE_STARTED, request=_order_request(config))
+        else:
+            logger.info(f"[{config.order_id}] Resuming from journal stage '{entry.stage}'")
+    
     result: Optional[OrderResult] = None
+    timings = StageTimings()
     
     # 重试循环
     for attempt in range(config.max_retries + 1):
-        result = await _execute_with_timeout(config, attempt)
+        result = await _execute_with_timeout(config, attempt, timings)
         
-        # 成功则直接返回
+        # 成功则结束重试
         if result.status == "completed":
-            return result
+            break
         
         # 超时不重试
         if result.status == "timeout":
@@ -229,7 +321,17 @@ async def execute_skill_order(config: OrderConfig) -> OrderResult:
         # 还有重试机会
         if attempt < config.max_retries:
             logger.warning(f"[{config.order_id}] Retrying ({attempt + 1}/{config.max_retries})")
-            await asyncio.sleep(1)  # 重试间隔
+            with timings.span(SPAN_RETRY_BACKOFF):
+                await asyncio.sleep(1)  # 重试间隔
+    
+    # 各阶段耗时 (全部尝试合计) 写入 order.stage_ms{stage}
+    timings.export("order.stage_ms")
+    
+    if journal is not None:
+        if result.status == "completed":
+            journal.record(config.order_id, STAGE_COMPLETED)
+        else:
+            journal.record(config.order_id, STAGE_FAILED, error=result.error_message)
     
     # 执行失败 - 触发回调
     if result and result.status != "completed":
@@ -237,3 +339,130 @@ async def execute_skill_order(config: OrderConfig) -> OrderResult:
         _trigger_failure_callbacks(result)
     
     return result
+
+
+async def schedule_order(config: OrderConfig, scheduler: Optional[DeadlineScheduler] = None) -> OrderResult:
+    """
+    经截止时间调度器执行订单 (与 Challenger 共享，最早截止优先)
+    
+    按 deadline_slot → escrow_value → priority 排序；预计无法在截止前完成的订单不再执行，
+    执行中超过截止时间的订单被终止，均返回 status="timeout" 并触发失败回调。
+    可直接作为 EventPipeline 的 executor 使用。
+    
+    Args:
+        config: OrderConfig 订单配置
+        scheduler: 调度器 (默认使用全局调度器)
+        
+    Returns:
+        OrderResult: 执行结果
+    """
+    scheduler = scheduler or get_scheduler()
+    start_time = time.perf_counter()
+    try:
+        return await scheduler.run(
+            lambda: execute_skill_order(config),
+            deadline=config.deadline_slot,
+            value=config.escrow_value,
+            priority=config.priority,
+            kind=KIND_ORDER,
+            name=config.order_id,
+        )
+    except DeadlineMissedError as e:
+        logger.error(f"[{config.order_id}] {e}")
+        result = OrderResult(
+            order_id=config.order_id,
+            status="timeout",
+            commit_result=None,
+            verification=None,
+            execution_time_ms=int((time.perf_counter() - start_time) * 1000),
+            error_message=str(e),
+        )
+        journal = get_journal()
+        if journal is not None:
+            journal.record(config.order_id, STAGE_FAILED, error=str(e))
+        _trigger_failure_callbacks(result)
+        return result
+
+
+async def queue_order(
+    config: OrderConfig,
+    queue: Optional[FairQueue] = None,
+    executor: Optional[Callable[[OrderConfig], Awaitable[OrderResult]]] = None,
+) -> OrderResult:
+    """
+    经公平队列执行订单 (按 agent_id / skill_id 加权公平调度)
+    
+    单个 Agent 大量下单时只占用其权重对应的份额，其他 Agent 的订单不必排在其积压之后；
+    各 Agent 的并发数受 TenantPolicy.max_concurrent 限制。可直接作为 EventPipeline 的 executor 使用。
+    
+    Args:
+        config: OrderConfig 订单配置
+        queue: 公平队列 (默认使用全局队列)
+        executor: 出队后的执行函数 (默认 execute_skill_order；可传入 schedule_order 叠加截止时间调度)
+        
+    Returns:
+        OrderResult: 执行结果
+    """
+    queue = queue or get_fair_queue()
+    executor = executor or execute_skill_order
+    return await queue.run(
+        lambda: executor(config),
+        agent_id=config.agent_id,
+        skill_id=config.skill_id,
+    )
+
+
+def _order_request(config: OrderConfig) -> Dict[str, Any]:
+    """订单请求 (写入日志，重启后重建 OrderConfig)"""
+    return {
+        "skill_package": config.skill_package,
+        "input_data": config.input_data,
+        "timeout_seconds": config.timeout_seconds,
+        "max_retries": config.max_retries,
+        "callback_url": config.callback_url,
+        "deadline_slot": config.deadline_slot,
+        "escrow_value": config.escrow_value,
+        "priority": config.priority,
+        "agent_id": config.agent_id,
+        "skill_id": config.skill_id,
+        "sandbox_config": asdict(config.sandbox_config) if config.sandbox_config else None,
+    }
+
+
+def _order_config(order_id: str, request: Dict[str, Any]) -> OrderConfig:
+    """由日志中的订单请求重建 OrderConfig"""
+    request = dict(request)
+    sandbox_config = request.pop("sandbox_config", None)
+    return OrderConfig(
+        order_id=order_id,
+        sandbox_config=SandboxConfig(**sandbox_config) if sandbox_config else None,
+        **request,
+    )
+
+
+def unfinished_orders() -> list[OrderConfig]:
+    """进程重启前未完成的订单 (按全局订单日志重建 OrderConfig)"""
+    journal = get_journal()
+    if journal is None:
+        return []
+    return [
+        _order_config(entry.order_id, entry.request)
+        for entry in journal.unfinished()
+        if entry.request is not None
+    ]
+
+
+async def resume_orders() -> list[OrderResult]:
+    """
+    恢复进程重启前未完成的订单 (全局订单日志)
+    
+    按日志记录重建 OrderConfig 并重新提交；各订单从最后完成的阶段继续
+    (如已写入 DA 的结果直接复用 result_uri，不再执行容器)。
+    
+    Returns:
+        list[OrderResult]: 恢复的订单结果
+    """
+    configs = unfinished_orders()
+    if configs:
+        logger.info(f"Resuming {len(configs)} unfinished orders from journal")
+    return list(await asyncio.gather(*(execute_skill_order(config) for config in configs)))
@@ -0,0 +1,20 @@
+# Exo Protocol - Event Pipeline Module
+# Connects chain events to orchestrator order execution
+
+from .event_pipeline import (
+    DEFAULT_TRIGGER_EVENTS,
+    EventPipeline,
+    OrderBuilder,
+)
+from .speculative import (
+    Speculation,
+    SpeculativeExecutor,
+)
+
+__all__ = [
+    "DEFAULT_TRIGGER_EVENTS",
+    "EventPipeline",
+    "OrderBuilder",
+    "Speculation",
+    "SpeculativeExecutor",
+]
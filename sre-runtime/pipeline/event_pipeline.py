@@ -0,0 +1,427 @@
+# Exo Protocol - Event Pipeline
+# ChainListener → bounded queue → OrderBuilder → orchestrator worker pool → commit
+
+import asyncio
+import inspect
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Union
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from concurrency import get_scheduler
+from executor.images import PREFETCH_EVENTS, ImageManager, get_image_manager, set_image_manager
+from executor.sandbox import BACKEND_DOCKER, SandboxConfig, backend_name_for, reap_orphaned_containers
+from listener.chain_listener import ChainEvent, EventType
+from metrics import get_sink
+from orchestrator.orchestrator import OrderConfig, OrderResult, execute_skill_order, unfinished_orders
+from pipeline.speculative import SpeculativeExecutor
+
+logger = logging.getLogger(__name__)
+
+# 触发订单执行的事件 (同一订单只执行一次，先到者触发)
+DEFAULT_TRIGGER_EVENTS = (EventType.ESCROW_CREATED, EventType.ESCROW_FUNDED)
+
+# 解析器可以是同步或异步函数
+SkillResolver = Callable[[ChainEvent], Union[Optional[dict], Awaitable[Optional[dict]]]]
+InputResolver = Callable[[ChainEvent], Union[dict, Awaitable[dict]]]
+OrderExecutor = Callable[[OrderConfig], Awaitable[OrderResult]]
+ResultCallback = Callable[[OrderResult], Any]
+
+
+async def _maybe_await(value: Any) -> Any:
+    if inspect.isawaitable(value):
+        return await value
+    return value
+
+
+def _default_input(event: ChainEvent) -> dict:
+    return event.data.get("input", {})
+
+
+class OrderBuilder:
+    """
+    将链上事件转换为 OrderConfig
+
+    - 仅处理 trigger_events 中的事件类型
+    - skill_resolver / input_resolver 解析 Skill 包与输入 (可为异步，如从 DA 拉取)
+    - 按订单 ID 去重 (ESCROW_CREATED 与 ESCROW_FUNDED 只触发一次执行)
+    """
+
+    def __init__(
+        self,
+        skill_resolver: SkillResolver,
+        input_resolver: InputResolver = _default_input,
+        trigger_events: Iterable[EventType] = DEFAULT_TRIGGER_EVENTS,
+        order_defaults: Optional[Dict[str, Any]] = None,
+        dedupe_size: int = 10_000,
+    ):
+        """
+        Args:
+            skill_resolver: 事件 → Skill 包 (未知 Skill 返回 None)
+            input_resolver: 事件 → 输入数据 (默认 event.data["input"])
+            trigger_events: 触发执行的事件类型
+            order_defaults: OrderConfig 的其他字段 (timeout_seconds / max_retries 等)
+            dedupe_size: 去重窗口 (最近的订单 ID 数量)
+        """
+        self.skill_resolver = skill_resolver
+        self.input_resolver = input_resolver
+        self.trigger_events = frozenset(trigger_events)
+        self.order_defaults = order_defaults or {}
+        self.dedupe_size = dedupe_size
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+
+    @staticmethod
+    def order_id(event: ChainEvent) -> str:
+        """订单 ID: 事件数据中的 order_id / escrow，否则为交易签名"""
+        return str(event.data.get("order_id") or event.data.get("escrow") or event.signature)
+
+    def _first_seen(self, order_id: str) -> bool:
+        if order_id in self._seen:
+            return False
+        self._seen[order_id] = None
+        if len(self._seen) > self.dedupe_size:
+            self._seen.popitem(last=False)
+        return True
+
+    def mark_seen(self, order_id: str) -> None:
+        """记录已在别处提交的订单 (如从订单日志恢复)，其链上事件不再触发执行"""
+        self._first_seen(order_id)
+
+    async def build(self, event: ChainEvent) -> Optional[OrderConfig]:
+        """
+        构建订单配置
+
+        Returns:
+            OrderConfig，或 None (非触发事件 / 重复订单 / 无法解析 Skill)
+        """
+        if event.event_type not in self.trigger_events:
+            return None
+
+        order_id = self.order_id(event)
+        if not self._first_seen(order_id):
+            return None
+        # 先标记以挡住解析期间到达的同一订单事件；解析失败时撤销，后续事件 (如 ESCROW_FUNDED) 可重试
+        try:
+            order = await self._resolve(event, order_id)
+        except BaseException:
+            self._seen.pop(order_id, None)
+            raise
+        if order is None:
+            self._seen.pop(order_id, None)
+        return order
+
+    async def build_speculative(self, event: ChainEvent) -> Optional[OrderConfig]:
+        """
+        为未确认事件构建订单配置 (不记录订单 ID，确认后 build() 仍会构建)
+
+        Returns:
+            OrderConfig，或 None (非触发事件 / 已处理的订单 / 无法解析 Skill)
+        """
+        if event.event_type not in self.trigger_events:
+            return None
+
+        order_id = self.order_id(event)
+        if order_id in self._seen:
+            return None
+        return await self._resolve(event, order_id)
+
+    async def _resolve(self, event: ChainEvent, order_id: str) -> Optional[OrderConfig]:
+        skill_package = await _maybe_await(self.skill_resolver(event))
+        if skill_package is None:
+            logger.warning(f"[{order_id}] No skill package for event {event.signature[:16]}...")
+            return None
+        input_data = await _maybe_await(self.input_resolver(event))
+
+        order = OrderConfig(
+            order_id=order_id,
+            skill_package=skill_package,
+            input_data=input_data,
+            **self.order_defaults,
+        )
+        # 截止时间 (托管过期) 与托管金额，供 schedule_order 排序
+        clock = get_scheduler().clock
+        clock.observe(event.slot)
+        if event.data.get("expires_at"):
+            order.deadline_slot = clock.slot_at(event.data["expires_at"])
+        order.escrow_value = event.data.get("amount", order.escrow_value)
+        # 公平队列租户 (下单 Agent) 与 Skill，供 queue_order 调度
+        order.agent_id = event.data.get("buyer", order.agent_id)
+        order.skill_id = event.data.get("skill", order.skill_id)
+        return order
+
+
+@dataclass
+class _Envelope:
+    """队列元素 (携带各阶段时间戳，用于延迟统计)"""
+    item: Any
+    received_at: float
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class EventPipeline:
+    """
+    异步事件管道
+
+    listener.on_event → put() / submit() → 事件队列 → OrderBuilder → 订单队列 → worker 池 → execute_skill_order
+
+    - 两级有界队列提供背压: put() 在队列满时等待；同步回调 submit() 不阻塞，队列满时拒绝并计数
+    - 指标 (metrics sink):
+        pipeline.queue_wait_ms{stage=build|execute}  队列等待
+        pipeline.build_ms / pipeline.execute_ms      阶段耗时
+        pipeline.e2e_ms                              事件接收 → 订单完成
+        pipeline.queue_depth{stage}                  队列深度
+        pipeline.orders{status} / pipeline.events_rejected
+    - stop() 默认排空队列后退出，超时后取消执行中的订单 (沙盒容器随之终止)
+    - 推测执行 (可选，配合 ChainListener(speculative=True)): processed 事件提前开始执行，
+      confirmed 事件构建的订单复用其结果；未确认事件不会进入订单队列
+    - 镜像管理 (默认开启): start() 安装全局 ImageManager，Docker 沙盒只使用预拉取的镜像；
+      attach() 订阅 SKILL_REGISTERED / SKILL_UPDATED 后台预拉取；镜像未就绪的订单在 worker 中
+      等待拉取完成后再执行
+    """
+
+    def __init__(
+        self,
+        builder: OrderBuilder,
+        workers: int = 4,
+        queue_size: int = 1000,
+        order_queue_size: Optional[int] = None,
+        executor: OrderExecutor = execute_skill_order,
+        on_result: Optional[ResultCallback] = None,
+        reap_orphans: bool = True,
+        speculator: Optional[SpeculativeExecutor] = None,
+        resume: bool = True,
+        manage_images: bool = True,
+        image_manager: Optional[ImageManager] = None,
+    ):
+        """
+        Args:
+            builder: 订单构建器
+            workers: 并发执行订单的 worker 数量
+            queue_size: 事件队列容量
+            order_queue_size: 订单队列容量 (默认等于 workers)
+            executor: 订单执行函数 (默认 execute_skill_order；schedule_order 按截止时间调度，
+                此时 workers 应大于调度器并发数，调度器才有可重排的订单；queue_order 按 Agent 公平调度，
+                同理 workers 应大于公平队列并发数)
+            on_result: 订单完成回调 (同步或异步)
+            reap_orphans: 启动时回收遗留的沙盒容器
+            speculator: 推测执行管理 (可选，未提供时忽略未确认事件)
+            resume: 启动时重新提交订单日志中未完成的订单 (需配置 committer.journal)
+            manage_images: 启用镜像管理器 (False 时 Docker 沙盒按镜像名执行，可能隐式拉取)
+            image_manager: 镜像管理器 (默认使用全局管理器，未配置时新建；
+                未设置 package_resolver 时以 builder 的 skill_resolver 解析 Skill 注册事件)
+        """
+        self.builder = builder
+        self.workers = workers
+        self.executor = executor
+        self.on_result = on_result
+        self.reap_orphans = reap_orphans
+        self.speculator = speculator
+        self.resume = resume
+        self._owns_image_manager = manage_images and image_manager is None and get_image_manager() is None
+        self.image_manager = (image_manager or get_image_manager() or ImageManager()) if manage_images else None
+        self._previous_image_manager: Optional[ImageManager] = None
+        self._events: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._orders: asyncio.Queue = asyncio.Queue(maxsize=order_queue_size or workers)
+        self._tasks: List[asyncio.Task] = []
+        self._accepting = False
+
+    @property
+    def running(self) -> bool:
+        return self._accepting
+
+    def attach(self, listener: Any) -> None:
+        """
+        将管道注册为监听器的异步事件回调
+
+        使用 block 溢出策略: 管道积压时监听器的订阅者队列随之积压，
+        最终在读循环中等待 (背压)，不会丢弃事件。
+        """
+        listener.on_event(self.put, name="event-pipeline")
+        if self.image_manager is not None:
+            listener.on_event(self._prefetch_image, name="image-prefetch")
+
+    def submit(self, event: ChainEvent) -> bool:
+        """
+        非阻塞提交 (用于同步事件回调)
+
+        Returns:
+            是否入队 (管道未运行或队列已满时返回 False)
+        """
+        if not self._accepting:
+            return False
+        try:
+            self._events.put_nowait(_Envelope(event, time.perf_counter()))
+        except asyncio.QueueFull:
+            logger.error(f"Event queue full, rejecting event {event.signature[:16]}...")
+            get_sink().increment("pipeline.events_rejected", 1, {"event_type": event.event_type.value})
+            return False
+        return True
+
+    async def put(self, event: ChainEvent) -> None:
+        """提交事件，队列满时等待 (背压)"""
+        if not self._accepting:
+            raise RuntimeError("Pipeline is not running")
+        await self._events.put(_Envelope(event, time.perf_counter()))
+
+    async def start(self) -> None:
+        """启动 builder 与 worker 任务"""
+        if self._tasks:
+            return
+        if self.reap_orphans:
+            removed = await asyncio.to_thread(reap_orphaned_containers)
+            if removed:
+                logger.info(f"Reaped {removed} orphaned sandbox containers")
+        if self.image_manager is not None:
+            self._previous_image_manager = get_image_manager()
+            set_image_manager(self.image_manager)
+
+        self._accepting = True
+        self._tasks.append(asyncio.create_task(self._build_loop(), name="pipeline-builder"))
+        for i in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker_loop(), name=f"pipeline-worker-{i}"))
+        if self.resume:
+            self._tasks.append(asyncio.create_task(self._resume(), name="pipeline-resume"))
+        logger.info(f"Event pipeline started ({self.workers} workers)")
+
+    async def stop(self, drain: bool = True, timeout: Optional[float] = None) -> None:
+        """
+        停止管道
+
+        Args:
+            drain: 是否先处理完已入队的事件与订单
+            timeout: 排空等待上限 (秒)，超时后取消剩余任务
+        """
+        self._accepting = False
+        if drain:
+            try:
+                await asyncio.wait_for(self._drain(), timeout=timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Pipeline drain timed out after {timeout}s, cancelling in-flight orders")
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        if self.speculator is not None:
+            await self.speculator.close()
+        if self.image_manager is not None and get_image_manager() is self.image_manager:
+            set_image_manager(self._previous_image_manager)
+            if self._owns_image_manager:
+                self.image_manager.close()
+        logger.info("Event pipeline stopped")
+
+    async def _drain(self) -> None:
+        await self._events.join()
+        await self._orders.join()
+
+    def _record_depth(self) -> None:
+        sink = get_sink()
+        sink.gauge("pipeline.queue_depth", self._events.qsize(), {"stage": "build"})
+        sink.gauge("pipeline.queue_depth", self._orders.qsize(), {"stage": "execute"})
+
+    async def _build_loop(self) -> None:
+        sink = get_sink()
+        while True:
+            envelope = await self._events.get()
+            try:
+                started = time.perf_counter()
+                sink.observe("pipeline.queue_wait_ms", (started - envelope.enqueued_at) * 1000, {"stage": "build"})
+                self._record_depth()
+
+                event: ChainEvent = envelope.item
+                if event.speculative:
+                    await self._speculate(event)
+                    continue
+
+                order = await self.builder.build(event)
+                sink.observe("pipeline.build_ms", (time.perf_counter() - started) * 1000)
+                if order is not None:
+                    if self.speculator is not None:
+                        order.speculative_execution = self.speculator.claim(order.order_id, event.signature)
+                    # 订单队列满时等待 worker (背压传递到事件队列)
+                    await self._orders.put(_Envelope(order, envelope.received_at))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Order build failed for {envelope.item.signature[:16]}...: {e}")
+                sink.increment("pipeline.build_errors")
+            finally:
+                self._events.task_done()
+
+    async def _resume(self) -> None:
+        """重新提交上次运行未完成的订单 (各订单从最后完成的阶段继续)"""
+        orders = unfinished_orders()
+        if orders:
+            logger.info(f"Resuming {len(orders)} unfinished orders from journal")
+        for order in orders:
+            self.builder.mark_seen(order.order_id)
+            await self._orders.put(_Envelope(order, time.perf_counter()))
+        get_sink().increment("pipeline.orders_resumed", len(orders))
+
+    async def _prefetch_image(self, event: ChainEvent) -> None:
+        """Skill 注册 / 更新事件: 解析 Skill 包并在后台预拉取镜像"""
+        if event.event_type.value not in PREFETCH_EVENTS:
+            return
+        resolver = self.image_manager.package_resolver or self.builder.skill_resolver
+        try:
+            skill_package = await _maybe_await(resolver(event))
+        except Exception as e:
+            logger.warning(f"Skill package lookup failed for image prefetch {event.signature[:16]}...: {e}")
+            return
+        if skill_package and skill_package.get("runtime", {}).get("docker_image"):
+            self.image_manager.schedule(skill_package)
+
+    async def _prepare_image(self, order: OrderConfig) -> None:
+        """Docker 后端订单的镜像尚未就绪时，等待后台拉取完成 (失败时由沙盒报告 ImageNotReadyError)"""
+        manager = self.image_manager
+        skill_package = order.skill_package
+        if manager is None or not skill_package.get("runtime", {}).get("docker_image"):
+            return
+        if backend_name_for(skill_package, order.sandbox_config or SandboxConfig()) != BACKEND_DOCKER:
+            return
+        if manager.ready(skill_package):
+            return
+        logger.info(f"[{order.order_id}] Waiting for image prefetch")
+        try:
+            await asyncio.wrap_future(manager.schedule(skill_package))
+        except Exception as e:
+            logger.error(f"[{order.order_id}] Image prepare failed: {e}")
+
+    async def _speculate(self, event: ChainEvent) -> None:
+        """未确认事件: 开始推测执行 (结果在确认后才提交)"""
+        if self.speculator is None:
+            return
+        order = await self.builder.build_speculative(event)
+        if order is not None:
+            self.speculator.start(order, event.signature)
+
+    async def _worker_loop(self) -> None:
+        sink = get_sink()
+        while True:
+            envelope = await self._orders.get()
+            order: OrderConfig = envelope.item
+            try:
+                started = time.perf_counter()
+                sink.observe("pipeline.queue_wait_ms", (started - envelope.enqueued_at) * 1000, {"stage": "execute"})
+
+                await self._prepare_image(order)
+                result = await self.executor(order)
+                finished = time.perf_counter()
+                sink.observe("pipeline.execute_ms", (finished - started) * 1000)
+                sink.observe("pipeline.e2e_ms", (finished - envelope.received_at) * 1000)
+                sink.increment("pipeline.orders", 1, {"status": result.status})
+
+                if self.on_result is not None:
+                    await _maybe_await(self.on_result(result))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[{order.order_id}] Pipeline worker error: {e}")
+                sink.increment("pipeline.orders", 1, {"status": "error"})
+            finally:
+                self._orders.task_done()
@@ -0,0 +1,161 @@
+# Exo Protocol - Speculative Execution
+# processed 级别事件提前开始执行，confirmed 后交给订单流程提交 (DA 写入与链上提交只在确认后发生)
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from committer.committer import ExecutionOutput, execute_skill
+from executor.sandbox import CancelToken
+from metrics import get_sink
+from orchestrator.orchestrator import OrderConfig
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIRMATION_TIMEOUT = 30.0  # 秒，processed → confirmed 通常在 1 秒内
+DEFAULT_MAX_SPECULATIVE = 4
+
+SpeculativeRunner = Callable[[OrderConfig, CancelToken], Awaitable[ExecutionOutput]]
+
+
+async def _run_order(order: OrderConfig, cancel_token: CancelToken) -> ExecutionOutput:
+    return await execute_skill(
+        order.order_id,
+        order.skill_package,
+        order.input_data,
+        sandbox_config=order.sandbox_config,
+        cancel_token=cancel_token,
+    )
+
+
+def _consume_exception(task: asyncio.Task) -> None:
+    # 被丢弃的推测执行无人等待，避免 "exception was never retrieved"
+    if not task.cancelled():
+        task.exception()
+
+
+@dataclass
+class Speculation:
+    """进行中的推测执行"""
+    order_id: str
+    signature: str
+    task: asyncio.Task
+    cancel_token: CancelToken
+    started_at: float
+    expiry: asyncio.TimerHandle
+
+
+class SpeculativeExecutor:
+    """
+    推测执行管理
+
+    - start(): processed 事件到达时开始执行 (不写入 DA、不提交)
+    - claim(): 同一签名以 confirmed 到达时取回执行任务，由 commit_result 等待其结果
+    - 超过 confirmation_timeout 仍未确认 (交易被丢弃 / 分叉回滚) 时取消并丢弃；
+      确认的签名与推测执行的签名不一致时同样丢弃
+    - 同时进行的推测执行数量受 max_speculative 限制，超出时跳过 (确认后正常执行)
+
+    指标: pipeline.speculation{outcome=started|hit|dropped|forked|skipped}
+    """
+
+    def __init__(
+        self,
+        confirmation_timeout: float = DEFAULT_CONFIRMATION_TIMEOUT,
+        max_speculative: int = DEFAULT_MAX_SPECULATIVE,
+        runner: SpeculativeRunner = _run_order,
+    ):
+        """
+        Args:
+            confirmation_timeout: 等待确认的上限 (秒)
+            max_speculative: 同时进行的推测执行上限
+            runner: 执行函数 (默认 execute_skill，测试可注入)
+        """
+        self.confirmation_timeout = confirmation_timeout
+        self.max_speculative = max_speculative
+        self.runner = runner
+        self._inflight: Dict[str, Speculation] = {}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def __contains__(self, order_id: str) -> bool:
+        return order_id in self._inflight
+
+    def start(self, order: OrderConfig, signature: str) -> bool:
+        """
+        开始推测执行
+
+        Returns:
+            是否已开始 (订单已在推测执行或达到并发上限时返回 False)
+        """
+        if order.order_id in self._inflight:
+            return False
+        if len(self._inflight) >= self.max_speculative:
+            get_sink().increment("pipeline.speculation", 1, {"outcome": "skipped"})
+            return False
+
+        cancel_token = CancelToken()
+        task = asyncio.create_task(self.runner(order, cancel_token), name=f"speculative-{order.order_id}")
+        task.add_done_callback(_consume_exception)
+        expiry = asyncio.get_running_loop().call_later(
+            self.confirmation_timeout, self._expire, order.order_id, task
+        )
+        self._inflight[order.order_id] = Speculation(
+            order_id=order.order_id,
+            signature=signature,
+            task=task,
+            cancel_token=cancel_token,
+            started_at=time.perf_counter(),
+            expiry=expiry,
+        )
+        get_sink().increment("pipeline.speculation", 1, {"outcome": "started"})
+        logger.debug(f"[{order.order_id}] Speculative execution started for {signature[:16]}...")
+        return True
+
+    def claim(self, order_id: str, signature: str) -> Optional[asyncio.Task]:
+        """
+        交易确认后取回推测执行任务
+
+        Returns:
+            执行任务；没有推测执行或签名不一致 (分叉后由另一笔交易确认) 时返回 None
+        """
+        speculation = self._inflight.pop(order_id, None)
+        if speculation is None:
+            return None
+        speculation.expiry.cancel()
+        if speculation.signature != signature:
+            self._discard(speculation, "forked")
+            return None
+
+        sink = get_sink()
+        sink.increment("pipeline.speculation", 1, {"outcome": "hit"})
+        sink.observe("pipeline.speculation_lead_ms", (time.perf_counter() - speculation.started_at) * 1000)
+        return speculation.task
+
+    def _expire(self, order_id: str, task: asyncio.Task) -> None:
+        speculation = self._inflight.get(order_id)
+        if speculation is None or speculation.task is not task:
+            return
+        del self._inflight[order_id]
+        logger.warning(f"[{order_id}] Transaction {speculation.signature[:16]}... not confirmed, discarding speculative execution")
+        self._discard(speculation, "dropped")
+
+    def _discard(self, speculation: Speculation, outcome: str) -> None:
+        speculation.cancel_token.cancel()
+        speculation.task.cancel()
+        get_sink().increment("pipeline.speculation", 1, {"outcome": outcome})
+
+    async def close(self) -> None:
+        """取消所有未确认的推测执行"""
+        speculations = list(self._inflight.values())
+        self._inflight.clear()
+        for speculation in speculations:
+            speculation.expiry.cancel()
+            self._discard(speculation, "dropped")
+        await asyncio.gather(*(s.task for s in speculations), return_exceptions=True)
@@ -0,0 +1,149 @@
+"""
+Exo Protocol - Anchor 事件解码单元测试 (判别符 / Borsh 解包 / LogParser 集成)
+"""
+
+import base64
+import hashlib
+
+import pytest
+
+from listener.anchor_events import (
+    EVENT_SCHEMAS,
+    b58encode,
+    decode_event,
+    encode_event,
+    event_discriminator,
+)
+from listener.chain_listener import EXO_CORE_PROGRAM_ID, EXO_HOOKS_PROGRAM_ID, EventType, LogParser
+
+ESCROW = bytes(range(32))
+BUYER = bytes([7]) * 32
+SKILL = bytes([9]) * 32
+
+
+def program_data(payload: bytes) -> str:
+    return "Program data: " + base64.b64encode(payload).decode()
+
+
+class TestPrimitives:
+    def test_b58encode(self):
+        assert b58encode(b"hello world") == "StV1DL6CwTryKyV"
+        # System Program ID (全零公钥)
+        assert b58encode(bytes(32)) == "1" * 32
+
+    def test_discriminator_is_sha256_prefix(self):
+        expected = hashlib.sha256(b"event:EscrowCreated").digest()[:8]
+        assert event_discriminator("EscrowCreated") == expected
+
+    def test_discriminators_are_unique(self):
+        assert len(EVENT_SCHEMAS) == len({s.name for s in EVENT_SCHEMAS.values()})
+
+
+class TestDecodeEvent:
+    def test_roundtrip_escrow_created(self):
+        payload = encode_event(
+            "EscrowCreated", escrow=ESCROW, buyer=BUYER, skill=SKILL,
+            amount=500_000_000, nonce=3, expires_at=1_700_000_000,
+        )
+
+        event = decode_event(payload)
+
+        assert event.name == "EscrowCreated"
+        assert event.event_type == "escrow_created"
+        assert event.fields == {
+            "escrow": b58encode(ESCROW),
+            "buyer": b58encode(BUYER),
+            "skill": b58encode(SKILL),
+            "amount": 500_000_000,
+            "nonce": 3,
+            "expires_at": 1_700_000_000,
+        }
+
+    def test_hash_field_is_hex(self):
+        content_hash = "ab" * 32
+        payload = encode_event(
+            "SkillRegistered", skill=SKILL, authority=BUYER,
+            content_hash=content_hash, price_lamports=100, version=1,
+        )
+
+        assert decode_event(payload).fields["content_hash"] == content_hash
+
+    def test_unknown_discriminator(self):
+        assert decode_event(b"\x00" * 64) is None
+
+    def test_truncated_payload(self):
+        payload = encode_event("EscrowCancelled", escrow=ESCROW, buyer=BUYER, amount=1)
+        assert decode_event(payload[:-1]) is None
+
+    def test_unknown_event_name(self):
+        with pytest.raises(KeyError):
+            encode_event("NoSuchEvent")
+
+
+class TestLogParserIntegration:
+    def test_typed_event_overrides_keywords(self):
+        payload = encode_event(
+            "EscrowCreated", escrow=ESCROW, buyer=BUYER, skill=SKILL,
+            amount=42, nonce=0, expires_at=0,
+        )
+        logs = [
+            f"Program {EXO_CORE_PROGRAM_ID} invoke [1]",
+            "Program log: Instruction: FundEscrow",
+            "Program log: Amount: 99 lamports",
+            program_data(payload),
+            f"Program {EXO_CORE_PROGRAM_ID} success",
+        ]
+
+        event = LogParser.parse("sig", logs, slot=1)
+
+        assert event.event_type == EventType.ESCROW_CREATED
+        assert event.data["event_name"] == "EscrowCreated"
+        assert event.data["escrow"] == b58encode(ESCROW)
+        assert event.data["amount"] == 42
+        assert event.data["raw_data"] == payload.hex()
+
+    def test_multiple_events_are_kept(self):
+        core = encode_event(
+            "EscrowCompleted", escrow=ESCROW, executor=BUYER,
+            protocol_fee=5, skill_royalty=10, executor_payout=85,
+        )
+        hook = encode_event(
+            "TransferHooked", mint=SKILL, amount=100,
+            protocol_fee=5, creator_royalty=10, executor_amount=85,
+        )
+        logs = [
+            f"Program {EXO_CORE_PROGRAM_ID} invoke [1]",
+            program_data(core),
+            f"Program {EXO_HOOKS_PROGRAM_ID} invoke [2]",
+            program_data(hook),
+        ]
+
+        event = LogParser.parse("sig", logs, slot=1)
+
+        assert event.event_type == EventType.ESCROW_RELEASED
+        assert [e["name"] for e in event.data["events"]] == ["EscrowCompleted", "TransferHooked"]
+
+    def test_unknown_program_data_falls_back_to_keywords(self):
+        logs = [
+            f"Program {EXO_CORE_PROGRAM_ID} invoke [1]",
+            "Program log: Escrow created",
+            program_data(b"\x01\x02\x03"),
+        ]
+
+        event = LogParser.parse("sig", logs, slot=1)
+
+        assert event.event_type == EventType.ESCROW_CREATED
+        assert "event_name" not in event.data
+        assert event.data["raw_data"] == "010203"
+
+    def test_amount_only_from_amount_field(self):
+        logs = [
+            f"Program {EXO_CORE_PROGRAM_ID} invoke [1]",
+            "Program log: Transfer amount: 1000 lamports",
+            "Program log: slash_amount: 7",
+            "Program log: Amounts reconciled: 3",
+        ]
+
+        event = LogParser.parse("sig", logs, slot=1)
+
+        assert event.data["amount"] == 1000
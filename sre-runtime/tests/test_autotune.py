@@ -0,0 +1,168 @@
+"""
+Exo Protocol - Sandbox Autotuner 单元测试
+"""
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from committer import commit_result
+from executor.autotune import MIB, SandboxAutotuner, set_autotuner
+from executor.sandbox import ResourceUsage, SandboxConfig, SandboxReport
+from metrics import InMemoryMetricsSink, reset_sink, set_sink
+
+SKILL = {"name": "summary", "version": "1.0.0", "runtime": {"docker_image": "img", "entrypoint": "main.py"}}
+
+
+def report_for(peak_mib=40, cpu_ms=100, wall_ms=400, oom=False, timed_out=False, backend="docker") -> SandboxReport:
+    usage = ResourceUsage(
+        cpu_time_ms=cpu_ms,
+        peak_memory_bytes=peak_mib * MIB,
+        wall_time_ms=wall_ms,
+        oom_killed=oom,
+    )
+    return SandboxReport(backend=backend, usage=usage, timed_out=timed_out)
+
+
+def trained(tuner: SandboxAutotuner, n: int = 20, **kwargs) -> SandboxAutotuner:
+    for _ in range(n):
+        tuner.record(SKILL, report_for(**kwargs))
+    return tuner
+
+
+@pytest.fixture(autouse=True)
+def isolated_globals():
+    set_sink(InMemoryMetricsSink())
+    set_autotuner(None)
+    yield
+    set_autotuner(None)
+    reset_sink()
+
+
+class TestPropose:
+    """资源包络计算"""
+
+    def test_insufficient_samples(self):
+        tuner = trained(SandboxAutotuner(), n=19)
+        assert tuner.propose(SKILL) is None
+        assert tuner.tuned_config(SKILL) == tuner.base
+
+    def test_envelope_from_p99(self):
+        """p99 × headroom，向上取整到 MiB"""
+        tuner = trained(SandboxAutotuner(min_samples=10), n=99, peak_mib=80)
+        tuner.record(SKILL, report_for(peak_mib=300))
+
+        envelope = tuner.propose(SKILL)
+        assert envelope.mem_bytes == 120 * MIB  # p99 = 80 MiB (单个离群值不影响)
+        assert envelope.cpu_quota == 37500     # 0.25 核 × 1.5
+        assert envelope.timeout_seconds == 2.0  # 0.4s × 3 向上取整，不低于下限
+        assert envelope.samples == 100
+
+        config = tuner.tuned_config(SKILL)
+        assert config.mem_limit == "120m"
+        assert config.cpu_quota == 37500
+        assert config.timeout_seconds == 2.0
+
+    def test_never_exceeds_base(self):
+        """包络不超过基准配置"""
+        tuner = trained(SandboxAutotuner(), peak_mib=2048, cpu_ms=40_000, wall_ms=40_000)
+        envelope = tuner.propose(SKILL)
+
+        assert envelope.mem_bytes == 512 * MIB
+        assert envelope.cpu_quota == 50000
+        assert envelope.timeout_seconds == 30
+
+    def test_declared_timeout_kept(self):
+        """Skill 显式声明 timeout_seconds 时不调整"""
+        skill = {**SKILL, "runtime": {**SKILL["runtime"], "timeout_seconds": 10}}
+        tuner = SandboxAutotuner()
+        for _ in range(20):
+            tuner.record(skill, report_for())
+
+        assert tuner.tuned_config(skill).timeout_seconds == 30
+
+    def test_propose_only_by_default(self):
+        tuner = trained(SandboxAutotuner())
+        assert tuner.config_for(SKILL) == tuner.base
+        assert ("summary@1.0.0", "docker") in tuner.proposals()
+
+        tuner.apply = True
+        assert tuner.config_for(SKILL).mem_limit == "64m"
+
+
+class TestBackends:
+    """按后端分别学习"""
+
+    def test_samples_keyed_by_backend(self):
+        tuner = trained(SandboxAutotuner(), peak_mib=40)
+        process_skill = {**SKILL, "runtime": {**SKILL["runtime"], "sandbox_backend": "process"}}
+        for _ in range(19):
+            tuner.record(process_skill, report_for(peak_mib=300, backend="process"))
+
+        assert tuner.propose(SKILL).mem_bytes == 64 * MIB
+        assert tuner.propose(process_skill) is None
+        assert tuner.propose(SKILL, backend="process") is None
+
+        # 某个后端 OOM 只重置该后端的样本
+        tuner.record(process_skill, report_for(oom=True, backend="process"))
+        assert tuner.propose(SKILL) is not None
+
+    def test_rlimit_backends_keep_base_memory(self):
+        """process / forkserver 以 RLIMIT_AS 限制内存，不按 RSS 收紧"""
+        skill = {**SKILL, "runtime": {**SKILL["runtime"], "sandbox_backend": "forkserver"}}
+        tuner = SandboxAutotuner(apply=True)
+        for _ in range(20):
+            tuner.record(skill, report_for(peak_mib=40, backend="forkserver"))
+
+        assert tuner.propose(skill).mem_bytes == 512 * MIB
+        config = tuner.config_for(skill)
+        assert config.mem_limit == tuner.base.mem_limit
+        assert config.cpu_quota == 37500
+
+
+class TestFallback:
+    """OOM / 超时回退"""
+
+    def test_oom_resets_samples(self):
+        tuner = trained(SandboxAutotuner(apply=True))
+        tuned = tuner.config_for(SKILL)
+
+        tuner.record(SKILL, report_for(oom=True), tuned)
+
+        assert tuner.propose(SKILL) is None
+        assert tuner.config_for(SKILL) == tuner.base
+
+    @pytest.mark.asyncio
+    async def test_committer_retries_with_base_config(self):
+        """调优配置超时后，committer 以基准配置重试"""
+        tuner = trained(SandboxAutotuner(apply=True))
+        set_autotuner(tuner)
+        configs = []
+
+        def fake_sandbox(skill_package, input_data, config, report, **kwargs):
+            configs.append(config)
+            if len(configs) == 1:
+                report.timed_out = True
+                raise RuntimeError("Process timed out after 2.0s")
+            report.usage = ResourceUsage(peak_memory_bytes=40 * MIB, wall_time_ms=5000)
+            return {"output": "ok"}
+
+        with patch("committer.committer.execute_in_sandbox", side_effect=fake_sandbox), \
+             patch("committer.committer.store_result", new_callable=AsyncMock) as mock_store:
+            mock_store.return_value = "file://test.json"
+            result = await commit_result("order-1", SKILL, {"prompt": "x"})
+
+        assert result.status == "success"
+        assert configs[0].mem_limit == "64m"
+        assert configs[1] == tuner.base
+        assert tuner.propose(SKILL) is None  # 样本已重置，需重新学习
+
+    @pytest.mark.asyncio
+    async def test_committer_no_retry_on_base_failure(self):
+        """基准配置失败不重试"""
+        set_autotuner(SandboxAutotuner(apply=True))
+        with patch("committer.committer.execute_in_sandbox", side_effect=RuntimeError("boom")) as mock_sandbox:
+            result = await commit_result("order-2", SKILL, {"prompt": "x"})
+
+        assert result.status == "failed"
+        assert mock_sandbox.call_count == 1
@@ -0,0 +1,412 @@
+"""
+Exo Protocol - 重连补齐单元测试 (检查点 / 翻页 / 批量 getTransaction / 去重)
+
+使用 httpx.MockTransport 作为本地 JSON-RPC 替身
+"""
+
+import json
+from datetime import datetime
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+
+from listener.backfill import Backfiller, Checkpoint, CheckpointStore, RpcError
+from listener.chain_listener import (
+    EXO_CORE_PROGRAM_ID,
+    EXO_HOOKS_PROGRAM_ID,
+    ChainEvent,
+    ChainListener,
+    EventType,
+)
+
+
+def core_logs(message: str):
+    return [
+        f"Program {EXO_CORE_PROGRAM_ID} invoke [1]",
+        f"Program log: {message}",
+        f"Program {EXO_CORE_PROGRAM_ID} success",
+    ]
+
+
+class FakeRpc:
+    """最小 Solana JSON-RPC 替身"""
+
+    def __init__(self):
+        # program_id → [(slot, signature, err)]，按时间升序
+        self.history = {}
+        self.transactions = {}
+        self.calls = []
+        self.failing = set()
+        # signature → 剩余失败次数 (None 为一直失败)，失败形式为 error 或 null
+        self.unavailable = {}
+
+    def add(self, program_ids, slot, signature, logs, err=None):
+        for program_id in program_ids:
+            self.history.setdefault(program_id, []).append((slot, signature, err))
+        self.transactions[signature] = {"slot": slot, "meta": {"logMessages": logs, "err": err}}
+
+    def make_unavailable(self, signature, times=None, as_error=False):
+        self.unavailable[signature] = [times, as_error]
+
+    def _handle(self, request):
+        method, params = request["method"], request["params"]
+        self.calls.append(method)
+        error = {"jsonrpc": "2.0", "id": request["id"], "error": {"code": -32005, "message": "Node is behind"}}
+        if method in self.failing:
+            return error
+        if method == "getTransaction" and params[0] in self.unavailable:
+            remaining, as_error = self.unavailable[params[0]]
+            if remaining is not None:
+                if remaining <= 1:
+                    del self.unavailable[params[0]]
+                else:
+                    self.unavailable[params[0]][0] -= 1
+            return error if as_error else {"jsonrpc": "2.0", "id": request["id"], "result": None}
+        if method == "getSignaturesForAddress":
+            address, options = params
+            entries = list(reversed(self.history.get(address, [])))
+            if "before" in options:
+                index = [sig for _, sig, _ in entries].index(options["before"])
+                entries = entries[index + 1:]
+            result = [
+                {"signature": sig, "slot": slot, "err": err}
+                for slot, sig, err in entries[:options["limit"]]
+            ]
+        elif method == "getTransaction":
+            result = self.transactions.get(params[0])
+        else:
+            result = None
+        return {"jsonrpc": "2.0", "id": request["id"], "result": result}
+
+    def transport(self):
+        def handler(http_request: httpx.Request) -> httpx.Response:
+            payload = json.loads(http_request.content)
+            if isinstance(payload, list):
+                return httpx.Response(200, json=[self._handle(r) for r in payload])
+            return httpx.Response(200, json=self._handle(payload))
+        return httpx.MockTransport(handler)
+
+    def backfiller(self, program_ids, **kwargs):
+        client = httpx.AsyncClient(transport=self.transport())
+        kwargs.setdefault("retry_delay", 0)
+        return Backfiller("http://rpc.local", program_ids, client=client, **kwargs)
+
+
+class TestCheckpoint:
+    def test_advance_and_covers(self):
+        checkpoint = Checkpoint()
+        checkpoint.advance(10, "a")
+        checkpoint.advance(10, "b")
+        checkpoint.advance(9, "old")
+
+        assert checkpoint.slot == 10
+        assert checkpoint.signatures == ["a", "b"]
+        assert checkpoint.covers(9, "x")
+        assert checkpoint.covers(10, "a")
+        assert not checkpoint.covers(10, "c")
+        assert not checkpoint.covers(11, "a")
+
+    def test_store_roundtrip(self, tmp_path):
+        path = str(tmp_path / "state" / "checkpoint.json")
+        store = CheckpointStore(path)
+        assert store.load() is None
+
+        store.advance(42, "sig")
+        store.save()
+
+        loaded = CheckpointStore(path).load()
+        assert loaded == Checkpoint(slot=42, signatures=["sig"])
+
+    def test_corrupt_file_is_ignored(self, tmp_path):
+        path = tmp_path / "checkpoint.json"
+        path.write_text("{not json")
+
+        assert CheckpointStore(str(path)).load() is None
+
+
+class TestBackfiller:
+    @pytest.mark.asyncio
+    async def test_pages_until_checkpoint(self):
+        rpc = FakeRpc()
+        for slot in range(1, 8):
+            rpc.add([EXO_CORE_PROGRAM_ID], slot, f"sig{slot}", core_logs("noop"))
+        backfiller = rpc.backfiller([EXO_CORE_PROGRAM_ID], page_limit=2)
+
+        signatures = await backfiller.fetch_signatures(EXO_CORE_PROGRAM_ID, Checkpoint(3, ["sig3"]))
+
+        assert [info["signature"] for info in signatures] == ["sig4", "sig5", "sig6", "sig7"]
+        # 7,6 | 5,4 | 3 (到达检查点)
+        assert rpc.calls.count("getSignaturesForAddress") == 3
+
+    @pytest.mark.asyncio
+    async def test_skips_failed_transactions(self):
+        rpc = FakeRpc()
+        rpc.add([EXO_CORE_PROGRAM_ID], 5, "ok", core_logs("Escrow created"))
+        rpc.add([EXO_CORE_PROGRAM_ID], 6, "failed", core_logs("Escrow created"), err={"InstructionError": [0, "Custom"]})
+        backfiller = rpc.backfiller([EXO_CORE_PROGRAM_ID])
+
+        result = await backfiller.fetch_missed(Checkpoint(1, []))
+
+        assert [tx.signature for tx in result.transactions] == ["ok"]
+
+    @pytest.mark.asyncio
+    async def test_merges_programs_in_slot_order(self):
+        rpc = FakeRpc()
+        rpc.add([EXO_CORE_PROGRAM_ID], 5, "core5", core_logs("Escrow created"))
+        rpc.add([EXO_HOOKS_PROGRAM_ID], 6, "hook6", ["Program log: Transfer hooked"])
+        rpc.add([EXO_CORE_PROGRAM_ID, EXO_HOOKS_PROGRAM_ID], 7, "both7", core_logs("Escrow released"))
+        backfiller = rpc.backfiller([EXO_CORE_PROGRAM_ID, EXO_HOOKS_PROGRAM_ID], batch_size=2)
+
+        missed = (await backfiller.fetch_missed(Checkpoint(4, []))).transactions
+
+        assert [(tx.slot, tx.signature) for tx in missed] == [(5, "core5"), (6, "hook6"), (7, "both7")]
+        assert missed[0].logs == core_logs("Escrow created")
+        assert rpc.calls.count("getTransaction") == 3
+
+    @pytest.mark.asyncio
+    async def test_long_gap_is_not_truncated(self):
+        """超过 max_signatures 仍翻页到检查点，最早的签名不丢失"""
+        rpc = FakeRpc()
+        for slot in range(1, 10):
+            rpc.add([EXO_CORE_PROGRAM_ID], slot, f"sig{slot}", core_logs("noop"))
+        backfiller = rpc.backfiller([EXO_CORE_PROGRAM_ID], page_limit=2, max_signatures=3)
+
+        signatures = await backfiller.fetch_signatures(EXO_CORE_PROGRAM_ID, Checkpoint(1, ["sig1"]))
+
+        assert [info["signature"] for info in signatures] == [f"sig{slot}" for slot in range(2, 10)]
+
+    @pytest.mark.asyncio
+    async def test_failed_transactions_are_retried(self):
+        rpc = FakeRpc()
+        for slot in (5, 6, 7):
+            rpc.add([EXO_CORE_PROGRAM_ID], slot, f"sig{slot}", core_logs("Escrow created"))
+        rpc.make_unavailable("sig6", times=1, as_error=True)
+        rpc.make_unavailable("sig7", times=2)
+        backfiller = rpc.backfiller([EXO_CORE_PROGRAM_ID])
+
+        result = await backfiller.fetch_missed(Checkpoint(4, []))
+
+        assert [tx.signature for tx in result.transactions] == ["sig5", "sig6", "sig7"]
+        assert result.unresolved is None
+        # 3 + 重试 sig6、sig7 + 再重试 sig7
+        assert rpc.calls.count("getTransaction") == 6
+
+    @pytest.mark.parametrize("as_error", [False, True])
+    @pytest.mark.asyncio
+    async def test_stops_at_unavailable_transaction(self, as_error):
+        """中间一笔交易重试后仍取不到: 只返回其之前的交易"""
+        rpc = FakeRpc()
+        for slot in (5, 6, 7):
+            rpc.add([EXO_CORE_PROGRAM_ID], slot, f"sig{slot}", core_logs("Escrow created"))
+        rpc.make_unavailable("sig6", as_error=as_error)
+        backfiller = rpc.backfiller([EXO_CORE_PROGRAM_ID], fetch_retries=2)
+
+        result = await backfiller.fetch_missed(Checkpoint(4, []))
+
+        assert [tx.signature for tx in result.transactions] == ["sig5"]
+        assert result.unresolved == (6, "sig6")
+        assert rpc.calls.count("getTransaction") == 3 + 2
+
+    @pytest.mark.asyncio
+    async def test_rpc_error_raises(self):
+        rpc = FakeRpc()
+        rpc.failing.add("getSignaturesForAddress")
+        backfiller = rpc.backfiller([EXO_CORE_PROGRAM_ID])
+
+        with pytest.raises(RpcError):
+            await backfiller.fetch_signatures(EXO_CORE_PROGRAM_ID, Checkpoint())
+
+
+class TestListenerBackfill:
+    def make_listener(self, rpc, tmp_path):
+        listener = ChainListener(
+            api_key="test",
+            program_ids=[EXO_CORE_PROGRAM_ID],
+            checkpoint_path=str(tmp_path / "checkpoint.json"),
+        )
+        listener._backfiller = rpc.backfiller([EXO_CORE_PROGRAM_ID])
+        return listener
+
+    @pytest.mark.asyncio
+    async def test_without_checkpoint_nothing_is_fetched(self, tmp_path):
+        rpc = FakeRpc()
+        listener = self.make_listener(rpc, tmp_path)
+
+        assert await listener.backfill() == 0
+        assert rpc.calls == []
+
+    @pytest.mark.asyncio
+    async def test_replays_missed_events_then_dedupes_live(self, tmp_path):
+        rpc = FakeRpc()
+        rpc.add([EXO_CORE_PROGRAM_ID], 10, "seen", core_logs("Escrow created"))
+        rpc.add([EXO_CORE_PROGRAM_ID], 11, "missed1", core_logs("Escrow funded"))
+        rpc.add([EXO_CORE_PROGRAM_ID], 12, "missed2", core_logs("Escrow released"))
+
+        store = CheckpointStore(str(tmp_path / "checkpoint.json"))
+        store.advance(10, "seen")
+        store.save()
+
+        listener = self.make_listener(rpc, tmp_path)
+        received = []
+        listener.on_event(lambda event: received.append((event.signature, event.event_type)))
+
+        assert await listener.backfill() == 2
+
+        # 补齐期间缓冲的实时通知与补齐结果重叠
+        live = {
+            "jsonrpc": "2.0",
+            "method": "logsNotification",
+            "params": {"result": {
+                "context": {"slot": 12},
+                "value": {"signature": "missed2", "logs": core_logs("Escrow released"), "err": None},
+            }},
+        }
+        await listener._handle_message(json.dumps(live))
+        await listener.stop()
+
+        assert received == [
+            ("missed1", EventType.ESCROW_FUNDED),
+            ("missed2", EventType.ESCROW_RELEASED),
+        ]
+        assert CheckpointStore(str(tmp_path / "checkpoint.json")).load() == Checkpoint(12, ["missed2"])
+
+    @pytest.mark.asyncio
+    async def test_backfill_uses_program_parser(self, tmp_path):
+        rpc = FakeRpc()
+        rpc.add([EXO_CORE_PROGRAM_ID], 11, "custom", ["Program log: custom instruction"])
+        store = CheckpointStore(str(tmp_path / "checkpoint.json"))
+        store.advance(10, "seen")
+        store.save()
+
+        class CustomParser:
+            @staticmethod
+            def parse(signature, logs, slot=0):
+                return ChainEvent(
+                    event_type=EventType.UNKNOWN, signature=signature, slot=slot,
+                    timestamp=datetime(2024, 1, 1), program_id=EXO_CORE_PROGRAM_ID, data={"custom": True},
+                )
+
+        listener = ChainListener(
+            api_key="test",
+            program_ids=[EXO_CORE_PROGRAM_ID],
+            checkpoint_path=str(tmp_path / "checkpoint.json"),
+            parsers={EXO_CORE_PROGRAM_ID: CustomParser},
+            reorder_window=0,
+        )
+        listener._backfiller = rpc.backfiller([EXO_CORE_PROGRAM_ID])
+        received = []
+        listener.on_event(lambda event: received.append(event.data))
+
+        assert await listener.backfill() == 1
+        await listener.stop()
+
+        assert received == [{"custom": True}]
+
+    @pytest.mark.asyncio
+    async def test_unavailable_transaction_holds_checkpoint(self, tmp_path):
+        """缺失交易之后的补齐与实时事件不推进检查点，下次补齐重新获取"""
+        rpc = FakeRpc()
+        rpc.add([EXO_CORE_PROGRAM_ID], 11, "missed1", core_logs("Escrow funded"))
+        rpc.add([EXO_CORE_PROGRAM_ID], 12, "pending", core_logs("Escrow released"))
+        rpc.add([EXO_CORE_PROGRAM_ID], 13, "missed3", core_logs("Escrow created"))
+        rpc.make_unavailable("pending")
+        store = CheckpointStore(str(tmp_path / "checkpoint.json"))
+        store.advance(10, "seen")
+        store.save()
+
+        listener = ChainListener(
+            api_key="test",
+            program_ids=[EXO_CORE_PROGRAM_ID],
+            checkpoint_path=str(tmp_path / "checkpoint.json"),
+            reorder_window=0,
+        )
+        listener._backfiller = rpc.backfiller([EXO_CORE_PROGRAM_ID], fetch_retries=1)
+        received = []
+        listener.on_event(lambda event: received.append(event.signature))
+
+        assert await listener.backfill() == 1
+        await listener._process("live14", core_logs("Escrow created"), 14)
+        assert received == ["missed1", "live14"]
+        assert listener.checkpoint.load() == Checkpoint(11, ["missed1"])
+
+        # 交易已索引: 下次补齐从检查点重新获取，之后检查点正常推进
+        del rpc.unavailable["pending"]
+        assert await listener.backfill() == 2
+        await listener._process("live15", core_logs("Escrow created"), 15)
+        await listener.stop()
+
+        assert received == ["missed1", "live14", "pending", "missed3", "live15"]
+        assert CheckpointStore(str(tmp_path / "checkpoint.json")).load() == Checkpoint(15, ["live15"])
+
+    @pytest.mark.asyncio
+    async def test_failed_backfill_holds_checkpoint(self, tmp_path):
+        rpc = FakeRpc()
+        rpc.failing.add("getSignaturesForAddress")
+        listener = self.make_listener(rpc, tmp_path)
+        listener.checkpoint.advance(10, "seen")
+
+        with pytest.raises(RpcError):
+            await listener.backfill()
+        await listener._process("live11", core_logs("Escrow created"), 11)
+        await listener.stop()
+
+        assert listener.checkpoint.load() == Checkpoint(10, ["seen"])
+
+
+class TestCheckpointOrdering:
+    """检查点只推进到已发布的位置"""
+
+    @pytest.mark.asyncio
+    async def test_buffered_events_hold_checkpoint(self):
+        listener = ChainListener(api_key="test", backfill=False, reorder_window=60)
+        received = []
+        listener.on_event(lambda event: received.append(event.signature))
+
+        await listener._process("event10", core_logs("Escrow created"), 10)
+        await listener._process("noop11", ["Program log: unrelated"], 11)
+        await listener._process("noop9", ["Program log: unrelated"], 9)
+
+        # slot 10 的事件仍在重排缓冲中: 只计入更早的无事件交易
+        assert received == []
+        assert listener.checkpoint.load() == Checkpoint(9, ["noop9"])
+
+        await listener._release(listener._reorder.drain)
+
+        assert received == ["event10"]
+        assert listener.checkpoint.load() == Checkpoint(11, ["noop11"])
+        await listener.stop()
+
+
+class TestReconnect:
+    """断线后的重连策略"""
+
+    @pytest.mark.asyncio
+    async def test_retries_until_connected_by_default(self):
+        listener = ChainListener(api_key="test", backfill=False)
+        attempts = []
+
+        async def connect():
+            attempts.append(1)
+            if len(attempts) == 8:
+                listener._running = False
+            return False
+
+        with patch.object(listener, "connect", side_effect=connect), \
+             patch("listener.chain_listener.asyncio.sleep", new_callable=AsyncMock) as sleep:
+            await listener.run()
+
+        assert len(attempts) == 8
+        delays = [call.args[0] for call in sleep.await_args_list]
+        assert delays[:3] == [3, 6, 12]
+        assert max(delays) == 60
+
+    @pytest.mark.asyncio
+    async def test_stops_after_explicit_attempt_limit(self):
+        listener = ChainListener(api_key="test", backfill=False, max_reconnect_attempts=2)
+
+        with patch.object(listener, "connect", new_callable=AsyncMock, return_value=False) as connect, \
+             patch("listener.chain_listener.asyncio.sleep", new_callable=AsyncMock):
+            await listener.run()
+
+        assert connect.await_count == 2
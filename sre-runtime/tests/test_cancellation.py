@@ -0,0 +1,196 @@
+"""
+Exo Protocol - 沙盒取消与孤儿容器回收单元测试
+"""
+
+import asyncio
+import os
+import sys
+import textwrap
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from executor.sandbox import (
+    INSTANCE_ID,
+    LABEL_INSTANCE,
+    LABEL_MANAGED,
+    LABEL_ORDER_ID,
+    CancelToken,
+    SandboxCancelledError,
+    execute_in_sandbox,
+    reap_orphaned_containers,
+)
+from orchestrator import OrderConfig, execute_skill_order
+
+SLEEP_SKILL = """
+    import os, time
+
+
+    def main():
+        with open(os.path.join(os.path.dirname(__file__), "pid"), "w") as f:
+            f.write(str(os.getpid()))
+        time.sleep(30)
+
+
+    if __name__ == "__main__":
+        main()
+"""
+
+
+def make_skill(tmp_path, backend: str = "process") -> dict:
+    scripts = tmp_path / "scripts"
+    scripts.mkdir()
+    (scripts / "main.py").write_text(textwrap.dedent(SLEEP_SKILL))
+    return {
+        "name": "sleepy",
+        "path": str(tmp_path),
+        "runtime": {
+            "docker_image": "exo-runtime-python-3.11",
+            "entrypoint": "scripts/main.py",
+            "sandbox_backend": backend,
+            "timeout_seconds": 30,
+        },
+    }
+
+
+def wait_for_pid(tmp_path) -> int:
+    pid_file = tmp_path / "scripts" / "pid"
+    deadline = time.monotonic() + 10
+    while not pid_file.exists() or not pid_file.read_text():
+        assert time.monotonic() < deadline, "skill did not start"
+        time.sleep(0.02)
+    return int(pid_file.read_text())
+
+
+def process_gone(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    # 已退出但未回收的僵尸进程
+    with open(f"/proc/{pid}/stat") as f:
+        return f.read().split(")")[-1].split()[0] == "Z"
+
+
+class TestCancelToken:
+    """取消令牌"""
+
+    def test_callbacks_run_once(self):
+        token = CancelToken()
+        callback = MagicMock()
+        token.on_cancel(callback)
+
+        token.cancel()
+        token.cancel()
+
+        callback.assert_called_once()
+        with pytest.raises(SandboxCancelledError):
+            token.raise_if_cancelled()
+
+    def test_late_registration_runs_immediately(self):
+        token = CancelToken()
+        token.cancel()
+        callback = MagicMock()
+        token.on_cancel(callback)
+        callback.assert_called_once()
+
+    def test_unregister(self):
+        token = CancelToken()
+        callback = MagicMock()
+        token.on_cancel(callback)()
+        token.cancel()
+        callback.assert_not_called()
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="Linux only")
+class TestProcessCancellation:
+    """取消立即终止子进程"""
+
+    @pytest.mark.parametrize("backend", ["process", "forkserver"])
+    def test_cancel_kills_running_skill(self, tmp_path, backend):
+        skill = make_skill(tmp_path, backend)
+        token = CancelToken()
+
+        async def run():
+            task = asyncio.create_task(
+                asyncio.to_thread(execute_in_sandbox, skill, {}, cancel_token=token)
+            )
+            pid = await asyncio.to_thread(wait_for_pid, tmp_path)
+            token.cancel()
+            with pytest.raises(SandboxCancelledError):
+                await asyncio.wait_for(task, timeout=5)
+            return pid
+
+        pid = asyncio.run(run())
+        assert process_gone(pid)
+
+    def test_orchestrator_timeout_kills_sandbox(self, tmp_path):
+        """订单超时后沙盒进程被立即终止，而不是等待 Skill 自身超时"""
+        skill = make_skill(tmp_path)
+        config = OrderConfig(order_id="order-slow", skill_package=skill, input_data={}, timeout_seconds=1)
+
+        started = time.perf_counter()
+        result = asyncio.run(execute_skill_order(config))
+
+        assert result.status == "timeout"
+        assert time.perf_counter() - started < 5
+        pid = wait_for_pid(tmp_path)
+        deadline = time.monotonic() + 2
+        while not process_gone(pid):
+            assert time.monotonic() < deadline, "sandbox process still running"
+            time.sleep(0.02)
+
+
+class TestDockerCancellation:
+    """Docker 容器标签、kill 与回收"""
+
+    @patch("executor.sandbox.docker.from_env")
+    def test_cancel_kills_container(self, mock_docker):
+        token = CancelToken()
+        mock_container = MagicMock()
+
+        def wait(timeout):
+            token.cancel()
+            return {"StatusCode": 137}
+
+        mock_container.wait.side_effect = wait
+        mock_container.logs.return_value = b""
+        mock_docker.return_value.containers.create.return_value = mock_container
+
+        skill = {"name": "s", "runtime": {"docker_image": "img", "entrypoint": "main.py"}}
+        with pytest.raises(SandboxCancelledError):
+            execute_in_sandbox(skill, {}, order_id="order-9", cancel_token=token)
+
+        labels = mock_docker.return_value.containers.create.call_args.kwargs["labels"]
+        assert labels == {LABEL_MANAGED: "true", LABEL_ORDER_ID: "order-9", LABEL_INSTANCE: INSTANCE_ID}
+        mock_container.kill.assert_called_once()
+        mock_container.remove.assert_called_once_with(force=True)
+
+    @patch("executor.sandbox.docker.from_env")
+    def test_cancelled_before_start(self, mock_docker):
+        token = CancelToken()
+        token.cancel()
+        skill = {"name": "s", "runtime": {"docker_image": "img", "entrypoint": "main.py"}}
+
+        with pytest.raises(SandboxCancelledError):
+            execute_in_sandbox(skill, {}, cancel_token=token)
+        mock_docker.return_value.containers.create.assert_not_called()
+
+    def test_reaper_removes_foreign_instances(self):
+        def container(instance, order_id):
+            c = MagicMock()
+            c.labels = {LABEL_MANAGED: "true", LABEL_INSTANCE: instance, LABEL_ORDER_ID: order_id}
+            return c
+
+        orphan, live = container("dead-instance", "order-1"), container(INSTANCE_ID, "order-2")
+        client = MagicMock()
+        client.containers.list.return_value = [orphan, live]
+
+        assert reap_orphaned_containers(client) == 1
+        client.containers.list.assert_called_once_with(all=True, filters={"label": f"{LABEL_MANAGED}=true"})
+        orphan.remove.assert_called_once_with(force=True)
+        live.remove.assert_not_called()
+
+        assert reap_orphaned_containers(client, order_ids=["order-2"]) == 1
+        live.remove.assert_called_once_with(force=True)
@@ -0,0 +1,106 @@
+"""
+Exo Protocol - JSON 编解码门面单元测试 (后端选择 / 回退 / 规范化输出)
+"""
+
+import json
+import math
+
+import pytest
+
+import codec
+from codec import json_codec
+from committer.committer import compute_result_hash
+from executor.sandbox import serialize_input
+from verifier.verifier import compute_result_hash as verifier_hash
+
+SAMPLES = [
+    {"b": 1, "a": [1.5, 1e16, -0.0, 3], "c": {"z": None, "y": True}},
+    {"unicode": "结果 ✓", "nested": [{"k": "v"}, []]},
+    {"big": 2 ** 70, "small": -(2 ** 63)},
+]
+
+
+@pytest.fixture(params=codec.available_backends())
+def backend(request):
+    codec.set_backend(request.param)
+    yield request.param
+    codec.reset_backend()
+
+
+class TestBackend:
+    def test_default_prefers_native(self):
+        codec.reset_backend()
+
+        assert codec.get_backend() == codec.available_backends()[0]
+
+    def test_rejects_unknown_backend(self):
+        with pytest.raises(ValueError):
+            codec.set_backend("simdjson")
+
+
+class TestFastPath:
+    @pytest.mark.parametrize("value", SAMPLES)
+    def test_round_trip(self, backend, value):
+        assert codec.loads(codec.dumps(value)) == value
+        assert codec.loads(codec.dumpb(value)) == value
+        assert codec.loads(memoryview(codec.dumpb(value))) == value
+
+    def test_compact_and_indented(self, backend):
+        assert codec.dumps({"a": [1, 2]}) == '{"a":[1,2]}'
+        assert codec.dumps({"b": 1, "a": 2}, sort_keys=True) == '{"a":2,"b":1}'
+        assert codec.dumps({"a": 1}, indent=True) == '{\n  "a": 1\n}'
+        assert codec.dumps("✓") == '"✓"'
+
+    def test_stdlib_only_values_fall_back(self, backend):
+        assert math.isnan(codec.loads("NaN"))
+        assert codec.dumps(2 ** 70) == str(2 ** 70)
+        with pytest.raises(TypeError):
+            codec.dumps(object())
+
+    def test_invalid_input_raises_decode_error(self, backend):
+        with pytest.raises(codec.JSONDecodeError):
+            codec.loads("{")
+
+
+class TestExactPath:
+    @pytest.mark.parametrize("value", SAMPLES)
+    def test_canonical_matches_stdlib(self, backend, value):
+        assert codec.canonical_dumps(value) == json.dumps(value, sort_keys=True, separators=(",", ":"))
+        assert codec.canonical_dumps(value, compact=False, ensure_ascii=False) == json.dumps(
+            value, sort_keys=True, ensure_ascii=False
+        )
+
+    @pytest.mark.parametrize("value", SAMPLES)
+    def test_hashes_independent_of_backend(self, value):
+        hashes = set()
+        for name in codec.available_backends():
+            codec.set_backend(name)
+            hashes.add((compute_result_hash(value), verifier_hash(value), serialize_input(value)))
+        codec.reset_backend()
+
+        assert len(hashes) == 1
+
+    def test_exact_round_trip_preserves_big_ints(self):
+        value = {"big": 2 ** 70, "nan": float("nan")}
+
+        restored = codec.exact_loads(codec.exact_dumps(value, indent=True))
+
+        assert restored["big"] == 2 ** 70
+        assert math.isnan(restored["nan"])
+
+    def test_sort_keys_matches_round_trip(self):
+        value = json.loads('{"b": {"d": 1, "c": [{"f": 2, "e": 3}]}, "a": 0}')
+
+        sorted_value = codec.sort_keys(value)
+
+        assert json.dumps(sorted_value) == json.dumps(json.loads(json.dumps(value, sort_keys=True)))
+
+
+def test_stdlib_used_without_native(monkeypatch):
+    monkeypatch.setattr(json_codec, "orjson", None)
+    codec.reset_backend()
+
+    assert codec.available_backends() == (codec.BACKEND_STDLIB,)
+    assert codec.get_backend() == codec.BACKEND_STDLIB
+    assert codec.loads(codec.dumpb({"a": 1})) == {"a": 1}
+    codec.reset_backend()
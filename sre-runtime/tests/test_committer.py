@@ -11,7 +11,7 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from committer import CommitResult, commit_result, compute_result_hash
-from executor.sandbox import SandboxConfig
+from executor.sandbox import ResourceUsage, SandboxConfig
 
 
 class TestCommitResultDataclass:
@@ -192,6 +192,31 @@ class TestExecutionTiming:
             assert result.execution_time_ms >= 0
 
 
+class TestResourceUsage:
+    """沙盒资源消耗透传到 CommitResult"""
+
+    @pytest.mark.asyncio
+    async def test_resource_usage_on_commit_result(self):
+        usage = ResourceUsage(cpu_time_ms=12, peak_memory_bytes=1024, wall_time_ms=30)
+
+        def fake_sandbox(skill_package, input_data, config, report, **kwargs):
+            report.usage = usage
+            return {"output": "ok"}
+
+        with patch("committer.committer.execute_in_sandbox", side_effect=fake_sandbox), \
+             patch("committer.committer.store_result", new_callable=AsyncMock) as mock_store:
+            mock_store.return_value = "file://test.json"
+
+            result = await commit_result(
+                order_id="order-usage",
+                skill_package={"runtime": {"docker_image": "test", "entrypoint": "main.py"}},
+                input_data={"prompt": "test"},
+            )
+
+            assert result.status == "success"
+            assert result.resource_usage == usage
+
+
 class TestSandboxConfigPassthrough:
     """验证 SandboxConfig 正确传递"""
     
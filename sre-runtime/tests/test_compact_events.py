@@ -0,0 +1,104 @@
+"""
+Exo Protocol - 紧凑事件表示单元测试 (slots / 原始日志保留策略 / 紧凑序列化)
+"""
+
+import json
+from datetime import datetime
+
+import pytest
+
+from committer import CommitResult
+from listener.chain_listener import (
+    EXO_CORE_PROGRAM_ID,
+    RAW_LOGS_DROP,
+    RAW_LOGS_KEEP,
+    RAW_LOGS_LAZY,
+    ChainEvent,
+    ChainListener,
+    CompressedLogs,
+    EventType,
+    retain_logs,
+)
+from orchestrator import OrderResult
+from verifier.challenger import ChallengeResult, ChallengeStatus
+
+LOGS = [f"Program {EXO_CORE_PROGRAM_ID} invoke [1]", "Program log: Escrow created", "Program log: Amount: 5"]
+
+
+def make_event(**kwargs) -> ChainEvent:
+    return ChainEvent(
+        event_type=EventType.ESCROW_CREATED,
+        signature="sig",
+        slot=7,
+        timestamp=datetime(2024, 1, 1),
+        program_id=EXO_CORE_PROGRAM_ID,
+        data={"amount": 5},
+        **kwargs,
+    )
+
+
+class TestCompressedLogs:
+    def test_sequence_behaviour(self):
+        logs = CompressedLogs(LOGS)
+
+        assert list(logs) == LOGS
+        assert len(logs) == 3
+        assert logs[1] == "Program log: Escrow created"
+        assert logs == LOGS
+        assert CompressedLogs([]) == []
+
+    def test_retain_policies(self):
+        assert retain_logs(LOGS, RAW_LOGS_KEEP) is LOGS
+        assert isinstance(retain_logs(LOGS, RAW_LOGS_LAZY), CompressedLogs)
+        assert retain_logs(LOGS, RAW_LOGS_DROP) == []
+        with pytest.raises(ValueError):
+            retain_logs(LOGS, "zip")
+
+
+class TestChainEvent:
+    def test_slotted(self):
+        event = make_event()
+
+        assert not hasattr(event, "__dict__")
+        with pytest.raises(AttributeError):
+            event.extra = 1
+
+    def test_compact_json(self):
+        event = make_event(raw_logs=CompressedLogs(LOGS))
+
+        compact = event.to_compact_json(include_logs=True)
+
+        assert "\n" not in compact
+        assert json.loads(compact)["raw_logs"] == LOGS
+        assert "raw_logs" not in json.loads(event.to_compact_json())
+        # to_json 保持可读格式
+        assert event.to_json().startswith("{\n  ")
+
+    def test_equality_with_compressed_logs(self):
+        assert make_event(raw_logs=CompressedLogs(LOGS)) == make_event(raw_logs=list(LOGS))
+
+
+def test_result_records_are_slotted():
+    records = [
+        CommitResult("o", "da://x", "h", 1, "success"),
+        OrderResult("o", "completed", None, None, 1),
+        ChallengeResult("p", ChallengeStatus.PENDING),
+    ]
+
+    assert not any(hasattr(record, "__dict__") for record in records)
+
+
+@pytest.mark.asyncio
+async def test_listener_applies_raw_logs_policy():
+    listener = ChainListener(api_key="test", backfill=False, reorder_window=0, raw_logs_policy=RAW_LOGS_LAZY)
+    received = []
+    listener.on_event(received.append)
+
+    await listener._process("tx1", LOGS, 1, None)
+    await listener.stop()
+
+    assert isinstance(received[0].raw_logs, CompressedLogs)
+    assert received[0].raw_logs == LOGS
+
+    with pytest.raises(ValueError):
+        ChainListener(api_key="test", raw_logs_policy="zip")
@@ -0,0 +1,243 @@
+"""
+Exo Protocol - 截止时间调度器单元测试 (EDF 排序 / 丢弃 / 抢占 / 订单与挑战接入)
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from concurrency import (
+    KIND_CHALLENGE,
+    DeadlineMissedError,
+    DeadlineScheduler,
+    SlotClock,
+    reset_scheduler,
+    set_scheduler,
+)
+from constants import CHALLENGE_WINDOW_SLOTS
+from metrics import InMemoryMetricsSink, reset_sink, set_sink
+from orchestrator import OrderConfig, schedule_order
+from orchestrator.orchestrator import clear_failure_callbacks, register_failure_callback
+from verifier.challenger import ChallengeStatus, ChallengeTarget, watch_and_challenge
+
+
+class FakeTime:
+    def __init__(self):
+        self.value = 0.0
+
+    def __call__(self):
+        return self.value
+
+
+@pytest.fixture
+def sink():
+    sink = InMemoryMetricsSink()
+    set_sink(sink)
+    yield sink
+    reset_sink()
+
+
+def recorder(order, name, delay=0.0):
+    async def run():
+        order.append(name)
+        await asyncio.sleep(delay)
+        return name
+    return run
+
+
+class TestSlotClock:
+    def test_advances_and_reanchors_forward_only(self):
+        now = FakeTime()
+        clock = SlotClock(slot_seconds=0.5, slot=100, clock=now)
+
+        now.value = 1.0
+        assert clock.now() == 102
+        clock.observe(101)
+        assert clock.now() == 102
+        clock.observe(200)
+        assert clock.now() == 200
+        assert clock.seconds_until(210) == 5
+
+
+class TestDeadlineScheduler:
+    @pytest.mark.asyncio
+    async def test_earliest_deadline_first_then_value_then_priority(self):
+        scheduler = DeadlineScheduler(max_concurrent=1, clock=SlotClock(slot=0))
+        order = []
+        blocker = asyncio.Event()
+
+        async def block():
+            await blocker.wait()
+
+        first = scheduler.submit(block)
+        futures = [
+            scheduler.submit(recorder(order, "none")),
+            scheduler.submit(recorder(order, "late"), deadline=5000),
+            scheduler.submit(recorder(order, "cheap"), deadline=1000.2),
+            scheduler.submit(recorder(order, "rich"), deadline=1000.7, value=10),
+            scheduler.submit(recorder(order, "rich-vip"), deadline=1000.5, value=10, priority=1),
+        ]
+        blocker.set()
+        await asyncio.gather(first, *futures)
+
+        assert order == ["rich-vip", "rich", "cheap", "late", "none"]
+
+    @pytest.mark.asyncio
+    async def test_sheds_work_past_deadline(self, sink):
+        scheduler = DeadlineScheduler(clock=SlotClock(slot=100))
+
+        with pytest.raises(DeadlineMissedError) as exc:
+            await scheduler.run(recorder([], "x"), deadline=50, name="o1")
+
+        assert exc.value.stage == "shed before start"
+        assert sink.counter("scheduler.deadline_miss", {"scheduler": "default", "kind": "order", "stage": "queued"}) == 1
+
+    @pytest.mark.asyncio
+    async def test_sheds_when_estimate_exceeds_slack(self):
+        scheduler = DeadlineScheduler(clock=SlotClock(slot_seconds=0.01))
+        await scheduler.run(recorder([], "warmup", delay=0.1))
+        assert scheduler.estimate("order") >= 9
+
+        with pytest.raises(DeadlineMissedError):
+            await scheduler.run(recorder([], "x"), deadline=scheduler.clock.now() + 3)
+
+    @pytest.mark.asyncio
+    async def test_preempts_running_work_at_deadline(self, sink):
+        scheduler = DeadlineScheduler(clock=SlotClock(slot_seconds=0.01))
+        cancelled = []
+
+        async def slow():
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        with pytest.raises(DeadlineMissedError) as exc:
+            await scheduler.run(slow, deadline=scheduler.clock.now() + 5)
+
+        assert exc.value.stage == "preempted while running"
+        assert cancelled == [True]
+        assert scheduler.running == 0
+        assert sink.counter("scheduler.jobs", {"scheduler": "default", "kind": "order", "outcome": "preempted"}) == 1
+
+    @pytest.mark.asyncio
+    async def test_reanchor_reschedules_preemption(self):
+        """时钟重新锚定到更晚的 slot 后，已过截止的任务立即被抢占"""
+        scheduler = DeadlineScheduler(clock=SlotClock(slot_seconds=1.0, slot=100))
+        started = asyncio.Event()
+
+        async def slow():
+            started.set()
+            await asyncio.sleep(5)
+
+        future = scheduler.submit(slow, deadline=130)
+        await started.wait()
+        scheduler.clock.observe(140)
+
+        with pytest.raises(DeadlineMissedError) as exc:
+            await asyncio.wait_for(future, timeout=1)
+        assert exc.value.stage == "preempted while running"
+
+    @pytest.mark.asyncio
+    async def test_bounded_concurrency_and_errors(self):
+        scheduler = DeadlineScheduler(max_concurrent=2)
+        active, peak = [0], [0]
+
+        async def job():
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            await asyncio.sleep(0.01)
+            active[0] -= 1
+
+        async def boom():
+            raise ValueError("boom")
+
+        await asyncio.gather(*(scheduler.submit(job) for _ in range(6)))
+        with pytest.raises(ValueError):
+            await scheduler.run(boom)
+        assert peak[0] == 2
+
+    @pytest.mark.asyncio
+    async def test_cancelling_caller_cancels_work(self):
+        scheduler = DeadlineScheduler()
+        started = asyncio.Event()
+
+        async def slow():
+            started.set()
+            await asyncio.sleep(5)
+
+        future = scheduler.submit(slow)
+        await started.wait()
+        future.cancel()
+        for _ in range(3):
+            await asyncio.sleep(0)
+
+        assert scheduler.running == 0
+
+
+class TestIntegration:
+    @pytest.fixture(autouse=True)
+    def scheduler(self):
+        scheduler = DeadlineScheduler(clock=SlotClock(slot=1000))
+        set_scheduler(scheduler)
+        yield scheduler
+        reset_scheduler()
+
+    @pytest.mark.asyncio
+    async def test_expired_order_is_shed(self):
+        failures = []
+        register_failure_callback(failures.append)
+        config = OrderConfig(order_id="late", skill_package={}, input_data={}, deadline_slot=900)
+        try:
+            with patch("orchestrator.orchestrator.commit_result") as commit:
+                result = await schedule_order(config)
+        finally:
+            clear_failure_callbacks()
+
+        commit.assert_not_called()
+        assert result.status == "timeout"
+        assert "missed deadline" in result.error_message
+        assert failures == [result]
+
+    @pytest.mark.asyncio
+    async def test_challenges_ordered_by_window(self, scheduler):
+        scheduler.max_concurrent = 1
+        verified = []
+        blocker = asyncio.Event()
+        busy = scheduler.submit(blocker.wait)
+
+        async def verify(order_pubkey):
+            verified.append(order_pubkey)
+            return None
+
+        targets = [
+            ChallengeTarget("later", commit_slot=1050),
+            ChallengeTarget("sooner", commit_slot=1010),
+            ChallengeTarget("closed", commit_slot=1000 - CHALLENGE_WINDOW_SLOTS - 1),
+        ]
+        with patch("verifier.challenger.verify_result", side_effect=verify), \
+             patch("verifier.challenger.fetch_current_slot", AsyncMock(return_value=None)):
+            pending = asyncio.ensure_future(watch_and_challenge(targets))
+            await asyncio.sleep(0)
+            blocker.set()
+            results = await pending
+            await busy
+
+        assert verified == ["sooner", "later"]
+        assert [r.order_pubkey for r in results] == ["later", "sooner", "closed"]
+        assert results[2].status == ChallengeStatus.FAILED
+        assert scheduler.estimate(KIND_CHALLENGE) >= 0
+
+    @pytest.mark.asyncio
+    async def test_challenge_clock_anchored_to_chain_slot(self, scheduler):
+        """以 getSlot 的当前 slot 锚定，而非过去的提交 slot"""
+        targets = [ChallengeTarget("stale", commit_slot=1010)]
+        with patch("verifier.challenger.fetch_current_slot", AsyncMock(return_value=1200)), \
+             patch("verifier.challenger.verify_result", AsyncMock(return_value=None)) as verify:
+            results = await watch_and_challenge(targets)
+
+        assert scheduler.clock.now() >= 1200
+        verify.assert_not_called()
+        assert results[0].status == ChallengeStatus.FAILED
@@ -0,0 +1,169 @@
+"""
+Exo Protocol - 事件分发器单元测试 (异步回调 / 溢出策略 / 积压指标)
+"""
+
+import asyncio
+import os
+from datetime import datetime
+
+import pytest
+
+from listener.chain_listener import ChainEvent, EventType, MockChainListener
+from listener.dispatch import EventDispatcher
+from metrics import InMemoryMetricsSink, reset_sink, set_sink
+
+
+def make_event(i: int) -> ChainEvent:
+    return ChainEvent(
+        event_type=EventType.ESCROW_CREATED,
+        signature=f"sig-{i}",
+        slot=i,
+        timestamp=datetime(2026, 1, 1),
+        program_id="prog",
+        data={"amount": i},
+        raw_logs=[f"Program log: {i}"],
+    )
+
+
+@pytest.fixture
+def sink():
+    sink = InMemoryMetricsSink()
+    set_sink(sink)
+    yield sink
+    reset_sink()
+
+
+class TestEventRoundTrip:
+    def test_from_dict(self):
+        event = make_event(7)
+        restored = ChainEvent.from_dict(event.to_dict(), raw_logs=event.raw_logs)
+        assert restored == event
+
+
+class TestAsyncCallbacks:
+    """异步回调不阻塞分发"""
+
+    @pytest.mark.asyncio
+    async def test_emit_does_not_wait_for_async_callback(self, sink):
+        listener = MockChainListener()
+        started = asyncio.Event()
+        release = asyncio.Event()
+        received = []
+
+        async def slow_handler(event):
+            started.set()
+            await release.wait()
+            received.append(event.signature)
+
+        sync_received = []
+        listener.on_event(slow_handler, name="slow")
+        listener.on_event(lambda e: sync_received.append(e.signature))
+
+        for i in range(3):
+            listener._emit(make_event(i))
+
+        # 同步回调立即执行，异步回调在后台排队
+        assert sync_received == ["sig-0", "sig-1", "sig-2"]
+        await started.wait()
+        assert listener.subscriber_lag() == {"slow": 2}
+
+        release.set()
+        await listener.flush(timeout=1)
+        assert received == ["sig-0", "sig-1", "sig-2"]
+        assert sink.histogram("listener.dispatch_lag_ms", {"subscriber": "slow"}).count == 3
+        await listener.stop()
+
+    @pytest.mark.asyncio
+    async def test_callback_error_isolated(self):
+        dispatcher = EventDispatcher()
+        received = []
+
+        async def handler(event):
+            if event.slot == 0:
+                raise ValueError("boom")
+            received.append(event.slot)
+
+        dispatcher.subscribe(handler)
+        dispatcher.emit(make_event(0))
+        dispatcher.emit(make_event(1))
+        await dispatcher.flush(timeout=1)
+        await dispatcher.close()
+
+        assert received == [1]
+
+
+class TestOverflowPolicies:
+    """队列溢出策略"""
+
+    @pytest.mark.asyncio
+    async def test_block_applies_backpressure(self):
+        dispatcher = EventDispatcher()
+        release = asyncio.Event()
+
+        async def handler(event):
+            await release.wait()
+
+        dispatcher.subscribe(handler, max_queue=2, overflow="block")
+        publisher = asyncio.create_task(_publish_all(dispatcher, range(5)))
+        await asyncio.sleep(0.05)
+
+        assert not publisher.done()  # 读循环被背压阻塞
+        release.set()
+        await asyncio.wait_for(publisher, timeout=1)
+        await dispatcher.close()
+
+    @pytest.mark.asyncio
+    async def test_drop_oldest(self, sink):
+        dispatcher = EventDispatcher()
+        received = []
+
+        async def handler(event):
+            received.append(event.slot)
+
+        subscriber = dispatcher.subscribe(handler, name="lossy", max_queue=2, overflow="drop_oldest")
+        for i in range(5):
+            dispatcher.emit(make_event(i))
+        await dispatcher.flush(timeout=1)
+        await dispatcher.close()
+
+        assert received == [3, 4]
+        assert subscriber.dropped == 3
+        assert sink.counter("listener.events_dropped", {"subscriber": "lossy"}) == 3
+
+    @pytest.mark.asyncio
+    async def test_spill_to_disk_preserves_order(self, tmp_path, sink):
+        dispatcher = EventDispatcher()
+        received = []
+        release = asyncio.Event()
+
+        async def handler(event):
+            await release.wait()
+            received.append(event)
+
+        dispatcher.subscribe(handler, name="spiller", max_queue=2, overflow="spill", spill_dir=str(tmp_path))
+        for i in range(7):
+            dispatcher.emit(make_event(i))
+
+        assert dispatcher.lag() == {"spiller": 7}
+        assert len(os.listdir(tmp_path)) == 1
+        assert sink.counter("listener.events_spilled", {"subscriber": "spiller"}) == 5
+
+        release.set()
+        await dispatcher.flush(timeout=1)
+        await dispatcher.close()
+
+        assert [e.slot for e in received] == list(range(7))
+        assert received[6] == make_event(6)
+        assert os.listdir(tmp_path) == []
+
+    def test_unknown_policy_rejected(self):
+        async def handler(event):
+            pass
+
+        with pytest.raises(ValueError, match="overflow policy"):
+            EventDispatcher().subscribe(handler, overflow="explode")
+
+
+async def _publish_all(dispatcher: EventDispatcher, slots) -> None:
+    for i in slots:
+        await dispatcher.publish(make_event(i))
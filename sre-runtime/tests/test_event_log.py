@@ -0,0 +1,158 @@
+"""
+Exo Protocol - 事件日志单元测试 (分段写入 / slot 区间回放 / 崩溃恢复)
+"""
+
+import json
+import os
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+from listener.chain_listener import (
+    EXO_CORE_PROGRAM_ID,
+    ChainEvent,
+    ChainListener,
+    EventPublisher,
+    EventType,
+    MockChainListener,
+)
+from listener import event_log
+from listener.event_log import INDEX_SUFFIX, SEGMENT_SUFFIX, EventLogReader, EventLogWriter
+
+
+def make_event(slot, signature=None) -> ChainEvent:
+    return ChainEvent(
+        event_type=EventType.ESCROW_CREATED,
+        signature=signature or f"sig-{slot}",
+        slot=slot,
+        timestamp=datetime(2024, 1, 1),
+        program_id=EXO_CORE_PROGRAM_ID,
+        data={"amount": slot},
+        raw_logs=[f"Program log: Escrow created slot {slot}"],
+    )
+
+
+def write(directory, slots, **kwargs):
+    writer = EventLogWriter(str(directory), **kwargs)
+    for slot in slots:
+        writer.append_event(make_event(slot))
+    writer.close()
+
+
+class TestEventLog:
+    def test_round_trip(self, tmp_path):
+        write(tmp_path, [1, 2, 3])
+
+        events = list(EventLogReader(str(tmp_path)).events())
+
+        assert [e.slot for e in events] == [1, 2, 3]
+        assert events[0].to_dict() == make_event(1).to_dict()
+        assert events[0].raw_logs == ["Program log: Escrow created slot 1"]
+
+    def test_segments_rotate_and_ranges_span_them(self, tmp_path):
+        write(tmp_path, range(100), segment_bytes=1024, index_interval=256)
+        reader = EventLogReader(str(tmp_path))
+
+        assert len(reader.segments()) > 3
+        assert [slot for slot, _ in reader.records(40, 59)] == list(range(40, 60))
+        assert [slot for slot, _ in reader.records(95)] == list(range(95, 100))
+        assert list(reader.records(200)) == []
+
+    def test_late_events_are_not_skipped_by_index(self, tmp_path):
+        # slot 5 在 slot 50 之后写入 (迟到事件)
+        slots = list(range(10, 60)) + [5] + list(range(60, 80))
+        write(tmp_path, slots, segment_bytes=2048, index_interval=128)
+
+        assert [slot for slot, _ in EventLogReader(str(tmp_path)).records(0, 9)] == [5]
+        assert [slot for slot, _ in EventLogReader(str(tmp_path)).records(4, 11)] == [10, 11, 5]
+
+    def test_range_read_stops_after_end_slot(self, tmp_path):
+        write(tmp_path, range(1000))
+        scanned = []
+        original = event_log._scan
+
+        def counting_scan(*args, **kwargs):
+            for record in original(*args, **kwargs):
+                scanned.append(record[1])
+                yield record
+
+        with patch.object(event_log, "_scan", counting_scan):
+            slots = [slot for slot, _ in EventLogReader(str(tmp_path)).records(10, 20)]
+
+        assert slots == list(range(10, 21))
+        assert max(scanned) == 21
+
+    def test_reopen_appends_to_last_segment(self, tmp_path):
+        write(tmp_path, [1, 2])
+        write(tmp_path, [3])
+        reader = EventLogReader(str(tmp_path))
+
+        assert len(reader.segments()) == 1
+        assert [slot for slot, _ in reader.records()] == [1, 2, 3]
+
+    def test_torn_tail_truncated_on_reopen(self, tmp_path):
+        write(tmp_path, [1, 2])
+        segment = os.path.join(tmp_path, EventLogReader(str(tmp_path)).segments()[-1] + SEGMENT_SUFFIX)
+        with open(segment, "ab") as f:
+            f.write(b"\x40\x00\x00\x00partial")
+
+        # 读取时忽略残缺尾记录
+        assert [slot for slot, _ in EventLogReader(str(tmp_path)).records()] == [1, 2]
+
+        write(tmp_path, [3])
+        assert [slot for slot, _ in EventLogReader(str(tmp_path)).records()] == [1, 2, 3]
+
+    def test_sealed_segment_records_trailer(self, tmp_path):
+        write(tmp_path, range(50), segment_bytes=512)
+        reader = EventLogReader(str(tmp_path))
+        first = reader.segments()[0]
+
+        with open(os.path.join(tmp_path, first + INDEX_SUFFIX), "rb") as f:
+            trailer = f.read()[-16:]
+        # 封存段的最后一条索引记录段大小
+        assert int.from_bytes(trailer[8:], "little") == os.path.getsize(os.path.join(tmp_path, first + SEGMENT_SUFFIX))
+
+
+def notification(signature, slot):
+    return json.dumps({
+        "jsonrpc": "2.0",
+        "method": "logsNotification",
+        "params": {"result": {
+            "context": {"slot": slot},
+            "value": {
+                "signature": signature,
+                "logs": [f"Program {EXO_CORE_PROGRAM_ID} invoke [1]", "Program log: Escrow created"],
+                "err": None,
+            },
+        }},
+    })
+
+
+@pytest.mark.asyncio
+async def test_listener_writes_confirmed_events(tmp_path):
+    listener = ChainListener(api_key="test", backfill=False, reorder_window=0, event_log_dir=str(tmp_path))
+
+    await listener._handle_message(notification("tx1", 10))
+    await listener._handle_message(notification("tx1", 10))
+    await listener._handle_message(notification("tx2", 11))
+    await listener.stop()
+
+    events = list(EventLogReader(str(tmp_path)).events(10, 11))
+    assert [(e.signature, e.slot) for e in events] == [("tx1", 10), ("tx2", 11)]
+    assert events[0].raw_logs[-1] == "Program log: Escrow created"
+
+
+@pytest.mark.asyncio
+async def test_mock_listener_shares_event_log(tmp_path):
+    listener = MockChainListener(event_log_dir=str(tmp_path))
+    received = []
+    listener.on_event(lambda e: received.append(e.slot))
+
+    for slot in (1, 2):
+        await listener._publish(make_event(slot))
+    await listener.stop()
+
+    assert isinstance(listener, EventPublisher)
+    assert received == [1, 2]
+    assert [e.slot for e in EventLogReader(str(tmp_path)).events()] == [1, 2]
@@ -0,0 +1,190 @@
+"""
+Exo Protocol - 公平队列单元测试 (加权公平 / 并发配额 / 指标 / 订单接入)
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from concurrency import FairQueue, TenantPolicy, reset_fair_queue, set_fair_queue
+from metrics import InMemoryMetricsSink, reset_sink, set_sink
+from orchestrator import OrderConfig, OrderResult, queue_order
+
+
+@pytest.fixture
+def sink():
+    sink = InMemoryMetricsSink()
+    set_sink(sink)
+    yield sink
+    reset_sink()
+
+
+class Recorder:
+    """记录出队顺序；每个任务等待 gate 打开后结束"""
+
+    def __init__(self):
+        self.order = []
+        self.gate = asyncio.Event()
+
+    def job(self, label):
+        async def run():
+            self.order.append(label)
+            await self.gate.wait()
+            return label
+        return run
+
+
+async def drain(queue, futures, recorder):
+    recorder.gate.set()
+    return await asyncio.gather(*futures)
+
+
+class TestFairQueue:
+    @pytest.mark.asyncio
+    async def test_small_agent_not_starved_by_heavy_agent(self):
+        queue = FairQueue(max_concurrent=1)
+        rec = Recorder()
+        futures = [queue.submit(rec.job("heavy"), agent_id="heavy", skill_id="s") for _ in range(50)]
+        futures += [queue.submit(rec.job("small"), agent_id="small", skill_id="s") for _ in range(3)]
+
+        rec.gate.set()
+        await asyncio.gather(*futures)
+
+        # small 的 3 个订单与 heavy 交替执行，不必等待 heavy 的积压
+        assert [i for i, label in enumerate(rec.order) if label == "small"] == [1, 3, 5]
+
+    @pytest.mark.asyncio
+    async def test_weights_share_dispatches(self):
+        queue = FairQueue(max_concurrent=1, policies={"gold": TenantPolicy.for_tier(2)})
+        rec = Recorder()
+        futures = [queue.submit(rec.job("blocker"), agent_id="blocker")]
+        futures += [queue.submit(rec.job("gold"), agent_id="gold") for _ in range(20)]
+        futures += [queue.submit(rec.job("basic"), agent_id="basic") for _ in range(20)]
+
+        await drain(queue, futures, rec)
+
+        first = rec.order[1:16]
+        assert first.count("gold") == 12
+        assert first.count("basic") == 3
+
+    @pytest.mark.asyncio
+    async def test_skills_share_within_agent(self):
+        queue = FairQueue(max_concurrent=1)
+        rec = Recorder()
+        futures = [queue.submit(rec.job("blocker"), agent_id="a", skill_id="x")]
+        futures += [queue.submit(rec.job("x"), agent_id="a", skill_id="x") for _ in range(10)]
+        futures += [queue.submit(rec.job("y"), agent_id="a", skill_id="y") for _ in range(2)]
+
+        await drain(queue, futures, rec)
+
+        assert rec.order[:5] == ["blocker", "y", "x", "y", "x"]
+
+    @pytest.mark.asyncio
+    async def test_idle_agent_does_not_bank_credit(self):
+        queue = FairQueue(max_concurrent=1)
+        rec = Recorder()
+        rec.gate.set()
+        await asyncio.gather(*(queue.submit(rec.job("a"), agent_id="a") for _ in range(20)))
+
+        rec.order.clear()
+        rec.gate.clear()
+        futures = [queue.submit(rec.job("b"), agent_id="b") for _ in range(5)]
+        futures += [queue.submit(rec.job("a"), agent_id="a") for _ in range(5)]
+        await drain(queue, futures, rec)
+
+        assert rec.order[:4] == ["b", "a", "b", "a"]
+
+    @pytest.mark.asyncio
+    async def test_tenant_quota(self):
+        queue = FairQueue(max_concurrent=4, policies={"heavy": TenantPolicy(max_concurrent=1)})
+        rec = Recorder()
+        futures = [queue.submit(rec.job("heavy"), agent_id="heavy") for _ in range(5)]
+        await asyncio.sleep(0)
+
+        assert queue.running == 1
+        assert queue.tenant_depth("heavy") == 4
+
+        futures += [queue.submit(rec.job("small"), agent_id="small") for _ in range(2)]
+        await asyncio.sleep(0)
+        assert queue.running == 3
+
+        await drain(queue, futures, rec)
+        assert queue.running == 0
+        assert queue.queued == 0
+
+    @pytest.mark.asyncio
+    async def test_cancel_queued_and_running(self):
+        queue = FairQueue(max_concurrent=1)
+        rec = Recorder()
+        running = queue.submit(rec.job("a"), agent_id="a")
+        queued = queue.submit(rec.job("b"), agent_id="b")
+        await asyncio.sleep(0)
+
+        queued.cancel()
+        await asyncio.sleep(0)
+        assert queue.queued == 0
+        running.cancel()
+        for _ in range(3):
+            await asyncio.sleep(0)
+
+        assert queue.running == 0
+        assert rec.order == ["a"]
+
+    @pytest.mark.asyncio
+    async def test_errors_propagate(self):
+        queue = FairQueue()
+
+        async def boom():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            await queue.run(boom, agent_id="a")
+        assert queue.running == 0
+
+    def test_policy_validation(self):
+        with pytest.raises(ValueError):
+            TenantPolicy(weight=0)
+        assert TenantPolicy.for_stake(2_000_000_000).weight == 3.0
+
+    @pytest.mark.asyncio
+    async def test_metrics(self, sink):
+        queue = FairQueue(max_concurrent=1, name="orders")
+        rec = Recorder()
+        futures = [queue.submit(rec.job("a"), agent_id="a") for _ in range(3)]
+        await asyncio.sleep(0)
+
+        assert sink.gauges[("fairqueue.tenant_queue_depth", (("agent", "a"), ("queue", "orders")))] == 2
+        await drain(queue, futures, rec)
+
+        assert sink.counter("fairqueue.dispatched", {"queue": "orders", "agent": "a"}) == 3
+        assert sink.histogram("fairqueue.queue_wait_ms", {"queue": "orders", "agent": "a"}).count == 3
+        assert sink.gauges[("fairqueue.queue_depth", (("queue", "orders"),))] == 0
+
+
+class TestQueueOrder:
+    @pytest.fixture(autouse=True)
+    def queue(self):
+        queue = FairQueue(max_concurrent=1)
+        set_fair_queue(queue)
+        yield queue
+        reset_fair_queue()
+
+    @pytest.mark.asyncio
+    async def test_orders_keyed_by_agent(self, queue):
+        seen = []
+
+        async def execute(config):
+            seen.append((config.agent_id, queue.tenant_depth(config.agent_id)))
+            return OrderResult(config.order_id, "completed", None, None, 0)
+
+        configs = [
+            OrderConfig(order_id=f"o{i}", skill_package={}, input_data={}, agent_id="heavy", skill_id="s")
+            for i in range(3)
+        ] + [OrderConfig(order_id="small", skill_package={}, input_data={}, agent_id="small")]
+
+        with patch("orchestrator.orchestrator.execute_skill_order", AsyncMock(side_effect=execute)):
+            results = await asyncio.gather(*(queue_order(c) for c in configs))
+
+        assert [r.order_id for r in results] == ["o0", "o1", "o2", "small"]
+        assert [agent for agent, _ in seen] == ["heavy", "small", "heavy", "heavy"]
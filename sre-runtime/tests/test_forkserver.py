@@ -0,0 +1,216 @@
+"""
+Exo Protocol - Forkserver 后端单元测试
+
+真实启动 zygote 进程执行临时 Skill (仅 Linux)。
+"""
+
+import os
+import sys
+import textwrap
+import threading
+import time
+
+import pytest
+
+from executor.forkserver import ZYGOTE_START_TIMEOUT, ForkServerSandboxBackend
+from executor.sandbox import SandboxConfig, SandboxReport, execute_in_sandbox, get_backend
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="Linux only")
+
+EXAMPLES_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "examples", "skills",
+)
+
+ECHO_SKILL = """
+    import json
+    import sys
+
+    CALLS = 0
+
+
+    def main():
+        global CALLS
+        CALLS += 1
+        data = json.load(sys.stdin)
+        print(json.dumps({"echo": data, "calls": CALLS, "pid": __import__("os").getpid()}))
+        sys.exit(0)
+
+
+    if __name__ == "__main__":
+        raise RuntimeError("must not run as __main__ in zygote")
+"""
+
+
+def make_skill(tmp_path, source: str, **runtime) -> dict:
+    scripts = tmp_path / "scripts"
+    scripts.mkdir()
+    (scripts / "main.py").write_text(textwrap.dedent(source))
+    return {
+        "name": "tmp-skill",
+        "path": str(tmp_path),
+        "runtime": {
+            "docker_image": "exo-runtime-python-3.11",
+            "entrypoint": "scripts/main.py",
+            "sandbox_backend": "forkserver",
+            **runtime,
+        },
+    }
+
+
+@pytest.fixture
+def backend():
+    backend = ForkServerSandboxBackend(max_workers_per_skill=2)
+    yield backend
+    backend.close()
+
+
+class TestForkServerBackend:
+    """forkserver 后端执行"""
+
+    def test_backend_registered(self):
+        assert isinstance(get_backend("forkserver"), ForkServerSandboxBackend)
+
+    def test_echo_and_isolation(self, tmp_path, backend):
+        """每个请求在独立子进程中执行，模块状态不跨请求泄漏"""
+        skill = make_skill(tmp_path, ECHO_SKILL)
+        config = SandboxConfig()
+
+        first = backend.run(skill, b'{"a": 1}', config, 10, SandboxReport())
+        second = backend.run(skill, b'{"b": 2}', config, 10, SandboxReport())
+
+        assert b'"echo": {"a": 1}' in first
+        assert b'"calls": 1' in first and b'"calls": 1' in second
+        assert len(backend._all) == 1  # zygote 复用
+
+    def test_resource_usage_reported(self, tmp_path, backend):
+        """zygote 通过 wait4 回报子进程资源消耗"""
+        skill = make_skill(tmp_path, ECHO_SKILL)
+        report = SandboxReport()
+
+        backend.run(skill, b"{}", SandboxConfig(), 10, report)
+
+        assert report.usage is not None
+        assert report.usage.peak_memory_bytes > 0
+        assert report.usage.wall_time_ms >= 0
+
+    def test_example_skill_via_execute(self):
+        skill = {
+            "name": "text-summary",
+            "path": os.path.join(EXAMPLES_DIR, "text-summary"),
+            "runtime": {
+                "docker_image": "exo-runtime-python-3.11",
+                "entrypoint": "scripts/main.py",
+                "sandbox_backend": "forkserver",
+            },
+        }
+        result = execute_in_sandbox(skill, {"text": "Solana is fast. " * 20, "max_length": 50})
+        assert "summary" in result
+
+    def test_nonzero_exit(self, tmp_path, backend):
+        skill = make_skill(tmp_path, """
+            import sys
+            def main():
+                print("bad input", file=sys.stderr)
+                sys.exit(2)
+        """)
+        with pytest.raises(RuntimeError, match="exited with code 2: bad input"):
+            backend.run(skill, b"{}", SandboxConfig(), 10, SandboxReport())
+
+    def test_exception_reported(self, tmp_path, backend):
+        skill = make_skill(tmp_path, """
+            def main():
+                raise ValueError("boom")
+        """)
+        with pytest.raises(RuntimeError, match="ValueError: boom"):
+            backend.run(skill, b"{}", SandboxConfig(), 10, SandboxReport())
+
+    def test_timeout(self, tmp_path, backend):
+        skill = make_skill(tmp_path, """
+            import time
+            def main():
+                time.sleep(30)
+        """)
+        with pytest.raises(RuntimeError, match="timed out"):
+            backend.run(skill, b"{}", SandboxConfig(), 0.5, SandboxReport())
+        # zygote 仍可继续服务
+        assert backend._all[0].alive
+
+    def test_memory_limit(self, tmp_path, backend):
+        skill = make_skill(tmp_path, """
+            def main():
+                x = bytearray(512 * 1024 * 1024)
+        """)
+        with pytest.raises(RuntimeError, match="MemoryError"):
+            backend.run(skill, b"{}", SandboxConfig(mem_limit="128m"), 10, SandboxReport())
+
+    def test_missing_main_rejected(self, tmp_path, backend):
+        skill = make_skill(tmp_path, "X = 1")
+        with pytest.raises(RuntimeError, match="no main"):
+            backend.run(skill, b"{}", SandboxConfig(), 10, SandboxReport())
+        assert backend._all == []
+
+    def test_hard_exit(self, tmp_path, backend):
+        skill = make_skill(tmp_path, """
+            import os
+            def main():
+                os._exit(5)
+        """)
+        with pytest.raises(RuntimeError, match="exited with code 5"):
+            backend.run(skill, b"{}", SandboxConfig(), 10, SandboxReport())
+
+
+class TestForkServerPool:
+    """zygote 池: 退出的 zygote / 获取超时 / close 后归还"""
+
+    def test_dead_zygote_wakes_waiter(self, tmp_path):
+        backend = ForkServerSandboxBackend(max_workers_per_skill=1)
+        skill = make_skill(tmp_path, ECHO_SKILL)
+        key = (os.path.join(str(tmp_path), "scripts", "main.py"), True)
+        try:
+            server = backend._acquire(key)
+            results = []
+            waiter = threading.Thread(target=lambda: results.append(backend._acquire(key)))
+            waiter.start()
+            time.sleep(0.2)
+
+            server.kill()
+            server._proc.wait()
+            backend._release(key, server)
+            waiter.join(timeout=ZYGOTE_START_TIMEOUT)
+
+            assert results and results[0] is not server and results[0].alive
+            assert backend._all == results
+            backend._release(key, results[0])
+            assert b'"calls": 1' in backend.run(skill, b"{}", SandboxConfig(), 10, SandboxReport())
+        finally:
+            backend.close()
+
+    def test_acquire_timeout_cold_starts(self, tmp_path):
+        backend = ForkServerSandboxBackend(max_workers_per_skill=1, acquire_timeout=0.1)
+        make_skill(tmp_path, ECHO_SKILL)
+        key = (os.path.join(str(tmp_path), "scripts", "main.py"), True)
+        try:
+            pooled = backend._acquire(key)
+            cold = backend._acquire(key)
+
+            assert cold is not pooled and cold.alive
+            assert backend._all == [pooled]
+            backend._release(key, cold)
+            assert not cold.alive  # 临时 zygote 用完即终止
+            backend._release(key, pooled)
+            assert backend._idle[key] == [pooled]
+        finally:
+            backend.close()
+
+    def test_release_after_close(self, tmp_path):
+        backend = ForkServerSandboxBackend(max_workers_per_skill=1)
+        make_skill(tmp_path, ECHO_SKILL)
+        key = (os.path.join(str(tmp_path), "scripts", "main.py"), True)
+        server = backend._acquire(key)
+
+        backend.close()
+        backend._release(key, server)
+
+        assert not server.alive
+        assert backend._all == []
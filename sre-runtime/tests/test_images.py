@@ -0,0 +1,252 @@
+"""
+Exo Protocol - Image Manager 单元测试
+
+使用 Mock Docker client，避免真实镜像拉取。
+"""
+
+import asyncio
+import pytest
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import docker
+
+from executor.images import (
+    ImageManager,
+    ImageNotReadyError,
+    ImageVerificationError,
+    set_image_manager,
+)
+from executor.sandbox import execute_in_sandbox
+
+
+IMAGE_ID = "sha256:" + "ab12cd34ef56" * 5 + "abcd"
+
+
+def make_image(image_id=IMAGE_ID, size=100, digests=None):
+    image = MagicMock()
+    image.id = image_id
+    image.attrs = {"Size": size, "RepoDigests": digests or []}
+    return image
+
+
+def make_package(image="exo-runtime-python-3.11", image_hash=None):
+    runtime = {"docker_image": image, "entrypoint": "scripts/main.py"}
+    if image_hash:
+        runtime["docker_image_hash"] = image_hash
+    return {"name": "test-skill", "runtime": runtime}
+
+
+@pytest.fixture
+def client():
+    client = MagicMock()
+    client.images.get.return_value = make_image()
+    return client
+
+
+@pytest.fixture(autouse=True)
+def reset_manager():
+    set_image_manager(None)
+    yield
+    set_image_manager(None)
+
+
+class TestPrepare:
+    """预拉取与校验"""
+
+    def test_local_image_not_pulled(self, client):
+        """本地已有镜像时不拉取"""
+        manager = ImageManager(client=client)
+        record = manager.prepare(make_package())
+
+        assert record.image_id == IMAGE_ID
+        client.images.pull.assert_not_called()
+
+    def test_missing_image_pulled(self, client):
+        """本地缺失时拉取"""
+        client.images.get.side_effect = docker.errors.ImageNotFound("missing")
+        client.images.pull.return_value = make_image()
+
+        manager = ImageManager(client=client)
+        manager.prepare(make_package())
+
+        client.images.pull.assert_called_once_with("exo-runtime-python-3.11")
+
+    def test_hash_prefix_verified(self, client):
+        """docker_image_hash 前缀匹配 image id"""
+        manager = ImageManager(client=client)
+        record = manager.prepare(make_package(image_hash=IMAGE_ID[:25]))
+        assert record.image_id == IMAGE_ID
+
+    def test_hash_matches_repo_digest(self, client):
+        """docker_image_hash 匹配 repo digest"""
+        digest = "sha256:" + "9" * 64
+        client.images.get.return_value = make_image(digests=[f"exo/runtime@{digest}"])
+
+        manager = ImageManager(client=client)
+        manager.prepare(make_package(image_hash=digest))
+
+    def test_repo_digest_pulled_by_digest(self, client):
+        """docker_image_hash 为 repo digest 时直接按 repo@digest 拉取"""
+        digest = "sha256:" + "9" * 64
+        client.images.get.side_effect = docker.errors.ImageNotFound("missing")
+        client.images.pull.return_value = make_image(digests=[f"registry:5000/exo/runtime@{digest}"])
+
+        manager = ImageManager(client=client)
+        manager.prepare(make_package("registry:5000/exo/runtime:3.11", image_hash=digest))
+
+        client.images.pull.assert_called_once_with(f"registry:5000/exo/runtime@{digest}")
+
+    def test_image_id_hash_falls_back_to_tag(self, client):
+        """docker_image_hash 为 image id 时按 digest 拉取失败，回退按 tag 拉取并校验"""
+        client.images.get.side_effect = docker.errors.ImageNotFound("missing")
+        client.images.pull.side_effect = [docker.errors.NotFound("manifest unknown"), make_image()]
+
+        manager = ImageManager(client=client)
+        record = manager.prepare(make_package(image_hash=IMAGE_ID))
+
+        assert record.image_id == IMAGE_ID
+        assert client.images.pull.call_args_list[-1].args == ("exo-runtime-python-3.11",)
+
+    def test_hash_mismatch_rejected(self, client):
+        """digest 不一致时拒绝"""
+        manager = ImageManager(client=client)
+        with pytest.raises(ImageVerificationError, match="digest mismatch"):
+            manager.prepare(make_package(image_hash="sha256:" + "0" * 64))
+        assert manager.records() == []
+
+    def test_prefetch_many(self, client):
+        """启动时批量预拉取"""
+        manager = ImageManager(client=client)
+        records = asyncio.run(manager.prefetch([make_package("a"), make_package("b")]))
+
+        assert [r.reference for r in records] == ["a", "b"]
+        manager.close()
+
+
+class TestResolve:
+    """订单关键路径解析"""
+
+    def test_resolve_ready_image(self, client):
+        """已就绪镜像解析为 image id"""
+        manager = ImageManager(client=client)
+        manager.prepare(make_package())
+
+        assert manager.resolve(make_package()) == IMAGE_ID
+        assert manager.records()[0].in_use == 1
+        manager.release(make_package())
+        assert manager.records()[0].in_use == 0
+
+    def test_resolve_missing_schedules_pull(self, client):
+        """未就绪时不等待拉取，直接报错并调度后台拉取"""
+        manager = ImageManager(client=client)
+        with patch.object(manager, "schedule") as mock_schedule:
+            with pytest.raises(ImageNotReadyError):
+                manager.resolve(make_package())
+            mock_schedule.assert_called_once()
+
+    @patch("executor.sandbox.docker.from_env")
+    def test_sandbox_uses_pinned_image_id(self, mock_docker, client):
+        """沙盒使用 image id 创建容器"""
+        mock_container = MagicMock()
+        mock_container.wait.return_value = {"StatusCode": 0}
+        mock_container.logs.return_value = b'{}'
+        mock_docker.return_value.containers.create.return_value = mock_container
+
+        manager = ImageManager(client=client)
+        manager.prepare(make_package())
+        set_image_manager(manager)
+
+        execute_in_sandbox(make_package(), {"query": "test"})
+
+        call_kwargs = mock_docker.return_value.containers.create.call_args.kwargs
+        assert call_kwargs["image"] == IMAGE_ID
+        assert manager.records()[0].in_use == 0
+
+
+def track_disk(client, shared=0):
+    """docker system df 替身: 本地镜像大小之和 (shared 为共享层大小，只计一次)"""
+    present = {}
+
+    def get(ref):
+        image = make_image(f"sha256:{ref * 16}", size=100 + shared)
+        present[image.id] = 100
+        return image
+
+    client.images.get.side_effect = get
+    client.images.remove.side_effect = lambda image_id: present.pop(image_id)
+    client.df.side_effect = lambda: {"LayersSize": sum(present.values()) + (shared if present else 0)}
+    return present
+
+
+class TestEviction:
+    """磁盘预算淘汰"""
+
+    def test_lru_eviction(self, client):
+        """超出预算时淘汰最久未使用的镜像"""
+        manager = ImageManager(client=client, max_disk_bytes=250)
+        track_disk(client)
+
+        manager.prepare(make_package("a"))
+        manager.prepare(make_package("b"))
+        manager.resolve(make_package("a"))
+        manager.release(make_package("a"))
+        manager.prepare(make_package("c"))
+
+        references = sorted(r.reference for r in manager.records())
+        assert references == ["a", "c"]
+        client.images.remove.assert_called_once_with("sha256:" + "b" * 16)
+
+    def test_in_use_not_evicted(self, client):
+        """使用中的镜像不淘汰"""
+        manager = ImageManager(client=client, max_disk_bytes=150)
+        track_disk(client)
+
+        manager.prepare(make_package("a"))
+        manager.resolve(make_package("a"))
+        manager.prepare(make_package("b"))
+
+        assert [r.reference for r in manager.records()] == ["a", "b"]
+        client.images.remove.assert_not_called()
+
+    def test_eviction_uses_actual_disk_usage(self, client):
+        """按 docker system df 的实际占用淘汰: 共享层使镜像大小之和高估占用"""
+        manager = ImageManager(client=client, max_disk_bytes=400)
+        track_disk(client, shared=200)
+
+        for reference in "abc":
+            manager.prepare(make_package(reference))
+
+        # 镜像大小之和 900，实际占用 500: 只需淘汰一个
+        assert [r.reference for r in manager.records()] == ["b", "c"]
+        assert manager.disk_usage() == 400
+
+    def test_disk_usage_falls_back_to_tracked_sizes(self, client):
+        client.df.side_effect = docker.errors.APIError("df unavailable")
+        manager = ImageManager(client=client)
+        manager.prepare(make_package())
+
+        assert manager.disk_usage() == 100
+
+
+class TestSkillRegisteredEvent:
+    """SKILL_REGISTERED 事件触发预拉取"""
+
+    def test_on_event_schedules_prefetch(self, client):
+        from listener.chain_listener import ChainEvent, EventType
+
+        manager = ImageManager(client=client, package_resolver=lambda e: make_package())
+        event = ChainEvent(
+            event_type=EventType.SKILL_REGISTERED,
+            signature="sig",
+            slot=1,
+            timestamp=datetime.utcnow(),
+            program_id="prog",
+        )
+        with patch.object(manager, "schedule") as mock_schedule:
+            manager.on_event(event)
+            mock_schedule.assert_called_once()
+
+            event.event_type = EventType.ESCROW_CREATED
+            manager.on_event(event)
+            assert mock_schedule.call_count == 1
@@ -0,0 +1,182 @@
+"""
+Exo Protocol - 订单日志单元测试 (批量提交 / 崩溃恢复 / 从最后完成阶段继续)
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from committer import commit_result, compute_result_hash
+from committer.journal import (
+    STAGE_COMPLETED,
+    STAGE_EXECUTED,
+    STAGE_FAILED,
+    STAGE_STARTED,
+    STAGE_STORED,
+    OrderJournal,
+    reset_journal,
+    set_journal,
+)
+from metrics import InMemoryMetricsSink, reset_sink, set_sink
+from executor.sandbox import SandboxConfig
+from orchestrator import OrderConfig, execute_skill_order, resume_orders, unfinished_orders
+from orchestrator.orchestrator import _order_request
+
+SKILL = {"runtime": {"docker_image": "test", "entrypoint": "main.py"}}
+RESULT = {"answer": 42, "big": 2 ** 70, "text": "结果"}
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = OrderJournal(str(tmp_path / "journal.db"))
+    set_journal(journal)
+    yield journal
+    reset_journal()
+
+
+def reopen(journal: OrderJournal) -> OrderJournal:
+    """模拟进程重启"""
+    journal.close()
+    reopened = OrderJournal(journal.path)
+    set_journal(reopened)
+    return reopened
+
+
+class TestOrderJournal:
+    def test_records_merge_across_stages(self, journal):
+        journal.record("o1", STAGE_STARTED, request={"input_data": {"x": 1}})
+        journal.record("o1", STAGE_EXECUTED, result=RESULT, result_hash="h")
+        journal.flush()
+        journal.record("o1", STAGE_STORED, result_uri="da://o1")
+
+        entry = journal.get("o1")
+        assert entry.stage == STAGE_STORED
+        assert entry.request == {"input_data": {"x": 1}}
+        assert entry.result == RESULT
+        assert (entry.result_hash, entry.result_uri) == ("h", "da://o1")
+
+        entry = reopen(journal).get("o1")
+        assert entry.stage == STAGE_STORED
+        # 精确序列化: 大整数不丢精度
+        assert entry.result["big"] == 2 ** 70
+
+    @pytest.mark.asyncio
+    async def test_batched_flush(self, journal):
+        sink = InMemoryMetricsSink()
+        set_sink(sink)
+        try:
+            for i in range(10):
+                journal.record(f"o{i}", STAGE_STARTED)
+            assert journal._conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0] == 0
+
+            await asyncio.sleep(journal.flush_interval * 3)
+
+            assert journal._conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0] == 10
+            batch_size = sink.histogram("journal.batch_size")
+            assert (batch_size.count, batch_size.quantile(1.0)) == (1, 10)
+        finally:
+            reset_sink()
+
+    def test_max_batch_flushes_without_event_loop(self, tmp_path):
+        journal = OrderJournal(str(tmp_path / "j.db"), max_batch=3)
+        for i in range(3):
+            journal.record(f"o{i}", STAGE_STARTED)
+
+        assert journal._conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0] == 3
+        journal.close()
+
+    def test_unfinished_and_prune(self, journal):
+        journal.record("done", STAGE_COMPLETED)
+        journal.record("failed", STAGE_FAILED, error="boom")
+        journal.record("open", STAGE_EXECUTED)
+
+        assert [e.order_id for e in journal.unfinished()] == ["open"]
+        assert journal.prune(older_than=float("inf")) == 2
+        assert journal.get("done") is None
+
+
+class TestResume:
+    @pytest.mark.asyncio
+    async def test_commit_records_stages(self, journal):
+        with patch("committer.committer.execute_in_sandbox", return_value=RESULT), \
+             patch("committer.committer.store_result", new_callable=AsyncMock, return_value="da://o1"):
+            result = await commit_result("o1", SKILL, {})
+
+        entry = journal.get("o1")
+        assert result.status == "success"
+        assert entry.stage == STAGE_STORED
+        assert entry.result_hash == compute_result_hash(RESULT)
+
+    @pytest.mark.asyncio
+    async def test_reuses_executed_result(self, journal):
+        journal.record("o1", STAGE_EXECUTED, result=RESULT, result_hash=compute_result_hash(RESULT))
+        journal = reopen(journal)
+
+        with patch("committer.committer.execute_in_sandbox") as sandbox, \
+             patch("committer.committer.store_result", new_callable=AsyncMock, return_value="da://o1") as store:
+            result = await commit_result("o1", SKILL, {})
+
+        sandbox.assert_not_called()
+        assert store.call_args[0][0] == RESULT
+        assert result.result_hash == compute_result_hash(RESULT)
+        assert journal.get("o1").result_uri == "da://o1"
+
+    @pytest.mark.asyncio
+    async def test_reuses_stored_uri(self, journal):
+        journal.record("o1", STAGE_STORED, result=RESULT, result_hash="h", result_uri="da://o1")
+
+        with patch("committer.committer.execute_in_sandbox") as sandbox, \
+             patch("committer.committer.store_result", new_callable=AsyncMock) as store:
+            result = await commit_result("o1", SKILL, {})
+
+        sandbox.assert_not_called()
+        store.assert_not_called()
+        assert (result.status, result.result_uri, result.result_hash) == ("success", "da://o1", "h")
+
+    @pytest.mark.asyncio
+    async def test_resume_unfinished_orders_after_restart(self, journal):
+        config = OrderConfig(order_id="o1", skill_package=SKILL, input_data={"x": 1}, timeout_seconds=5)
+        journal.record("o1", STAGE_STARTED, request={
+            "skill_package": SKILL, "input_data": {"x": 1}, "timeout_seconds": 5, "max_retries": 0,
+            "callback_url": None,
+        })
+        journal.record("o1", STAGE_STORED, result=RESULT, result_hash=compute_result_hash(RESULT), result_uri="da://o1")
+        journal = reopen(journal)
+
+        assert unfinished_orders() == [config]
+        with patch("committer.committer.execute_in_sandbox") as sandbox:
+            results = await resume_orders()
+
+        sandbox.assert_not_called()
+        assert [(r.order_id, r.status) for r in results] == [("o1", "completed")]
+        assert journal.get("o1").stage == STAGE_COMPLETED
+        assert unfinished_orders() == []
+
+    @pytest.mark.asyncio
+    async def test_resume_keeps_sandbox_config(self, journal):
+        sandbox_config = SandboxConfig(mem_limit="1g", cpu_quota=100000, network_disabled=False, backend="process")
+        config = OrderConfig(order_id="o1", skill_package=SKILL, input_data={"x": 1}, sandbox_config=sandbox_config)
+        journal.record("o1", STAGE_STARTED, request=_order_request(config))
+        journal = reopen(journal)
+
+        assert unfinished_orders() == [config]
+        with patch("committer.committer.execute_in_sandbox", return_value=RESULT) as sandbox, \
+             patch("committer.committer.store_result", new_callable=AsyncMock, return_value="da://o1"):
+            results = await resume_orders()
+
+        assert [r.status for r in results] == ["completed"]
+        assert sandbox.call_args.args[2] == sandbox_config
+
+    @pytest.mark.asyncio
+    async def test_completed_order_is_not_reexecuted(self, journal):
+        config = OrderConfig(order_id="o1", skill_package=SKILL, input_data={})
+        with patch("committer.committer.execute_in_sandbox", return_value=RESULT) as sandbox, \
+             patch("committer.committer.store_result", new_callable=AsyncMock, return_value="da://o1"):
+            first = await execute_skill_order(config)
+            second = await execute_skill_order(config)
+
+        assert sandbox.call_count == 1
+        assert first.status == second.status == "completed"
+        assert second.commit_result.result_uri == "da://o1"
+        assert second.commit_result.result_hash == first.commit_result.result_hash
@@ -0,0 +1,137 @@
+"""
+Exo Protocol - Mock 回放压测单元测试 (到达过程 / 合成日志 / 回放统计)
+"""
+
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+
+from listener.chain_listener import ChainEvent, EventType, LogParser, MockChainListener
+from listener.event_log import EventLogWriter
+from listener.load import (
+    ArrivalProfile,
+    RecordedTransaction,
+    cycle,
+    load_transactions,
+    synthetic_transactions,
+)
+
+
+def take(iterator, n):
+    return [next(iterator) for _ in range(n)]
+
+
+class TestArrivalProfile:
+    def test_uniform_spacing(self):
+        arrivals = take(ArrivalProfile(rate=100, process="uniform").arrivals(), 5)
+
+        assert arrivals == pytest.approx([0.0, 0.01, 0.02, 0.03, 0.04])
+
+    def test_poisson_mean_rate(self):
+        arrivals = take(ArrivalProfile(rate=1000, seed=7).arrivals(), 5000)
+
+        assert arrivals == sorted(arrivals)
+        assert 4.5 < arrivals[-1] < 5.5
+
+    def test_bursts_add_simultaneous_arrivals(self):
+        profile = ArrivalProfile(rate=10, process="uniform", burst_rate=1, burst_size=50, seed=1)
+        arrivals = [t for t in take(profile.arrivals(), 500) if t < 10]
+
+        # 10 秒内约 100 个基础到达 + 约 10 次突发
+        assert len(arrivals) > 300
+        assert max(arrivals.count(t) for t in set(arrivals)) >= 50
+
+    def test_rejects_unknown_process(self):
+        with pytest.raises(ValueError):
+            ArrivalProfile(process="bursty")
+
+
+class TestSources:
+    def test_synthetic_logs_parse_to_typed_events(self):
+        transactions = take(synthetic_transactions(seed=3), 300)
+        events = [LogParser.parse(tx.signature, tx.logs, tx.slot) for tx in transactions]
+        types = {e.event_type for e in events if e is not None}
+
+        assert {EventType.ESCROW_CREATED, EventType.ESCROW_RELEASED, EventType.TRANSFER_HOOKED} <= types
+        created = next(e for e in events if e and e.event_type == EventType.ESCROW_CREATED)
+        # Anchor 事件字段
+        assert created.data["event_name"] == "EscrowCreated"
+        assert created.data["escrow"]
+        assert len({tx.signature for tx in transactions}) == 300
+
+    def test_synthetic_is_reproducible(self):
+        first = take(synthetic_transactions(seed=5), 10)
+        second = take(synthetic_transactions(seed=5), 10)
+
+        assert first == second
+
+    def test_cycle_renames_and_shifts_slots(self):
+        recorded = [RecordedTransaction("a", 10, []), RecordedTransaction("b", 11, [])]
+
+        replayed = take(cycle(recorded), 4)
+
+        assert [(tx.signature, tx.slot) for tx in replayed] == [("a", 10), ("b", 11), ("a-1", 12), ("b-1", 13)]
+
+    def test_load_from_json_and_event_log(self, tmp_path):
+        path = tmp_path / "txs.json"
+        path.write_text(json.dumps([{"signature": "s1", "slot": 5, "logs": ["Program log: Escrow created"]}]))
+        assert load_transactions(str(path)) == [RecordedTransaction("s1", 5, ["Program log: Escrow created"])]
+
+        writer = EventLogWriter(str(tmp_path / "log"))
+        writer.append_event(ChainEvent(
+            event_type=EventType.ESCROW_CREATED, signature="s2", slot=6, timestamp=datetime(2024, 1, 1),
+            program_id="prog", raw_logs=["Program log: Escrow created"],
+        ))
+        writer.close()
+        assert load_transactions(str(tmp_path / "log")) == [RecordedTransaction("s2", 6, ["Program log: Escrow created"])]
+
+
+class TestReplay:
+    @pytest.mark.asyncio
+    async def test_replay_reports_throughput_and_lag(self):
+        listener = MockChainListener()
+        received = []
+
+        async def subscriber(event):
+            received.append(event.signature)
+
+        listener.on_event(subscriber, name="sink")
+        report = await listener.replay(
+            synthetic_transactions(seed=1), ArrivalProfile(rate=20_000, seed=1), count=2000
+        )
+
+        assert report.sent == 2000
+        assert report.parsed == len(received)
+        assert report.throughput > 0
+        assert report.dispatch_lag_ms["sink"].count == report.parsed
+        summary = report.summary()
+        assert "sink.dispatch_lag_p99_ms" in summary
+
+    @pytest.mark.asyncio
+    async def test_replay_paces_to_target_rate(self):
+        listener = MockChainListener()
+        report = await listener.replay(
+            synthetic_transactions(seed=1), ArrivalProfile(rate=500, process="uniform"), duration=0.2
+        )
+
+        assert 90 <= report.sent <= 101
+        assert report.duration_s >= 0.19
+
+    @pytest.mark.asyncio
+    async def test_unbounded_source_requires_limit(self):
+        with pytest.raises(ValueError):
+            await MockChainListener().replay(synthetic_transactions())
+
+    @pytest.mark.asyncio
+    async def test_stop_ends_replay(self):
+        listener = MockChainListener()
+        task = asyncio.create_task(
+            listener.replay(synthetic_transactions(seed=1), ArrivalProfile(rate=100), duration=60)
+        )
+        await asyncio.sleep(0.05)
+        await listener.stop()
+
+        report = await asyncio.wait_for(task, timeout=1)
+        assert report.sent < 100
@@ -0,0 +1,116 @@
+"""
+Exo Protocol - Metrics Sink 单元测试
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from executor.sandbox import ResourceUsage, SandboxReport, execute_in_sandbox, skill_key
+from metrics import Histogram, InMemoryMetricsSink, get_sink, reset_sink, set_sink
+
+
+@pytest.fixture
+def sink():
+    sink = InMemoryMetricsSink()
+    set_sink(sink)
+    yield sink
+    reset_sink()
+
+
+class TestInMemorySink:
+    """进程内聚合"""
+
+    def test_counter_and_gauge(self, sink):
+        sink.increment("orders", tags={"skill": "a"})
+        sink.increment("orders", 2, tags={"skill": "a"})
+        sink.gauge("queue_depth", 5)
+
+        assert sink.counter("orders", {"skill": "a"}) == 3
+        assert sink.counter("orders", {"skill": "b"}) == 0
+        assert sink.gauges[("queue_depth", ())] == 5
+
+    def test_histogram_stats(self):
+        histogram = Histogram(buckets=(10, 100, 1000))
+        for value in (5, 50, 60, 70, 500):
+            histogram.add(value)
+
+        assert histogram.count == 5
+        assert histogram.min == 5 and histogram.max == 500
+        assert histogram.mean == pytest.approx(137)
+        assert histogram.quantile(0.5) == 100
+        assert histogram.quantile(0.99) == 500
+
+    def test_default_sink_lazy(self):
+        reset_sink()
+        assert isinstance(get_sink(), InMemoryMetricsSink)
+        reset_sink()
+
+
+class TestSandboxMetrics:
+    """沙盒资源消耗上报"""
+
+    def test_skill_key(self):
+        assert skill_key({"name": "a", "version": "1.0.0"}) == "a@1.0.0"
+        assert skill_key({"runtime": {"docker_image": "img"}}) == "img"
+
+    @patch("executor.sandbox.docker.from_env")
+    def test_docker_stats_collected(self, mock_docker, sink):
+        """Docker stats 流 + OOMKilled 状态写入报告"""
+        mock_container = MagicMock()
+        mock_container.wait.return_value = {"StatusCode": 0}
+        mock_container.logs.return_value = b'{}'
+        mock_container.stats.return_value = iter([
+            {
+                "cpu_stats": {"cpu_usage": {"total_usage": 40_000_000}},
+                "memory_stats": {"usage": 10 << 20},
+                "blkio_stats": {"io_service_bytes_recursive": [
+                    {"op": "Read", "value": 4096},
+                    {"op": "Write", "value": 8192},
+                ]},
+            },
+            {
+                "cpu_stats": {"cpu_usage": {"total_usage": 75_000_000}},
+                "memory_stats": {"usage": 6 << 20},
+                "blkio_stats": None,
+            },
+        ])
+        mock_container.attrs = {"State": {"OOMKilled": False}}
+        mock_docker.return_value.containers.create.return_value = mock_container
+
+        skill = {"name": "s", "version": "1", "runtime": {"docker_image": "img", "entrypoint": "main.py"}}
+        report = SandboxReport()
+        execute_in_sandbox(skill, {}, report=report)
+
+        assert report.backend == "docker"
+        assert report.usage.cpu_time_ms == 75
+        assert report.usage.peak_memory_bytes == 10 << 20
+        assert report.usage.io_read_bytes == 4096
+        assert report.usage.io_write_bytes == 8192
+        assert report.usage.oom_killed is False
+
+        tags = {"skill": "s@1", "backend": "docker"}
+        assert sink.histogram("sandbox.cpu_time_ms", tags).max == 75
+        assert sink.counter("sandbox.oom_killed", tags) == 0
+
+    @patch("executor.sandbox.docker.from_env")
+    def test_oom_recorded_on_failure(self, mock_docker, sink):
+        """OOM 失败时同样记录资源消耗"""
+        mock_container = MagicMock()
+        mock_container.wait.return_value = {"StatusCode": 137}
+        mock_container.logs.return_value = b"Killed"
+        mock_container.stats.return_value = iter([])
+        mock_container.attrs = {"State": {"OOMKilled": True}}
+        mock_docker.return_value.containers.create.return_value = mock_container
+
+        skill = {"name": "s", "runtime": {"docker_image": "img", "entrypoint": "main.py"}}
+        report = SandboxReport()
+        with pytest.raises(RuntimeError, match="137"):
+            execute_in_sandbox(skill, {}, report=report)
+
+        assert report.usage.oom_killed is True
+        assert sink.counter("sandbox.oom_killed", {"skill": "s", "backend": "docker"}) == 1
+
+    def test_resource_usage_defaults(self):
+        usage = ResourceUsage()
+        assert usage.cpu_time_ms == 0 and usage.oom_killed is False
@@ -0,0 +1,276 @@
+"""
+Exo Protocol - 多端点监听器单元测试 (合并去重 / 故障切换 / 退避 / 僵死检测)
+"""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock
+
+import pytest
+
+from listener.chain_listener import EXO_CORE_PROGRAM_ID
+from listener.multi_endpoint import Endpoint, MultiEndpointListener
+
+
+class FakeWebSocket:
+    """可脚本化的 WebSocket 连接"""
+
+    def __init__(self):
+        self.sent = []
+        self.closed = False
+        self._inbox: asyncio.Queue = asyncio.Queue()
+
+    def deliver(self, signature, slot):
+        self._inbox.put_nowait(json.dumps({
+            "jsonrpc": "2.0",
+            "method": "logsNotification",
+            "params": {"result": {
+                "context": {"slot": slot},
+                "value": {
+                    "signature": signature,
+                    "logs": [f"Program {EXO_CORE_PROGRAM_ID} invoke [1]", "Program log: Escrow created"],
+                    "err": None,
+                },
+            }},
+        }))
+
+    def drop(self):
+        self._inbox.put_nowait(ConnectionResetError("connection reset"))
+
+    async def send(self, message):
+        self.sent.append(json.loads(message))
+
+    async def close(self):
+        self.closed = True
+        self._inbox.put_nowait(None)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        item = await self._inbox.get()
+        if item is None:
+            raise StopAsyncIteration
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+
+class FakeConnector:
+    """按 URL 返回预设的连接或异常，用尽后返回新连接"""
+
+    def __init__(self, script=None):
+        self.script = {url: list(items) for url, items in (script or {}).items()}
+        self.connections = {}
+
+    async def __call__(self, url):
+        items = self.script.get(url)
+        outcome = items.pop(0) if items else FakeWebSocket()
+        if isinstance(outcome, Exception):
+            raise outcome
+        self.connections.setdefault(url, []).append(outcome)
+        return outcome
+
+    def latest(self, url):
+        return self.connections[url][-1]
+
+
+async def wait_until(predicate, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not met")
+        await asyncio.sleep(0.005)
+
+
+def make_listener(connector, **kwargs):
+    endpoints = [Endpoint("a", "ws://a", "http://a"), Endpoint("b", "ws://b", "http://b")]
+    options = dict(
+        program_ids=[EXO_CORE_PROGRAM_ID],
+        connector=connector,
+        backoff_base=0.01,
+        backoff_max=0.05,
+        stale_after=None,
+        backfill=False,
+        reorder_window=0,
+    )
+    options.update(kwargs)
+    return MultiEndpointListener(endpoints, **options)
+
+
+@pytest.mark.asyncio
+async def test_streams_are_merged_and_deduplicated():
+    connector = FakeConnector()
+    listener = make_listener(connector)
+    received = []
+    listener.on_event(lambda e: received.append(e.signature))
+    task = asyncio.create_task(listener.run())
+    await wait_until(lambda: all(e.health.connected for e in listener.endpoints))
+
+    a, b = connector.latest("ws://a"), connector.latest("ws://b")
+    assert a.sent[0]["method"] == "logsSubscribe"
+    a.deliver("tx1", 1)
+    await wait_until(lambda: received == ["tx1"])
+    b.deliver("tx1", 1)
+    b.deliver("tx2", 2)
+    await wait_until(lambda: received == ["tx1", "tx2"])
+    await wait_until(lambda: listener.endpoints[1].health.messages == 2)
+
+    health = listener.health()
+    assert health["a"].messages == 1
+    assert health["b"].first_rate < health["a"].first_rate
+
+    await listener.stop()
+    await task
+
+
+@pytest.mark.asyncio
+async def test_failover_keeps_delivering_and_reconnects():
+    connector = FakeConnector()
+    listener = make_listener(connector)
+    received = []
+    listener.on_event(lambda e: received.append(e.signature))
+    task = asyncio.create_task(listener.run())
+    await wait_until(lambda: all(e.health.connected for e in listener.endpoints))
+
+    first_a = connector.latest("ws://a")
+    first_a.drop()
+    connector.latest("ws://b").deliver("tx1", 1)
+    await wait_until(lambda: received == ["tx1"])
+
+    # 端点 a 退避后重连
+    await wait_until(lambda: listener.endpoints[0].health.connects == 2)
+    assert connector.latest("ws://a") is not first_a
+    connector.latest("ws://a").deliver("tx2", 2)
+    await wait_until(lambda: received == ["tx1", "tx2"])
+
+    await listener.stop()
+    await task
+
+
+@pytest.mark.asyncio
+async def test_connection_failures_back_off():
+    connector = FakeConnector({"ws://a": [OSError("refused"), OSError("refused")]})
+    listener = make_listener(connector)
+    task = asyncio.create_task(listener.run())
+
+    await wait_until(lambda: listener.endpoints[0].health.connected)
+    assert listener.endpoints[0].health.connects == 1
+    # 连上但尚未收到消息: 不重置退避
+    assert listener.endpoints[0].health.consecutive_failures == 2
+
+    connector.latest("ws://a").deliver("tx1", 1)
+    await wait_until(lambda: listener.endpoints[0].health.consecutive_failures == 0)
+
+    await listener.stop()
+    await task
+
+
+@pytest.mark.asyncio
+async def test_flapping_connection_keeps_backing_off():
+    connector = FakeConnector()
+    listener = make_listener(connector)
+    task = asyncio.create_task(listener.run())
+    await wait_until(lambda: listener.endpoints[0].health.connected)
+
+    # 连上即断且无消息: 按失败累计
+    connector.latest("ws://a").drop()
+    await wait_until(lambda: listener.endpoints[0].health.connects == 2)
+    connector.latest("ws://a").drop()
+    await wait_until(lambda: listener.endpoints[0].health.connects == 3)
+    assert listener.endpoints[0].health.consecutive_failures == 2
+
+    await listener.stop()
+    await task
+
+
+@pytest.mark.asyncio
+async def test_failed_subscribe_closes_connection():
+    class RejectingWebSocket(FakeWebSocket):
+        async def send(self, message):
+            raise ConnectionResetError("closed during subscribe")
+
+    rejecting = RejectingWebSocket()
+    connector = FakeConnector({"ws://a": [rejecting]})
+    listener = make_listener(connector)
+    task = asyncio.create_task(listener.run())
+
+    await wait_until(lambda: listener.endpoints[0].health.connected)
+    assert rejecting.closed
+    assert listener.endpoints[0].health.connects == 1
+
+    await listener.stop()
+    await task
+
+
+def test_backoff_is_jittered_and_capped():
+    listener = make_listener(FakeConnector(), backoff_base=1.0, backoff_max=8.0)
+    endpoint = listener.endpoints[0]
+
+    for failures, cap in ((0, 1.0), (2, 4.0), (10, 8.0)):
+        endpoint.health.consecutive_failures = failures
+        delays = [listener._backoff(endpoint) for _ in range(50)]
+        assert all(cap / 2 <= d <= cap for d in delays)
+        assert len(set(delays)) > 1
+
+
+@pytest.mark.asyncio
+async def test_backfill_only_after_all_endpoints_drop():
+    connector = FakeConnector()
+    listener = make_listener(connector)
+    listener.backfill = AsyncMock(return_value=0)
+    task = asyncio.create_task(listener.run())
+    await wait_until(lambda: all(e.health.connected for e in listener.endpoints))
+    assert listener.backfill.await_count == 1
+
+    # 单个端点断开: 另一端点在线，无需补齐
+    connector.latest("ws://a").drop()
+    await wait_until(lambda: listener.endpoints[0].health.connects == 2)
+    assert listener.backfill.await_count == 1
+
+    # 全部断开后恢复: 补齐空档
+    connector.latest("ws://a").drop()
+    connector.latest("ws://b").drop()
+    await wait_until(lambda: all(e.health.connects >= 2 for e in listener.endpoints) and listener.backfill.await_count == 2)
+
+    await listener.stop()
+    await task
+
+
+@pytest.mark.asyncio
+async def test_watchdog_recycles_stale_endpoint():
+    connector = FakeConnector()
+    listener = make_listener(connector, stale_after=0.1)
+    task = asyncio.create_task(listener.run())
+    await wait_until(lambda: all(e.health.connected for e in listener.endpoints))
+    stale = connector.latest("ws://b")
+
+    async def keep_a_busy():
+        for i in range(30):
+            connector.latest("ws://a").deliver(f"tx{i}", i)
+            await asyncio.sleep(0.01)
+
+    await keep_a_busy()
+    await wait_until(lambda: stale.closed)
+    await wait_until(lambda: listener.endpoints[1].health.connects >= 2)
+    assert listener.endpoints[0].health.connects == 1
+
+    await listener.stop()
+    await task
+
+
+def test_best_endpoint_prefers_healthy_rpc():
+    listener = make_listener(FakeConnector())
+    a, b = listener.endpoints
+    a.health.connected = b.health.connected = True
+    a.health.first_rate, b.health.first_rate = 0.2, 0.9
+
+    assert listener.best_endpoint(require_rpc=True) is b
+
+    b.rpc_url = None
+    assert listener.best_endpoint(require_rpc=True) is a
+
+
+def test_requires_endpoints():
+    with pytest.raises(ValueError):
+        MultiEndpointListener([])
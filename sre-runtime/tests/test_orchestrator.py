@@ -5,7 +5,7 @@ import asyncio
 import pytest
 import sys
 import os
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import ANY, AsyncMock, MagicMock, patch
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -185,6 +185,9 @@ class TestAC02ExecuteSkillOrder:
                 skill_package=sample_order_config.skill_package,
                 input_data=sample_order_config.input_data,
                 sandbox_config=sample_order_config.sandbox_config,
+                cancel_token=ANY,
+                execution=None,
+                timings=ANY,
             )
     
     @pytest.mark.asyncio
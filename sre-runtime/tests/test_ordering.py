@@ -0,0 +1,180 @@
+"""
+Exo Protocol - 事件去重与重排单元测试
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from listener.chain_listener import EXO_CORE_PROGRAM_ID, EXO_HOOKS_PROGRAM_ID, ChainListener
+from listener.ordering import DedupCache, ReorderBuffer
+from metrics import InMemoryMetricsSink, reset_sink, set_sink
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def sink():
+    sink = InMemoryMetricsSink()
+    set_sink(sink)
+    yield sink
+    reset_sink()
+
+
+def event(slot, name=""):
+    return SimpleNamespace(slot=slot, name=name or f"e{slot}")
+
+
+class TestDedupCache:
+    def test_rejects_duplicates(self):
+        cache = DedupCache(max_size=10, ttl=None)
+
+        assert cache.add("a")
+        assert not cache.add("a")
+        assert "a" in cache
+
+    def test_size_eviction(self):
+        cache = DedupCache(max_size=2, ttl=None)
+        for key in ("a", "b", "c"):
+            cache.add(key)
+
+        assert "a" not in cache
+        assert len(cache) == 2
+        assert cache.add("a")
+
+    def test_ttl_eviction(self):
+        clock = FakeClock()
+        cache = DedupCache(max_size=10, ttl=5.0, clock=clock)
+        cache.add("a")
+        clock.now = 3.0
+        cache.add("b")
+
+        clock.now = 5.0
+        assert "a" not in cache
+        assert "b" in cache
+        assert cache.add("a")
+
+
+class TestReorderBuffer:
+    def test_releases_in_slot_order_after_window(self):
+        clock = FakeClock()
+        buffer = ReorderBuffer(window=1.0, clock=clock)
+        for slot in (12, 10, 11):
+            buffer.push(event(slot))
+
+        assert buffer.pop_ready() == []
+        assert buffer.next_deadline() == 1.0
+
+        clock.now = 1.0
+        assert [e.slot for e in buffer.pop_ready()] == [10, 11, 12]
+        assert len(buffer) == 0
+
+    def test_later_low_slot_holds_back_higher_slots(self):
+        clock = FakeClock()
+        buffer = ReorderBuffer(window=1.0, clock=clock)
+        buffer.push(event(12))
+        clock.now = 0.5
+        buffer.push(event(11))
+
+        clock.now = 1.0
+        # slot 12 已到期，但 slot 11 还在窗口内
+        assert buffer.pop_ready() == []
+
+        clock.now = 1.5
+        assert [e.slot for e in buffer.pop_ready()] == [11, 12]
+
+    def test_same_slot_keeps_arrival_order(self):
+        clock = FakeClock()
+        buffer = ReorderBuffer(window=1.0, clock=clock)
+        buffer.push(event(5, "first"))
+        clock.now = 0.9
+        buffer.push(event(5, "second"))
+
+        clock.now = 1.0
+        assert [e.name for e in buffer.pop_ready()] == ["first", "second"]
+
+    def test_late_event_released_immediately(self, sink):
+        clock = FakeClock()
+        buffer = ReorderBuffer(window=1.0, clock=clock)
+        buffer.push(event(10))
+        clock.now = 1.0
+        buffer.pop_ready()
+
+        buffer.push(event(9))
+
+        assert [e.slot for e in buffer.pop_ready()] == [9]
+        assert sink.counter("listener.events_late") == 1
+
+    def test_drain(self):
+        buffer = ReorderBuffer(window=10.0)
+        buffer.push(event(2))
+        buffer.push(event(1))
+
+        assert [e.slot for e in buffer.drain()] == [1, 2]
+        assert buffer.next_deadline() is None
+
+
+def notification(signature, slot, program_id, message):
+    return json.dumps({
+        "jsonrpc": "2.0",
+        "method": "logsNotification",
+        "params": {"result": {
+            "context": {"slot": slot},
+            "value": {
+                "signature": signature,
+                "logs": [f"Program {program_id} invoke [1]", f"Program log: {message}"],
+                "err": None,
+            },
+        }},
+    })
+
+
+class TestListenerOrdering:
+    @pytest.mark.asyncio
+    async def test_duplicate_subscriptions_deliver_once(self, sink):
+        listener = ChainListener(api_key="test", backfill=False, reorder_window=0)
+        received = []
+        listener.on_event(lambda e: received.append(e.signature))
+
+        # 同一交易同时涉及 exo-core 与 exo-hooks，两个订阅各推送一次
+        await listener._handle_message(notification("tx1", 5, EXO_CORE_PROGRAM_ID, "Escrow released"))
+        await listener._handle_message(notification("tx1", 5, EXO_HOOKS_PROGRAM_ID, "Transfer hooked"))
+        await listener.stop()
+
+        assert received == ["tx1"]
+        assert sink.counter("listener.duplicates") == 1
+
+    @pytest.mark.asyncio
+    async def test_events_emitted_in_slot_order(self, sink):
+        listener = ChainListener(api_key="test", backfill=False, reorder_window=0.05)
+        received = []
+        listener.on_event(lambda e: received.append(e.slot))
+
+        for signature, slot in (("c", 12), ("a", 10), ("b", 11)):
+            await listener._handle_message(notification(signature, slot, EXO_CORE_PROGRAM_ID, "Escrow created"))
+        assert received == []
+
+        # 窗口到期后由后台任务释放
+        await asyncio.sleep(0.15)
+        assert received == [10, 11, 12]
+        await listener.stop()
+
+    @pytest.mark.asyncio
+    async def test_stop_drains_buffer(self, sink):
+        listener = ChainListener(api_key="test", backfill=False, reorder_window=60)
+        received = []
+        listener.on_event(lambda e: received.append(e.slot))
+
+        await listener._handle_message(notification("b", 2, EXO_CORE_PROGRAM_ID, "Escrow created"))
+        await listener._handle_message(notification("a", 1, EXO_CORE_PROGRAM_ID, "Escrow created"))
+        await listener.stop()
+
+        assert received == [1, 2]
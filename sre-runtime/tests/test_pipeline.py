@@ -0,0 +1,269 @@
+"""
+Exo Protocol - Event Pipeline 单元测试
+"""
+
+import asyncio
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from executor.images import ImageManager, get_image_manager
+from listener.chain_listener import ChainEvent, EventType, MockChainListener
+from metrics import InMemoryMetricsSink, reset_sink, set_sink
+from orchestrator import OrderConfig, OrderResult
+from pipeline import EventPipeline, OrderBuilder
+
+SKILL = {"name": "echo", "runtime": {"docker_image": "img", "entrypoint": "main.py"}}
+
+
+def make_event(event_type=EventType.ESCROW_FUNDED, escrow="escrow-1", **data) -> ChainEvent:
+    return ChainEvent(
+        event_type=event_type,
+        signature=f"sig-{escrow}-{event_type.value}",
+        slot=1,
+        timestamp=datetime.utcnow(),
+        program_id="prog",
+        data={"escrow": escrow, "skill": "echo", "input": {"q": escrow}, **data},
+    )
+
+
+def completed(config: OrderConfig) -> OrderResult:
+    return OrderResult(
+        order_id=config.order_id,
+        status="completed",
+        commit_result=None,
+        verification=None,
+        execution_time_ms=0,
+    )
+
+
+@pytest.fixture
+def sink():
+    sink = InMemoryMetricsSink()
+    set_sink(sink)
+    yield sink
+    reset_sink()
+
+
+class TestOrderBuilder:
+    """事件 → OrderConfig"""
+
+    @pytest.mark.asyncio
+    async def test_build_order(self):
+        builder = OrderBuilder(lambda e: SKILL, order_defaults={"timeout_seconds": 60})
+        order = await builder.build(make_event())
+
+        assert order.order_id == "escrow-1"
+        assert order.skill_package == SKILL
+        assert order.input_data == {"q": "escrow-1"}
+        assert order.timeout_seconds == 60
+
+    @pytest.mark.asyncio
+    async def test_non_trigger_event_ignored(self):
+        builder = OrderBuilder(lambda e: SKILL)
+        assert await builder.build(make_event(EventType.SKILL_REGISTERED)) is None
+
+    @pytest.mark.asyncio
+    async def test_created_and_funded_trigger_once(self):
+        builder = OrderBuilder(lambda e: SKILL)
+        assert await builder.build(make_event(EventType.ESCROW_CREATED)) is not None
+        assert await builder.build(make_event(EventType.ESCROW_FUNDED)) is None
+
+    @pytest.mark.asyncio
+    async def test_async_resolvers(self):
+        async def resolve_skill(event):
+            return SKILL if event.data["skill"] == "echo" else None
+
+        builder = OrderBuilder(resolve_skill)
+        assert await builder.build(make_event()) is not None
+        assert await builder.build(make_event(escrow="escrow-2", skill="unknown")) is None
+
+    @pytest.mark.asyncio
+    async def test_failed_resolve_does_not_mark_seen(self):
+        calls = []
+
+        def resolve_skill(event):
+            calls.append(event.event_type)
+            if len(calls) == 1:
+                raise ConnectionError("DA unavailable")
+            return None if len(calls) == 2 else SKILL
+
+        builder = OrderBuilder(resolve_skill)
+        with pytest.raises(ConnectionError):
+            await builder.build(make_event(EventType.ESCROW_CREATED))
+        assert await builder.build(make_event(EventType.ESCROW_CREATED)) is None
+
+        # 后续事件重试解析，成功后才去重
+        assert await builder.build(make_event(EventType.ESCROW_FUNDED)) is not None
+        assert await builder.build(make_event(EventType.ESCROW_FUNDED)) is None
+        assert len(calls) == 3
+
+
+class TestEventPipeline:
+    """管道运行、背压与排空"""
+
+    @pytest.mark.asyncio
+    async def test_events_execute_orders(self, sink):
+        results = []
+
+        async def executor(config):
+            return completed(config)
+
+        pipeline = EventPipeline(
+            OrderBuilder(lambda e: SKILL), workers=2, executor=executor,
+            on_result=results.append, reap_orphans=False, manage_images=False,
+        )
+        await pipeline.start()
+        for i in range(5):
+            assert pipeline.submit(make_event(escrow=f"escrow-{i}"))
+        pipeline.submit(make_event(EventType.AGENT_CREATED))
+        await pipeline.stop()
+
+        assert sorted(r.order_id for r in results) == [f"escrow-{i}" for i in range(5)]
+        assert sink.counter("pipeline.orders", {"status": "completed"}) == 5
+        assert sink.histogram("pipeline.e2e_ms").count == 5
+        assert sink.histogram("pipeline.build_ms").count == 6
+
+    @pytest.mark.asyncio
+    async def test_concurrency_bounded_by_workers(self):
+        running = 0
+        peak = 0
+
+        async def executor(config):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return completed(config)
+
+        pipeline = EventPipeline(OrderBuilder(lambda e: SKILL), workers=3, executor=executor, reap_orphans=False, manage_images=False)
+        await pipeline.start()
+        for i in range(12):
+            await pipeline.put(make_event(escrow=f"escrow-{i}"))
+        await pipeline.stop()
+
+        assert peak == 3
+
+    @pytest.mark.asyncio
+    async def test_submit_rejects_when_full(self, sink):
+        release = asyncio.Event()
+
+        async def executor(config):
+            await release.wait()
+            return completed(config)
+
+        pipeline = EventPipeline(
+            OrderBuilder(lambda e: SKILL), workers=1, queue_size=2,
+            executor=executor, reap_orphans=False, manage_images=False,
+        )
+        await pipeline.start()
+        accepted = [pipeline.submit(make_event(escrow=f"escrow-{i}")) for i in range(10)]
+        await asyncio.sleep(0)
+
+        assert accepted.count(False) > 0
+        assert sink.counter("pipeline.events_rejected", {"event_type": "escrow_funded"}) == accepted.count(False)
+        release.set()
+        await pipeline.stop()
+
+    @pytest.mark.asyncio
+    async def test_stop_timeout_cancels_in_flight(self):
+        cancelled = asyncio.Event()
+
+        async def executor(config):
+            try:
+                await asyncio.sleep(30)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        pipeline = EventPipeline(OrderBuilder(lambda e: SKILL), workers=1, executor=executor, reap_orphans=False, manage_images=False)
+        await pipeline.start()
+        pipeline.submit(make_event())
+        await asyncio.sleep(0.01)
+        await pipeline.stop(timeout=0.05)
+
+        assert cancelled.is_set()
+        assert not pipeline.submit(make_event(escrow="late"))
+
+    @pytest.mark.asyncio
+    async def test_attach_to_listener(self):
+        results = []
+
+        async def executor(config):
+            return completed(config)
+
+        listener = MockChainListener()
+        pipeline = EventPipeline(
+            OrderBuilder(lambda e: SKILL), executor=executor,
+            on_result=results.append, reap_orphans=False, manage_images=False,
+        )
+        pipeline.attach(listener)
+        await pipeline.start()
+        listener._emit(make_event())
+        await listener.flush()
+        await pipeline.stop()
+
+        assert [r.order_id for r in results] == ["escrow-1"]
+
+
+class TestImageManagement:
+    """镜像管理器的安装与预拉取"""
+
+    def make_manager(self):
+        client = MagicMock()
+        client.images.get.return_value.id = "sha256:" + "ab" * 32
+        client.images.get.return_value.attrs = {"Size": 1, "RepoDigests": []}
+        return ImageManager(client=client)
+
+    @pytest.mark.asyncio
+    async def test_start_installs_image_manager(self):
+        manager = self.make_manager()
+        pipeline = EventPipeline(
+            OrderBuilder(lambda e: SKILL), executor=AsyncMock(), reap_orphans=False, image_manager=manager,
+        )
+
+        await pipeline.start()
+        assert get_image_manager() is manager
+        await pipeline.stop()
+        assert get_image_manager() is None
+
+    @pytest.mark.asyncio
+    async def test_skill_registered_prefetches_image(self):
+        manager = self.make_manager()
+        listener = MockChainListener()
+        pipeline = EventPipeline(
+            OrderBuilder(lambda e: SKILL), executor=AsyncMock(), reap_orphans=False, image_manager=manager,
+        )
+        pipeline.attach(listener)
+        await pipeline.start()
+
+        listener._emit(make_event(EventType.SKILL_REGISTERED))
+        await listener.flush()
+        for _ in range(100):
+            if manager.ready(SKILL):
+                break
+            await asyncio.sleep(0.01)
+        await pipeline.stop()
+
+        assert manager.ready(SKILL)
+        manager.client.images.get.assert_called_once_with("img")
+
+    @pytest.mark.asyncio
+    async def test_order_waits_for_image(self):
+        manager = self.make_manager()
+        ready = []
+
+        async def executor(config):
+            ready.append(manager.ready(config.skill_package))
+            return completed(config)
+
+        pipeline = EventPipeline(
+            OrderBuilder(lambda e: SKILL), executor=executor, reap_orphans=False, image_manager=manager,
+        )
+        await pipeline.start()
+        await pipeline.put(make_event())
+        await pipeline.stop()
+
+        assert ready == [True]
@@ -0,0 +1,194 @@
+"""
+Exo Protocol - Process Sandbox 后端单元测试
+
+在宿主上真实执行示例 Skill 与临时脚本 (仅 Linux)。
+"""
+
+import os
+import subprocess
+import sys
+import textwrap
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+
+from executor.limits import parse_mem_limit
+from executor.sandbox import SandboxConfig, SandboxReport, execute_in_sandbox, get_backend
+from metrics import InMemoryMetricsSink, reset_sink, set_sink
+from executor.process_sandbox import ProcessSandboxBackend, resolve_entrypoint
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="Linux only")
+
+EXAMPLES_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "examples", "skills",
+)
+
+
+def make_skill(tmp_path, source: str, **runtime) -> dict:
+    scripts = tmp_path / "scripts"
+    scripts.mkdir()
+    (scripts / "main.py").write_text(textwrap.dedent(source))
+    return {
+        "name": "tmp-skill",
+        "path": str(tmp_path),
+        "runtime": {
+            "docker_image": "exo-runtime-python-3.11",
+            "entrypoint": "scripts/main.py",
+            "sandbox_backend": "process",
+            **runtime,
+        },
+    }
+
+
+class TestParseMemLimit:
+    """内存限制解析"""
+
+    def test_units(self):
+        assert parse_mem_limit("512m") == 512 * 1024 ** 2
+        assert parse_mem_limit("1g") == 1024 ** 3
+        assert parse_mem_limit("64k") == 64 * 1024
+        assert parse_mem_limit("1048576") == 1048576
+
+
+class TestProcessBackend:
+    """process 后端执行"""
+
+    def test_backend_registered(self):
+        assert isinstance(get_backend("process"), ProcessSandboxBackend)
+
+    def test_unknown_backend_rejected(self, tmp_path):
+        skill = make_skill(tmp_path, "print('{}')", sandbox_backend="vm")
+        with pytest.raises(ValueError, match="Unknown sandbox backend"):
+            execute_in_sandbox(skill, {})
+
+    def test_example_code_review_skill(self):
+        """执行示例 code-review Skill (stdin 输入)"""
+        skill = {
+            "name": "code-review",
+            "path": os.path.join(EXAMPLES_DIR, "code-review"),
+            "runtime": {
+                "docker_image": "exo-runtime-python-3.11",
+                "entrypoint": "scripts/main.py",
+                "sandbox_backend": "process",
+            },
+        }
+        result = execute_in_sandbox(skill, {"code": "eval(x)", "language": "python"})
+
+        assert "issues" in result
+        assert "overall_score" in result
+
+    def test_config_selects_backend(self, tmp_path):
+        """SandboxConfig.backend 选择后端"""
+        skill = make_skill(tmp_path, """
+            import json, sys
+            print(json.dumps({"echo": json.load(sys.stdin)}))
+        """)
+        del skill["runtime"]["sandbox_backend"]
+
+        result = execute_in_sandbox(skill, {"a": 1}, SandboxConfig(backend="process"))
+        assert result == {"echo": {"a": 1}}
+
+    def test_resource_usage_recorded(self, tmp_path):
+        """wait4 rusage 写入 SandboxReport 与 metrics sink"""
+        skill = make_skill(tmp_path, """
+            import json
+            x = bytearray(32 * 1024 * 1024)
+            print(json.dumps({"n": sum(range(10 ** 6))}))
+        """)
+        sink = InMemoryMetricsSink()
+        set_sink(sink)
+        report = SandboxReport()
+        try:
+            execute_in_sandbox(skill, {}, report=report)
+        finally:
+            reset_sink()
+
+        assert report.backend == "process"
+        assert report.usage.peak_memory_bytes >= 32 * 1024 * 1024
+        assert report.usage.cpu_time_ms > 0
+        assert report.usage.wall_time_ms >= report.usage.cpu_time_ms // 2
+        tags = {"skill": "tmp-skill", "backend": "process"}
+        assert sink.histogram("sandbox.peak_memory_bytes", tags).count == 1
+
+    def test_nonzero_exit(self, tmp_path):
+        skill = make_skill(tmp_path, "import sys; sys.exit(3)")
+        with pytest.raises(RuntimeError, match="exited with code 3"):
+            execute_in_sandbox(skill, {})
+
+    def test_timeout_kills_process(self, tmp_path):
+        skill = make_skill(tmp_path, "import time; time.sleep(30)", timeout_seconds=0.5)
+        with pytest.raises(RuntimeError, match="timed out"):
+            execute_in_sandbox(skill, {})
+
+    def test_memory_limit(self, tmp_path):
+        skill = make_skill(tmp_path, "x = bytearray(512 * 1024 * 1024)")
+        with pytest.raises(RuntimeError, match="MemoryError"):
+            execute_in_sandbox(skill, {}, SandboxConfig(mem_limit="128m"))
+
+    def test_environment_not_inherited(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("DEEPSEEK_API_KEY", "secret")
+        skill = make_skill(tmp_path, """
+            import json, os
+            print(json.dumps({"key": os.environ.get("DEEPSEEK_API_KEY")}))
+        """)
+        assert execute_in_sandbox(skill, {}) == {"key": None}
+
+    def test_network_disabled(self, tmp_path):
+        skill = make_skill(tmp_path, """
+            import json, socket
+            s = socket.socket()
+            s.settimeout(1)
+            try:
+                s.connect(("1.1.1.1", 53))
+                print(json.dumps({"connected": True}))
+            except OSError:
+                print(json.dumps({"connected": False}))
+        """)
+        try:
+            result = execute_in_sandbox(skill, {})
+        except RuntimeError as e:
+            pytest.skip(f"namespaces unavailable: {e}")
+        assert result == {"connected": False}
+
+
+    def test_large_payload_round_trip(self, tmp_path):
+        """输入 / 输出超过管道缓冲区"""
+        skill = make_skill(tmp_path, """
+            import json, sys
+            data = json.load(sys.stdin)
+            print(json.dumps({"n": len(data["blob"]), "out": "y" * (2 * 1024 * 1024)}))
+        """)
+        blob = "x" * (90 * 1000)
+        result = execute_in_sandbox(skill, {"blob": blob})
+        assert len(result["out"]) == 2 * 1024 * 1024
+        assert result["n"] == len(blob)
+
+    def test_spawn_from_threads_without_preexec_fn(self, tmp_path):
+        """限制由 launcher 在子进程内应用，多线程并发 spawn 安全"""
+        skill = make_skill(tmp_path, """
+            import json, resource, sys
+            soft, _ = resource.getrlimit(resource.RLIMIT_AS)
+            print(json.dumps({"as": soft, "input": json.load(sys.stdin)}))
+        """)
+        config = SandboxConfig(backend="process", mem_limit="256m")
+        with patch("executor.process_sandbox.subprocess.Popen", wraps=subprocess.Popen) as popen:
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                results = list(pool.map(lambda i: execute_in_sandbox(skill, {"i": i}, config), range(16)))
+
+        assert [r["input"]["i"] for r in results] == list(range(16))
+        assert {r["as"] for r in results} == {256 * 1024 ** 2}
+        assert all("preexec_fn" not in c.kwargs for c in popen.call_args_list)
+
+
+class TestResolveEntrypoint:
+    """入口脚本解析"""
+
+    def test_requires_path(self):
+        with pytest.raises(ValueError, match="requires"):
+            resolve_entrypoint({"runtime": {"entrypoint": "main.py"}})
+
+    def test_rejects_traversal(self, tmp_path):
+        with pytest.raises(ValueError, match="escapes"):
+            resolve_entrypoint({"path": str(tmp_path), "runtime": {"entrypoint": "../x.py"}})
@@ -4,8 +4,10 @@ Exo Protocol - Sandbox 模块单元测试
 使用 Mock Docker 进行测试，避免真实 Docker 依赖。
 """
 
+import socket
+
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, call, patch
 
 from executor.sandbox import (
     SandboxConfig,
@@ -98,7 +100,7 @@ class TestExecuteInSandbox:
         mock_container = MagicMock()
         mock_container.wait.return_value = {"StatusCode": 0}
         mock_container.logs.return_value = b'{"result": "success"}'
-        mock_docker.return_value.containers.run.return_value = mock_container
+        mock_docker.return_value.containers.create.return_value = mock_container
         
         skill_package = {
             "runtime": {
@@ -121,7 +123,7 @@ class TestExecuteInSandbox:
         mock_container = MagicMock()
         mock_container.wait.return_value = {"StatusCode": 0}
         mock_container.logs.return_value = b'{"status": "ok"}'
-        mock_docker.return_value.containers.run.return_value = mock_container
+        mock_docker.return_value.containers.create.return_value = mock_container
         
         skill_package = {
             "runtime": {
@@ -135,7 +137,7 @@ class TestExecuteInSandbox:
         assert result == {"status": "ok"}
         
         # 验证配置被正确传递
-        call_kwargs = mock_docker.return_value.containers.run.call_args.kwargs
+        call_kwargs = mock_docker.return_value.containers.create.call_args.kwargs
         assert call_kwargs["mem_limit"] == "1g"
         assert call_kwargs["cpu_quota"] == 75000
     
@@ -144,7 +146,7 @@ class TestExecuteInSandbox:
         """测试超时场景"""
         mock_container = MagicMock()
         mock_container.wait.side_effect = Exception("Container timed out")
-        mock_docker.return_value.containers.run.return_value = mock_container
+        mock_docker.return_value.containers.create.return_value = mock_container
         
         skill_package = {
             "runtime": {
@@ -166,7 +168,7 @@ class TestExecuteInSandbox:
         mock_container = MagicMock()
         mock_container.wait.return_value = {"StatusCode": 1}
         mock_container.logs.return_value = b'Error: something went wrong'
-        mock_docker.return_value.containers.run.return_value = mock_container
+        mock_docker.return_value.containers.create.return_value = mock_container
         
         skill_package = {
             "runtime": {
@@ -197,7 +199,7 @@ class TestExecuteInSandbox:
         mock_container = MagicMock()
         mock_container.wait.return_value = {"StatusCode": 0}
         mock_container.logs.return_value = b'{}'
-        mock_docker.return_value.containers.run.return_value = mock_container
+        mock_docker.return_value.containers.create.return_value = mock_container
         
         skill_package = {
             "runtime": {
@@ -208,5 +210,130 @@ class TestExecuteInSandbox:
         
         execute_in_sandbox(skill_package, {"data": "test"})
         
-        call_kwargs = mock_docker.return_value.containers.run.call_args.kwargs
+        call_kwargs = mock_docker.return_value.containers.create.call_args.kwargs
         assert call_kwargs["network_disabled"] is True
+
+
+class TestInputTransport:
+    """输入传递方式测试"""
+    
+    skill_package = {
+        "runtime": {
+            "docker_image": "python:3.11-slim",
+            "entrypoint": "scripts/main.py"
+        }
+    }
+    
+    def _mock_container(self, mock_docker):
+        mock_container = MagicMock()
+        mock_container.wait.return_value = {"StatusCode": 0}
+        mock_container.logs.return_value = b'{"ok": true}'
+        mock_docker.return_value.containers.create.return_value = mock_container
+        return mock_container
+    
+    @patch("executor.sandbox.docker.from_env")
+    def test_stdin_is_default(self, mock_docker):
+        """默认通过 stdin 写入输入，不使用环境变量"""
+        mock_container = self._mock_container(mock_docker)
+        
+        execute_in_sandbox(self.skill_package, {"b": 2, "a": 1})
+        
+        call_kwargs = mock_docker.return_value.containers.create.call_args.kwargs
+        assert call_kwargs["stdin_open"] is True
+        assert call_kwargs["stdin_once"] is True
+        assert "INPUT_JSON" not in call_kwargs["environment"]
+        
+        sock = mock_container.attach_socket.return_value
+        sock._sock.sendall.assert_called_once_with(b'{"a": 1, "b": 2}')
+        # 写入后半关闭，Skill 才能读到 EOF
+        sock._sock.shutdown.assert_called_once_with(socket.SHUT_WR)
+        assert sock._sock.method_calls.index(call.shutdown(socket.SHUT_WR)) > \
+            sock._sock.method_calls.index(call.sendall(b'{"a": 1, "b": 2}'))
+        sock.close.assert_called_once()
+        mock_container.start.assert_called_once()
+    
+    @patch("executor.sandbox.docker.from_env")
+    def test_env_transport(self, mock_docker):
+        """env 模式保留 INPUT_JSON 兼容"""
+        self._mock_container(mock_docker)
+        
+        config = SandboxConfig(input_transport="env")
+        execute_in_sandbox(self.skill_package, {"query": "test"}, config)
+        
+        call_kwargs = mock_docker.return_value.containers.create.call_args.kwargs
+        assert call_kwargs["environment"]["INPUT_JSON"] == '{"query": "test"}'
+        assert call_kwargs["stdin_open"] is False
+    
+    @patch("executor.sandbox.docker.from_env")
+    def test_file_transport_mounts_readonly(self, mock_docker, tmp_path):
+        """file 模式将输入写入宿主文件并只读挂载，执行后清理"""
+        self._mock_container(mock_docker)
+        
+        config = SandboxConfig(input_transport="file", input_dir=str(tmp_path))
+        execute_in_sandbox(self.skill_package, {"query": "test"}, config)
+        
+        call_kwargs = mock_docker.return_value.containers.create.call_args.kwargs
+        (host_path, bind), = call_kwargs["volumes"].items()
+        assert host_path.startswith(str(tmp_path))
+        assert bind == {"bind": "/run/exo/input.json", "mode": "ro"}
+        assert "< /run/exo/input.json" in call_kwargs["command"][-1]
+        assert list(tmp_path.iterdir()) == []
+    
+    @patch("executor.sandbox.docker.from_env")
+    def test_runtime_overrides_transport(self, mock_docker):
+        """Skill runtime 可覆盖传输方式"""
+        self._mock_container(mock_docker)
+        skill_package = {
+            "runtime": dict(self.skill_package["runtime"], input_transport="env")
+        }
+        
+        execute_in_sandbox(skill_package, {"query": "test"})
+        
+        call_kwargs = mock_docker.return_value.containers.create.call_args.kwargs
+        assert "INPUT_JSON" in call_kwargs["environment"]
+    
+    def test_unknown_transport_rejected(self):
+        """未知传输方式报错"""
+        config = SandboxConfig(input_transport="carrier-pigeon")
+        with pytest.raises(ValueError, match="Unknown input transport"):
+            execute_in_sandbox(self.skill_package, {"query": "test"}, config)
+    
+    @patch("executor.sandbox.docker.from_env")
+    def test_large_input_with_raised_limit(self, mock_docker):
+        """提高 max_input_bytes 后可传递大输入 (stdin 不受环境大小限制)"""
+        self._mock_container(mock_docker)
+        records = [{"id": i, "value": i * 1.5} for i in range(10_000)]
+        
+        config = SandboxConfig(max_input_bytes=2_000_000)
+        assert execute_in_sandbox(self.skill_package, {"data": records}, config) == {"ok": True}
+    
+    def test_env_transport_keeps_size_cap(self):
+        """env 模式始终受默认大小限制"""
+        config = SandboxConfig(input_transport="env", max_input_bytes=2_000_000)
+        with pytest.raises(ValueError, match="Input too large"):
+            execute_in_sandbox(self.skill_package, {"data": "x" * 200_000}, config)
+
+
+def _docker_image_available(image: str) -> bool:
+    """Docker 守护进程可用且本地已有镜像 (集成测试不触发拉取)"""
+    try:
+        import docker
+        docker.from_env().images.get(image)
+        return True
+    except Exception:
+        return False
+
+
+@pytest.mark.skipif(not _docker_image_available("python:3.11-slim"), reason="Docker or python:3.11-slim unavailable")
+class TestDockerStdinIntegration:
+    """真实容器中通过 stdin 读取输入 (需读到 EOF 才能返回)"""
+
+    def test_skill_reads_stdin_to_eof(self):
+        skill_package = {
+            "runtime": {
+                "docker_image": "python:3.11-slim",
+                "entrypoint": '-c "import json, sys; print(json.dumps(json.load(sys.stdin)))"',
+                "timeout_seconds": 30,
+            }
+        }
+        assert execute_in_sandbox(skill_package, {"b": 2, "a": 1}) == {"a": 1, "b": 2}
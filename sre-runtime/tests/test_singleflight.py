@@ -0,0 +1,251 @@
+"""
+Exo Protocol - Single-flight 单元测试 (并发合并 / 取消 / 订单与回放去重)
+"""
+
+import asyncio
+import threading
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from committer import commit_result
+from concurrency import SingleFlight, execution_key
+from executor.sandbox import CancelToken, ResourceUsage, SandboxCancelledError, SandboxConfig
+from metrics import InMemoryMetricsSink, reset_sink, set_sink
+from orchestrator import OrderConfig, execute_skill_order
+from orchestrator.orchestrator import clear_failure_callbacks, register_failure_callback
+from verifier import verify_result
+
+SKILL = {"name": "echo", "runtime": {"docker_image": "test", "entrypoint": "main.py"}}
+
+
+class Work:
+    """可控的异步任务: 记录调用次数，等待 release 后返回"""
+
+    def __init__(self, result="done"):
+        self.calls = 0
+        self.cancelled = 0
+        self.result = result
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+@pytest.fixture
+def sink():
+    sink = InMemoryMetricsSink()
+    set_sink(sink)
+    yield sink
+    reset_sink()
+
+
+class TestSingleFlight:
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_run(self, sink):
+        flight, work = SingleFlight("test"), Work()
+
+        callers = [asyncio.create_task(flight.do("k", work)) for _ in range(5)]
+        await asyncio.sleep(0)
+        work.release.set()
+
+        assert await asyncio.gather(*callers) == ["done"] * 5
+        assert work.calls == 1
+        assert len(flight) == 0
+        assert sink.counter("singleflight.calls", {"flight": "test", "outcome": "leader"}) == 1
+        assert sink.counter("singleflight.calls", {"flight": "test", "outcome": "shared"}) == 4
+
+    @pytest.mark.asyncio
+    async def test_results_are_not_cached(self):
+        flight, work = SingleFlight("test"), Work()
+        work.release.set()
+
+        await flight.do("k", work)
+        await flight.do("k", work)
+
+        assert work.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_exception_shared(self):
+        flight, work = SingleFlight("test"), Work(result=RuntimeError("boom"))
+
+        callers = [asyncio.create_task(flight.do("k", work)) for _ in range(3)]
+        await asyncio.sleep(0)
+        work.release.set()
+        results = await asyncio.gather(*callers, return_exceptions=True)
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert work.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_cancel_only_when_last_waiter_leaves(self):
+        flight, work = SingleFlight("test"), Work()
+        first = asyncio.create_task(flight.do("k", work))
+        second = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        await asyncio.sleep(0)
+        assert work.cancelled == 0
+
+        second.cancel()
+        await asyncio.gather(first, second, return_exceptions=True)
+        await asyncio.sleep(0)
+        assert work.cancelled == 1
+        assert len(flight) == 0
+
+    @pytest.mark.asyncio
+    async def test_cancel_token_withdraws_caller(self):
+        flight, work = SingleFlight("test"), Work()
+        tokens = [CancelToken(), CancelToken()]
+        callers = [asyncio.create_task(flight.do("k", work, cancel_token=t)) for t in tokens]
+        await asyncio.sleep(0)
+
+        tokens[0].cancel()
+        for _ in range(3):
+            await asyncio.sleep(0)
+        assert callers[0].cancelled()
+        assert work.cancelled == 0
+
+        tokens[1].cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0)
+        assert work.cancelled == 1
+
+    @pytest.mark.asyncio
+    async def test_late_joiner_does_not_attach_to_cancelled_run(self):
+        flight, work = SingleFlight("test"), Work()
+        first = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        await asyncio.gather(first, return_exceptions=True)
+        assert "k" not in flight
+
+        work.release.set()
+        assert await flight.do("k", work) == "done"
+        assert work.calls == 2
+
+
+def test_execution_key():
+    assert execution_key(SKILL, {"a": 1, "b": 2}) == execution_key(dict(SKILL), {"b": 2, "a": 1})
+    assert execution_key(SKILL, {"a": 1}) != execution_key(SKILL, {"a": 2})
+    assert execution_key(SKILL, {"a": 1}) != execution_key({**SKILL, "version": "2"}, {"a": 1})
+    # 沙盒配置不同 (内存 / 超时 / 后端) 的执行不合并
+    assert execution_key(SKILL, {"a": 1}) != execution_key(SKILL, {"a": 1}, SandboxConfig())
+    assert execution_key(SKILL, {"a": 1}, SandboxConfig()) != \
+        execution_key(SKILL, {"a": 1}, SandboxConfig(mem_limit="1g"))
+    assert execution_key(SKILL, {"a": 1}, SandboxConfig()) == execution_key(SKILL, {"a": 1}, SandboxConfig())
+
+
+class TestDeduplication:
+    @pytest.mark.asyncio
+    async def test_identical_executions_run_one_container(self):
+        runs = []
+        gate = threading.Event()
+
+        def sandbox(skill_package, input_data, config, **kwargs):
+            runs.append(kwargs["order_id"])
+            gate.wait(timeout=5)
+            return {"echo": input_data["x"]}
+
+        with patch("committer.committer.execute_in_sandbox", side_effect=sandbox), \
+             patch("committer.committer.store_result", new_callable=AsyncMock, return_value="da://r"):
+            tasks = [asyncio.create_task(commit_result(f"o{i}", SKILL, {"x": 1})) for i in range(4)]
+            other = asyncio.create_task(commit_result("o9", SKILL, {"x": 2}))
+            while len(runs) < 2:
+                await asyncio.sleep(0.01)
+            gate.set()
+            results = await asyncio.gather(*tasks, other)
+
+        assert sorted(runs) == ["o0", "o9"]
+        assert [r.order_id for r in results] == ["o0", "o1", "o2", "o3", "o9"]
+        assert len({r.result_hash for r in results[:4]}) == 1
+        assert results[4].result_hash != results[0].result_hash
+
+    @pytest.mark.asyncio
+    async def test_cancel_token_kills_shared_container(self):
+        killed = threading.Event()
+
+        def sandbox(skill_package, input_data, config, cancel_token=None, **kwargs):
+            cancel_token.on_cancel(killed.set)
+            killed.wait(timeout=5)
+            raise SandboxCancelledError("Sandbox execution cancelled")
+
+        token = CancelToken()
+        with patch("committer.committer.execute_in_sandbox", side_effect=sandbox):
+            task = asyncio.create_task(commit_result("o1", SKILL, {"x": 1}, cancel_token=token))
+            await asyncio.sleep(0.05)
+            token.cancel()
+            result = await task
+
+        assert killed.wait(timeout=1)
+        assert result.status == "failed"
+        assert "cancelled" in result.error_message
+
+    @pytest.mark.asyncio
+    async def test_each_caller_gets_resource_usage_on_failure(self):
+        gate = threading.Event()
+
+        def sandbox(skill_package, input_data, config, report=None, **kwargs):
+            gate.wait(timeout=5)
+            report.usage = ResourceUsage(cpu_time_ms=7)
+            raise RuntimeError("boom")
+
+        with patch("committer.committer.execute_in_sandbox", side_effect=sandbox):
+            tasks = [asyncio.create_task(commit_result(f"o{i}", SKILL, {"x": 1})) for i in range(2)]
+            await asyncio.sleep(0.05)
+            gate.set()
+            results = await asyncio.gather(*tasks)
+
+        assert [r.status for r in results] == ["failed", "failed"]
+        assert [r.resource_usage.cpu_time_ms for r in results] == [7, 7]
+
+    @pytest.mark.asyncio
+    async def test_duplicate_orders_share_result(self):
+        calls = []
+        failures = []
+        register_failure_callback(failures.append)
+
+        async def commit(**kwargs):
+            calls.append(kwargs["order_id"])
+            await asyncio.sleep(0.05)
+            raise RuntimeError("boom")
+
+        try:
+            config = OrderConfig(order_id="dup", skill_package=SKILL, input_data={})
+            with patch("orchestrator.orchestrator.commit_result", side_effect=commit):
+                results = await asyncio.gather(*(execute_skill_order(config) for _ in range(3)))
+        finally:
+            clear_failure_callbacks()
+
+        assert calls == ["dup"]
+        assert results[0] is results[1] is results[2]
+        assert len(failures) == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_verifications_replay_once(self):
+        replays = []
+
+        async def replay(skill_package, input_data):
+            replays.append(time.perf_counter())
+            await asyncio.sleep(0.05)
+            return {"result": "mock_result"}
+
+        with patch("verifier.verifier.execute_in_sandbox", side_effect=replay):
+            results = await asyncio.gather(
+                verify_result("order-a"), verify_result("order-a"), verify_result("order-b"),
+            )
+
+        # order-a 合并为一次验证；order-b 的回放与其内容相同，共享同一次沙盒执行
+        assert len(replays) == 1
+        assert results[0] == results[1]
@@ -0,0 +1,278 @@
+"""
+Exo Protocol - 推测执行单元测试 (processed 提前执行 / confirmed 后提交 / 丢弃与分叉回滚)
+"""
+
+import asyncio
+import json
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+from committer import ExecutionOutput, commit_result
+from listener.chain_listener import (
+    COMMITMENT_CONFIRMED,
+    COMMITMENT_PROCESSED,
+    EXO_CORE_PROGRAM_ID,
+    ChainEvent,
+    ChainListener,
+    EventType,
+)
+from metrics import InMemoryMetricsSink, reset_sink, set_sink
+from orchestrator import OrderConfig, OrderResult
+from pipeline import EventPipeline, OrderBuilder, SpeculativeExecutor
+
+SKILL = {"name": "echo", "runtime": {"docker_image": "img", "entrypoint": "main.py"}}
+
+
+@pytest.fixture
+def sink():
+    sink = InMemoryMetricsSink()
+    set_sink(sink)
+    yield sink
+    reset_sink()
+
+
+def make_event(commitment, signature="sig-1", escrow="escrow-1") -> ChainEvent:
+    return ChainEvent(
+        event_type=EventType.ESCROW_CREATED,
+        signature=signature,
+        slot=1,
+        timestamp=datetime.utcnow(),
+        program_id="prog",
+        data={"escrow": escrow, "input": {"q": escrow}},
+        commitment=commitment,
+    )
+
+
+class FakeRunner:
+    """记录推测执行调用，可阻塞直到 release()"""
+
+    def __init__(self, block=False):
+        self.calls = []
+        self.cancelled = []
+        self._gate = asyncio.Event()
+        if not block:
+            self._gate.set()
+
+    def release(self):
+        self._gate.set()
+
+    async def __call__(self, order, cancel_token):
+        self.calls.append(order.order_id)
+        cancel_token.on_cancel(lambda: self.cancelled.append(order.order_id))
+        await self._gate.wait()
+        return ExecutionOutput(result={"echo": order.input_data})
+
+
+async def wait_until(predicate, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not met")
+        await asyncio.sleep(0.005)
+
+
+class TestSpeculativeExecutor:
+    @pytest.mark.asyncio
+    async def test_claim_returns_running_task(self, sink):
+        runner = FakeRunner()
+        speculator = SpeculativeExecutor(runner=runner)
+        order = OrderConfig(order_id="o1", skill_package=SKILL, input_data={"q": 1})
+
+        assert speculator.start(order, "sig-1")
+        assert not speculator.start(order, "sig-1")
+        task = speculator.claim("o1", "sig-1")
+
+        assert (await task).result == {"echo": {"q": 1}}
+        assert speculator.claim("o1", "sig-1") is None
+        assert sink.counter("pipeline.speculation", {"outcome": "hit"}) == 1
+
+    @pytest.mark.asyncio
+    async def test_unconfirmed_speculation_is_cancelled(self, sink):
+        runner = FakeRunner(block=True)
+        speculator = SpeculativeExecutor(confirmation_timeout=0.05, runner=runner)
+        speculator.start(OrderConfig(order_id="o1", skill_package=SKILL, input_data={}), "sig-1")
+
+        await wait_until(lambda: "o1" not in speculator)
+
+        assert runner.cancelled == ["o1"]
+        assert speculator.claim("o1", "sig-1") is None
+        assert sink.counter("pipeline.speculation", {"outcome": "dropped"}) == 1
+
+    @pytest.mark.asyncio
+    async def test_forked_signature_is_discarded(self, sink):
+        runner = FakeRunner(block=True)
+        speculator = SpeculativeExecutor(runner=runner)
+        speculator.start(OrderConfig(order_id="o1", skill_package=SKILL, input_data={}), "sig-old")
+        await wait_until(lambda: runner.calls == ["o1"])
+
+        assert speculator.claim("o1", "sig-new") is None
+        assert runner.cancelled == ["o1"]
+        assert sink.counter("pipeline.speculation", {"outcome": "forked"}) == 1
+
+    @pytest.mark.asyncio
+    async def test_capacity_limit_skips(self, sink):
+        speculator = SpeculativeExecutor(max_speculative=1, runner=FakeRunner(block=True))
+        orders = [OrderConfig(order_id=f"o{i}", skill_package=SKILL, input_data={}) for i in range(2)]
+
+        assert speculator.start(orders[0], "sig-0")
+        assert not speculator.start(orders[1], "sig-1")
+        assert sink.counter("pipeline.speculation", {"outcome": "skipped"}) == 1
+        await speculator.close()
+        assert len(speculator) == 0
+
+
+class TestCommitWithSpeculation:
+    @pytest.mark.asyncio
+    async def test_commit_awaits_existing_execution(self):
+        async def execution():
+            return ExecutionOutput(result={"ok": True}, tokens_used=3)
+
+        with patch("committer.committer._run_sandbox") as run_sandbox, \
+             patch("committer.committer.store_result", return_value="da://x") as upload:
+            result = await commit_result("o1", SKILL, {}, execution=execution())
+
+        run_sandbox.assert_not_called()
+        upload.assert_called_once_with({"ok": True}, "o1")
+        assert result.status == "success"
+        assert result.tokens_used == 3
+
+
+class TestPipelineSpeculation:
+    @pytest.mark.asyncio
+    async def test_execution_starts_on_processed_and_commits_on_confirmed(self, sink):
+        runner = FakeRunner(block=True)
+        executed = []
+
+        async def executor(order):
+            # 推测执行的结果在确认后才由订单流程提交
+            output = await order.speculative_execution
+            executed.append((order.order_id, output.result))
+            return OrderResult(order.order_id, "completed", None, None, 0)
+
+        pipeline = EventPipeline(
+            OrderBuilder(lambda e: SKILL),
+            workers=1,
+            executor=executor,
+            reap_orphans=False,
+            manage_images=False,
+            speculator=SpeculativeExecutor(runner=runner),
+        )
+        await pipeline.start()
+
+        await pipeline.put(make_event(COMMITMENT_PROCESSED))
+        await wait_until(lambda: runner.calls == ["escrow-1"])
+        assert executed == []
+
+        await pipeline.put(make_event(COMMITMENT_CONFIRMED))
+        runner.release()
+        await pipeline.stop()
+
+        assert runner.calls == ["escrow-1"]
+        assert executed == [("escrow-1", {"echo": {"q": "escrow-1"}})]
+
+    @pytest.mark.asyncio
+    async def test_dropped_transaction_never_commits(self, sink):
+        runner = FakeRunner(block=True)
+        executed = []
+
+        async def executor(order):
+            executed.append(order.order_id)
+            return OrderResult(order.order_id, "completed", None, None, 0)
+
+        pipeline = EventPipeline(
+            OrderBuilder(lambda e: SKILL),
+            workers=1,
+            executor=executor,
+            reap_orphans=False,
+            manage_images=False,
+            speculator=SpeculativeExecutor(confirmation_timeout=0.05, runner=runner),
+        )
+        await pipeline.start()
+
+        await pipeline.put(make_event(COMMITMENT_PROCESSED))
+        await wait_until(lambda: runner.cancelled == ["escrow-1"])
+        await pipeline.stop()
+
+        assert executed == []
+
+    @pytest.mark.asyncio
+    async def test_processed_events_ignored_without_speculator(self):
+        executed = []
+
+        async def executor(order):
+            executed.append(order.speculative_execution)
+            return OrderResult(order.order_id, "completed", None, None, 0)
+
+        pipeline = EventPipeline(OrderBuilder(lambda e: SKILL), workers=1, executor=executor, reap_orphans=False, manage_images=False)
+        await pipeline.start()
+        await pipeline.put(make_event(COMMITMENT_PROCESSED))
+        await pipeline.put(make_event(COMMITMENT_CONFIRMED))
+        await pipeline.stop()
+
+        assert executed == [None]
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(json.loads(message))
+
+
+def notification(subscription_id, signature, err=None):
+    return json.dumps({
+        "jsonrpc": "2.0",
+        "method": "logsNotification",
+        "params": {
+            "subscription": subscription_id,
+            "result": {
+                "context": {"slot": 1},
+                "value": {
+                    "signature": signature,
+                    "logs": [f"Program {EXO_CORE_PROGRAM_ID} invoke [1]", "Program log: Escrow created"],
+                    "err": err,
+                },
+            },
+        },
+    })
+
+
+class TestSpeculativeListener:
+    @pytest.mark.asyncio
+    async def test_subscribes_at_both_commitments(self, sink):
+        listener = ChainListener(
+            api_key="test", program_ids=[EXO_CORE_PROGRAM_ID], backfill=False, reorder_window=0, speculative=True
+        )
+        ws = listener._ws = FakeWebSocket()
+        received = []
+        listener.on_event(lambda e: received.append((e.signature, e.commitment)))
+
+        await listener._subscribe()
+        assert [r["params"][1]["commitment"] for r in ws.sent] == [COMMITMENT_PROCESSED, COMMITMENT_CONFIRMED]
+        for request, subscription_id in zip(ws.sent, (1, 2)):
+            await listener._handle_message(json.dumps({"jsonrpc": "2.0", "id": request["id"], "result": subscription_id}))
+
+        await listener._handle_message(notification(1, "tx1"))
+        await listener._handle_message(notification(1, "tx1"))
+        # 执行失败的交易不做推测执行
+        await listener._handle_message(notification(1, "tx2", err={"InstructionError": [0, "Custom"]}))
+        await listener._handle_message(notification(2, "tx1"))
+        listener._ws = None
+        await listener.stop()
+
+        assert received == [("tx1", COMMITMENT_PROCESSED), ("tx1", COMMITMENT_CONFIRMED)]
+        # 只有 confirmed 事件推进检查点
+        assert listener.checkpoint.load().signatures == ["tx1"]
+
+    def test_commitment_round_trip(self):
+        event = make_event(COMMITMENT_PROCESSED)
+        restored = ChainEvent.from_dict(event.to_dict())
+
+        assert restored.commitment == COMMITMENT_PROCESSED
+        assert restored.speculative
+        # 旧格式 (无 commitment 字段) 视为已确认
+        legacy = {k: v for k, v in event.to_dict().items() if k != "commitment"}
+        assert not ChainEvent.from_dict(legacy).speculative
@@ -0,0 +1,197 @@
+"""
+Exo Protocol - 阶段耗时单元测试 (StageTimings / 沙盒 / Committer / 订单 / Verifier 回放)
+"""
+
+import asyncio
+import copy
+import dataclasses
+import pickle
+import sys
+import textwrap
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from committer.committer import CommitResult, commit_result
+from executor.sandbox import SandboxReport, execute_in_sandbox
+from metrics import (
+    SPAN_CONTAINER_CREATE,
+    SPAN_DA_UPLOAD,
+    SPAN_FETCH,
+    SPAN_HASHING,
+    SPAN_OUTPUT_PARSING,
+    SPAN_REPLAY,
+    SPAN_RETRY_BACKOFF,
+    SPAN_SKILL_RUNTIME,
+    SPAN_VALIDATION,
+    InMemoryMetricsSink,
+    StageTimings,
+    reset_sink,
+    set_sink,
+)
+from orchestrator import OrderConfig, OrderResult, execute_skill_order
+from verifier.verifier import verify_result
+
+SKILL_SOURCE = """
+    import json, sys
+    data = json.load(sys.stdin)
+    print(json.dumps({"echo": data}))
+"""
+
+
+@pytest.fixture
+def sink():
+    sink = InMemoryMetricsSink()
+    set_sink(sink)
+    yield sink
+    reset_sink()
+
+
+def make_skill(tmp_path) -> dict:
+    scripts = tmp_path / "scripts"
+    scripts.mkdir()
+    (scripts / "main.py").write_text(textwrap.dedent(SKILL_SOURCE))
+    return {
+        "name": "tmp-skill",
+        "path": str(tmp_path),
+        "runtime": {"entrypoint": "scripts/main.py", "sandbox_backend": "process"},
+    }
+
+
+class TestStageTimings:
+    def test_span_totals_and_errors(self):
+        timings = StageTimings()
+        with timings.span("a"):
+            time.sleep(0.01)
+        with pytest.raises(ValueError):
+            with timings.span("b"):
+                raise ValueError()
+        timings.add("a", time.perf_counter(), 5.0)
+
+        totals = timings.totals()
+        assert list(totals) == ["a", "b"]
+        assert totals["a"] >= 15.0
+        assert [o["stage"] for o in timings.offsets()] == ["a", "b", "a"]
+
+    def test_extend_orders_by_start(self):
+        earlier = StageTimings()
+        earlier.add("execution", 1.0, 10.0)
+        timings = StageTimings()
+        timings.add("hashing", 2.0, 1.0)
+
+        timings.extend(earlier)
+        timings.extend(timings)
+        timings.extend(None)
+
+        assert [s.stage for s in timings.spans] == ["execution", "hashing"]
+
+    def test_export_one_sample_per_stage(self, sink):
+        timings = StageTimings()
+        timings.add("x", 0.0, 2.0)
+        timings.add("x", 1.0, 3.0)
+
+        timings.export("order.stage_ms", {"skill": "s"})
+
+        histogram = sink.histogram("order.stage_ms", {"skill": "s", "stage": "x"})
+        assert histogram.count == 1
+        assert histogram.max == 5.0
+
+    def test_results_can_be_copied(self):
+        """嵌入 StageTimings 的结果类型可 asdict / deepcopy / pickle"""
+        commit = CommitResult("o", "u", "h", 1, "success")
+        commit.timings.add("hashing", 1.0, 2.0)
+        order = OrderResult("o", "completed", commit, None, 1, timings=commit.timings)
+
+        for result in (commit, order):
+            as_dict = dataclasses.asdict(result)
+            assert as_dict["timings"]["spans"] == [{"stage": "hashing", "start": 1.0, "duration_ms": 2.0}]
+
+            for clone in (copy.deepcopy(result), pickle.loads(pickle.dumps(result))):
+                assert clone == result
+                clone.timings.add("da_upload", 3.0, 1.0)
+                assert list(clone.timings.totals()) == ["hashing", "da_upload"]
+                assert list(result.timings.totals()) == ["hashing"]
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="Linux only")
+class TestSandboxStages:
+    def test_process_backend_stages(self, tmp_path):
+        report = SandboxReport()
+        result = execute_in_sandbox(make_skill(tmp_path), {"k": 1}, report=report)
+
+        assert result == {"echo": {"k": 1}}
+        assert list(report.timings.totals()) == [
+            SPAN_VALIDATION, SPAN_CONTAINER_CREATE, SPAN_SKILL_RUNTIME, SPAN_OUTPUT_PARSING,
+        ]
+
+    @pytest.mark.asyncio
+    async def test_commit_result_stages(self, tmp_path):
+        with patch("committer.committer.store_result", new_callable=AsyncMock, return_value="file:///r"):
+            commit = await commit_result("o1", make_skill(tmp_path), {"k": 1})
+
+        assert commit.status == "success"
+        assert list(commit.timings.totals()) == [
+            SPAN_VALIDATION, SPAN_CONTAINER_CREATE, SPAN_SKILL_RUNTIME, SPAN_OUTPUT_PARSING,
+            SPAN_HASHING, SPAN_DA_UPLOAD,
+        ]
+
+    @pytest.mark.asyncio
+    async def test_failed_commit_keeps_execution_stages(self, tmp_path):
+        skill = make_skill(tmp_path)
+        (tmp_path / "scripts" / "main.py").write_text("raise SystemExit(3)")
+
+        commit = await commit_result("o2", skill, {"k": 1})
+
+        assert commit.status == "failed"
+        assert SPAN_SKILL_RUNTIME in commit.timings.totals()
+        assert SPAN_DA_UPLOAD not in commit.timings.totals()
+
+
+class TestOrderStages:
+    @pytest.mark.asyncio
+    async def test_retries_accumulate_and_export(self, sink):
+        config = OrderConfig(order_id="retry", skill_package={"name": "s"}, input_data={}, max_retries=1)
+        with patch("committer.committer.execute_in_sandbox", side_effect=[RuntimeError("boom"), {"ok": True}]), \
+             patch("committer.committer.store_result", new_callable=AsyncMock, return_value="file:///r"), \
+             patch("orchestrator.orchestrator.asyncio.sleep", new_callable=AsyncMock):
+            result = await execute_skill_order(config)
+
+        assert result.status == "completed"
+        assert list(result.timings.totals()) == [SPAN_RETRY_BACKOFF, SPAN_HASHING, SPAN_DA_UPLOAD]
+        assert sink.histogram("order.stage_ms", {"stage": SPAN_RETRY_BACKOFF}).count == 1
+
+    @pytest.mark.asyncio
+    async def test_completed_order_carries_commit_stages(self, sink):
+        config = OrderConfig(order_id="ok", skill_package={"name": "s"}, input_data={})
+        with patch("committer.committer.execute_in_sandbox", return_value={"ok": True}), \
+             patch("committer.committer.store_result", new_callable=AsyncMock, return_value="file:///r"):
+            result = await execute_skill_order(config)
+
+        assert result.status == "completed"
+        assert result.commit_result.timings is result.timings
+        assert {SPAN_HASHING, SPAN_DA_UPLOAD} <= set(result.timings.totals())
+        assert sink.histogram("order.stage_ms", {"stage": SPAN_DA_UPLOAD}).count == 1
+
+
+class TestVerifierStages:
+    @pytest.mark.asyncio
+    async def test_replay_stages_exported(self, sink):
+        timings = StageTimings()
+
+        await verify_result("order-1", timings=timings)
+
+        assert list(timings.totals()) == [SPAN_FETCH, SPAN_REPLAY, SPAN_HASHING]
+        assert sink.histogram("verifier.stage_ms", {"stage": SPAN_REPLAY}).count == 1
+
+    @pytest.mark.asyncio
+    async def test_shared_run_reports_spans_to_every_caller(self, sink):
+        first, second = StageTimings(), StageTimings()
+
+        await asyncio.gather(
+            verify_result("order-2", timings=first),
+            verify_result("order-2", timings=second),
+        )
+
+        assert first.totals() == second.totals()
+        assert sink.histogram("verifier.stage_ms", {"stage": SPAN_FETCH}).count == 1
@@ -0,0 +1,196 @@
+"""
+Exo Protocol - 订阅管理单元测试 (请求 ID → 订阅 ID → Program 路由 / 运行时增删)
+"""
+
+import json
+
+import pytest
+
+from listener.chain_listener import (
+    EXO_CORE_PROGRAM_ID,
+    EXO_HOOKS_PROGRAM_ID,
+    ChainListener,
+    EventType,
+    LogParser,
+)
+from listener.subscriptions import SubscriptionManager
+
+
+class HookParser(LogParser):
+    """只识别 Transfer Hook 日志的解析器"""
+
+    EVENT_KEYWORDS = {"Transfer hooked": EventType.TRANSFER_HOOKED}
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(json.loads(message))
+
+    async def close(self):
+        pass
+
+
+def confirm(request, subscription_id):
+    return json.dumps({"jsonrpc": "2.0", "id": request["id"], "result": subscription_id})
+
+
+def notification(subscription_id, signature, program_id, message, slot=1):
+    return json.dumps({
+        "jsonrpc": "2.0",
+        "method": "logsNotification",
+        "params": {
+            "subscription": subscription_id,
+            "result": {
+                "context": {"slot": slot},
+                "value": {
+                    "signature": signature,
+                    "logs": [f"Program {program_id} invoke [1]", f"Program log: {message}"],
+                    "err": None,
+                },
+            },
+        },
+    })
+
+
+class TestSubscriptionManager:
+    def test_confirmations_matched_by_request_id(self):
+        manager = SubscriptionManager()
+        core = manager.subscribe("core", LogParser)
+        hooks = manager.subscribe("hooks", HookParser)
+
+        # 确认乱序到达
+        manager.handle_response({"id": hooks["id"], "result": 202})
+        manager.handle_response({"id": core["id"], "result": 101})
+
+        assert manager.route(101).program_id == "core"
+        assert manager.route(202).parser is HookParser
+        assert manager.route(999) is None
+
+    def test_duplicate_subscribe_only_updates_parser(self):
+        manager = SubscriptionManager()
+        assert manager.subscribe("core", LogParser) is not None
+        assert manager.subscribe("core", HookParser) is None
+        assert manager.get("core").parser is HookParser
+
+    def test_unsubscribe_active(self):
+        manager = SubscriptionManager()
+        request = manager.subscribe("core", LogParser)
+        manager.handle_response({"id": request["id"], "result": 7})
+
+        unsubscribe = manager.unsubscribe("core")
+
+        assert unsubscribe["method"] == "logsUnsubscribe"
+        assert unsubscribe["params"] == [7]
+        # 注销确认前的通知被丢弃
+        assert manager.route(7) is None
+        assert manager.is_known(7)
+
+        manager.handle_response({"id": unsubscribe["id"], "result": True})
+        assert not manager.is_known(7)
+        assert manager.programs == []
+
+    def test_unsubscribe_before_confirmation(self):
+        manager = SubscriptionManager()
+        request = manager.subscribe("core", LogParser)
+
+        assert manager.unsubscribe("core") is None
+        follow_up = manager.handle_response({"id": request["id"], "result": 7})
+
+        assert follow_up == {"jsonrpc": "2.0", "id": follow_up["id"], "method": "logsUnsubscribe", "params": [7]}
+        assert manager.route(7) is None
+
+    def test_failed_subscription_is_dropped(self):
+        manager = SubscriptionManager()
+        request = manager.subscribe("core", LogParser)
+
+        manager.handle_response({"id": request["id"], "error": {"code": -32602, "message": "Invalid param"}})
+
+        assert manager.programs == []
+
+    def test_reset_resubscribes(self):
+        manager = SubscriptionManager()
+        for program in ("core", "hooks"):
+            request = manager.subscribe(program, LogParser)
+            manager.handle_response({"id": request["id"], "result": hash(program)})
+
+        requests = manager.reset()
+
+        assert [r["params"][0]["mentions"] for r in requests] == [["core"], ["hooks"]]
+        assert [r["id"] for r in requests] == [1, 2]
+        assert manager.route(hash("core")) is None
+
+
+class TestListenerRouting:
+    @pytest.mark.asyncio
+    async def test_notifications_routed_to_program_parser(self):
+        listener = ChainListener(
+            api_key="test",
+            backfill=False,
+            reorder_window=0,
+            parsers={EXO_HOOKS_PROGRAM_ID: HookParser},
+        )
+        ws = listener._ws = FakeWebSocket()
+        received = []
+        listener.on_event(lambda e: received.append((e.signature, e.event_type)))
+
+        await listener._subscribe()
+        core_request, hooks_request = ws.sent
+        assert core_request["params"][0]["mentions"] == [EXO_CORE_PROGRAM_ID]
+        await listener._handle_message(confirm(core_request, 11))
+        await listener._handle_message(confirm(hooks_request, 22))
+
+        await listener._handle_message(notification(11, "tx1", EXO_CORE_PROGRAM_ID, "Escrow created"))
+        # HookParser 不识别 Escrow 关键字
+        await listener._handle_message(notification(22, "tx2", EXO_HOOKS_PROGRAM_ID, "Escrow created"))
+        await listener._handle_message(notification(22, "tx3", EXO_HOOKS_PROGRAM_ID, "Transfer hooked"))
+        listener._ws = None
+        await listener.stop()
+
+        assert received == [
+            ("tx1", EventType.ESCROW_CREATED),
+            ("tx2", EventType.UNKNOWN),
+            ("tx3", EventType.TRANSFER_HOOKED),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_add_and_remove_program_at_runtime(self):
+        listener = ChainListener(api_key="test", program_ids=[EXO_CORE_PROGRAM_ID], backfill=False, reorder_window=0)
+        ws = listener._ws = FakeWebSocket()
+        received = []
+        listener.on_event(lambda e: received.append(e.signature))
+        await listener._subscribe()
+        await listener._handle_message(confirm(ws.sent[0], 11))
+
+        await listener.add_program(EXO_HOOKS_PROGRAM_ID, HookParser)
+        add_request = ws.sent[-1]
+        assert add_request["method"] == "logsSubscribe"
+        assert add_request["params"][0]["mentions"] == [EXO_HOOKS_PROGRAM_ID]
+        await listener._handle_message(confirm(add_request, 22))
+        await listener._handle_message(notification(22, "tx1", EXO_HOOKS_PROGRAM_ID, "Transfer hooked"))
+
+        await listener.remove_program(EXO_CORE_PROGRAM_ID)
+        remove_request = ws.sent[-1]
+        assert remove_request == {"jsonrpc": "2.0", "id": remove_request["id"], "method": "logsUnsubscribe", "params": [11]}
+        # 注销确认前仍在途的通知
+        await listener._handle_message(notification(11, "tx2", EXO_CORE_PROGRAM_ID, "Escrow created"))
+        listener._ws = None
+        await listener.stop()
+
+        assert received == ["tx1"]
+        assert listener.program_ids == [EXO_HOOKS_PROGRAM_ID]
+
+    @pytest.mark.asyncio
+    async def test_reconnect_resubscribes_current_programs(self):
+        listener = ChainListener(api_key="test", program_ids=[EXO_CORE_PROGRAM_ID], backfill=False)
+        first = FakeWebSocket()
+        await listener._subscribe(first)
+        await listener.add_program(EXO_HOOKS_PROGRAM_ID)
+
+        second = FakeWebSocket()
+        await listener._subscribe(second)
+
+        assert [r["params"][0]["mentions"][0] for r in second.sent] == [EXO_CORE_PROGRAM_ID, EXO_HOOKS_PROGRAM_ID]
+        assert [r["id"] for r in second.sent] == [1, 2]
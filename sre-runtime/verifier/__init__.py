@@ -4,11 +4,13 @@
 __version__ = "0.1.0"
 
 from .verifier import verify_result, verify_result_with_mock
-from .challenger import challenge_if_invalid, ChallengeResult
+from .challenger import challenge_if_invalid, watch_and_challenge, ChallengeResult, ChallengeTarget
 
 __all__ = [
     "verify_result",
     "verify_result_with_mock",
     "challenge_if_invalid",
+    "watch_and_challenge",
     "ChallengeResult",
+    "ChallengeTarget",
 ]
@@ -11,7 +11,13 @@ import os
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from concurrency import KIND_CHALLENGE, DeadlineMissedError, DeadlineScheduler, get_scheduler
+from constants import CHALLENGE_WINDOW_SLOTS
 
 from .verifier import verify_result
 
@@ -28,7 +34,7 @@ class ChallengeStatus(Enum):
     FAILED = "failed"
 
 
-@dataclass
+@dataclass(slots=True)
 class ChallengeResult:
     """Result of a challenge operation."""
     order_pubkey: str
@@ -71,6 +77,25 @@ class ChallengeLog:
 challenge_log = ChallengeLog()
 
 
+@dataclass
+class ChallengeTarget:
+    """
+    A committed order to verify, with its scheduling inputs.
+    
+    The challenge must land within CHALLENGE_WINDOW_SLOTS of the commit slot.
+    """
+    order_pubkey: str
+    commit_slot: Optional[int] = None
+    escrow_value: int = 0
+    priority: int = 0
+    
+    @property
+    def deadline_slot(self) -> Optional[int]:
+        if self.commit_slot is None:
+            return None
+        return self.commit_slot + CHALLENGE_WINDOW_SLOTS
+
+
 async def build_challenge_instruction(
     order_pubkey: str,
     proof: bytes,
@@ -157,6 +182,28 @@ async def submit_challenge_transaction(
         return None
 
 
+async def fetch_current_slot() -> Optional[int]:
+    """
+    Fetch the current (confirmed) slot from the RPC node.
+    
+    Returns:
+        Current slot, or None if the RPC is unavailable
+    """
+    try:
+        from solana.rpc.async_api import AsyncClient
+        from solana.rpc.commitment import Confirmed
+        
+        rpc_url = os.getenv("SOLANA_RPC_URL", "https://api.devnet.solana.com")
+        client = AsyncClient(rpc_url)
+        try:
+            return (await client.get_slot(commitment=Confirmed)).value
+        finally:
+            await client.close()
+    except Exception as e:
+        logger.warning(f"getSlot failed: {e}")
+        return None
+
+
 async def challenge_if_invalid(order_pubkey: str) -> ChallengeResult:
     """
     Verify a submitted result and challenge if invalid.
@@ -227,20 +274,65 @@ async def challenge_if_invalid(order_pubkey: str) -> ChallengeResult:
     return result
 
 
-async def watch_and_challenge(order_pubkeys: List[str]) -> List[ChallengeResult]:
+async def watch_and_challenge(
+    order_pubkeys: Sequence[Union[str, ChallengeTarget]],
+    scheduler: Optional[DeadlineScheduler] = None,
+    current_slot: Optional[int] = None,
+) -> List[ChallengeResult]:
     """
     Watch multiple orders and challenge any invalid results.
     
+    Verifications run through the deadline scheduler shared with the
+    orchestrator: the order whose challenge window closes first is verified
+    first, and orders whose window can no longer be met are skipped (FAILED)
+    instead of delaying the others.
+    
     Args:
-        order_pubkeys: List of order public keys to verify
+        order_pubkeys: Order public keys or ChallengeTarget entries to verify
+        scheduler: Deadline scheduler (default: the shared global scheduler)
+        current_slot: Current chain slot (default: fetched with getSlot)
         
     Returns:
-        List of ChallengeResult for each order
+        List of ChallengeResult for each order (in input order)
     """
+    scheduler = scheduler or get_scheduler()
+    targets = [t if isinstance(t, ChallengeTarget) else ChallengeTarget(t) for t in order_pubkeys]
+    
+    # Anchor the scheduler's slot clock on the current chain slot; if the RPC is
+    # unavailable, the latest commit slot is still a lower bound for it
+    if current_slot is None:
+        current_slot = await fetch_current_slot()
+    if current_slot is None:
+        commit_slots = [t.commit_slot for t in targets if t.commit_slot is not None]
+        current_slot = max(commit_slots, default=None)
+    if current_slot is not None:
+        scheduler.clock.observe(current_slot)
+    
+    futures = [
+        scheduler.submit(
+            lambda target=target: challenge_if_invalid(target.order_pubkey),
+            deadline=target.deadline_slot,
+            value=target.escrow_value,
+            priority=target.priority,
+            kind=KIND_CHALLENGE,
+            name=target.order_pubkey,
+        )
+        for target in targets
+    ]
+    
     results = []
-    for order_pubkey in order_pubkeys:
-        result = await challenge_if_invalid(order_pubkey)
-        results.append(result)
+    for target, future in zip(targets, futures):
+        try:
+            results.append(await future)
+        except DeadlineMissedError as e:
+            logger.error(f"❌ Challenge window missed for order {target.order_pubkey}: {e}")
+            result = ChallengeResult(
+                order_pubkey=target.order_pubkey,
+                status=ChallengeStatus.FAILED,
+                error_reason=f"Challenge window missed: {e}",
+            )
+            challenge_log.add(result)
+            results.append(result)
     return results
 
 
@@ -8,14 +8,25 @@ Reference: docs/mvp v2.0.md §4.2.4
 import argparse
 import asyncio
 import hashlib
-import json
 import logging
 from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from codec import canonical_dumps
+from concurrency import SingleFlight, execution_key
+from metrics import SPAN_FETCH, SPAN_HASHING, SPAN_REPLAY, StageTimings
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# In-flight verifications (by order) and sandbox replays (by skill digest + input hash)
+_verifications = SingleFlight("verify")
+_replays = SingleFlight("replay")
+
 
 @dataclass
 class VerificationResult:
@@ -31,7 +42,7 @@ def compute_result_hash(result: Dict[str, Any]) -> bytes:
     Compute deterministic hash of a result dictionary.
     Uses sorted keys JSON serialization for consistency.
     """
-    result_json = json.dumps(result, sort_keys=True, separators=(",", ":"))
+    result_json = canonical_dumps(result)
     return hashlib.sha256(result_json.encode("utf-8")).digest()
 
 
@@ -133,7 +144,7 @@ async def execute_in_sandbox(
     return {"result": "mock_result", "timestamp": 1234567890}
 
 
-async def verify_result(order_pubkey: str) -> Optional[str]:
+async def verify_result(order_pubkey: str, timings: Optional[StageTimings] = None) -> Optional[str]:
     """
     Verify the correctness of a submitted result.
     
@@ -143,30 +154,55 @@ async def verify_result(order_pubkey: str) -> Optional[str]:
     3. Replays the skill execution in sandbox
     4. Compares the replay result hash with submitted hash
     
+    Concurrent verifications of the same order share one run, and concurrent
+    replays of the same skill and input share one sandbox execution.
+    
+    Stage spans (fetch, replay, hashing) of each verification run are exported
+    as the verifier.stage_ms{stage} histogram.
+    
     Args:
         order_pubkey: The public key of the order to verify
+        timings: Optional StageTimings that receives the run's stage spans
         
     Returns:
         None if verification passes, error message string if it fails
     """
+    error, run_timings = await _verifications.do(order_pubkey, lambda: _verify(order_pubkey))
+    if timings is not None:
+        timings.extend(run_timings)
+    return error
+
+
+async def _verify(order_pubkey: str) -> Tuple[Optional[str], StageTimings]:
+    """Single verification run behind verify_result (error, stage spans)."""
     logger.info(f"Starting verification for order: {order_pubkey}")
+    timings = StageTimings()
     
-    # 1. Fetch order and submitted hash
-    order = await fetch_order(order_pubkey)
-    submitted_hash = order["result_hash"]
-    
-    # 2. Fetch skill information
-    skill = await fetch_skill(order["skill"])
-    skill_package = await fetch_skill_package(skill["content_hash"])
-    
-    # 3. Fetch original input
-    original_input = await fetch_order_input(order_pubkey)
-    
-    # 4. Replay execution in sandbox (deterministic)
-    replay_result = await execute_in_sandbox(skill_package, original_input)
-    
-    # 5. Compute replay result hash
-    replay_hash = compute_result_hash(replay_result)
+    try:
+        with timings.span(SPAN_FETCH):
+            # 1. Fetch order and submitted hash
+            order = await fetch_order(order_pubkey)
+            submitted_hash = order["result_hash"]
+            
+            # 2. Fetch skill information
+            skill = await fetch_skill(order["skill"])
+            skill_package = await fetch_skill_package(skill["content_hash"])
+            
+            # 3. Fetch original input
+            original_input = await fetch_order_input(order_pubkey)
+        
+        # 4. Replay execution in sandbox (deterministic)
+        with timings.span(SPAN_REPLAY):
+            replay_result = await _replays.do(
+                execution_key(skill_package, original_input),
+                lambda: execute_in_sandbox(skill_package, original_input),
+            )
+        
+        # 5. Compute replay result hash
+        with timings.span(SPAN_HASHING):
+            replay_hash = compute_result_hash(replay_result)
+    finally:
+        timings.export("verifier.stage_ms")
     
     # 6. Compare hashes
     if replay_hash != submitted_hash:
@@ -175,10 +211,10 @@ async def verify_result(order_pubkey: str) -> Optional[str]:
             f"got {submitted_hash.hex() if isinstance(submitted_hash, bytes) else submitted_hash}"
         )
         logger.warning(f"Verification failed: {error_msg}")
-        return error_msg
+        return error_msg, timings
     
     logger.info(f"Verification passed for order: {order_pubkey}")
-    return None
+    return None, timings
 
 
 def main():